@@ -0,0 +1 @@
+# Offline benchmarks for the Music League bot; run with `python -m benchmarks`.
@@ -0,0 +1,74 @@
+"""Run the offline benchmarks: python -m benchmarks [scenario ...] [--scale N] [--json]"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.budgets import QUERY_BUDGETS
+from benchmarks.scenarios import SCENARIOS
+
+
+async def run(names, scale):
+    results = []
+    for name in names:
+        result = await SCENARIOS[name](scale=scale)
+        results.append(result.summary())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Music League bot benchmarks")
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Size of each scenario relative to the full run (default: 1.0)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument(
+        "--budgets", action="store_true", help="Print the SQL statement budgets and exit"
+    )
+    args = parser.parse_args()
+
+    if args.budgets:
+        if args.json:
+            print(json.dumps(QUERY_BUDGETS, indent=2))
+        else:
+            for operation, budget in QUERY_BUDGETS.items():
+                print(f"{operation}: {budget}")
+        return
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(run(args.scenarios or list(SCENARIOS), args.scale))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for summary in results:
+            print(f"\n{summary['scenario']}")
+            for key, value in summary.items():
+                if key != "scenario":
+                    print(f"  {key}: {value}")
+
+    # A scenario over its query budget fails the run, e.g. in CI
+    if not all(summary["within_budget"] for summary in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
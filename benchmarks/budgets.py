@@ -0,0 +1,103 @@
+"""SQL statement budgets for database operations, commands and event handlers.
+
+The budgets are the most statements each operation may run in the worst case
+covered by the tests (e.g. creating a guild or player that doesn't exist yet).
+They are checked by test_query_budgets.py and reported by the benchmarks, so a
+change that adds a round-trip, or an N+1 loop, fails in review.
+"""
+
+from contextlib import contextmanager
+
+from musicleague_bot.src.metrics import metrics
+
+QUERY_BUDGETS = {
+    # DatabaseService operations
+    "get_or_create_guild": 3,
+    "get_league": 4,
+    "create_league": 3,
+    "get_leagues": 1,
+    "update_guild_settings": 4,
+    "get_or_create_player": 3,
+    "set_player_reminders": 4,
+    "get_leaderboard": 1,
+    "create_round": 4,
+    "get_round": 1,
+    "get_active_round": 1,
+    "complete_round": 2,
+    "complete_round_handover": 7,
+    "update_round_message_ids": 1,
+    "update_round_timing": 1,
+    "get_due_rounds": 1,
+    "claim_round": 1,
+    "release_round": 1,
+    "get_round_guild_info": 1,
+    "schedule_reminder": 1,
+    "get_reminder_targets": 1,
+    "create_submission": 5,
+    "find_duplicate_submission": 1,
+    "get_guild_templates": 1,
+    "set_guild_template": 4,
+    "get_round_submissions": 1,
+    "count_round_submissions": 1,
+    "get_round_history": 1,
+    "get_round_by_number": 1,
+    "get_results_page": 1,
+    "record_vote": 1,
+    "remove_vote": 1,
+    "get_voter_ballot": 1,
+    "set_vote_points": 2,
+    "get_ballot_votes": 2,
+    "get_open_ballots": 2,
+    "get_round_export": 1,
+    "get_vote_affinity": 1,
+    "get_vote_export": 1,
+    "calculate_round_results": 4,
+    "queue_theme": 3,
+    "get_queue": 2,
+    "remove_queued_theme": 3,
+    # Slash commands
+    "/settings": 4,
+    "/reminders": 4,
+    "/league create": 4,
+    "/league list": 1,
+    "/leaderboard": 1,
+    "/start": 8,
+    "/submit": 1,
+    "/status": 3,
+    "/end_submission": 3,
+    "/end_voting": 2,
+    "/history": 1,
+    "/round": 3,
+    "/stats": 2,
+    "/vote": 6,
+    "/vote_analysis": 2,
+    "/queue_theme": 4,
+    "/queued_themes": 2,
+    # Event handlers and scheduler work
+    "submission_modal": 8,
+    "voting_reaction": 3,
+    "live_tally_rebuild": 2,
+    "check_rounds_idle": 1,
+    "round_transition": 8,
+    "round_completion": 15,
+    "round_reminder": 8,
+    "queued_start": 11,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An operation ran more SQL statements than its budget allows."""
+
+
+@contextmanager
+def query_budget(operation, budgets=QUERY_BUDGETS):
+    """Fail if the ``with`` block runs more statements than ``operation``'s budget."""
+    budget = budgets[operation]
+    with metrics.count_queries() as query_count:
+        yield query_count
+
+    if query_count.statements > budget:
+        raise QueryBudgetExceeded(
+            f"{operation} ran {query_count.statements} SQL statements, "
+            f"its budget is {budget}"
+        )
@@ -0,0 +1,416 @@
+"""Stand-ins for the discord.py objects the cogs use, for running them offline.
+
+Every REST call the real objects would make is recorded, and a simple
+per-route rate limiter counts the 429s Discord would have returned.
+"""
+
+import asyncio
+import itertools
+from collections import Counter, deque
+from types import SimpleNamespace
+
+import discord
+
+from musicleague_bot.src.bot import MusicLeagueBot
+from musicleague_bot.src.metadata import NullResolver
+
+_snowflakes = itertools.count(1_100_000_000_000_000_000)
+
+# Seconds a direct message takes to send, so sending them one by one shows
+DM_LATENCY = 0.005
+
+
+def next_snowflake():
+    """Return a new unique Discord-style ID."""
+    return next(_snowflakes)
+
+
+def _not_found():
+    response = SimpleNamespace(status=404, reason="Not Found")
+    return discord.NotFound(response, "Unknown Message")
+
+
+def _forbidden():
+    response = SimpleNamespace(status=403, reason="Forbidden")
+    return discord.Forbidden(response, "Cannot send messages to this user")
+
+
+class FakeRateLimiter:
+    """Counts rate limits per bucket on a simulated clock, without sleeping.
+
+    Every bucket allows ``limit`` requests per ``per`` seconds, like Discord's
+    limit on sending messages to one channel.
+
+    When a bucket is exhausted, the time a real client would have waited for
+    it to reset is added to ``delay`` and the simulated clock moves on.
+    """
+
+    def __init__(self, limit=5, per=5.0):
+        self.limit = limit
+        self.per = per
+        self.clock = 0.0
+        self.windows = {}
+        self.rate_limited = 0
+        self.delay = 0.0
+
+    def hit(self, bucket):
+        start, count = self.windows.get(bucket, (self.clock, 0))
+        if self.clock - start >= self.per:
+            start, count = self.clock, 0
+
+        if count >= self.limit:
+            self.rate_limited += 1
+            wait = start + self.per - self.clock
+            self.delay += wait
+            self.clock += wait
+            start, count = self.clock, 0
+
+        self.windows[bucket] = (start, count + 1)
+
+
+class FakeRecorder:
+    """Records every simulated REST call."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.limiter = FakeRateLimiter()
+
+    def request(self, route, bucket):
+        self.calls[route] += 1
+        self.limiter.hit(bucket)
+
+    def reset(self):
+        self.calls.clear()
+        self.limiter = FakeRateLimiter()
+
+    def summary(self):
+        return {
+            "rest_calls": sum(self.calls.values()),
+            "messages_sent": self.calls["send_message"],
+            "reactions_added": self.calls["add_reaction"],
+            "messages_edited": self.calls["edit_message"],
+            "dms_sent": self.calls["send_dm"],
+            "rate_limited": self.limiter.rate_limited,
+            "rate_limit_delay": round(self.limiter.delay, 2),
+        }
+
+
+class FakeUser:
+    """A Discord user or guild member."""
+
+    def __init__(self, user_id, name=None, bot=False, recorder=None):
+        self.id = int(user_id)
+        self.name = name or f"user{user_id}"
+        self.display_name = self.name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.guild_permissions = SimpleNamespace(
+            manage_guild=True, administrator=True
+        )
+        self.recorder = recorder
+        self.dms = []  # Direct messages the bot sent them
+        self.dms_closed = False
+
+    async def send(self, content=None, **kwargs):
+        self.recorder.request("send_dm", f"dm:{self.id}")
+        await asyncio.sleep(DM_LATENCY)
+        if self.dms_closed:
+            raise _forbidden()
+        self.dms.append(content)
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeReaction:
+    """One emoji's reactions on a message."""
+
+    def __init__(self, message, emoji):
+        self.message = message
+        self.emoji = emoji
+        self.user_ids = []
+
+    @property
+    def count(self):
+        return len(self.user_ids)
+
+    async def users(self):
+        self.message.channel.recorder.request(
+            "get_reaction_users", f"reactions:{self.message.channel.id}"
+        )
+        for user_id in list(self.user_ids):
+            yield FakeUser(user_id)
+
+
+class FakeMessage:
+    """A message posted in a fake channel."""
+
+    def __init__(self, channel, author, content=None, embed=None):
+        self.id = next_snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.reactions = []
+
+    def _reaction(self, emoji, create=False):
+        emoji = str(emoji)
+        for reaction in self.reactions:
+            if reaction.emoji == emoji:
+                return reaction
+        if create:
+            reaction = FakeReaction(self, emoji)
+            self.reactions.append(reaction)
+            return reaction
+        return None
+
+    def react(self, emoji, user_id):
+        """Add a user's reaction as the gateway would, without a REST call."""
+        reaction = self._reaction(emoji, create=True)
+        if user_id not in reaction.user_ids:
+            reaction.user_ids.append(user_id)
+
+    def unreact(self, emoji, user_id):
+        """Remove a user's reaction as the gateway would, without a REST call."""
+        reaction = self._reaction(emoji)
+        if reaction and user_id in reaction.user_ids:
+            reaction.user_ids.remove(user_id)
+
+    async def add_reaction(self, emoji):
+        self.channel.recorder.request("add_reaction", f"reactions:{self.channel.id}")
+        self.react(emoji, self.author.id)
+
+    async def remove_reaction(self, emoji, member):
+        self.channel.recorder.request("remove_reaction", f"reactions:{self.channel.id}")
+        self.unreact(emoji, member.id)
+
+    async def edit(self, content=None, embed=None, **kwargs):
+        self.channel.recorder.request("edit_message", f"channel:{self.channel.id}")
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        return self
+
+
+class FakeTextChannel:
+    """A text channel the bot can post in."""
+
+    def __init__(self, guild, client, name="music-league"):
+        self.id = next_snowflake()
+        self.guild = guild
+        self.client = client
+        self.recorder = client.recorder
+        self.name = name
+        self.messages = {}
+        self.mention = f"<#{self.id}>"
+
+    def permissions_for(self, member):
+        return SimpleNamespace(send_messages=True)
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        self.recorder.request("send_message", f"channel:{self.id}")
+        message = FakeMessage(self, self.client.user, content=content, embed=embed)
+        self.messages[message.id] = message
+        self.client.cached_messages.append(message)
+        return message
+
+    async def fetch_message(self, message_id):
+        self.recorder.request("fetch_message", f"channel:{self.id}")
+        message = self.messages.get(int(message_id))
+        if message is None:
+            raise _not_found()
+        return message
+
+    def get_partial_message(self, message_id):
+        """A message to act on without fetching it, like discord.PartialMessage."""
+        return self.messages.get(int(message_id)) or FakePartialMessage(self, message_id)
+
+
+class FakePartialMessage:
+    """A reference to a message that isn't (or is no longer) in the channel."""
+
+    def __init__(self, channel, message_id):
+        self.id = int(message_id)
+        self.channel = channel
+
+    async def edit(self, content=None, embed=None, **kwargs):
+        self.channel.recorder.request("edit_message", f"channel:{self.channel.id}")
+        raise _not_found()
+
+
+class FakeGuild:
+    """A guild with one text channel and a set of members."""
+
+    def __init__(self, client, member_count=0):
+        self.id = next_snowflake()
+        self.name = f"Guild {self.id}"
+        self.client = client
+        self.me = client.user
+        self.channel = FakeTextChannel(self, client)
+        self.members = {}
+        for _ in range(member_count):
+            self.add_member()
+
+    def add_member(self):
+        member = FakeUser(next_snowflake(), recorder=self.client.recorder)
+        self.members[member.id] = member
+        self.client.users[member.id] = member
+        return member
+
+    @property
+    def text_channels(self):
+        return [self.channel]
+
+    def get_channel(self, channel_id):
+        return self.channel if int(channel_id) == self.channel.id else None
+
+    def get_member(self, user_id):
+        # Like the low-memory profile: nothing is cached
+        return None
+
+    async def query_members(self, user_ids=None, cache=True, **kwargs):
+        self.client.recorder.request("query_members", "gateway")
+        return [self.members[user_id] for user_id in user_ids if user_id in self.members]
+
+
+class FakeClient:
+    """Offline stand-in for MusicLeagueBot.
+
+    Database access and name lookups use MusicLeagueBot's own methods, so the
+    benchmarks exercise the same code paths as the real bot.
+    """
+
+    get_db_session = MusicLeagueBot.get_db_session
+    get_read_session = MusicLeagueBot.get_read_session
+    wait_until_db_ready = MusicLeagueBot.wait_until_db_ready
+    resolve_display_names = MusicLeagueBot.resolve_display_names
+    owns_guild = MusicLeagueBot.owns_guild
+
+    def __init__(self, message_cache_size=1000):
+        self.recorder = FakeRecorder()
+        self.user = FakeUser(next_snowflake(), name="Music League", bot=True)
+        self.instance_id = "benchmark"
+        self.shard_ids = None
+        self.shard_count = None
+        self.db_ready_task = None
+        self.low_memory = True
+        self.intents = discord.Intents.default()
+        self.intents.members = True
+        self.guilds = {}
+        self.users = {}
+        self.cached_messages = deque(maxlen=message_cache_size)
+        self.metadata_resolver = NullResolver()  # Never call out to the network
+
+    def add_guild(self, member_count=0):
+        guild = FakeGuild(self, member_count)
+        self.guilds[guild.id] = guild
+        return guild
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(int(guild_id))
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds.values():
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+        return None
+
+    def get_user(self, user_id):
+        # Like the low-memory profile: users are looked up on demand
+        return None
+
+    async def fetch_user(self, user_id):
+        self.recorder.request("fetch_user", "users")
+        return self.users.get(int(user_id)) or FakeUser(user_id)
+
+    async def wait_until_ready(self):
+        return None
+
+
+class FakeInteractionResponse:
+    """Records what a command sent back to the user."""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.messages = []
+        self.modal = None
+        self.view = None
+        self.deferred = False
+
+    def is_done(self):
+        return bool(self.messages) or self.modal is not None or self.deferred
+
+    async def send_message(self, content=None, *, embed=None, **kwargs):
+        self.interaction.client.recorder.request(
+            "interaction_response", f"interaction:{id(self.interaction)}"
+        )
+        self.messages.append(content if embed is None else embed)
+        self.view = kwargs.get("view")
+
+    async def edit_message(self, *, content=None, embed=None, **kwargs):
+        self.interaction.client.recorder.request(
+            "interaction_response", f"interaction:{id(self.interaction)}"
+        )
+        self.messages.append(content if embed is None else embed)
+
+    async def send_modal(self, modal):
+        self.interaction.client.recorder.request(
+            "interaction_response", f"interaction:{id(self.interaction)}"
+        )
+        self.modal = modal
+
+    async def defer(self, **kwargs):
+        self.interaction.client.recorder.request(
+            "interaction_response", f"interaction:{id(self.interaction)}"
+        )
+        self.deferred = True
+
+
+class FakeFollowup:
+    """Follow-up webhook of an interaction."""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.messages = []
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        self.interaction.client.recorder.request(
+            "followup", f"interaction:{id(self.interaction)}"
+        )
+        self.messages.append(content if embed is None else embed)
+
+
+class FakeInteraction:
+    """A slash command invocation from a guild member."""
+
+    def __init__(self, client, guild, user):
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = guild.channel
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.extras = {}
+        self.command = None
+
+    async def edit_original_response(self, **kwargs):
+        self.client.recorder.request("edit_response", f"interaction:{id(self)}")
+
+
+def reaction_payload(guild, message, user, emoji):
+    """Build the payload of a raw reaction event."""
+    return SimpleNamespace(
+        user_id=user.id,
+        member=user,
+        guild_id=guild.id,
+        channel_id=message.channel.id,
+        message_id=message.id,
+        emoji=emoji,
+    )
@@ -0,0 +1,96 @@
+"""Timing, query counting and temporary databases for the benchmark scenarios."""
+
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+from musicleague_bot.src.metrics import metrics
+
+from .budgets import QUERY_BUDGETS
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of a list of numbers."""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ScenarioResult:
+    """Latencies and query counts collected while running a scenario."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.statements = []
+        self.extra = {}
+        self.budget_usage = {}
+
+    async def measure(self, operation, budget=None):
+        """Run one operation, recording its latency and SQL statement count.
+
+        With ``budget``, the statement count is also checked against that
+        entry of QUERY_BUDGETS.
+        """
+        with metrics.count_queries() as query_count:
+            started = time.perf_counter()
+            result = await operation()
+            self.latencies.append(time.perf_counter() - started)
+        self.statements.append(query_count.statements)
+
+        if budget:
+            self.check_budget(budget, query_count.statements)
+        return result
+
+    def check_budget(self, budget, statements):
+        """Record statements used against a query budget, keeping the worst case."""
+        self.budget_usage[budget] = max(statements, self.budget_usage.get(budget, 0))
+
+    def summary(self):
+        operations = len(self.latencies)
+        total = sum(self.latencies)
+        return {
+            "scenario": self.name,
+            "operations": operations,
+            "seconds": round(total, 3),
+            "ops_per_second": round(operations / total, 1) if total else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "queries_per_op": round(sum(self.statements) / operations, 1)
+            if operations
+            else 0.0,
+            "max_queries_per_op": max(self.statements, default=0),
+            "query_budgets": {
+                budget: f"{used}/{QUERY_BUDGETS[budget]}"
+                for budget, used in self.budget_usage.items()
+            },
+            "within_budget": all(
+                used <= QUERY_BUDGETS[budget]
+                for budget, used in self.budget_usage.items()
+            ),
+            **self.extra,
+        }
+
+
+@asynccontextmanager
+async def temporary_database():
+    """Point the bot at a fresh SQLite database in a temporary directory."""
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import dispose_engines
+
+    previous_url = os.environ.get("DATABASE_URL")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        try:
+            await init_db()
+            yield
+        finally:
+            await dispose_engines()
+            if previous_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = previous_url
@@ -0,0 +1,828 @@
+"""Benchmark scenarios driving the cogs against fake Discord objects.
+
+Each scenario takes a ``scale`` factor (1.0 is the full-size run) and returns
+a ScenarioResult.
+"""
+
+import asyncio
+import datetime
+import math
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from musicleague_bot.src.analysis import mark_rounds_completed
+from musicleague_bot.src.ballot import BallotState, Ballots
+from musicleague_bot.src.cogs.admin import AdminCog
+from musicleague_bot.src.cogs.history import HistoryCog
+from musicleague_bot.src.cogs.rounds import MAX_VOTES, RoundsCog, VOTING_EMOJIS
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db.models import (
+    DEFAULT_LEAGUE,
+    Guild,
+    League,
+    Player,
+    Round,
+    Submission,
+    Vote,
+)
+from musicleague_bot.src.metrics import metrics
+from musicleague_bot.src.notify import RateLimiter
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.render import DEFAULT_RENDERER, Renderer, chunk_messages
+from musicleague_bot.src.scoring import BALLOT_POINTS, SCORING_SYSTEMS, TIE_BREAKERS
+from musicleague_bot.src.stats import invalidate_stats
+
+from .fakes import DM_LATENCY, FakeClient, FakeInteraction, reaction_payload
+from .harness import ScenarioResult, percentile, temporary_database
+
+
+def make_rounds_cog(client):
+    """Create a RoundsCog without starting its background loop."""
+    cog = RoundsCog(client)
+    cog.check_rounds.cancel()
+    return cog
+
+
+async def seed_guilds(client, guilds, submissions=0, phase="submission", voters=0):
+    """Store a guild, its main league, an active round and its submissions for each fake guild.
+
+    ``phase`` is where the round should be: "submission" (not due), "voting"
+    (submission deadline passed) or "complete" (voting deadline passed).
+    """
+    now = datetime.datetime.utcnow()
+    if phase == "submission":
+        submission_end, voting_end = now + datetime.timedelta(days=1), now + datetime.timedelta(days=2)
+    elif phase == "voting":
+        submission_end, voting_end = now - datetime.timedelta(minutes=1), now + datetime.timedelta(days=1)
+    else:
+        submission_end, voting_end = now - datetime.timedelta(days=1), now - datetime.timedelta(minutes=1)
+
+    async with client.get_db_session() as session:
+        rows = []
+        for guild in guilds:
+            guild_row = Guild(guild_id=str(guild.id))
+            league_row = League(
+                guild=guild_row, name=DEFAULT_LEAGUE, channel_id=str(guild.channel.id)
+            )
+            round_row = Round(
+                guild=guild_row,
+                league=league_row,
+                round_number=1,
+                theme="Benchmark",
+                submission_end=submission_end,
+                voting_end=voting_end,
+            )
+            members = list(guild.members.values())
+            players = [
+                Player(user_id=str(member.id), guild=guild_row, league=league_row)
+                for member in members[: max(submissions, voters)]
+            ]
+            for idx, player in enumerate(players[:submissions]):
+                track_id = f"{guild.id:0>18}{idx:04d}"[-22:]
+                Submission(
+                    round=round_row,
+                    player=player,
+                    content=f"https://open.spotify.com/track/{track_id}",
+                    description="Benchmark submission" if idx % 2 else None,
+                    provider="spotify",
+                    track_id=track_id,
+                    guild=guild_row,
+                    fingerprint=f"spotify:{track_id}",
+                )
+            session.add(guild_row)
+            rows.append((league_row, round_row))
+
+        await session.flush()
+        for league_row, round_row in rows:
+            league_row.active_round = round_row.id
+        await session.commit()
+
+
+async def seed_history(client, guild, rounds, votes_per_player=3, rings=0, seed=0):
+    """Store ``rounds`` completed rounds in which every member submitted and voted.
+
+    The first ``2 * rings`` members are paired up, and each spends one vote a
+    round on their partner. Returns the number of votes stored.
+    """
+    rng = random.Random(seed)
+    past = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    members = [str(member.id) for member in guild.members.values()]
+    partners = {}
+    for idx in range(0, 2 * rings, 2):
+        partners[members[idx]], partners[members[idx + 1]] = members[idx + 1], members[idx]
+
+    async with client.get_db_session() as session:
+        # Rows are inserted in bulk, as large histories take too long through the ORM
+        guild_row = Guild(guild_id=str(guild.id))
+        league_row = League(
+            guild=guild_row, name=DEFAULT_LEAGUE, channel_id=str(guild.channel.id)
+        )
+        players = [
+            Player(user_id=user_id, guild=guild_row, league=league_row) for user_id in members
+        ]
+        session.add(guild_row)
+        await session.flush()
+
+        await session.execute(
+            Round.__table__.insert(),
+            [
+                {
+                    "guild_id": guild_row.id,
+                    "league_id": league_row.id,
+                    "round_number": number,
+                    "theme": f"Theme {number}",
+                    "submission_end": past,
+                    "voting_end": past,
+                    "is_completed": True,
+                }
+                for number in range(1, rounds + 1)
+            ],
+        )
+        round_ids = (
+            await session.execute(
+                select(Round.id).where(Round.guild_id == guild_row.id).order_by(Round.round_number)
+            )
+        ).scalars().all()
+
+        # Each round's ballot: who votes for whom
+        ballots = []
+        for _ in round_ids:
+            picks = []
+            for voter in members:
+                chosen = [partners[voter]] if voter in partners else []
+                while len(chosen) < votes_per_player:
+                    submitter = members[rng.randrange(len(members))]
+                    if submitter != voter and submitter not in chosen:
+                        chosen.append(submitter)
+                picks += [(voter, submitter) for submitter in chosen]
+            ballots.append(picks)
+
+        player_ids = {player.user_id: player.id for player in players}
+        submissions = []
+        for round_id, picks in zip(round_ids, ballots):
+            received = {}
+            for _, submitter in picks:
+                received[submitter] = received.get(submitter, 0) + 1
+            submissions += [
+                {
+                    "round_id": round_id,
+                    "player_id": player_ids[user_id],
+                    "guild_id": guild_row.id,
+                    "content": f"song {round_id} {user_id}",
+                    "votes_received": received.get(user_id, 0),
+                }
+                for user_id in members
+            ]
+        await session.execute(Submission.__table__.insert(), submissions)
+
+        submission_ids = {
+            (round_id, player_id): submission_id
+            for submission_id, round_id, player_id in await session.execute(
+                select(Submission.id, Submission.round_id, Submission.player_id)
+                .join(Round, Submission.round_id == Round.id)
+                .where(Round.guild_id == guild_row.id)
+            )
+        }
+        votes = [
+            {
+                "round_id": round_id,
+                "submission_id": submission_ids[round_id, player_ids[submitter]],
+                "voter_id": voter,
+            }
+            for round_id, picks in zip(round_ids, ballots)
+            for voter, submitter in picks
+        ]
+        await session.execute(Vote.__table__.insert(), votes)
+        await session.commit()
+    return len(votes)
+
+
+async def guild_ticks(scale=1.0, ticks=3):
+    """Scheduler ticks over many guilds, 10% of which are due to start voting."""
+    result = ScenarioResult("guild_ticks")
+    guild_count = max(10, int(1000 * scale))
+
+    async with temporary_database():
+        client = FakeClient()
+        guilds = [client.add_guild(member_count=5) for _ in range(guild_count)]
+        due = guilds[: guild_count // 10]
+        await seed_guilds(client, due, submissions=5, phase="voting")
+        await seed_guilds(client, guilds[len(due) :], submissions=2, phase="submission")
+
+        cog = make_rounds_cog(client)
+        for _ in range(ticks):
+            await result.measure(cog.check_rounds)
+
+        # The first tick starts voting in every due guild, the rest are idle
+        result.check_budget(
+            "round_transition", math.ceil((result.statements[0] - 1) / len(due))
+        )
+        result.check_budget("check_rounds_idle", result.statements[-1])
+
+        result.extra.update(guilds=guild_count, due_rounds=len(due), **client.recorder.summary())
+
+    return result
+
+
+async def reactions(scale=1.0):
+    """A burst of voting reactions on one large ballot."""
+    result = ScenarioResult("reactions")
+    reaction_count = max(100, int(10000 * scale))
+    rng = random.Random(26)
+
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=200)
+        await seed_guilds(client, [guild], submissions=len(VOTING_EMOJIS), phase="voting")
+
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        ballot = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+
+        voters = list(guild.members.values())
+        emojis = [reaction.emoji for reaction in ballot.reactions]
+        for _ in range(reaction_count):
+            voter = rng.choice(voters)
+            emoji = rng.choice(emojis)
+            payload = reaction_payload(guild, ballot, voter, emoji)
+
+            if voter.id in ballot._reaction(emoji).user_ids:
+                ballot.unreact(emoji, voter.id)
+                await result.measure(
+                    lambda: cog.on_raw_reaction_remove(payload), budget="voting_reaction"
+                )
+            else:
+                ballot.react(emoji, voter.id)
+                await result.measure(
+                    lambda: cog.on_raw_reaction_add(payload), budget="voting_reaction"
+                )
+
+        summary = result.summary()
+        result.extra.update(
+            per_minute=round(summary["ops_per_second"] * 60),
+            target_per_minute=10000,
+            **client.recorder.summary(),
+        )
+
+    return result
+
+
+async def live_tally(scale=1.0, interval=0.05):
+    """A burst of voting reactions on a ballot showing the votes so far.
+
+    The ballot is edited at most once per ``interval`` seconds however many
+    reactions arrive, and shows the final count once its tally is closed.
+    """
+    result = ScenarioResult("live_tally")
+    reaction_count = max(100, int(5000 * scale))
+    rng = random.Random(45)
+
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=200)
+        await seed_guilds(client, [guild], submissions=len(VOTING_EMOJIS), phase="voting")
+        async with client.get_db_session() as session:
+            await DatabaseService(session).update_guild_settings(
+                str(guild.id), live_tally="counts"
+            )
+
+        cog = make_rounds_cog(client)
+        cog.live.interval = interval
+        await cog.check_rounds()  # Post the ballot
+        ballot = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+        round_id = next(iter(cog.live._tallies))
+
+        client.recorder.reset()
+        started = time.perf_counter()
+        voters = list(guild.members.values())
+        emojis = [reaction.emoji for reaction in ballot.reactions]
+        for _ in range(reaction_count):
+            voter = rng.choice(voters)
+            emoji = rng.choice(emojis)
+            payload = reaction_payload(guild, ballot, voter, emoji)
+            if voter.id in ballot._reaction(emoji).user_ids:
+                ballot.unreact(emoji, voter.id)
+                await result.measure(
+                    lambda: cog.on_raw_reaction_remove(payload), budget="voting_reaction"
+                )
+            else:
+                ballot.react(emoji, voter.id)
+                await result.measure(
+                    lambda: cog.on_raw_reaction_add(payload), budget="voting_reaction"
+                )
+        await cog.live.close(round_id)
+        elapsed = time.perf_counter() - started
+
+        # The ballot ends up showing every vote recorded
+        async with client.get_db_session() as session:
+            _, votes = await DatabaseService(session).get_ballot_votes(round_id)
+        assert f"({len(votes)} votes)" in ballot.content
+
+        edits = client.recorder.calls["edit_message"]
+        max_edits = math.ceil(elapsed / interval) + 1
+        assert edits <= max_edits
+        result.extra.update(
+            reactions=reaction_count,
+            edits=edits,
+            max_edits=max_edits,
+            **client.recorder.summary(),
+        )
+
+    return result
+
+
+async def ballot_memory(scale=1.0, submissions=12, voters=40):
+    """Ballot states of 5,000 rounds being voted on at once, 40 voters each.
+
+    Reports the memory each voter costs, next to keeping each voter's picks
+    as a set of ballot indexes by user ID as the live tally used to.
+    """
+    result = ScenarioResult("ballot_memory")
+    round_count = max(50, int(5000 * scale))
+    rng = random.Random(50)
+
+    # Discord user IDs are 19 digits, and arrive as strings from the votes table
+    rounds = []
+    for _ in range(round_count):
+        users = [1_200_000_000_000_000_000 + rng.randrange(10**9) for _ in range(voters)]
+        votes = [
+            (user_id, ballot_index)
+            for idx, user_id in enumerate(users)
+            for ballot_index in rng.sample(
+                [entry for entry in range(submissions) if entry != idx], MAX_VOTES
+            )
+        ]
+        rounds.append((users[:submissions], votes))
+    voter_count = round_count * voters
+
+    def traced(build):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            kept = build()
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        del kept
+        return used
+
+    def build_ballots():
+        ballots = Ballots()
+        for round_id, (submitters, votes) in enumerate(rounds):
+            ballot = ballots.add(round_id, BallotState([str(u) for u in submitters]))
+            for user_id, ballot_index in votes:
+                ballot.add(str(user_id), ballot_index)
+        return ballots
+
+    def build_sets():
+        tallies = {}
+        for round_id, (_, votes) in enumerate(rounds):
+            ballots = tallies[round_id] = {}
+            for user_id, ballot_index in votes:
+                ballots.setdefault(str(user_id), set()).add(ballot_index)
+        return tallies
+
+    ballot_bytes = traced(build_ballots)
+    set_bytes = traced(build_sets)
+
+    # Every vote is checked as a reaction would be: own submission, limit, then counted
+    async def cast(submitters, votes):
+        ballot = BallotState(submitters)
+        for user_id, ballot_index in votes:
+            if not (
+                ballot.has_voted(user_id, ballot_index)
+                or ballot.owns(user_id, ballot_index)
+                or ballot.count(user_id) >= MAX_VOTES
+            ):
+                ballot.add(user_id, ballot_index)
+        assert ballot.cast == len(votes) and ballot.turnout == len(submitters)
+        return ballot
+
+    for submitters, votes in rounds:
+        await result.measure(lambda: cast(submitters, votes))
+
+    result.extra.update(
+        rounds=round_count,
+        voters=voter_count,
+        bytes_per_voter=round(ballot_bytes / voter_count, 1),
+        set_bytes_per_voter=round(set_bytes / voter_count, 1),
+        rest_calls=0,
+    )
+    return result
+
+
+async def reminders(scale=1.0, rate=500.0):
+    """Voting reminders sent by direct message to hundreds of submitters.
+
+    ``rate`` stands in for Discord's limit, high enough that the run measures
+    how many messages are sent at once rather than the limit itself.
+    """
+    result = ScenarioResult("reminders")
+    player_count = max(50, int(1000 * scale))
+
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=player_count)
+        await seed_guilds(client, [guild], submissions=player_count, phase="voting")
+        async with client.get_db_session() as session:
+            await DatabaseService(session).update_guild_settings(
+                str(guild.id), reminder_hours="24,1", reminder_delivery="dm"
+            )
+
+        cog = make_rounds_cog(client)
+        cog.reminders.limiter = RateLimiter(rate, burst=int(rate))
+        await cog.check_rounds()  # Post the ballot
+
+        # A third of the submitters voted, and one in ten has closed DMs
+        members = list(guild.members.values())
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            for member in members[::3]:
+                await db.record_vote(round_obj.id, str(member.id), 0)
+            past = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+            await session.execute(
+                Round.__table__.update().values(next_reminder=past, next_deadline=past)
+            )
+            await session.commit()
+        for member in members[1::10]:
+            member.dms_closed = True
+
+        client.recorder.reset()
+        await result.measure(cog.check_rounds, budget="round_reminder")
+        started = time.perf_counter()
+        await asyncio.gather(*cog.reminders._tasks)
+        delivery = time.perf_counter() - started
+
+        # Sent side by side, not one after another
+        dms = client.recorder.calls["send_dm"]
+        assert dms == player_count - len(members[::3])
+        assert delivery < dms * DM_LATENCY / 2
+
+        result.extra.update(
+            players=player_count,
+            delivery_ms=round(delivery * 1000, 2),
+            serial_ms=round(dms * DM_LATENCY * 1000, 2),
+            **client.recorder.summary(),
+        )
+
+    return result
+
+
+async def large_round(scale=1.0, submissions=120):
+    """Completing rounds with 120 submissions and three votes per player."""
+    result = ScenarioResult("large_round")
+    round_count = max(1, int(3 * scale))
+    rng = random.Random(120)
+
+    async with temporary_database():
+        client = FakeClient()
+        guilds = [client.add_guild(member_count=submissions) for _ in range(round_count)]
+        await seed_guilds(client, guilds, submissions=submissions, phase="voting")
+
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballots
+
+        # Everyone votes for three submissions, then voting closes
+        for guild in guilds:
+            ballot = next(
+                message for message in guild.channel.messages.values() if message.reactions
+            )
+            emojis = [reaction.emoji for reaction in ballot.reactions]
+            for member in guild.members.values():
+                for emoji in rng.sample(emojis, 3):
+                    ballot.react(emoji, member.id)
+
+        async with client.get_db_session() as session:
+            past = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+            await session.execute(
+                Round.__table__.update().values(voting_end=past, next_deadline=past)
+            )
+            await session.commit()
+
+        client.recorder.reset()
+        first_message = metrics.histograms.get(("results_first_message_seconds", ()))
+        before = (first_message.count, first_message.sum) if first_message else (0, 0.0)
+        await result.measure(cog.check_rounds)
+        result.check_budget(
+            "round_completion", math.ceil((result.statements[0] - 1) / round_count)
+        )
+
+        # Time from starting a completion to its first results message
+        first_message = metrics.histograms[("results_first_message_seconds", ())]
+        first_message_ms = (first_message.sum - before[1]) / (first_message.count - before[0]) * 1000
+
+        summary = client.recorder.summary()
+        result.extra.update(
+            rounds=round_count,
+            submissions=submissions,
+            first_message_ms=round(first_message_ms, 2),
+            **summary,
+        )
+
+    return result
+
+
+async def commands(scale=1.0):
+    """/status and /leaderboard invocations across guilds with active rounds."""
+    result = ScenarioResult("commands")
+    invocation_count = max(20, int(500 * scale))
+
+    async with temporary_database():
+        client = FakeClient()
+        guilds = [client.add_guild(member_count=10) for _ in range(50)]
+        await seed_guilds(client, guilds, submissions=10, phase="submission")
+
+        rounds_cog = make_rounds_cog(client)
+        settings_cog = SettingsCog(client)
+
+        for idx in range(invocation_count):
+            guild = guilds[idx % len(guilds)]
+            user = next(iter(guild.members.values()))
+            interaction = FakeInteraction(client, guild, user)
+            if idx % 2:
+                await result.measure(
+                    lambda: settings_cog.leaderboard.callback(settings_cog, interaction, 10),
+                    budget="/leaderboard",
+                )
+            else:
+                await result.measure(
+                    lambda: rounds_cog.status.callback(rounds_cog, interaction),
+                    budget="/status",
+                )
+
+        result.extra.update(**client.recorder.summary())
+
+    return result
+
+
+async def rendering(scale=1.0, submissions=120):
+    """Rendering and chunking 120-entry results with default and custom templates."""
+    result = ScenarioResult("rendering")
+    iterations = max(10, int(500 * scale))
+
+    custom = Renderer(
+        {
+            "result_entry": "{medal}**{number}. {username}** ({score} pts)\n"
+            "{track}> {content}\n{description}\n",
+            "leaderboard_entry": "{position}. {username}: {score}\n",
+        }
+    )
+    entries = [
+        (
+            SimpleNamespace(
+                content=f"https://open.spotify.com/track/{idx:022d}",
+                description="Benchmark submission" if idx % 2 else None,
+            ),
+            SimpleNamespace(title=f"Song {idx}", artist="Artist", duration_seconds=200 + idx),
+        )
+        for idx in range(submissions)
+    ]
+
+    def render_results(renderer):
+        rendered = (
+            renderer.result_entry(
+                position,
+                VOTING_EMOJIS[position % len(VOTING_EMOJIS)],
+                position,
+                submission,
+                submissions - position,
+                f"Player {position}",
+                metadata,
+            )
+            for position, (submission, metadata) in enumerate(entries)
+        )
+        return list(chunk_messages(rendered))
+
+    messages = 0
+    for idx in range(iterations):
+        renderer = DEFAULT_RENDERER if idx % 2 else custom
+
+        async def render():
+            return render_results(renderer)
+
+        messages = len(await result.measure(render))
+
+    result.extra.update(submissions=submissions, messages_per_post=messages, rest_calls=0)
+    return result
+
+
+async def stats(scale=1.0, rounds=300):
+    """/stats over a long history: one cold computation, then cached calls."""
+    result = ScenarioResult("stats")
+    invocation_count = max(20, int(500 * scale))
+    rounds = max(10, int(rounds * scale))
+
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=40)
+        votes = await seed_history(client, guild, rounds)
+        cog = HistoryCog(client)
+        members = list(guild.members.values())
+
+        invalidate_stats(guild.id)
+        for idx in range(invocation_count):
+            interaction = FakeInteraction(client, guild, members[idx % len(members)])
+            await result.measure(
+                lambda: cog.stats.callback(cog, interaction, None), budget="/stats"
+            )
+
+        result.extra.update(
+            rounds=rounds,
+            votes=votes,
+            cold_ms=round(result.latencies[0] * 1000, 2),
+            **client.recorder.summary(),
+        )
+
+    return result
+
+
+async def vote_analysis(scale=1.0, players=500, rounds=300):
+    """/vote_analysis over 500 players and 300 rounds with planted voting rings."""
+    result = ScenarioResult("vote_analysis")
+    players = max(20, int(players * scale))
+    rounds = max(10, int(rounds * scale))
+    rings = max(1, players // 100)
+    invocation_count = 20
+
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=players)
+        votes = await seed_history(client, guild, rounds, rings=rings)
+        cog = AdminCog(client)
+        user = next(iter(guild.members.values()))
+
+        # The last round completes after the matrix is first built
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update()
+                .where(Round.round_number == rounds)
+                .values(is_completed=False)
+            )
+            await session.commit()
+
+        async def analyse():
+            interaction = FakeInteraction(client, guild, user)
+            await cog.vote_analysis.callback(cog, interaction, None)
+            return interaction.followup.messages[0]
+
+        for _ in range(invocation_count):
+            await result.measure(analyse, budget="/vote_analysis")
+
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update()
+                .where(Round.round_number == rounds)
+                .values(is_completed=True)
+            )
+            await session.commit()
+        mark_rounds_completed(guild.id)
+        embed = await result.measure(analyse, budget="/vote_analysis")
+
+        # Every planted pair should be reported as possible vote trading
+        trading = embed.fields[0].value
+        members = list(guild.members.values())
+        rings_found = sum(
+            f"{first.display_name} ↔ {second.display_name}" in trading
+            or f"{second.display_name} ↔ {first.display_name}" in trading
+            for first, second in zip(members[0 : 2 * rings : 2], members[1 : 2 * rings : 2])
+        )
+
+        result.extra.update(
+            players=players,
+            rounds=rounds,
+            votes=votes,
+            build_ms=round(result.latencies[0] * 1000, 2),
+            incremental_ms=round(result.latencies[-1] * 1000, 2),
+            rings=rings,
+            rings_found=rings_found,
+            **client.recorder.summary(),
+        )
+
+    return result
+
+
+async def scoring(scale=1.0, submissions=120, voters=120):
+    """Scoring a round of 120 submissions and 120 voters under each scoring system.
+
+    The Borda round is also ranked with each tie-breaker.
+    """
+    result = ScenarioResult("scoring")
+    iterations = max(2, int(20 * scale))
+    rng = random.Random(42)
+
+    async with temporary_database():
+        client = FakeClient()
+        guilds = {
+            name: client.add_guild(member_count=max(submissions, voters))
+            for name in SCORING_SYSTEMS
+        }
+        await seed_guilds(
+            client, list(guilds.values()), submissions=submissions, phase="complete", voters=voters
+        )
+
+        # Everyone reacts to three submissions; points ballots give the rest of
+        # their points with /vote and downvote ballots add a downvote
+        round_ids = {}
+        async with client.get_db_session() as session:
+            for name, guild in guilds.items():
+                league_row = (
+                    await session.execute(
+                        select(League)
+                        .join(Guild, League.guild_id == Guild.id)
+                        .where(Guild.guild_id == str(guild.id))
+                    )
+                ).scalar_one()
+                league_row.scoring = name
+                round_ids[name] = league_row.active_round
+                ballot = (
+                    await session.execute(
+                        select(Submission)
+                        .where(Submission.round_id == league_row.active_round)
+                        .order_by(Submission.id)
+                    )
+                ).scalars().all()
+
+                votes = []
+                for member in list(guild.members.values())[:voters]:
+                    picks = rng.sample(ballot, 5)
+                    points = [None, None, None]
+                    if name == "points":
+                        points += [3, BALLOT_POINTS - 6]
+                    elif name == "downvotes":
+                        points.append(-1)
+                    for submission, vote_points in zip(picks, points):
+                        if vote_points is None:
+                            submission.votes_received = (submission.votes_received or 0) + 1
+                        votes.append(
+                            {
+                                "round_id": league_row.active_round,
+                                "submission_id": submission.id,
+                                "voter_id": str(member.id),
+                                "points": vote_points,
+                            }
+                        )
+                await session.execute(Vote.__table__.insert(), votes)
+            await session.commit()
+
+        for name in SCORING_SYSTEMS:
+
+            async def score():
+                async with client.get_db_session() as session:
+                    db = DatabaseService(session)
+                    return await db.calculate_round_results(round_ids[name])
+
+            started = len(result.latencies)
+            for _ in range(iterations):
+                results = await result.measure(score, budget="calculate_round_results")
+            assert len(results) == submissions
+            result.extra[f"{name}_ms"] = round(
+                percentile(result.latencies[started:], 50) * 1000, 2
+            )
+
+        for tie_breaker in TIE_BREAKERS:
+            async with client.get_db_session() as session:
+                await DatabaseService(session).update_guild_settings(
+                    str(guilds["borda"].id), tie_breaker=tie_breaker
+                )
+
+            async def rank():
+                async with client.get_db_session() as session:
+                    db = DatabaseService(session)
+                    return await db.calculate_round_results(round_ids["borda"])
+
+            started = len(result.latencies)
+            for _ in range(iterations):
+                results = await result.measure(rank, budget="calculate_round_results")
+            places = [entry.place for entry in results]
+            assert places == sorted(places)
+            result.extra[f"tie_{tie_breaker}_ms"] = round(
+                percentile(result.latencies[started:], 50) * 1000, 2
+            )
+
+        result.extra.update(submissions=submissions, voters=voters, rest_calls=0)
+
+    return result
+
+
+SCENARIOS = {
+    "guild_ticks": guild_ticks,
+    "reactions": reactions,
+    "live_tally": live_tally,
+    "ballot_memory": ballot_memory,
+    "reminders": reminders,
+    "large_round": large_round,
+    "commands": commands,
+    "rendering": rendering,
+    "stats": stats,
+    "vote_analysis": vote_analysis,
+    "scoring": scoring,
+}
@@ -0,0 +1,217 @@
+"""Who votes for whom, and which pairs of players vote for each other too often.
+
+``VoteMatrix`` keeps a guild's votes as a sparse voter -> submitter matrix:
+players get dense indexes, each voter's row only holds the submitters they
+voted for, and the rounds each player voted or submitted in are bitmasks.
+Rounds are added to it as they complete, so it is built from the database
+once and then only reads the rounds played since.
+
+A pair's score compares how often the voter picked the submitter with how
+often they would have by chance: the voter's share of votes per ballot entry,
+times the rounds in which they could have voted for them. Scores are in
+standard deviations (``(observed - expected) / sqrt(expected)``). A voting
+ring shows up as two players who both score highly for each other.
+"""
+
+import heapq
+import math
+import time
+from array import array
+from typing import NamedTuple
+
+from .db import league_name
+
+# Pairs with fewer votes than this are never reported
+MIN_PAIR_VOTES = 3
+
+# How long a guild's matrix is kept after it was last used
+MATRIX_TTL_SECONDS = 60 * 60
+
+
+class Affinity(NamedTuple):
+    """How much one player votes for another compared with chance."""
+
+    voter_id: str
+    submitter_id: str
+    votes: int
+    expected: float
+    score: float
+
+
+class SuspiciousPair(NamedTuple):
+    """Two players who both vote for each other more than chance would."""
+
+    first_id: str
+    second_id: str
+    votes: int  # Votes in both directions together
+    score: float  # The lower of the two players' scores for each other
+
+
+class VoteMatrix:
+    """A guild's votes as a sparse voter -> submitter count matrix."""
+
+    def __init__(self):
+        self.user_ids = []  # Index -> Discord user ID
+        self._index = {}  # Discord user ID -> index
+        self.rows = []  # Index -> {submitter index: votes}
+        self.votes_cast = array("l")  # Index -> votes cast
+        self.slots = array("l")  # Index -> ballot entries seen, besides their own
+        self.voted_rounds = []  # Index -> bitmask of rounds voted in
+        self.submitted_rounds = []  # Index -> bitmask of rounds submitted to
+        self.round_count = 0
+        self.last_round = None  # Number of the last round added
+        self._scores = None
+
+    def _player(self, user_id):
+        index = self._index.get(user_id)
+        if index is None:
+            index = self._index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.rows.append({})
+            self.votes_cast.append(0)
+            self.slots.append(0)
+            self.voted_rounds.append(0)
+            self.submitted_rounds.append(0)
+        return index
+
+    def add_rounds(self, submissions, votes):
+        """Add completed rounds.
+
+        ``submissions`` is ``(round_number, user_id, ...)`` rows and ``votes``
+        is ``(round_number, voter_id, submitter_id)`` rows, both ordered by
+        round and only for rounds after ``last_round``.
+        """
+        # Submitters of each round
+        submitters = {}
+        for round_number, user_id, *_ in submissions:
+            players = submitters.setdefault(round_number, set())
+            if user_id is not None:
+                players.add(self._player(user_id))
+
+        # Votes of each round, by voter
+        ballots = {}
+        for round_number, voter_id, submitter_id in votes:
+            ballots.setdefault(round_number, {}).setdefault(
+                self._player(voter_id), []
+            ).append(self._player(submitter_id))
+
+        for round_number in sorted(submitters.keys() | ballots.keys()):
+            bit = 1 << self.round_count
+            self.round_count += 1
+            self.last_round = round_number
+
+            round_submitters = submitters.get(round_number, set())
+            for submitter in round_submitters:
+                self.submitted_rounds[submitter] |= bit
+
+            for voter, picks in ballots.get(round_number, {}).items():
+                self.voted_rounds[voter] |= bit
+                self.votes_cast[voter] += len(picks)
+                self.slots[voter] += len(round_submitters) - (voter in round_submitters)
+                row = self.rows[voter]
+                for submitter in picks:
+                    row[submitter] = row.get(submitter, 0) + 1
+
+        self._scores = None
+
+    def _score_pairs(self):
+        """Score every pair with enough votes, by (voter index, submitter index)."""
+        if self._scores is not None:
+            return self._scores
+
+        scores = {}
+        for voter, row in enumerate(self.rows):
+            if not self.slots[voter]:
+                continue
+            rate = self.votes_cast[voter] / self.slots[voter]
+            voted = self.voted_rounds[voter]
+            for submitter, votes in row.items():
+                if votes < MIN_PAIR_VOTES or submitter == voter:
+                    continue
+                # Rounds in which this voter could have voted for the submitter;
+                # int.bit_count() needs Python 3.10
+                shared = bin(voted & self.submitted_rounds[submitter]).count("1")
+                expected = shared * rate
+                if expected > 0:
+                    scores[voter, submitter] = (
+                        votes,
+                        expected,
+                        (votes - expected) / math.sqrt(expected),
+                    )
+        self._scores = scores
+        return scores
+
+    def top_affinities(self, limit=10, user_id=None):
+        """The highest-scoring voter -> submitter pairs, optionally only those involving a player."""
+        player = self._index.get(user_id) if user_id is not None else None
+        if user_id is not None and player is None:
+            return []
+
+        return heapq.nlargest(
+            limit,
+            (
+                Affinity(self.user_ids[voter], self.user_ids[submitter], *score)
+                for (voter, submitter), score in self._score_pairs().items()
+                if player is None or player in (voter, submitter)
+            ),
+            key=lambda affinity: affinity.score,
+        )
+
+    def suspicious_pairs(self, limit=5, min_score=3.0):
+        """Pairs who both vote for each other at least ``min_score`` beyond chance."""
+        scores = self._score_pairs()
+        pairs = []
+        for (voter, submitter), (votes, _, score) in scores.items():
+            if voter > submitter or score < min_score:
+                continue
+            reverse = scores.get((submitter, voter))
+            if reverse and reverse[2] >= min_score:
+                pairs.append(
+                    SuspiciousPair(
+                        self.user_ids[voter],
+                        self.user_ids[submitter],
+                        votes + reverse[0],
+                        min(score, reverse[2]),
+                    )
+                )
+        pairs.sort(key=lambda pair: pair.score, reverse=True)
+        return pairs[:limit]
+
+
+# Matrices of leagues recently analysed: (guild ID, league) -> [matrix, last used, stale]
+_matrices = {}
+
+
+async def get_vote_matrix(db, guild_id, league=None):
+    """Get a league's vote matrix, reading only the rounds completed since it was built."""
+    guild_id, league = str(guild_id), league_name(league)
+    now = time.monotonic()
+    for expired in [
+        key for key, entry in _matrices.items() if now - entry[1] >= MATRIX_TTL_SECONDS
+    ]:
+        del _matrices[expired]
+
+    cached = _matrices.get((guild_id, league))
+    if cached is None:
+        cached = _matrices[(guild_id, league)] = [VoteMatrix(), now, True]
+
+    matrix = cached[0]
+    if cached[2]:
+        submissions = await db.get_round_export(
+            guild_id, after_round=matrix.last_round, league=league
+        )
+        votes = await db.get_vote_export(
+            guild_id, after_round=matrix.last_round, league=league
+        )
+        matrix.add_rounds(submissions, votes)
+        cached[2] = False
+
+    cached[1] = now
+    return matrix
+
+
+def mark_rounds_completed(guild_id, league=None):
+    """Note that a league completed a round, for its matrix to pick up when next used."""
+    cached = _matrices.get((str(guild_id), league_name(league)))
+    if cached:
+        cached[2] = True
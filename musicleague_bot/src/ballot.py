@@ -0,0 +1,130 @@
+"""Who has voted for what on the ballots being voted on, kept in memory.
+
+Every vote is stored in the database, but checking a reaction against the
+vote limit, the voter's own submission and the live tally shouldn't need a
+query or Discord's list of who reacted. A ``BallotState`` holds one round's
+votes compactly: each voter gets a dense index on first vote, and their picks
+are one 64-bit mask in an ``array``, so a ballot costs a dictionary entry and
+8 bytes per voter, and every check is a lookup and a bit test. Per-submission
+vote counts and the turnout are kept up to date as votes change.
+
+``Ballots`` holds the states of the rounds being voted on. They are loaded
+from the votes table when the bot starts and whenever a round's state is
+missing, e.g. after a shard moved to this process.
+"""
+
+from array import array
+
+# Most entries a ballot can have, one bit of a voter's picks each
+MAX_BALLOT_ENTRIES = 64
+
+
+class BallotState:
+    """The votes cast so far on one round's ballot."""
+
+    __slots__ = ("owners", "players", "voters", "picks", "votes", "cast", "turnout")
+
+    def __init__(self, submitters):
+        submitters = [int(user_id) for user_id in submitters[:MAX_BALLOT_ENTRIES]]
+        self.owners = array("Q", submitters)  # Submitter of each ballot entry
+        self.voters = {}  # User ID -> index of their picks
+        self.picks = array("Q")  # Bitmask of the entries each voter picked
+        self.votes = array("I", [0]) * len(submitters)  # Votes for each entry
+        self.cast = 0  # Votes on the ballot
+        self.turnout = 0  # Submitters who have voted
+
+        # Submitters take the first indexes, so an index tells them apart
+        for user_id in submitters:
+            self._index(user_id)
+        self.players = len(self.voters)
+
+    def _index(self, user_id):
+        index = self.voters.get(user_id)
+        if index is None:
+            index = self.voters[user_id] = len(self.picks)
+            self.picks.append(0)
+        return index
+
+    def owns(self, voter_id, ballot_index):
+        """Whether the entry at ``ballot_index`` is the voter's own submission."""
+        return ballot_index < len(self.owners) and self.owners[ballot_index] == int(voter_id)
+
+    def has_voted(self, voter_id, ballot_index):
+        index = self.voters.get(int(voter_id))
+        return index is not None and bool(self.picks[index] >> ballot_index & 1)
+
+    def count(self, voter_id):
+        """How many votes the voter has cast."""
+        index = self.voters.get(int(voter_id))
+        # int.bit_count() needs Python 3.10
+        return 0 if index is None else bin(self.picks[index]).count("1")
+
+    def add(self, voter_id, ballot_index):
+        """Count a vote. Returns False if it was already counted or there's no such entry."""
+        if not 0 <= ballot_index < len(self.owners):
+            return False
+        index = self._index(int(voter_id))
+        picks = self.picks[index]
+        bit = 1 << ballot_index
+        if picks & bit:
+            return False
+
+        self.picks[index] = picks | bit
+        self.votes[ballot_index] += 1
+        self.cast += 1
+        if not picks and index < self.players:
+            self.turnout += 1
+        return True
+
+    def remove(self, voter_id, ballot_index):
+        """Take a vote back. Returns False if it wasn't counted."""
+        index = self.voters.get(int(voter_id))
+        if index is None or not 0 <= ballot_index < len(self.owners):
+            return False
+        picks = self.picks[index]
+        bit = 1 << ballot_index
+        if not picks & bit:
+            return False
+
+        # The voter keeps their index, so voting again doesn't grow the arrays
+        self.picks[index] = picks & ~bit
+        self.votes[ballot_index] -= 1
+        self.cast -= 1
+        if picks == bit and index < self.players:
+            self.turnout -= 1
+        return True
+
+    @classmethod
+    def load(cls, submitters, votes):
+        """Rebuild a ballot from its submitters in ballot order and ``(voter_id, ballot_index)`` votes."""
+        ballot = cls(submitters)
+        for voter_id, ballot_index in votes:
+            ballot.add(voter_id, ballot_index)
+        return ballot
+
+
+class Ballots:
+    """The ballot states of the rounds being voted on, by round ID."""
+
+    def __init__(self):
+        self._ballots = {}
+
+    def __len__(self):
+        return len(self._ballots)
+
+    def get(self, round_id):
+        return self._ballots.get(round_id)
+
+    def add(self, round_id, ballot):
+        """Keep a round's ballot, returning the one to use.
+
+        A ballot already kept wins: it was loaded earlier and has counted
+        every vote since, while ``ballot`` may have been read before them.
+        """
+        return self._ballots.setdefault(round_id, ballot)
+
+    def discard(self, round_id):
+        self._ballots.pop(round_id, None)
+
+    def clear(self):
+        self._ballots.clear()
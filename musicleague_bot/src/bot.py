@@ -1,24 +1,72 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
+import hashlib
+import json
 import os
+import socket
+import time
 import logging
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
-from .db import init_db, get_session
+from .db import init_db, get_session, get_read_session
+from .metadata import create_resolver
+from .metrics import metrics, QUERY_COUNT_BUCKETS
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("musicleague-bot")
 
-# Load environment variables
-load_dotenv()
 
+def parse_shard_ids(value):
+    """Parse a shard list such as "0,2,4-7" into a sorted list of shard IDs."""
+    shard_ids = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
 
-class MusicLeagueBot(commands.Bot):
+
+class MusicLeagueCommandTree(app_commands.CommandTree):
+    """Command tree that records latency and query counts for slash commands."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started"] = time.perf_counter()
+        interaction.extras["query_count"] = metrics.start_query_count()
+        return True
+
+    async def on_error(self, interaction, error):
+        record_command_metrics(interaction, "error")
+        await super().on_error(interaction, error)
+
+
+def record_command_metrics(interaction, outcome):
+    """Record how long a slash command took and how many queries it ran."""
+    if "started" not in interaction.extras or interaction.command is None:
+        return
+
+    command = interaction.command.qualified_name
+    metrics.observe(
+        "command_seconds",
+        time.perf_counter() - interaction.extras["started"],
+        command=command,
+    )
+    metrics.observe(
+        "command_db_queries",
+        interaction.extras["query_count"].statements,
+        buckets=QUERY_COUNT_BUCKETS,
+        command=command,
+    )
+    metrics.increment("commands_total", command=command, outcome=outcome)
+
+
+class MusicLeagueBot(commands.AutoShardedBot):
     """Main bot class for Music League Discord bot."""
 
     def __init__(self):
@@ -26,48 +74,271 @@ class MusicLeagueBot(commands.Bot):
         intents.message_content = True
         intents.members = True
 
+        options = {}
+        message_cache_size = os.getenv("MESSAGE_CACHE_SIZE")
+
+        # The low-memory profile keeps no member lists at all. Only the few
+        # players shown in results need names, and those are requested from
+        # the gateway on demand by resolve_display_names.
+        self.low_memory = os.getenv("MEMORY_PROFILE", "default").lower() == "low"
+        if self.low_memory:
+            intents.message_content = False
+            intents.typing = False
+            intents.voice_states = False
+            intents.invites = False
+            options["chunk_guilds_at_startup"] = False
+            options["member_cache_flags"] = discord.MemberCacheFlags.none()
+            # Enough for the recently posted ballots; voting does not depend on it
+            message_cache_size = message_cache_size or "200"
+
+        if message_cache_size:
+            options["max_messages"] = int(message_cache_size)
+
+        # Shard layout. Without SHARD_COUNT Discord's recommended count is used
+        # and every shard runs in this process. SHARD_IDS restricts this process
+        # to a subset so several processes can split the guilds between them.
+        shard_count = os.getenv("SHARD_COUNT")
+        shard_ids = os.getenv("SHARD_IDS")
+
         super().__init__(
             command_prefix="!",  # Fallback prefix for text commands
             intents=intents,
             help_command=None,  # We'll use slash commands
+            shard_count=int(shard_count) if shard_count else None,
+            shard_ids=parse_shard_ids(shard_ids) if shard_ids else None,
+            tree_cls=MusicLeagueCommandTree,
+            http_trace=metrics.create_http_trace(),
+            **options,
+        )
+
+        # Identifies this process when claiming round transitions
+        self.instance_id = os.getenv("INSTANCE_ID") or (
+            f"{socket.gethostname()}:{os.getpid()}"
         )
 
         # Store cogs to load
-        self.cogs_list = ["cogs.settings", "cogs.rounds"]
+        self.cogs_list = ["cogs.settings", "cogs.rounds", "cogs.history", "cogs.admin"]
+
+        # on_ready fires again on every reconnect, but commands only need one sync
+        self.commands_synced = False
+
+        # Database setup runs alongside the gateway connection; see setup_hook
+        self.db_ready_task = None
+
+        # Seconds spent in each startup phase, reported once the bot is ready
+        self.startup_started = time.perf_counter()
+        self.setup_finished = self.startup_started
+        self.startup_timings = {}
+
+        # Looks up track titles and artists when songs are submitted
+        self.metadata_resolver = create_resolver()
+
+    def record_startup_phase(self, phase, started):
+        """Record how long a startup phase took since ``started``."""
+        self.startup_timings[phase] = time.perf_counter() - started
+
+    async def wait_until_db_ready(self):
+        """Wait for the database setup started in setup_hook to finish."""
+        if self.db_ready_task is not None:
+            await asyncio.shield(self.db_ready_task)
+
+    async def _init_database(self):
+        """Create missing tables and columns while the gateway connects."""
+        started = time.perf_counter()
+        try:
+            await init_db()
+        except Exception as e:
+            logger.error(f"Failed to initialize database: {e}")
+            raise
+        self.record_startup_phase("database", started)
+        logger.info("Database initialized")
+
+    def owns_guild(self, guild_id) -> bool:
+        """Check whether one of this process's shards is responsible for a guild."""
+        if self.shard_ids is None or not self.shard_count:
+            return True  # This process runs every shard
+
+        return (int(guild_id) >> 22) % self.shard_count in self.shard_ids
+
+    async def resolve_display_names(self, guild, user_ids) -> dict:
+        """Get display names for a few users without caching whole member lists."""
+        names = {}
+        missing = []
+
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            user = (guild.get_member(int(user_id)) if guild else None) or self.get_user(
+                int(user_id)
+            )
+            if user:
+                names[user_id] = user.display_name
+            else:
+                missing.append(int(user_id))
+
+        metrics.increment("cache_hits_total", len(names), cache="display_names")
+        metrics.increment("cache_misses_total", len(missing), cache="display_names")
+
+        # Ask the gateway for just these members, at most 100 per request
+        if missing and guild is not None and self.intents.members:
+            for start in range(0, len(missing), 100):
+                try:
+                    members = await guild.query_members(
+                        user_ids=missing[start : start + 100],
+                        cache=not self.low_memory,
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to query members in {guild.id}: {e}")
+                    break
+                for member in members:
+                    names[str(member.id)] = member.display_name
+
+        # Users who have left the guild are looked up individually
+        for user_id in missing:
+            if str(user_id) in names:
+                continue
+            try:
+                user = await self.fetch_user(user_id)
+                names[str(user_id)] = user.display_name
+            except Exception:
+                names[str(user_id)] = f"User {user_id}"
+
+        return names
 
     @asynccontextmanager
     async def get_db_session(self):
         """Context manager for database sessions."""
+        await self.wait_until_db_ready()
         session = await get_session()
         try:
             yield session
         finally:
             await session.close()
 
+    @asynccontextmanager
+    async def get_read_session(self):
+        """Context manager for read-only database sessions.
+
+        These use the read engine (see ``DATABASE_READ_URL``), so they don't
+        wait on votes and submissions being written, but may not see writes
+        made a moment ago.
+        """
+        await self.wait_until_db_ready()
+        session = await get_read_session()
+        try:
+            yield session
+        finally:
+            await session.close()
+
     async def setup_hook(self):
         """Setup hook called when the bot is starting."""
         logger.info("Setting up bot...")
+        self.record_startup_phase("login", self.startup_started)
 
-        # Initialize the database
-        await init_db()
-        logger.info("Database initialized")
+        # Initialize the database in the background so the gateway connection
+        # doesn't wait for it. Anything needing the database waits in
+        # get_db_session until this is done.
+        self.db_ready_task = asyncio.create_task(self._init_database())
 
-        # Load cogs
+        # Load cogs. Each one is imported only here, by its extension path.
+        started = time.perf_counter()
         for cog in self.cogs_list:
             try:
                 await self.load_extension(f"musicleague_bot.src.{cog}")
                 logger.info(f"Loaded extension: {cog}")
             except Exception as e:
                 logger.error(f"Failed to load extension {cog}: {e}")
+        self.record_startup_phase("cogs", started)
+
+        # Optional local metrics endpoint
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            try:
+                await metrics.start_http_server(
+                    os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port)
+                )
+            except OSError as e:
+                logger.error(f"Failed to start metrics endpoint: {e}")
+
+        self.setup_finished = time.perf_counter()
 
     async def on_ready(self):
         """Event fired when the bot is ready."""
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
-        logger.info(f"Connected to {len(self.guilds)} guilds")
+        logger.info(
+            f"Connected to {len(self.guilds)} guilds "
+            f"(shards {self.shard_ids or 'all'} of {self.shard_count})"
+        )
 
         # Sync app commands
-        await self.tree.sync()
-        logger.info("Synced application commands")
+        if not self.commands_synced:
+            self.record_startup_phase("gateway", self.setup_finished)
+            started = time.perf_counter()
+            await self.sync_commands()
+            self.commands_synced = True
+            self.record_startup_phase("command_sync", started)
+            self.record_startup_phase("total", self.startup_started)
+            logger.info(
+                "Startup timings: "
+                + ", ".join(
+                    f"{phase} {seconds:.2f}s"
+                    for phase, seconds in self.startup_timings.items()
+                )
+            )
+
+    async def sync_commands(self):
+        """Sync application commands, skipping the upload if they haven't changed.
+
+        A hash of the serialized command tree is stored in COMMAND_SYNC_CACHE
+        after each sync. With DEV_GUILD_ID set, commands are synced only to that
+        guild, where changes show up immediately.
+        """
+        dev_guild_id = os.getenv("DEV_GUILD_ID")
+        guild = discord.Object(int(dev_guild_id)) if dev_guild_id else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+
+        commands_payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda command: command["name"],
+        )
+        digest = hashlib.sha256(
+            json.dumps(
+                {"application_id": self.application_id, "commands": commands_payload},
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+        scope = dev_guild_id or "global"
+        cache_path = os.getenv("COMMAND_SYNC_CACHE", ".command_sync.json")
+        try:
+            with open(cache_path) as f:
+                synced_hashes = json.load(f)
+        except (OSError, ValueError):
+            synced_hashes = {}
+
+        if synced_hashes.get(scope) == digest:
+            logger.info(f"Application commands unchanged, skipped sync ({scope})")
+            return False
+
+        await self.tree.sync(guild=guild)
+        logger.info(f"Synced application commands ({scope})")
+
+        synced_hashes[scope] = digest
+        try:
+            with open(cache_path, "w") as f:
+                json.dump(synced_hashes, f)
+        except OSError as e:
+            logger.warning(f"Could not save command sync hash: {e}")
+
+        return True
+
+    async def on_app_command_completion(self, interaction, command):
+        """Event fired when a slash command finishes without an error."""
+        record_command_metrics(interaction, "ok")
+
+    async def close(self):
+        await metrics.stop_http_server()
+        await self.metadata_resolver.close()
+        await super().close()
 
     async def on_guild_join(self, guild):
         """Event fired when the bot joins a guild."""
@@ -83,7 +354,19 @@ class MusicLeagueBot(commands.Bot):
 
 def run_bot():
     """Run the Discord bot."""
+    started = time.perf_counter()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    # Load environment variables
+    load_dotenv()
+
     bot = MusicLeagueBot()
+    bot.startup_started = started
+    bot.record_startup_phase("config", started)
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         logger.error(
@@ -0,0 +1,186 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from typing import Optional
+from ..analysis import get_vote_matrix
+from ..db import DatabaseService
+from ..metrics import metrics
+from ..render import EMBED_FIELD_LIMIT, fit
+from .rounds import LEAGUE_OPTION
+
+
+class AdminCog(commands.Cog):
+    """Commands for bot operators."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def _format_latencies(self, name, label, limit=10):
+        """Format call counts and p50/p99 latencies for one histogram family."""
+        rows = [
+            (dict(labels).get(label, "?"), histogram)
+            for (metric, labels), histogram in metrics.histograms.items()
+            if metric == name
+        ]
+        rows.sort(key=lambda row: row[1].sum, reverse=True)
+
+        lines = [
+            f"`{key}` {histogram.count}× "
+            f"p50 {histogram.quantile(0.5) * 1000:.0f}ms "
+            f"p99 {histogram.quantile(0.99) * 1000:.0f}ms"
+            for key, histogram in rows[:limit]
+        ]
+        return "\n".join(lines) or "No data yet"
+
+    def _format_discord_requests(self, limit=10):
+        """Format REST call counts and rate limits per route."""
+        rate_limited = {
+            dict(labels)["route"]: count
+            for (metric, labels), count in metrics.counters.items()
+            if metric == "discord_rate_limited_total"
+        }
+        rows = sorted(
+            (
+                (dict(labels)["route"], count)
+                for (metric, labels), count in metrics.counters.items()
+                if metric == "discord_requests_total"
+            ),
+            key=lambda row: row[1],
+            reverse=True,
+        )
+
+        lines = [
+            f"`{route}` {count}" + (f" ({rate_limited[route]}× 429)" if route in rate_limited else "")
+            for route, count in rows[:limit]
+        ]
+        return "\n".join(lines) or "No data yet"
+
+    @app_commands.command(
+        name="botstats", description="Show bot performance statistics"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def botstats(self, interaction: discord.Interaction):
+        """Show latency, database and Discord API statistics."""
+        embed = discord.Embed(title="Bot Statistics", color=discord.Color.blue())
+
+        embed.add_field(
+            name="Commands",
+            value=self._format_latencies("command_seconds", "command"),
+            inline=False,
+        )
+        embed.add_field(
+            name="Handlers",
+            value=self._format_latencies("handler_seconds", "handler"),
+            inline=False,
+        )
+        embed.add_field(
+            name="Database Operations",
+            value=self._format_latencies("db_operation_seconds", "operation"),
+            inline=False,
+        )
+
+        total_queries = metrics.counters.get(("db_queries_total", ()), 0)
+        query_latency = metrics.histograms.get(("db_query_seconds", ()))
+        database_summary = f"{total_queries} queries"
+        if query_latency:
+            database_summary += (
+                f", p50 {query_latency.quantile(0.5) * 1000:.0f}ms"
+                f", p99 {query_latency.quantile(0.99) * 1000:.0f}ms"
+            )
+        embed.add_field(name="SQL", value=database_summary, inline=False)
+
+        embed.add_field(
+            name="Discord API Requests",
+            value=self._format_discord_requests(),
+            inline=False,
+        )
+
+        gauges = "\n".join(
+            f"`{name}` {value}"
+            for (name, labels), value in sorted(metrics.gauges.items())
+        )
+        embed.add_field(name="Queues", value=gauges or "No data yet", inline=False)
+
+        hit_ratio = metrics.cache_hit_ratio("display_names")
+        embed.add_field(
+            name="Name Cache Hit Ratio",
+            value=f"{hit_ratio:.0%}" if hit_ratio is not None else "No data yet",
+            inline=False,
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        name="vote_analysis",
+        description="Show who votes for whom more than chance would explain",
+    )
+    @app_commands.describe(user="Only show pairs involving this member", league=LEAGUE_OPTION)
+    @app_commands.default_permissions(administrator=True)
+    async def vote_analysis(
+        self,
+        interaction: discord.Interaction,
+        user: discord.Member = None,
+        league: Optional[str] = None,
+    ):
+        """Show the strongest voting affinities and possible vote trading in a league."""
+        # Building the matrix for a league not analysed lately can take a while
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            matrix = await get_vote_matrix(db, interaction.guild_id, league)
+
+        user_id = str(user.id) if user else None
+        affinities = matrix.top_affinities(10, user_id=user_id)
+        pairs = [
+            pair
+            for pair in matrix.suspicious_pairs(10)
+            if user_id is None or user_id in (pair.first_id, pair.second_id)
+        ][:5]
+
+        usernames = await self.bot.resolve_display_names(
+            interaction.guild,
+            {affinity.voter_id for affinity in affinities}
+            | {affinity.submitter_id for affinity in affinities}
+            | {pair.first_id for pair in pairs}
+            | {pair.second_id for pair in pairs},
+        )
+
+        embed = discord.Embed(
+            title="Vote Analysis",
+            description=f"{matrix.round_count} completed round(s). Scores are standard "
+            f"deviations above the votes expected by chance.",
+            color=discord.Color.orange(),
+        )
+        embed.add_field(
+            name="Possible Vote Trading",
+            value=fit(
+                "\n".join(
+                    f"{usernames[pair.first_id]} ↔ {usernames[pair.second_id]}: "
+                    f"{pair.votes} votes, score {pair.score:.1f}"
+                    for pair in pairs
+                )
+                or "Nothing unusual",
+                EMBED_FIELD_LIMIT,
+            ),
+            inline=False,
+        )
+        embed.add_field(
+            name="Strongest Affinities",
+            value=fit(
+                "\n".join(
+                    f"{usernames[affinity.voter_id]} → {usernames[affinity.submitter_id]}: "
+                    f"{affinity.votes} votes (expected {affinity.expected:.1f}), "
+                    f"score {affinity.score:.1f}"
+                    for affinity in affinities
+                )
+                or "Not enough votes yet",
+                EMBED_FIELD_LIMIT,
+            ),
+            inline=False,
+        )
+
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
@@ -0,0 +1,325 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from typing import Optional
+from ..db import DatabaseService
+from ..render import (
+    EMBED_FIELD_LIMIT,
+    EMBED_TITLE_LIMIT,
+    MEDALS,
+    fit,
+    format_timestamp,
+    format_track,
+)
+from ..scoring import get_scoring_system
+from ..stats import get_guild_stats
+from .rounds import LEAGUE_OPTION, reply_unknown_league
+
+# Rounds or submissions shown per page
+HISTORY_PAGE_SIZE = 10
+
+# How long the page buttons keep working
+PAGE_TIMEOUT_SECONDS = 5 * 60
+
+
+class PagedView(discord.ui.View):
+    """Previous and Next buttons over keyset-paginated pages.
+
+    Every page is loaded from the cursor it starts at (the last row of the
+    page before it), and the cursors of pages already seen are kept, so paging
+    either way runs the same indexed query however deep the history goes.
+    """
+
+    def __init__(self, bot, owner_id):
+        super().__init__(timeout=PAGE_TIMEOUT_SECONDS)
+        self.bot = bot
+        self.owner_id = owner_id
+        self.cursors = [None]  # Where each page up to the current one starts
+        self.next_cursor = None
+
+    async def load_page(self, cursor):
+        """Return the embed for the page at ``cursor`` and the next page's cursor.
+
+        The next cursor is None on the last page.
+        """
+        raise NotImplementedError
+
+    async def render(self):
+        """Load the current page and update the buttons."""
+        embed, self.next_cursor = await self.load_page(self.cursors[-1])
+        embed.set_footer(text=f"Page {len(self.cursors)}")
+        self.previous_button.disabled = len(self.cursors) == 1
+        self.next_button.disabled = self.next_cursor is None
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "Run the command yourself to browse the pages.", ephemeral=True
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+
+class HistoryView(PagedView):
+    """A league's rounds, newest first. The cursor is a round number."""
+
+    def __init__(self, bot, owner_id, guild, league=None):
+        super().__init__(bot, owner_id)
+        self.guild = guild
+        self.league = league
+
+    async def load_page(self, cursor):
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            rounds = await db.get_round_history(
+                str(self.guild.id), cursor, HISTORY_PAGE_SIZE + 1, league=self.league
+            )
+        page = rounds[:HISTORY_PAGE_SIZE]
+
+        usernames = await self.bot.resolve_display_names(
+            self.guild, [summary.winner_id for summary in page if summary.winner_id]
+        )
+
+        embed = discord.Embed(
+            title="📜 Music League History", color=discord.Color.blue()
+        )
+        if not page:
+            embed.description = "No rounds have been played yet! Start one with `/start`."
+
+        for summary in page:
+            if not summary.is_completed:
+                outcome = "In progress"
+            elif summary.winner_id:
+                outcome = (
+                    f"🏆 {usernames[summary.winner_id]} - "
+                    f"{summary.winner_score} {summary.score_unit}"
+                )
+            else:
+                outcome = "No submissions"
+
+            embed.add_field(
+                name=fit(
+                    f"Round #{summary.round_number}: {summary.theme}", EMBED_TITLE_LIMIT
+                ),
+                value=f"{outcome}\n{summary.submission_count} submission(s), "
+                f"voting ended {format_timestamp(summary.voting_end)}",
+                inline=False,
+            )
+
+        next_cursor = page[-1].round_number if len(rounds) > HISTORY_PAGE_SIZE else None
+        return embed, next_cursor
+
+
+class RoundResultsView(PagedView):
+    """A completed round's submissions in results order.
+
+    The cursor is ``(place, submission id)`` of the last submission on the
+    page before.
+    """
+
+    def __init__(self, bot, owner_id, guild, round_obj):
+        super().__init__(bot, owner_id)
+        self.guild = guild
+        self.round_obj = round_obj
+
+    async def load_page(self, cursor):
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            rows = await db.get_results_page(
+                self.round_obj.id, cursor, HISTORY_PAGE_SIZE + 1
+            )
+            page = rows[:HISTORY_PAGE_SIZE]
+            track_metadata = await db.get_track_metadata(
+                (submission.provider, submission.track_id) for submission, _ in page
+            )
+
+        usernames = await self.bot.resolve_display_names(
+            self.guild, [user_id for _, user_id in page]
+        )
+
+        embed = discord.Embed(
+            title=fit(
+                f"🏆 Round #{self.round_obj.round_number}: {self.round_obj.theme}",
+                EMBED_TITLE_LIMIT,
+            ),
+            description=f"Voting ended {format_timestamp(self.round_obj.voting_end, 'F')}",
+            color=discord.Color.gold(),
+        )
+        if not page:
+            embed.description += "\n\nNobody submitted anything this round."
+
+        # Rounds completed before scores were stored show their votes
+        unit = get_scoring_system(self.round_obj.league.scoring).unit
+        for submission, user_id in page:
+            if submission.score is None:
+                score = f"{submission.votes_received} votes"
+            else:
+                score = f"{submission.score} {unit}"
+            rank = submission.place - 1
+            medal = MEDALS[rank] if rank < len(MEDALS) else ""
+            details = format_track(
+                track_metadata.get((submission.provider, submission.track_id))
+            ) + submission.content
+            if submission.description:
+                details += f"\n*{submission.description}*"
+
+            embed.add_field(
+                name=f"{medal}#{rank + 1}: {usernames[user_id]} - {score}",
+                value=fit(details, EMBED_FIELD_LIMIT),
+                inline=False,
+            )
+
+        next_cursor = None
+        if len(rows) > HISTORY_PAGE_SIZE:
+            last = page[-1][0]
+            next_cursor = (last.place, last.id)
+        return embed, next_cursor
+
+
+class HistoryCog(commands.Cog):
+    """Commands for browsing past rounds and players' records."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="history", description="Browse past Music League rounds")
+    @app_commands.describe(league=LEAGUE_OPTION)
+    async def history(self, interaction: discord.Interaction, league: Optional[str] = None):
+        """List a league's rounds, newest first."""
+        view = HistoryView(self.bot, interaction.user.id, interaction.guild, league)
+        embed = await view.render()
+
+        if not embed.fields:
+            # Nothing to page through: a league with no rounds yet, or a typo
+            async with self.bot.get_read_session() as session:
+                db = DatabaseService(session)
+                known = await db.has_league(interaction.guild_id, league)
+            if not known:
+                await reply_unknown_league(interaction, league)
+                return
+            await interaction.response.send_message(embed=embed)
+            return
+        await interaction.response.send_message(embed=embed, view=view)
+
+    @app_commands.command(
+        name="round", description="Show the results of a Music League round"
+    )
+    @app_commands.describe(number="Round number", league=LEAGUE_OPTION)
+    async def round_results(
+        self, interaction: discord.Interaction, number: int, league: Optional[str] = None
+    ):
+        """Show a round's submissions and votes."""
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_round_by_number(
+                str(interaction.guild_id), number, league=league
+            )
+            if not round_obj and not await db.has_league(interaction.guild_id, league):
+                await reply_unknown_league(interaction, league)
+                return
+
+        if not round_obj:
+            await interaction.response.send_message(
+                f"There's no Round #{number} in this league. Use `/history` to see all rounds.",
+                ephemeral=True,
+            )
+            return
+
+        if not round_obj.is_completed:
+            # Who submitted what stays hidden until the results are posted
+            await interaction.response.send_message(
+                f"Round #{number} is still in progress. Its results will be shown here "
+                f"once voting ends.",
+                ephemeral=True,
+            )
+            return
+
+        view = RoundResultsView(self.bot, interaction.user.id, interaction.guild, round_obj)
+        embed = await view.render()
+        await interaction.response.send_message(embed=embed, view=view)
+
+    @app_commands.command(name="stats", description="Show a player's Music League statistics")
+    @app_commands.describe(user="Player to show (default: you)", league=LEAGUE_OPTION)
+    async def stats(
+        self,
+        interaction: discord.Interaction,
+        user: discord.Member = None,
+        league: Optional[str] = None,
+    ):
+        """Show a player's record over a league's completed rounds."""
+        user = user or interaction.user
+        # Working out a league's statistics from cold can take a while
+        await interaction.response.defer(thinking=True)
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            guild_stats = await get_guild_stats(db, interaction.guild_id, league)
+            if not guild_stats.players and not await db.has_league(
+                interaction.guild_id, league
+            ):
+                await reply_unknown_league(interaction, league)
+                return
+
+        player = guild_stats.players.get(str(user.id))
+        if not player:
+            await interaction.followup.send(
+                f"{user.display_name} hasn't played a completed round yet!"
+            )
+            return
+
+        usernames = await self.bot.resolve_display_names(
+            interaction.guild,
+            [other_id for other_id, _ in player.votes_given + player.votes_from],
+        )
+
+        embed = discord.Embed(
+            title=fit(f"📈 Stats for {user.display_name}", EMBED_TITLE_LIMIT),
+            color=discord.Color.green(),
+        )
+        embed.add_field(
+            name="Rounds Played",
+            value=f"{player.rounds_played} of {guild_stats.round_count}",
+        )
+        embed.add_field(name="Average Votes", value=f"{player.average_votes:.1f} per round")
+        embed.add_field(name="Wins", value=f"{player.wins} ({player.win_rate:.0%})")
+        embed.add_field(name="Podium Finishes", value=str(player.podiums))
+        embed.add_field(
+            name="Streak",
+            value=f"{player.current_streak} round(s), best {player.longest_streak}",
+        )
+        embed.add_field(
+            name="Votes Most For",
+            value="\n".join(
+                f"{usernames[other_id]} - {votes} votes"
+                for other_id, votes in player.votes_given
+            )
+            or "No votes yet",
+            inline=False,
+        )
+        embed.add_field(
+            name="Most Votes From",
+            value="\n".join(
+                f"{usernames[other_id]} - {votes} votes"
+                for other_id, votes in player.votes_from
+            )
+            or "No votes yet",
+            inline=False,
+        )
+
+        await interaction.followup.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(HistoryCog(bot))
@@ -2,9 +2,32 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from discord.ui import Modal, TextInput
-import datetime
+import asyncio
+import logging
+import time
 from typing import Optional, List
-from ..db import DatabaseService
+from ..db import DatabaseService, DuplicateSubmission, UnknownLeague, league_name
+from ..links import TrackLink
+from ..ballot import BallotState, Ballots
+from ..live import LiveTallies, Tally
+from ..analysis import mark_rounds_completed
+from ..metadata import refresh_track_metadata
+from ..notify import ReminderSender
+from ..schedule import deadline_after, utcnow
+from ..scoring import describe_vote_penalty, get_scoring_system
+from ..stats import invalidate_stats
+from ..metrics import metrics
+from ..render import (
+    EMBED_FIELD_LIMIT,
+    MESSAGE_LIMIT,
+    Chunker,
+    chunk_messages,
+    fit,
+    format_timestamp,
+    get_renderer,
+)
+
+logger = logging.getLogger("musicleague-bot")
 
 # Emoji list for voting - supports up to 50 submissions
 VOTING_EMOJIS = [
@@ -15,14 +38,43 @@ VOTING_EMOJIS = [
     "❤️", "🧡", "💛", "🤍", "🖤", "💯", "🔮", "🌙", "☀️", "🔶"
 ]
 
+# How long a process may hold a round while posting its transition
+ROUND_LEASE_SECONDS = 10 * 60
+
+# Votes each player may cast in a round
+MAX_VOTES = 3
+
+# Results whose names are looked up before the first results message is sent
+RESULTS_FIRST_BATCH = 10
+
+# Describes the league option of the round commands
+LEAGUE_OPTION = "League to use (leave out for the main league)"
+
+
+async def reply_unknown_league(interaction, league):
+    """Tell the user a command named a league the server doesn't have."""
+    message = (
+        f"There's no league called **{league_name(league)}**. "
+        "See the server's leagues with `/league list`."
+    )
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
 
 class SubmissionModal(Modal):
-    """Modal for submitting a music entry."""
+    """Modal for submitting a music entry.
 
-    def __init__(self, db_service, guild_id):
+    The modal is submitted long after the command that showed it has
+    returned, so it opens its own database session when the entry arrives.
+    """
+
+    def __init__(self, bot, guild_id, league=None):
         super().__init__(title="Submit Music")
-        self.db_service = db_service
+        self.bot = bot
         self.guild_id = guild_id
+        self.league = league
 
         self.submission = TextInput(
             label="Music Link/Title",
@@ -42,26 +94,75 @@ class SubmissionModal(Modal):
         self.add_item(self.submission)
         self.add_item(self.description)
 
+    @metrics.timed("handler_seconds", handler="submission_modal")
     async def on_submit(self, interaction: discord.Interaction):
+        # Acknowledge straight away; near a deadline the database may be busy
+        # with hundreds of other submissions
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
         # Create submission in database
-        submission = await self.db_service.create_submission(
-            guild_id=self.guild_id,
-            user_id=str(interaction.user.id),
-            content=self.submission.value,
-            description=self.description.value if self.description.value else None,
-        )
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                submission = await db.create_submission(
+                    guild_id=self.guild_id,
+                    user_id=str(interaction.user.id),
+                    content=self.submission.value,
+                    description=self.description.value if self.description.value else None,
+                    league=self.league,
+                )
+            except DuplicateSubmission as e:
+                await interaction.followup.send(
+                    f"That song was already submitted {self._format_duplicate(e.match, e.round_id)}. "
+                    "This server doesn't allow repeats, so please pick another one!",
+                    ephemeral=True,
+                )
+                return
 
         if not submission:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "There's no active round to submit to!", ephemeral=True
             )
             return
 
-        await interaction.response.send_message(
-            f"Your submission has been recorded! Thank you for participating.",
-            ephemeral=True,
+        message = f"Your submission has been recorded! Thank you for participating."
+        if submission.duplicate_of:
+            message += (
+                "\n⚠️ Heads up: that song was already submitted "
+                f"{self._format_duplicate(submission.duplicate_of, submission.round_id)}."
+            )
+        await interaction.followup.send(message, ephemeral=True)
+
+        # Cache the track's title and artist now, so the ballot doesn't have to.
+        # The submission is saved already, so a failure here is only logged.
+        if submission.provider:
+            try:
+                await refresh_track_metadata(
+                    self.bot, TrackLink(submission.provider, submission.track_id)
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Couldn't cache metadata for {submission.provider}:{submission.track_id}: {e}"
+                )
+
+    def _format_duplicate(self, match, round_id):
+        """Describe where a song was submitted before."""
+        when = (
+            "in this round"
+            if match.round_id == round_id
+            else f"in Round #{match.round_number}"
         )
+        return f"{when} by <@{match.user_id}>"
 
+    async def on_error(self, interaction: discord.Interaction, error: Exception):
+        logger.exception(
+            "Error saving submission in guild %s", self.guild_id, exc_info=error
+        )
+        message = "Something went wrong saving your submission. Please try again."
+        if interaction.response.is_done():
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
 
 
 class RoundsCog(commands.Cog):
@@ -69,52 +170,68 @@ class RoundsCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.live = LiveTallies(bot)
+        self.ballots = Ballots()
+        self.reminders = ReminderSender(bot)
         self.check_rounds.start()
 
     def cog_unload(self):
         self.check_rounds.cancel()
+        self.live.cancel_all()
+        self.ballots.clear()
+        self.reminders.cancel_all()
 
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
+    async def on_raw_reaction_add(self, payload):
         """Handle reaction additions for voting."""
         # Skip bot reactions
-        if user.bot:
+        if payload.user_id == self.bot.user.id or (
+            payload.member and payload.member.bot
+        ):
             return
 
         # Check if this is a voting message
-        await self._handle_voting_reaction(reaction, user, True)
+        await self._handle_voting_reaction(payload, True)
 
     @commands.Cog.listener()
-    async def on_reaction_remove(self, reaction, user):
+    async def on_raw_reaction_remove(self, payload):
         """Handle reaction removals for voting."""
         # Skip bot reactions
-        if user.bot:
+        if payload.user_id == self.bot.user.id:
             return
 
         # Check if this is a voting message
-        await self._handle_voting_reaction(reaction, user, False)
+        await self._handle_voting_reaction(payload, False)
+
+    @metrics.timed("handler_seconds", handler="voting_reaction")
+    async def _handle_voting_reaction(self, payload, is_add):
+        """Handle voting reactions (both add and remove).
+
+        Uses raw reaction events so votes are seen even when the ballot is no
+        longer in the bot's message cache.
+        """
+        if payload.guild_id is None:
+            return  # Reactions in DMs are never votes
 
-    async def _handle_voting_reaction(self, reaction, user, is_add):
-        """Handle voting reactions (both add and remove)."""
-        message = reaction.message
-        
         # Check if this message is a voting message for an active round
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
             
             # Find if this message is a voting message
             from sqlalchemy import text
+            # The ballot is looked up by its message, through the voting message index
             query = text("""
-                SELECT r.id, r.round_number 
+                SELECT r.id, r.round_number, l.scoring, l.live_tally
                 FROM rounds r 
-                JOIN guilds g ON r.guild_id = g.id 
+                JOIN leagues l ON r.league_id = l.id 
+                JOIN guilds g ON l.guild_id = g.id 
                 WHERE r.voting_message_id = :message_id 
                 AND r.is_completed = FALSE 
                 AND g.guild_id = :guild_id
             """)
             result = await session.execute(query, {
-                "message_id": str(message.id),
-                "guild_id": str(message.guild.id)
+                "message_id": str(payload.message_id),
+                "guild_id": str(payload.guild_id)
             })
             round_data = result.fetchone()
             
@@ -122,79 +239,212 @@ class RoundsCog(commands.Cog):
                 return  # Not a voting message
             
             round_id = round_data[0]
+            system = get_scoring_system(round_data[2])
+            live_tally = round_data[3]
             
             # Check if the reaction emoji is one of our voting emojis
-            emoji_str = str(reaction.emoji)
+            emoji_str = str(payload.emoji)
             if emoji_str not in VOTING_EMOJIS:
                 return  # Not a voting emoji
             
-            # If adding a reaction, enforce the 3-vote limit
+            ballot_index = VOTING_EMOJIS.index(emoji_str)
+            ballot = await self._get_ballot(db, round_id)
+
             if is_add:
-                # Count user's current reactions on this message
-                user_reaction_count = 0
-                for emoji in VOTING_EMOJIS:
-                    try:
-                        msg_reaction = discord.utils.get(message.reactions, emoji=emoji)
-                        if msg_reaction:
-                            users = [u async for u in msg_reaction.users()]
-                            if user in users:
-                                user_reaction_count += 1
-                    except:
-                        continue
-                
-                # If user already has 3 reactions, remove this new one
-                if user_reaction_count > 3:
-                    try:
-                        await message.remove_reaction(reaction.emoji, user)
-                    except:
-                        pass
+                # Players can't vote for their own submission, nor more than MAX_VOTES
+                # times. Counting the vote straight away keeps a burst of
+                # reactions from the same voter from all passing the limit.
+                if ballot.has_voted(payload.user_id, ballot_index):
+                    return  # Already counted, e.g. given points with /vote
+                if (
+                    ballot.owns(payload.user_id, ballot_index)
+                    or ballot.count(payload.user_id) >= MAX_VOTES
+                    or not ballot.add(payload.user_id, ballot_index)
+                ):
+                    await self._reject_reaction(payload)
+                    return
+
+                # A reaction is a point of the ballot's points, if it has any left
+                if system.allocation is not None:
+                    points = await db.get_voter_ballot(
+                        round_id, payload.user_id, ballot_index
+                    )
+                    if system.check_vote(1, points):
+                        ballot.remove(payload.user_id, ballot_index)
+                        await self._reject_reaction(payload)
+                        return
+
+                # Keep who voted for what, for /stats and scoring
+                if not await db.record_vote(round_id, payload.user_id, ballot_index):
+                    ballot.remove(payload.user_id, ballot_index)
+                    return
+            else:
+                # Reactions the bot took away, or never counted, were never stored
+                if not ballot.remove(payload.user_id, ballot_index):
+                    return
+                await db.remove_vote(round_id, payload.user_id, ballot_index)
+
+            if live_tally != "off":
+                await self._show_live_vote(
+                    db,
+                    payload.guild_id,
+                    round_id,
+                    round_data[2],
+                    live_tally,
+                    ballot,
+                    channel_id=payload.channel_id,
+                )
+
+    async def _reject_reaction(self, payload):
+        """Take away a reaction that can't be counted as a vote."""
+        message = await self._get_voting_message(payload)
+        if not message:
+            return
+        try:
+            await message.remove_reaction(payload.emoji, discord.Object(payload.user_id))
+        except discord.HTTPException:
+            pass
+
+    async def _get_ballot(self, db, round_id):
+        """The round's ballot state, rebuilt from its stored votes if this process has none."""
+        ballot = self.ballots.get(round_id)
+        if ballot is None:
+            submitters, votes = await db.get_ballot_votes(round_id)
+            ballot = self.ballots.add(
+                round_id, BallotState.load(submitters[: len(VOTING_EMOJIS)], votes)
+            )
+        return ballot
+
+    async def load_ballots(self):
+        """Rebuild the ballots of the rounds being voted on when the bot starts.
+
+        If they can't be read, no ballot is kept and each one is rebuilt from
+        its stored votes when it's first needed instead.
+        """
+        try:
+            async with self.bot.get_db_session() as session:
+                open_ballots = await DatabaseService(session).get_open_ballots()
+        except Exception:
+            logger.exception("Couldn't load the open ballots")
+            metrics.increment("ballot_load_failures_total")
+            return
+
+        for round_id, (guild_id, submitters, votes) in open_ballots.items():
+            # Other processes count the votes of the guilds on their shards
+            if self.bot.owns_guild(guild_id):
+                self.ballots.add(
+                    round_id, BallotState.load(submitters[: len(VOTING_EMOJIS)], votes)
+                )
+
+    async def _show_live_vote(
+        self, db, guild_id, round_id, scoring, mode, ballot, channel_id=None
+    ):
+        """Show a vote on the round's live tally, starting one if this process has none."""
+        if self.live.get(round_id) is None:
+            round_obj = await db.get_round(round_id)
+            renderer = await get_renderer(db, guild_id)
+            tally = Tally(
+                mode,
+                self._ballot_header(renderer, round_obj, scoring),
+                VOTING_EMOJIS[: len(ballot.owners)],
+                ballot,
+                round_obj.voting_channel_id or channel_id,
+                round_obj.voting_message_id,
+            )
+            self.live.add(round_id, tally, renderer)
+        else:
+            self.live.changed(round_id)
+
+    async def _get_voting_message(self, payload):
+        """Get the message a raw reaction was added to, from cache if possible."""
+        message = discord.utils.get(self.bot.cached_messages, id=payload.message_id)
+        if message:
+            return message
+
+        channel = self.bot.get_channel(payload.channel_id)
+        if not channel:
+            return None
+
+        try:
+            return await channel.fetch_message(payload.message_id)
+        except discord.HTTPException:
+            return None
 
     @tasks.loop(
         minutes=5
     )  # Changed from 15 to 5 minutes for faster response to manual transitions
+    @metrics.timed("handler_seconds", handler="check_rounds")
     async def check_rounds(self):
         """Check for rounds that need to transition from submission to voting or to complete."""
-        now = datetime.datetime.utcnow()
-
-        # We need to check all guilds
-        async with self.bot.get_db_session() as session:
-            db = DatabaseService(session)
-
-            # Get all guilds
-            from sqlalchemy import text
-
-            query = text("SELECT id, guild_id FROM guilds")
-            guilds = await session.execute(query)
-
-            for guild_row in guilds:
-                guild_id = guild_row[1]  # SQLAlchemy returns tuple
+        now = utcnow()
+
+        async with (
+            self.bot.get_db_session() as session,
+            self.bot.get_read_session() as read_session,
+        ):
+            # Templates and track metadata for the posts are read from the read engine
+            db = DatabaseService(session, read_session)
+
+            # Only rounds whose deadline has passed, across every guild
+            due_rounds = await db.get_due_rounds(now)
+            metrics.set_gauge("due_rounds", len(due_rounds))
+
+            for active_round, guild_id, league_id in due_rounds:
+                # Other processes handle the guilds on their shards
+                if not self.bot.owns_guild(guild_id):
+                    continue
 
-                # Get the active round for this guild
-                active_round = await db.get_active_round(guild_id)
-                if not active_round or active_round.is_completed:
+                # No round running, so the league's next queued theme is due
+                if active_round is None or active_round.is_completed:
+                    new_round = await db.start_queued_round(league_id, now)
+                    if new_round:
+                        await self._announce_queued_round(db, guild_id, new_round)
                     continue
 
-                # Check if submission period is over but voting hasn't started
-                if (
-                    now >= active_round.submission_end
-                    and not active_round.voting_message_id
+                # Make sure no other process is already posting this transition
+                if not await db.claim_round(
+                    active_round.id, self.bot.instance_id, ROUND_LEASE_SECONDS
                 ):
-                    # Transition to voting phase
-                    await self.start_voting_phase(db, active_round)
+                    continue
 
-                # Check if voting period is over
-                elif now >= active_round.voting_end and not active_round.is_completed:
-                    # Complete the round and calculate results
-                    await self.complete_round(db, active_round)
+                try:
+                    # The round may have moved on while we were waiting for the lease
+                    await session.refresh(active_round)
+                    if active_round.is_completed:
+                        continue
+
+                    # Check if submission period is over but voting hasn't started
+                    if (
+                        now >= active_round.submission_end
+                        and not active_round.voting_message_id
+                    ):
+                        # Transition to voting phase
+                        await self.start_voting_phase(db, active_round)
+
+                    # Check if voting period is over
+                    elif now >= active_round.voting_end:
+                        # Complete the round and calculate results
+                        await self.complete_round(db, active_round)
+
+                    # Remind the players the deadline is coming up
+                    elif (
+                        active_round.next_reminder
+                        and now >= active_round.next_reminder
+                    ):
+                        await self.send_reminders(db, active_round, now)
+                finally:
+                    await db.release_round(active_round.id, self.bot.instance_id)
 
     @check_rounds.before_loop
     async def before_check_rounds(self):
         await self.bot.wait_until_ready()
+        await self.load_ballots()
 
+    @metrics.timed("handler_seconds", handler="start_voting_phase")
     async def start_voting_phase(self, db, round_obj):
         """Start the voting phase for a round using emoji reactions."""
         # Get guild info without lazy loading
-        discord_guild_id, channel_id, voting_days = await db.get_round_guild_info(
+        discord_guild_id, channel_id, voting_days, settings = await db.get_round_guild_info(
             round_obj.id
         )
         if not discord_guild_id:
@@ -232,6 +482,9 @@ class RoundsCog(commands.Cog):
             # Send the notification
             if target_channel:
                 await target_channel.send("The round has ended with no submissions!")
+                # The league's next queued theme may have started with the completion
+                if round_obj.next_round:
+                    await self._announce_round(db, guild, round_obj.next_round, target_channel)
 
             return
 
@@ -263,18 +516,55 @@ class RoundsCog(commands.Cog):
         if target_channel:
             try:
                 # Send a header message followed by detailed submission info
-                main_content = self._format_voting_header(round_obj)
-                
+                renderer = await get_renderer(db, discord_guild_id)
+                main_content = self._ballot_header(renderer, round_obj, settings.scoring)
+
+                # Votes are counted from the first reaction, so the ballot comes first
+                ballot = self.ballots.add(
+                    round_obj.id,
+                    BallotState([submission.player.user_id for submission in submissions]),
+                )
+
+                # Voters can follow the votes on the ballot message, if the server wants
+                tally = None
+                if settings.live_tally != "off":
+                    tally = Tally(
+                        settings.live_tally,
+                        main_content,
+                        VOTING_EMOJIS[: len(submissions)],
+                        ballot,
+                        str(target_channel.id),
+                    )
+                    main_content = tally.render(renderer)
+                    tally.shown = tally.version  # Posted with the ballot
+
                 # Send the main voting message
                 voting_message = await target_channel.send(
                     main_content, allowed_mentions=discord.AllowedMentions.none()
                 )
-                
-                # Send detailed submission info in follow-up messages
-                for idx, submission in enumerate(submissions):
-                    detail_entry = self._format_voting_submission_detail(idx, submission)
+                if tally:
+                    tally.message_id = str(voting_message.id)
+                    self.live.add(round_obj.id, tally, renderer)
+
+                # Titles and artists cached when the songs were submitted
+                track_metadata = await db.get_track_metadata(
+                    (submission.provider, submission.track_id)
+                    for submission in submissions
+                )
+
+                # Send detailed submission info in as few follow-up messages as fit
+                entries = (
+                    renderer.voting_entry(
+                        VOTING_EMOJIS[idx],
+                        idx,
+                        submission,
+                        track_metadata.get((submission.provider, submission.track_id)),
+                    )
+                    for idx, submission in enumerate(submissions)
+                )
+                for chunk in chunk_messages(entries):
                     await target_channel.send(
-                        detail_entry, allowed_mentions=discord.AllowedMentions.none()
+                        chunk, allowed_mentions=discord.AllowedMentions.none()
                     )
 
                 # Add emoji reactions for each submission
@@ -288,81 +578,84 @@ class RoundsCog(commands.Cog):
 
                 # Save the voting message ID
                 await db.update_round_message_ids(
-                    round_obj.id, voting_message_id=str(voting_message.id)
+                    round_obj.id,
+                    voting_message_id=str(voting_message.id),
+                    voting_channel_id=str(target_channel.id),
                 )
 
+                # Reminders now count down to the voting deadline
+                if settings.reminder_hours:
+                    await db.schedule_reminder(
+                        round_obj, settings.reminder_hours, utcnow()
+                    )
+
             except Exception as e:
                 # If message creation fails, send an error message
                 await target_channel.send(
                     f"Error creating voting message: {str(e)}. Please contact the bot administrator."
                 )
 
-    async def _get_username(self, user_id):
-        """Helper function to safely get a username from a user ID."""
-        try:
-            user = self.bot.get_user(int(user_id)) or await self.bot.fetch_user(int(user_id))
-            return user.display_name if user else f"User {user_id}"
-        except Exception:
-            return f"User {user_id}"
-    
-    def _get_medal_emoji(self, position):
-        """Get a medal emoji based on position."""
-        if position == 0:
-            return "🥇 "
-        elif position == 1:
-            return "🥈 "
-        elif position == 2:
-            return "🥉 "
-        return ""
-    
-    def _format_submission_result(self, idx, submission, submission_index, score, username):
-        """Format a result entry for a submission."""
-        medal = self._get_medal_emoji(idx)
-        voting_emoji = f"{VOTING_EMOJIS[submission_index]} " if submission_index < len(VOTING_EMOJIS) else ""
-        
-        entry = f"### {medal}{voting_emoji}#{submission_index + 1}: {username} - {score} votes\n"
-        entry += f"{submission.content}\n"
-        if submission.description:
-            entry += f"*{submission.description}*\n"
-        entry += "\n"
-        
-        return entry
-    
-    async def _format_leaderboard(self, leaderboard):
-        """Format the leaderboard section."""
-        leaderboard_msg = "## 📊 Current Leaderboard\n\n"
-        
-        if not leaderboard:
-            return leaderboard_msg + "No players yet!\n"
-        
-        for idx, player in enumerate(leaderboard, 1):
-            username = await self._get_username(player.user_id)
-            leaderboard_msg += f"#{idx}: {username} - {player.total_score} points\n"
-        
-        return leaderboard_msg
-    
-    def _format_voting_header(self, round_obj):
-        """Format the header section of a voting message."""
-        header = f"# 🎵 Voting for Round #{round_obj.round_number} 🎵\n\n"
-        header += f"React with emojis to vote for your favorite submissions! You can vote for up to **3 submissions**.\n"
-        header += f"Voting ends <t:{int(round_obj.voting_end.timestamp())}:R>\n\n"
-        header += f"**Theme**: {round_obj.theme}\n\n"
-        return header
-        
-    def _format_voting_submission_detail(self, submission_index, submission):
-        """Format detailed submission information for voting messages."""
-        emoji = VOTING_EMOJIS[submission_index] if submission_index < len(VOTING_EMOJIS) else "📌"
-        detail = f"{emoji} **Submission #{submission_index + 1}**\n"
-        detail += f"{submission.content}\n"
-        if submission.description:
-            detail += f"*{submission.description}*\n"
-        detail += "\n"
-        return detail
+    async def send_reminders(self, db, round_obj, now):
+        """Remind the players who haven't submitted or voted yet of the coming deadline.
+
+        The players are found in one query and reminded in the background,
+        so a guild with hundreds of them doesn't hold up the scheduler.
+        """
+        discord_guild_id, channel_id, _, settings = await db.get_round_guild_info(
+            round_obj.id
+        )
+        if not discord_guild_id:
+            return
 
+        voting = bool(round_obj.voting_message_id)
+        deadline = round_obj.voting_end if voting else round_obj.submission_end
+        guild = self.bot.get_guild(int(discord_guild_id))
+        if guild and now < deadline:
+            user_ids = await db.get_reminder_targets(round_obj.id, voting)
+            if user_ids:
+                # Remind voters where the ballot is
+                target_channel = None
+                channel_id = (voting and round_obj.voting_channel_id) or channel_id
+                if channel_id:
+                    target_channel = guild.get_channel(int(channel_id))
+                if not target_channel:
+                    for channel in guild.text_channels:
+                        if channel.permissions_for(guild.me).send_messages:
+                            target_channel = channel
+                            break
+
+                renderer = await get_renderer(db, discord_guild_id)
+                self.reminders.send(
+                    guild,
+                    target_channel,
+                    user_ids,
+                    renderer.reminder(round_obj, voting, guild.name),
+                    settings.reminder_delivery,
+                )
+
+        await db.schedule_reminder(round_obj, settings.reminder_hours, now)
+
+    def _ballot_header(self, renderer, round_obj, scoring):
+        """The ballot message voters react to, explaining the server's scoring."""
+        system = get_scoring_system(scoring)
+        return fit(
+            renderer.voting_header(round_obj, MAX_VOTES) + system.ballot_note(),
+            MESSAGE_LIMIT,
+        )
+
+    @metrics.timed("handler_seconds", handler="complete_round")
     async def complete_round(self, db, round_obj):
         """Complete a round and calculate results based on emoji reactions."""
+        started = time.perf_counter()
+
+        # The ballot shows the final count before the results are posted
+        await self.live.close(round_obj.id)
+        self.ballots.discard(round_obj.id)
+
         # Get guild info without lazy loading
-        discord_guild_id, channel_id, _ = await db.get_round_guild_info(round_obj.id)
+        discord_guild_id, channel_id, _, settings = await db.get_round_guild_info(
+            round_obj.id
+        )
         if not discord_guild_id:
             return  # Couldn't find guild info
 
@@ -418,30 +711,140 @@ class RoundsCog(commands.Cog):
                 # Commit the vote counts to the database
                 await db.session.commit()
 
-        # Calculate results
-        results = await db.calculate_round_results(round_obj.id)
+        # Find the target channel for results
+        target_channel = None
 
-        # Create results message
-        results_content = f"# 🏆 Results for Round #{round_obj.round_number} 🏆\n\n"
-        results_content += "The round has ended! Here are the results:\n\n"
-        results_content += f"**Theme**: {round_obj.theme}\n\n"
+        if channel_id:
+            # Try to get the dedicated channel
+            target_channel = guild.get_channel(int(channel_id))
+            if (
+                target_channel
+                and not target_channel.permissions_for(guild.me).send_messages
+            ):
+                target_channel = None
 
-        # Add each submission to the results with their score
-        for idx, (player, submission, submission_index, score) in enumerate(results):
-            username = await self._get_username(player.user_id)
-            results_content += self._format_submission_result(
-                idx, submission, submission_index, score, username
+        # If no dedicated channel or it wasn't found/accessible, find an appropriate channel
+        if not target_channel:
+            for channel in guild.text_channels:
+                if channel.permissions_for(guild.me).send_messages:
+                    target_channel = channel
+                    break
+
+        if not target_channel:
+            # Nowhere to post; score and complete the round anyway
+            await db.calculate_round_results(round_obj.id)
+            await self._mark_completed(db, discord_guild_id, round_obj, settings)
+            return
+
+        # Post the header while the round is being scored
+        renderer = await get_renderer(db, discord_guild_id)
+        header_task = asyncio.create_task(
+            target_channel.send(renderer.results_header(round_obj))
+        )
+        leaderboard_task = None
+
+        try:
+            # Calculate results. The round is completed as soon as it's scored,
+            # so posting the results failing doesn't score it again
+            results = await db.calculate_round_results(round_obj.id)
+            await self._mark_completed(db, discord_guild_id, round_obj, settings)
+
+            # Scores are committed, so the leaderboard can be prepared alongside
+            leaderboard_task = asyncio.create_task(
+                self._prepare_leaderboard(guild, discord_guild_id, renderer, settings.league)
+            )
+            track_metadata = await db.get_track_metadata(
+                (submission.provider, submission.track_id) for _, submission, *_ in results
             )
 
-        # Add leaderboard
-        leaderboard = await db.get_leaderboard(discord_guild_id, 5)
-        results_content += await self._format_leaderboard(leaderboard)
+            results_message = await header_task
+            metrics.observe(
+                "results_first_message_seconds", time.perf_counter() - started
+            )
 
-        # Find the target channel for results
+            # Send detailed results as soon as each message is ready
+            # Submitters who didn't vote are listed when the guild penalises them
+            penalty = None
+            if settings.vote_penalty != "none":
+                penalty = describe_vote_penalty(
+                    settings.vote_penalty, settings.non_voter_penalty
+                )
+            async for chunk in self._stream_results(
+                guild,
+                results,
+                track_metadata,
+                renderer,
+                get_scoring_system(settings.scoring).unit,
+                penalty,
+            ):
+                await target_channel.send(chunk)
+
+            # Send the leaderboard
+            await target_channel.send(await leaderboard_task)
+        finally:
+            for task in (header_task, leaderboard_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        await db.update_round_message_ids(
+            round_obj.id, results_message_id=str(results_message.id)
+        )
+
+        # The league's next queued theme may have started with the completion
+        if round_obj.next_round:
+            await self._announce_round(db, guild, round_obj.next_round, target_channel)
+
+    async def _mark_completed(self, db, discord_guild_id, round_obj, settings):
+        """Mark a scored round as completed and forget the statistics it changes."""
+        await db.complete_round(round_obj.id)
+        invalidate_stats(discord_guild_id, settings.league)
+        mark_rounds_completed(discord_guild_id, settings.league)
+
+    def _round_embed(self, renderer, round_obj):
+        """The announcement of a new round, with its theme and deadlines."""
+        embed = discord.Embed(
+            title=renderer.announcement_title(round_obj),
+            description=renderer.announcement_description(round_obj),
+            color=discord.Color.blue(),
+        )
+
+        # Add theme (now required)
+        embed.add_field(
+            name="Theme", value=fit(round_obj.theme, EMBED_FIELD_LIMIT), inline=False
+        )
+
+        embed.add_field(
+            name="Submission Deadline",
+            value=f"{format_timestamp(round_obj.submission_end, 'F')} ({format_timestamp(round_obj.submission_end)})",
+            inline=False,
+        )
+
+        embed.add_field(
+            name="Voting Deadline",
+            value=f"{format_timestamp(round_obj.voting_end, 'F')} ({format_timestamp(round_obj.voting_end)})",
+            inline=False,
+        )
+        return embed
+
+    async def _announce_round(self, db, guild, round_obj, channel):
+        """Post a new round's announcement in ``channel`` and remember the message."""
+        renderer = await get_renderer(db, guild.id)
+        message = await channel.send(embed=self._round_embed(renderer, round_obj))
+        await db.update_round_message_ids(
+            round_obj.id, submission_message_id=str(message.id)
+        )
+        return message
+
+    async def _announce_queued_round(self, db, discord_guild_id, round_obj):
+        """Announce a round the scheduler started from its league's queue."""
+        guild = self.bot.get_guild(int(discord_guild_id))
+        if not guild:
+            return  # Bot might have left the guild
+
+        _, channel_id, _, _ = await db.get_round_guild_info(round_obj.id)
         target_channel = None
 
         if channel_id:
-            # Try to get the dedicated channel
             target_channel = guild.get_channel(int(channel_id))
             if (
                 target_channel
@@ -456,57 +859,101 @@ class RoundsCog(commands.Cog):
                     target_channel = channel
                     break
 
-        # Only proceed if we have a valid channel
         if target_channel:
-            # Always use the same pattern regardless of message length:
-            # 1. Send a summary with title
-            # 2. Add all detailed results
-            # 3. Send the leaderboard
-            
-            # Create a main results message with a summary
-            round_results = (
-                f"# 🏆 Results for Round #{round_obj.round_number} 🏆\n\n"
+            await self._announce_round(db, guild, round_obj, target_channel)
+
+    async def _stream_results(
+        self, guild, results, track_metadata, renderer, unit="votes", penalty=None
+    ):
+        """Yield the detailed results as messages ready to send, in order.
+
+        Names for the top results are looked up separately from the rest, so
+        the first message (the top results) only waits for those while the
+        others resolve. With ``penalty`` (how it reads), submitters who didn't
+        vote are listed after the results.
+        """
+        batches = [
+            results[:RESULTS_FIRST_BATCH],
+            results[RESULTS_FIRST_BATCH:],
+        ]
+        batches = [batch for batch in batches if batch]
+        lookups = [
+            asyncio.create_task(
+                self.bot.resolve_display_names(
+                    guild, [result.player.user_id for result in batch]
+                )
             )
-            round_results += f"**Theme**: {round_obj.theme}\n\n"
-            round_results += "The round has ended! Here are the winners:\n\n"
-
-            results_message = await target_channel.send(round_results)
-            round_results = ""
-            # Send detailed results in follow-up messages
-            for idx, (player, submission, submission_index, score) in enumerate(results):
-                username = await self._get_username(player.user_id)
-                entry = self._format_submission_result(
-                    idx, submission, submission_index, score, username
-                )
-
-                # If adding this entry would make the message too long, send what we have and start a new message
-                if len(round_results + entry) > 1900:
-                    if round_results:  # Only send if not empty
-                        await target_channel.send(round_results)
-                    round_results = entry
-                else:
-                    round_results += entry
+            for batch in batches
+        ]
 
-            # Send any remaining detailed results
-            if round_results:
-                await target_channel.send(round_results)
-
-            # Send the leaderboard
-            leaderboard_msg = await self._format_leaderboard(leaderboard)
-            await target_channel.send(leaderboard_msg)
+        try:
+            chunker = Chunker()
+            non_voters = []
+            for batch, lookup in zip(batches, lookups):
+                usernames = await lookup
+                for player, submission, submission_index, score, voted, place in batch:
+                    # Tied submissions share a place, and its medal
+                    entry = renderer.result_entry(
+                        place - 1,
+                        VOTING_EMOJIS[submission_index]
+                        if submission_index < len(VOTING_EMOJIS)
+                        else None,
+                        submission_index,
+                        submission,
+                        score,
+                        usernames[player.user_id],
+                        track_metadata.get((submission.provider, submission.track_id)),
+                        unit,
+                    )
+                    if not voted:
+                        non_voters.append(usernames[player.user_id])
+                    for chunk in chunker.add(entry):
+                        yield chunk
+
+                # Non-voters go in the same message as the last results
+                if batch is batches[-1] and penalty and non_voters:
+                    for chunk in chunker.add(renderer.non_voters(non_voters, penalty)):
+                        yield chunk
+
+                # Send what is ready before waiting on the next batch's names
+                chunk = chunker.flush()
+                if chunk:
+                    yield chunk
+        finally:
+            for lookup in lookups:
+                lookup.cancel()
+
+    async def _prepare_leaderboard(self, guild, discord_guild_id, renderer, league=None):
+        """Load and format the league's leaderboard in a session of its own."""
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            # The scores were only just committed, so read them from the primary
+            leaderboard = await db.get_leaderboard(
+                discord_guild_id, 5, fresh=True, league=league
+            )
 
-            # Save the message ID and mark as completed
-            await db.complete_round(round_obj.id, str(results_message.id))
+        usernames = await self.bot.resolve_display_names(
+            guild, [player.user_id for player in leaderboard]
+        )
+        return renderer.leaderboard(leaderboard, usernames)
 
     @app_commands.command(name="start", description="Start a new round of Music League")
-    @app_commands.describe(theme="Theme for this round (required)")
-    async def start_round(self, interaction: discord.Interaction, theme: str):
+    @app_commands.describe(theme="Theme for this round (required)", league=LEAGUE_OPTION)
+    async def start_round(
+        self, interaction: discord.Interaction, theme: str, league: Optional[str] = None
+    ):
         """Start a new round of Music League with a specific theme."""
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
 
+            # The league's settings, including its channel
+            league_obj = await db.get_league(str(interaction.guild_id), league)
+            if league_obj is None:
+                await reply_unknown_league(interaction, league)
+                return
+
             # Check if there's already an active round
-            active_round = await db.get_active_round(str(interaction.guild_id))
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
             if active_round and not active_round.is_completed:
                 await interaction.response.send_message(
                     f"There's already an active round! Round #{active_round.round_number} ends <t:{int(active_round.submission_end.timestamp())}:R>",
@@ -523,33 +970,9 @@ class RoundsCog(commands.Cog):
                 return
 
             # Create new round with the required theme
-            new_round = await db.create_round(str(interaction.guild_id), theme)
-
-            # Create round announcement
-            embed = discord.Embed(
-                title=f"🎵 New Music League Round #{new_round.round_number} 🎵",
-                description=f"A new round has started! Submit your music with `/submit`.",
-                color=discord.Color.blue(),
-            )
+            new_round = await db.create_round(str(interaction.guild_id), theme, league)
 
-            # Add theme (now required)
-            embed.add_field(name="Theme", value=theme, inline=False)
-
-            embed.add_field(
-                name="Submission Deadline",
-                value=f"<t:{int(new_round.submission_end.timestamp())}:F> (<t:{int(new_round.submission_end.timestamp())}:R>)",
-                inline=False,
-            )
-
-            embed.add_field(
-                name="Voting Deadline",
-                value=f"<t:{int(new_round.voting_end.timestamp())}:F> (<t:{int(new_round.voting_end.timestamp())}:R>)",
-                inline=False,
-            )
-
-            # Get guild settings
-            guild = await db.get_or_create_guild(str(interaction.guild_id))
-            dedicated_channel_id = guild.channel_id
+            dedicated_channel_id = league_obj.channel_id
 
             # Respond to the interaction first
             await interaction.response.send_message(
@@ -563,10 +986,7 @@ class RoundsCog(commands.Cog):
                     channel
                     and channel.permissions_for(interaction.guild.me).send_messages
                 ):
-                    message = await channel.send(embed=embed)
-                    await db.update_round_message_ids(
-                        new_round.id, submission_message_id=str(message.id)
-                    )
+                    await self._announce_round(db, interaction.guild, new_round, channel)
 
                     # Update the user's response
                     await interaction.edit_original_response(
@@ -575,9 +995,8 @@ class RoundsCog(commands.Cog):
                     return
 
             # If no dedicated channel or couldn't send to it, send in the current channel
-            message = await interaction.channel.send(embed=embed)
-            await db.update_round_message_ids(
-                new_round.id, submission_message_id=str(message.id)
+            await self._announce_round(
+                db, interaction.guild, new_round, interaction.channel
             )
 
             # Update the user's response
@@ -585,16 +1004,121 @@ class RoundsCog(commands.Cog):
                 content="Round started! See the announcement below."
             )
 
+    @app_commands.command(
+        name="queue_theme", description="Queue a theme for a later round"
+    )
+    @app_commands.describe(
+        theme="Theme for the round",
+        start="Don't start it before this time in the league's timezone, like 2024-06-01 18:00",
+        league=LEAGUE_OPTION,
+    )
+    async def queue_theme(
+        self,
+        interaction: discord.Interaction,
+        theme: str,
+        start: Optional[str] = None,
+        league: Optional[str] = None,
+    ):
+        """Add a theme to the end of a league's queue."""
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                queued = await db.queue_theme(
+                    str(interaction.guild_id),
+                    theme,
+                    start,
+                    str(interaction.user.id),
+                    league,
+                )
+            except UnknownLeague:
+                await reply_unknown_league(interaction, league)
+                return
+            except ValueError as e:
+                await interaction.response.send_message(f"{e}.", ephemeral=True)
+                return
+
+        message = (
+            f"Queued **{fit(queued.theme, EMBED_FIELD_LIMIT)}** as #{queued.place} "
+            f"for **{league_name(league)}**."
+        )
+        if queued.start_at:
+            message += f" It won't start before {format_timestamp(queued.start_at, 'F')}."
+        await interaction.response.send_message(message, ephemeral=True)
+
+    @app_commands.command(
+        name="queued_themes", description="List or remove the themes queued for later rounds"
+    )
+    @app_commands.describe(
+        remove="Number of a theme to take out of the queue",
+        league=LEAGUE_OPTION,
+    )
+    async def queued_themes(
+        self,
+        interaction: discord.Interaction,
+        remove: Optional[int] = None,
+        league: Optional[str] = None,
+    ):
+        """Show a league's theme queue, or take a theme out of it."""
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                if remove is not None:
+                    # Anyone may take out their own themes; managers any theme
+                    user_id = None
+                    if not interaction.user.guild_permissions.manage_guild:
+                        user_id = str(interaction.user.id)
+                    removed = await db.remove_queued_theme(
+                        str(interaction.guild_id), remove, user_id, league
+                    )
+                    await interaction.response.send_message(
+                        f"Removed **{fit(removed.theme, EMBED_FIELD_LIMIT)}** from the queue.",
+                        ephemeral=True,
+                    )
+                    return
+
+                league_obj, themes = await db.get_queue(str(interaction.guild_id), league)
+            except UnknownLeague:
+                await reply_unknown_league(interaction, league)
+                return
+            except ValueError as e:
+                await interaction.response.send_message(f"{e}.", ephemeral=True)
+                return
+
+        embed = discord.Embed(
+            title=f"Queued Themes: {league_obj.name}", color=discord.Color.blue()
+        )
+        if not themes:
+            embed.description = "Nothing queued. Add a theme with `/queue_theme`."
+        elif league_obj.next_start:
+            embed.description = (
+                f"The next theme starts {format_timestamp(league_obj.next_start)}, "
+                "or when the current round ends if that's later."
+            )
+        else:
+            embed.description = "The next round starts when someone uses `/start`."
+
+        for place, queued in enumerate(themes, 1):
+            details = f"Queued by <@{queued.added_by}>" if queued.added_by else "Queued"
+            if queued.start_at:
+                details += f", not before {format_timestamp(queued.start_at, 'F')}"
+            embed.add_field(
+                name=f"#{place}",
+                value=fit(f"{queued.theme}\n{details}", EMBED_FIELD_LIMIT),
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @app_commands.command(
         name="submit", description="Submit a song for the current Music League round"
     )
-    async def submit(self, interaction: discord.Interaction):
+    @app_commands.describe(league=LEAGUE_OPTION)
+    async def submit(self, interaction: discord.Interaction, league: Optional[str] = None):
         """Submit a song for the current Music League round."""
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
 
             # Check if there's an active round
-            active_round = await db.get_active_round(str(interaction.guild_id))
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
 
             if not active_round:
                 await interaction.response.send_message(
@@ -611,7 +1135,7 @@ class RoundsCog(commands.Cog):
                 return
 
             # Check if the submission period is over
-            now = datetime.datetime.utcnow()
+            now = utcnow()
             if now >= active_round.submission_end:
                 await interaction.response.send_message(
                     f"The submission period for this round has ended! Voting is now open until <t:{int(active_round.voting_end.timestamp())}:F>",
@@ -620,19 +1144,146 @@ class RoundsCog(commands.Cog):
                 return
 
             # Show submission modal
-            modal = SubmissionModal(db, str(interaction.guild_id))
+            modal = SubmissionModal(self.bot, str(interaction.guild_id), league)
             await interaction.response.send_modal(modal)
 
+    @app_commands.command(
+        name="vote", description="Give points to a submission on the current ballot"
+    )
+    @app_commands.describe(
+        number="Submission number on the ballot",
+        points="Points to give (0 takes your vote back)",
+        league=LEAGUE_OPTION,
+    )
+    async def vote(
+        self,
+        interaction: discord.Interaction,
+        number: int,
+        points: int,
+        league: Optional[str] = None,
+    ):
+        """Vote with points, in leagues whose scoring system uses them."""
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+
+            settings = await db.get_league(str(interaction.guild_id), league)
+            if settings is None:
+                await reply_unknown_league(interaction, league)
+                return
+            system = get_scoring_system(settings.scoring)
+            if system.allocation is None:
+                await interaction.response.send_message(
+                    "This league's rounds are scored by reacting to the ballot. "
+                    "React to a submission to vote for it!",
+                    ephemeral=True,
+                )
+                return
+
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
+            if (
+                not active_round
+                or active_round.is_completed
+                or not active_round.voting_message_id
+            ):
+                await interaction.response.send_message(
+                    "There's no round being voted on right now!", ephemeral=True
+                )
+                return
+
+            lowest, highest = system.allocation
+            if points and not lowest <= points <= highest:
+                allowed = str(lowest) if lowest == highest else f"{lowest} to {highest}"
+                await interaction.response.send_message(
+                    f"You can give a submission {allowed} points, or 0 to take your "
+                    f"vote back.",
+                    ephemeral=True,
+                )
+                return
+
+            if not 1 <= number <= len(VOTING_EMOJIS):
+                await interaction.response.send_message(
+                    f"There's no Submission #{number} on the ballot.", ephemeral=True
+                )
+                return
+
+            ballot_index = number - 1
+            ballot = await self._get_ballot(db, active_round.id)
+            if not points:
+                removed = ballot.remove(interaction.user.id, ballot_index)
+                # Downvotes aren't on the ballot, so this may still take one back
+                await db.remove_vote(active_round.id, interaction.user.id, ballot_index)
+                await interaction.response.send_message(
+                    f"Took back your vote for Submission #{number}.", ephemeral=True
+                )
+                if removed and settings.live_tally != "off":
+                    await self._show_live_vote(
+                        db,
+                        interaction.guild_id,
+                        active_round.id,
+                        settings.scoring,
+                        settings.live_tally,
+                        ballot,
+                    )
+                return
+
+            if ballot.owns(interaction.user.id, ballot_index):
+                await interaction.response.send_message(
+                    "You can't vote for your own submission.", ephemeral=True
+                )
+                return
+
+            if points < 0 and ballot.has_voted(interaction.user.id, ballot_index):
+                await interaction.response.send_message(
+                    f"You've already voted for Submission #{number}. Take that vote "
+                    f"back first if you want to downvote it.",
+                    ephemeral=True,
+                )
+                return
+
+            others = await db.get_voter_ballot(
+                active_round.id, interaction.user.id, ballot_index
+            )
+            error = system.check_vote(points, others)
+            if error:
+                await interaction.response.send_message(error, ephemeral=True)
+                return
+
+            if not await db.set_vote_points(
+                active_round.id, interaction.user.id, ballot_index, points
+            ):
+                await interaction.response.send_message(
+                    f"There's no Submission #{number} on the ballot.", ephemeral=True
+                )
+                return
+            # Changing a vote's points doesn't change the tally, and downvotes
+            # count towards neither the tally nor the vote limit
+            added = points > 0 and ballot.add(interaction.user.id, ballot_index)
+
+            await interaction.response.send_message(
+                f"Gave Submission #{number} {points} point(s).", ephemeral=True
+            )
+            if added and settings.live_tally != "off":
+                await self._show_live_vote(
+                    db,
+                    interaction.guild_id,
+                    active_round.id,
+                    settings.scoring,
+                    settings.live_tally,
+                    ballot,
+                )
+
     @app_commands.command(
         name="status", description="Check the status of the current Music League round"
     )
-    async def status(self, interaction: discord.Interaction):
+    @app_commands.describe(league=LEAGUE_OPTION)
+    async def status(self, interaction: discord.Interaction, league: Optional[str] = None):
         """Check the status of the current Music League round."""
-        async with self.bot.get_db_session() as session:
+        # Read-only, so it never waits on votes being recorded
+        async with self.bot.get_read_session() as session:
             db = DatabaseService(session)
 
             # Get the active round
-            active_round = await db.get_active_round(str(interaction.guild_id))
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
 
             if not active_round:
                 embed = discord.Embed(
@@ -644,14 +1295,17 @@ class RoundsCog(commands.Cog):
                 return
 
             # Create the status embed
+            renderer = await get_renderer(db, interaction.guild_id)
             embed = discord.Embed(
-                title=f"Music League Round #{active_round.round_number} Status",
+                title=renderer.status_title(active_round),
                 color=discord.Color.blue(),
             )
 
-            embed.add_field(name="Theme", value=active_round.theme, inline=False)
+            embed.add_field(
+                name="Theme", value=fit(active_round.theme, EMBED_FIELD_LIMIT), inline=False
+            )
 
-            now = datetime.datetime.utcnow()
+            now = utcnow()
 
             if now < active_round.submission_end:
                 # Submission phase
@@ -663,15 +1317,15 @@ class RoundsCog(commands.Cog):
 
                 embed.add_field(
                     name="Submission Deadline",
-                    value=f"<t:{int(active_round.submission_end.timestamp())}:F> (<t:{int(active_round.submission_end.timestamp())}:R>)",
+                    value=f"{format_timestamp(active_round.submission_end, 'F')} ({format_timestamp(active_round.submission_end)})",
                     inline=False,
                 )
 
                 # Get current submissions
-                submissions = await db.get_round_submissions(active_round.id)
+                submission_count = await db.count_round_submissions(active_round.id)
                 embed.add_field(
                     name="Submissions",
-                    value=f"{len(submissions)} submission(s) so far",
+                    value=f"{submission_count} submission(s) so far",
                     inline=False,
                 )
 
@@ -685,15 +1339,15 @@ class RoundsCog(commands.Cog):
 
                 embed.add_field(
                     name="Voting Deadline",
-                    value=f"<t:{int(active_round.voting_end.timestamp())}:F> (<t:{int(active_round.voting_end.timestamp())}:R>)",
+                    value=f"{format_timestamp(active_round.voting_end, 'F')} ({format_timestamp(active_round.voting_end)})",
                     inline=False,
                 )
 
                 # Get submissions
-                submissions = await db.get_round_submissions(active_round.id)
+                submission_count = await db.count_round_submissions(active_round.id)
                 embed.add_field(
                     name="Submissions",
-                    value=f"{len(submissions)} submission(s) in this round",
+                    value=f"{submission_count} submission(s) in this round",
                     inline=False,
                 )
 
@@ -719,13 +1373,16 @@ class RoundsCog(commands.Cog):
         description="Forcibly end the submission period and start voting",
     )
     @app_commands.default_permissions(administrator=True)
-    async def end_submission(self, interaction: discord.Interaction):
+    @app_commands.describe(league=LEAGUE_OPTION)
+    async def end_submission(
+        self, interaction: discord.Interaction, league: Optional[str] = None
+    ):
         """Forcibly end the submission period and start the voting phase."""
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
 
             # Check if there's an active round
-            active_round = await db.get_active_round(str(interaction.guild_id))
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
 
             if not active_round:
                 await interaction.response.send_message(
@@ -734,7 +1391,7 @@ class RoundsCog(commands.Cog):
                 return
 
             # Check if we're already in voting phase or later
-            now = datetime.datetime.utcnow()
+            now = utcnow()
             if now >= active_round.submission_end:
                 await interaction.response.send_message(
                     "The submission period has already ended!", ephemeral=True
@@ -747,8 +1404,8 @@ class RoundsCog(commands.Cog):
                 )
                 return
 
-            # Get guild info to access the voting days setting
-            discord_guild_id, channel_id, voting_days = await db.get_round_guild_info(
+            # Get the league's settings to access the voting days
+            discord_guild_id, channel_id, voting_days, settings = await db.get_round_guild_info(
                 active_round.id
             )
             if not discord_guild_id:
@@ -758,8 +1415,10 @@ class RoundsCog(commands.Cog):
                 return
 
             # Calculate the new voting end time based on the current time plus voting days
-            now = datetime.datetime.utcnow()
-            new_voting_end = now + datetime.timedelta(days=voting_days)
+            now = utcnow()
+            new_voting_end = deadline_after(
+                now, voting_days, settings.timezone, settings.deadline_time
+            )
 
             # Update both submission end and voting end times
             await db.update_round_timing(
@@ -786,13 +1445,16 @@ class RoundsCog(commands.Cog):
         description="Forcibly end the voting period and calculate results",
     )
     @app_commands.default_permissions(administrator=True)
-    async def end_voting(self, interaction: discord.Interaction):
+    @app_commands.describe(league=LEAGUE_OPTION)
+    async def end_voting(
+        self, interaction: discord.Interaction, league: Optional[str] = None
+    ):
         """Forcibly end the voting period and calculate results."""
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
 
             # Check if there's an active round
-            active_round = await db.get_active_round(str(interaction.guild_id))
+            active_round = await db.get_active_round(str(interaction.guild_id), league)
 
             if not active_round:
                 await interaction.response.send_message(
@@ -801,7 +1463,7 @@ class RoundsCog(commands.Cog):
                 return
 
             # Check if we're in voting phase
-            now = datetime.datetime.utcnow()
+            now = utcnow()
             if now < active_round.submission_end:
                 await interaction.response.send_message(
                     "The submission period hasn't ended yet! Use `/end_submission` first.",
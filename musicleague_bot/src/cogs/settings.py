@@ -1,12 +1,118 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from ..db import DatabaseService
+from discord.ui import Modal, TextInput
+from typing import Optional
+from ..db import DatabaseService, UnknownLeague
+from ..live import LIVE_TALLY_MODES
+from ..notify import REMINDER_DELIVERIES, describe_reminders, parse_reminder_hours
+from ..render import (
+    MESSAGE_LIMIT,
+    SAMPLE_VALUES,
+    TEMPLATE_MAX_LENGTH,
+    TEMPLATES,
+    TemplateError,
+    compile_template,
+    fit,
+    invalidate_renderer,
+)
+from ..schedule import parse_deadline_time, parse_timezone
+from ..scoring import (
+    SCORING_SYSTEMS,
+    TIE_BREAKERS,
+    VOTE_PENALTIES,
+    describe_vote_penalty,
+    get_scoring_system,
+)
+from .rounds import LEAGUE_OPTION, reply_unknown_league
+
+TEMPLATE_CHOICES = [
+    app_commands.Choice(name=spec.description, value=name)
+    for name, spec in TEMPLATES.items()
+]
+
+SCORING_CHOICES = [
+    app_commands.Choice(name=system.description, value=name)
+    for name, system in SCORING_SYSTEMS.items()
+]
+
+VOTE_PENALTY_CHOICES = [
+    app_commands.Choice(name=description, value=name)
+    for name, description in VOTE_PENALTIES.items()
+]
+
+TIE_BREAKER_CHOICES = [
+    app_commands.Choice(name=description, value=name)
+    for name, description in TIE_BREAKERS.items()
+]
+
+LIVE_TALLY_CHOICES = [
+    app_commands.Choice(name=description, value=name)
+    for name, description in LIVE_TALLY_MODES.items()
+]
+
+REMINDER_DELIVERY_CHOICES = [
+    app_commands.Choice(name=description, value=name)
+    for name, description in REMINDER_DELIVERIES.items()
+]
+
+
+class TemplateModal(Modal):
+    """Modal for editing one of a guild's message templates."""
+
+    def __init__(self, bot, guild_id, name, current):
+        super().__init__(title="Edit Message Template")
+        self.bot = bot
+        self.guild_id = guild_id
+        self.name = name
+
+        fields = " ".join(f"{{{field}}}" for field in TEMPLATES[name].fields)
+        self.body = TextInput(
+            label=fit(TEMPLATES[name].description, 45),
+            placeholder=fit(f"Placeholders: {fields}" if fields else "Plain text", 100),
+            default=current,
+            required=True,
+            style=discord.TextStyle.paragraph,
+            max_length=TEMPLATE_MAX_LENGTH,
+        )
+        self.add_item(self.body)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            template = compile_template(self.name, self.body.value)
+        except TemplateError as e:
+            await interaction.response.send_message(
+                f"That template can't be used: {e}", ephemeral=True
+            )
+            return
+
+        # Saving the default text is the same as resetting
+        body = self.body.value
+        if body == TEMPLATES[self.name].default:
+            body = None
+
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.set_guild_template(self.guild_id, self.name, body)
+        invalidate_renderer(self.guild_id)
+
+        preview = template.render(SAMPLE_VALUES)
+        await interaction.response.send_message(
+            fit(f"Template saved! Preview:\n\n{preview}", MESSAGE_LIMIT),
+            ephemeral=True,
+        )
 
 
 class SettingsCog(commands.Cog):
     """Commands for configuring the Music League bot."""
 
+    template = app_commands.Group(
+        name="template", description="Customize the messages Music League posts"
+    )
+    league = app_commands.Group(
+        name="league", description="Run several Music Leagues on this server"
+    )
+
     def __init__(self, bot):
         self.bot = bot
 
@@ -17,6 +123,30 @@ class SettingsCog(commands.Cog):
         submission_days="Number of days for the submission period",
         voting_days="Number of days for the voting period",
         channel="Dedicated channel for Music League messages",
+        duplicates="What to do when a song was already submitted on this server",
+        scoring="How votes are turned into points",
+        vote_penalty="What happens to submitters who don't vote",
+        non_voter_penalty="Points taken off submitters who don't vote, for the points penalty",
+        tie_breaker="How submissions with the same score are ranked",
+        live_tally="What the ballot shows of the votes so far",
+        reminders="Hours before each deadline to remind players, e.g. 24, 1 (or off)",
+        reminder_delivery="How reminders reach players",
+        auto_start="Start the next queued theme as soon as a round ends",
+        timezone="Timezone for deadline times and queued start times, e.g. Europe/Berlin",
+        deadline_time="Local time of day deadlines fall on, e.g. 20:00 (or off)",
+        league="League to configure (leave out for the main league)",
+    )
+    @app_commands.choices(
+        duplicates=[
+            app_commands.Choice(name="Warn the submitter", value="warn"),
+            app_commands.Choice(name="Reject the submission", value="reject"),
+            app_commands.Choice(name="Allow", value="allow"),
+        ],
+        scoring=SCORING_CHOICES,
+        vote_penalty=VOTE_PENALTY_CHOICES,
+        tie_breaker=TIE_BREAKER_CHOICES,
+        live_tally=LIVE_TALLY_CHOICES,
+        reminder_delivery=REMINDER_DELIVERY_CHOICES,
     )
     async def settings(
         self,
@@ -24,8 +154,20 @@ class SettingsCog(commands.Cog):
         submission_days: int = None,
         voting_days: int = None,
         channel: discord.TextChannel = None,
+        duplicates: str = None,
+        scoring: str = None,
+        vote_penalty: str = None,
+        non_voter_penalty: int = None,
+        tie_breaker: str = None,
+        live_tally: str = None,
+        reminders: str = None,
+        reminder_delivery: str = None,
+        auto_start: bool = None,
+        timezone: str = None,
+        deadline_time: str = None,
+        league: Optional[str] = None,
     ):
-        """Configure settings for Music League on this server."""
+        """Configure settings for one of this server's leagues."""
         if not interaction.user.guild_permissions.manage_guild:
             await interaction.response.send_message(
                 "You need 'Manage Server' permission to change settings.",
@@ -33,20 +175,68 @@ class SettingsCog(commands.Cog):
             )
             return
 
+        if non_voter_penalty is not None and non_voter_penalty < 0:
+            await interaction.response.send_message(
+                "The penalty for not voting is the number of points to take off, "
+                "so it can't be negative.",
+                ephemeral=True,
+            )
+            return
+
+        if reminders is not None:
+            try:
+                parse_reminder_hours(reminders)
+            except ValueError as e:
+                await interaction.response.send_message(
+                    f"Reminders are hours before each deadline, like `24, 1`: {e}.",
+                    ephemeral=True,
+                )
+                return
+
+        try:
+            if timezone is not None:
+                parse_timezone(timezone)
+            if deadline_time is not None:
+                parse_deadline_time(deadline_time)
+        except ValueError as e:
+            await interaction.response.send_message(f"{e}.", ephemeral=True)
+            return
+
+        # Setting the points to take off turns that penalty on
+        if non_voter_penalty and vote_penalty is None:
+            vote_penalty = "points"
+
         async with self.bot.get_db_session() as session:
             db = DatabaseService(session)
 
             # Update settings
-            updated_settings = await db.update_guild_settings(
-                guild_id=str(interaction.guild_id),
-                submission_days=submission_days,
-                voting_days=voting_days,
-                channel_id=str(channel.id) if channel else None,
-            )
+            try:
+                updated_settings = await db.update_guild_settings(
+                    guild_id=str(interaction.guild_id),
+                    submission_days=submission_days,
+                    voting_days=voting_days,
+                    channel_id=str(channel.id) if channel else None,
+                    duplicate_policy=duplicates,
+                    scoring=scoring,
+                    vote_penalty=vote_penalty,
+                    non_voter_penalty=non_voter_penalty,
+                    tie_breaker=tie_breaker,
+                    live_tally=live_tally,
+                    reminder_hours=reminders,
+                    reminder_delivery=reminder_delivery,
+                    auto_start=auto_start,
+                    timezone=timezone,
+                    deadline_time=deadline_time,
+                    league=league,
+                )
+            except UnknownLeague:
+                await reply_unknown_league(interaction, league)
+                return
 
             # Confirm settings back to the user
             embed = discord.Embed(
-                title="Music League Settings", color=discord.Color.blue()
+                title=f"Music League Settings: {updated_settings.name}",
+                color=discord.Color.blue(),
             )
 
             embed.add_field(
@@ -70,24 +260,79 @@ class SettingsCog(commands.Cog):
                     inline=False,
                 )
 
+            duplicate_policies = {
+                "warn": "Warn the submitter",
+                "reject": "Rejected",
+                "allow": "Allowed",
+            }
+            embed.add_field(
+                name="Repeat Songs",
+                value=duplicate_policies[updated_settings.guild.duplicate_policy],
+                inline=False,
+            )
+            embed.add_field(
+                name="Scoring",
+                value=get_scoring_system(updated_settings.scoring).description,
+            )
+            embed.add_field(
+                name="Penalty for Not Voting",
+                value=describe_vote_penalty(
+                    updated_settings.vote_penalty, updated_settings.non_voter_penalty
+                ),
+            )
+            embed.add_field(
+                name="Ties", value=TIE_BREAKERS[updated_settings.tie_breaker]
+            )
+            embed.add_field(
+                name="Live Tally", value=LIVE_TALLY_MODES[updated_settings.live_tally]
+            )
+            embed.add_field(
+                name="Reminders", value=describe_reminders(updated_settings.reminder_hours)
+            )
+            if updated_settings.reminder_hours:
+                embed.add_field(
+                    name="Reminder Delivery",
+                    value=REMINDER_DELIVERIES[updated_settings.reminder_delivery],
+                )
+            deadlines = "Any time of day"
+            if updated_settings.deadline_time:
+                deadlines = f"{updated_settings.deadline_time} {updated_settings.timezone}"
+            embed.add_field(name="Deadlines", value=deadlines)
+            embed.add_field(
+                name="Queued Themes",
+                value="Start when a round ends"
+                if updated_settings.auto_start
+                else "Wait for `/start`, or their start time",
+            )
+
             await interaction.response.send_message(embed=embed)
 
     @app_commands.command(
         name="leaderboard", description="Show the top players in Music League"
     )
-    @app_commands.describe(limit="Number of players to show (default: 5)")
-    async def leaderboard(self, interaction: discord.Interaction, limit: int = 5):
-        """Show the leaderboard for Music League on this server."""
+    @app_commands.describe(
+        limit="Number of players to show (default: 5)", league=LEAGUE_OPTION
+    )
+    async def leaderboard(
+        self, interaction: discord.Interaction, limit: int = 5, league: Optional[str] = None
+    ):
+        """Show the leaderboard of one of this server's leagues."""
         if limit < 1:
             limit = 1
         if limit > 25:
             limit = 25
 
-        async with self.bot.get_db_session() as session:
+        # Read-only, so it never waits on votes being recorded
+        async with self.bot.get_read_session() as session:
             db = DatabaseService(session)
-            top_players = await db.get_leaderboard(str(interaction.guild_id), limit)
+            top_players = await db.get_leaderboard(
+                str(interaction.guild_id), limit, league=league
+            )
 
             if not top_players:
+                if not await db.has_league(interaction.guild_id, league):
+                    await reply_unknown_league(interaction, league)
+                    return
                 await interaction.response.send_message(
                     "No players in the leaderboard yet!"
                 )
@@ -97,11 +342,12 @@ class SettingsCog(commands.Cog):
                 title="🏆 Music League Leaderboard 🏆", color=discord.Color.gold()
             )
 
+            usernames = await self.bot.resolve_display_names(
+                interaction.guild, [player.user_id for player in top_players]
+            )
+
             for idx, player in enumerate(top_players, 1):
-                user = self.bot.get_user(
-                    int(player.user_id)
-                ) or await self.bot.fetch_user(int(player.user_id))
-                username = user.display_name if user else f"User {player.user_id}"
+                username = usernames[player.user_id]
 
                 # Add medal for top 3
                 medal = ""
@@ -120,6 +366,130 @@ class SettingsCog(commands.Cog):
 
             await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(
+        name="reminders", description="Turn your Music League deadline reminders on or off"
+    )
+    @app_commands.describe(
+        enabled="Whether to remind you before deadlines", league=LEAGUE_OPTION
+    )
+    async def reminders(
+        self, interaction: discord.Interaction, enabled: bool, league: Optional[str] = None
+    ):
+        """Opt in or out of the reminders a league sends before deadlines."""
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                await db.set_player_reminders(
+                    str(interaction.guild_id), str(interaction.user.id), enabled, league
+                )
+            except UnknownLeague:
+                await reply_unknown_league(interaction, league)
+                return
+
+        await interaction.response.send_message(
+            "You'll be reminded before deadlines when you haven't submitted or voted yet."
+            if enabled
+            else "You won't get deadline reminders from this league any more.",
+            ephemeral=True,
+        )
+
+    @league.command(name="create", description="Start another league on this server")
+    @app_commands.describe(
+        name="Name players use to pick the league",
+        channel="Dedicated channel for the league's messages",
+    )
+    async def create_league(
+        self,
+        interaction: discord.Interaction,
+        name: str,
+        channel: discord.TextChannel = None,
+    ):
+        """Create a league with its own rounds, players and settings."""
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message(
+                "You need 'Manage Server' permission to create leagues.",
+                ephemeral=True,
+            )
+            return
+
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                created = await db.create_league(
+                    str(interaction.guild_id), name, str(channel.id) if channel else None
+                )
+            except ValueError as e:
+                await interaction.response.send_message(f"{e}.", ephemeral=True)
+                return
+
+        await interaction.response.send_message(
+            f"League **{created.name}** created! Change its settings with "
+            f"`/settings league:{created.name}` and start its first round with "
+            f"`/start league:{created.name}`."
+        )
+
+    @league.command(name="list", description="List the leagues on this server")
+    async def list_leagues(self, interaction: discord.Interaction):
+        """Show this server's leagues and where they play."""
+        async with self.bot.get_read_session() as session:
+            db = DatabaseService(session)
+            leagues = await db.get_leagues(str(interaction.guild_id))
+
+        embed = discord.Embed(title="Music Leagues", color=discord.Color.blue())
+        if not leagues:
+            embed.description = "Only the main league so far. Add one with `/league create`."
+        for league in leagues:
+            channel = f"<#{league.channel_id}>" if league.channel_id else "Any channel"
+            embed.add_field(
+                name=league.name,
+                value=f"{channel}\n{get_scoring_system(league.scoring).description}",
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed)
+
+    @template.command(name="edit", description="Edit one of the messages Music League posts")
+    @app_commands.describe(name="Message to edit")
+    @app_commands.choices(name=TEMPLATE_CHOICES)
+    async def edit_template(self, interaction: discord.Interaction, name: str):
+        """Open an editor for one of this server's message templates."""
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message(
+                "You need 'Manage Server' permission to change messages.",
+                ephemeral=True,
+            )
+            return
+
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            templates = await db.get_guild_templates(str(interaction.guild_id))
+
+        current = templates.get(name, TEMPLATES[name].default)
+        await interaction.response.send_modal(
+            TemplateModal(self.bot, str(interaction.guild_id), name, current)
+        )
+
+    @template.command(name="reset", description="Go back to the default text of a message")
+    @app_commands.describe(name="Message to reset")
+    @app_commands.choices(name=TEMPLATE_CHOICES)
+    async def reset_template(self, interaction: discord.Interaction, name: str):
+        """Remove this server's custom text for a message template."""
+        if not interaction.user.guild_permissions.manage_guild:
+            await interaction.response.send_message(
+                "You need 'Manage Server' permission to change messages.",
+                ephemeral=True,
+            )
+            return
+
+        async with self.bot.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.set_guild_template(str(interaction.guild_id), name, None)
+        invalidate_renderer(interaction.guild_id)
+
+        await interaction.response.send_message(
+            f"{TEMPLATES[name].description} is back to the default text.",
+            ephemeral=True,
+        )
+
 
 async def setup(bot):
     await bot.add_cog(SettingsCog(bot))
@@ -1,4 +1,23 @@
-from .models import init_db, get_session
-from .service import DatabaseService
+from .models import init_db, get_session, get_read_session
+from .service import (
+    DatabaseService,
+    DuplicateMatch,
+    DuplicateSubmission,
+    RoundResult,
+    RoundSummary,
+    UnknownLeague,
+    league_name,
+)
 
-__all__ = ["init_db", "get_session", "DatabaseService"]
+__all__ = [
+    "init_db",
+    "get_session",
+    "get_read_session",
+    "DatabaseService",
+    "DuplicateMatch",
+    "DuplicateSubmission",
+    "RoundResult",
+    "RoundSummary",
+    "UnknownLeague",
+    "league_name",
+]
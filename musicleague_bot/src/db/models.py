@@ -8,15 +8,53 @@ from sqlalchemy import (
     Boolean,
     create_engine,
     Float,
+    Index,
+    inspect,
+    text,
+    bindparam,
+    event,
+    select,
+    func,
+    true,
+    false,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.types import TypeDecorator
 import datetime
 
+from ..metrics import metrics
+from ..schedule import DEFAULT_TIMEZONE, as_utc, next_deadline, utcnow
+
 # Create the base class for declarative models
 Base = declarative_base()
 
+# Name of the league every guild starts with
+DEFAULT_LEAGUE = "main"
+
+
+class UTCDateTime(TypeDecorator):
+    """A point in time, stored as naive UTC and read back timezone-aware.
+
+    Naive values are taken to be UTC already, as written before deadlines
+    were timezone-aware.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return as_utc(value).replace(tzinfo=None)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.replace(tzinfo=datetime.timezone.utc)
+
 
 class Guild(Base):
     """Model representing a Discord server/guild."""
@@ -25,18 +63,72 @@ class Guild(Base):
 
     id = Column(Integer, primary_key=True)
     guild_id = Column(String, unique=True, nullable=False)
-    submission_days = Column(Integer, default=3)
-    voting_days = Column(Integer, default=3)
-    active_round = Column(Integer, nullable=True)
-    channel_id = Column(String, nullable=True)  # Dedicated channel for Music League
+    # What to do when a song was already submitted in this guild: warn, reject or allow
+    duplicate_policy = Column(String, nullable=False, default="warn", server_default="warn")
 
     # Relationships
+    leagues = relationship("League", back_populates="guild", cascade="all, delete-orphan")
     rounds = relationship("Round", back_populates="guild", cascade="all, delete-orphan")
     players = relationship(
         "Player", back_populates="guild", cascade="all, delete-orphan"
     )
 
 
+class League(Base):
+    """A league played in a guild, with its own channel, settings, rounds and players.
+
+    Every guild has a league named DEFAULT_LEAGUE, and can run more side by side.
+    """
+
+    __tablename__ = "leagues"
+
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=False)
+    name = Column(String, nullable=False, default=DEFAULT_LEAGUE)
+    channel_id = Column(String, nullable=True)  # Dedicated channel for the league
+    submission_days = Column(Integer, default=3)
+    voting_days = Column(Integer, default=3)
+    active_round = Column(Integer, nullable=True)
+    # How rounds are scored (see scoring.SCORING_SYSTEMS)
+    scoring = Column(String, nullable=False, default="approval", server_default="approval")
+    # What happens to submitters who didn't vote (see scoring.VOTE_PENALTIES)
+    vote_penalty = Column(String, nullable=False, default="none", server_default="none")
+    # Points taken off them under the "points" penalty
+    non_voter_penalty = Column(Integer, nullable=False, default=0, server_default="0")
+    # How submissions with the same score are ordered (see scoring.TIE_BREAKERS)
+    tie_breaker = Column(String, nullable=False, default="earliest", server_default="earliest")
+    # What the ballot shows of the votes so far (see live.LIVE_TALLY_MODES)
+    live_tally = Column(String, nullable=False, default="off", server_default="off")
+    # Hours before each deadline to remind players, e.g. "24,1" (see notify.py)
+    reminder_hours = Column(String, nullable=False, default="", server_default="")
+    # How reminders reach players (see notify.REMINDER_DELIVERIES)
+    reminder_delivery = Column(
+        String, nullable=False, default="channel", server_default="channel"
+    )
+    # Whether the next queued theme starts as soon as a round completes
+    auto_start = Column(Boolean, nullable=False, default=False, server_default=false())
+    # When the next queued theme may start, once no round is running (see schedule.py)
+    next_start = Column(UTCDateTime, nullable=True)
+    # Timezone of the deadline time, and the local time deadlines fall on ("" for any)
+    timezone = Column(
+        String, nullable=False, default=DEFAULT_TIMEZONE, server_default=DEFAULT_TIMEZONE
+    )
+    deadline_time = Column(String, nullable=False, default="", server_default="")
+    created_at = Column(UTCDateTime, default=utcnow)
+
+    # Relationships
+    guild = relationship("Guild", back_populates="leagues")
+    rounds = relationship("Round", back_populates="league")
+    players = relationship("Player", back_populates="league")
+
+    __table_args__ = (
+        # Commands pick a guild's league by name
+        Index("ix_leagues_guild_name", "guild_id", "name", unique=True),
+        # The scheduler looks for queued themes that are due to start
+        Index("ix_leagues_next_start", "next_start"),
+    )
+
+
 class Player(Base):
     """Model representing a player in the Music League."""
 
@@ -45,14 +137,24 @@ class Player(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=False)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=True)
     total_score = Column(Integer, default=0)
+    # Whether the player wants deadline reminders
+    reminders = Column(Boolean, nullable=False, default=True, server_default=true())
 
     # Relationships
     guild = relationship("Guild", back_populates="players")
+    league = relationship("League", back_populates="players")
     submissions = relationship(
         "Submission", back_populates="player", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Players are looked up, and ranked on the leaderboard, per league
+        Index("ix_players_league_user", "league_id", "user_id"),
+        Index("ix_players_league_score", "league_id", "total_score"),
+    )
+
 
 class Round(Base):
     """Model representing a round in the Music League."""
@@ -61,22 +163,45 @@ class Round(Base):
 
     id = Column(Integer, primary_key=True)
     guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=False)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=True)
     round_number = Column(Integer, nullable=False)
     theme = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    submission_end = Column(DateTime, nullable=False)
-    voting_end = Column(DateTime, nullable=False)
+    created_at = Column(UTCDateTime, default=utcnow)
+    submission_end = Column(UTCDateTime, nullable=False)
+    voting_end = Column(UTCDateTime, nullable=False)
     is_completed = Column(Boolean, default=False)
     submission_message_id = Column(String, nullable=True)
     voting_message_id = Column(String, nullable=True)
+    voting_channel_id = Column(String, nullable=True)  # Where the ballot was posted
     results_message_id = Column(String, nullable=True)
 
+    # Lease held by the bot process currently running this round's transition
+    lease_owner = Column(String, nullable=True)
+    lease_expires = Column(UTCDateTime, nullable=True)
+
+    # When to next remind players of the current phase's deadline, if at all
+    next_reminder = Column(UTCDateTime, nullable=True)
+
+    # When the scheduler next has to act on the round, kept up to date on every
+    # write (see schedule.next_deadline); None once it's completed
+    next_deadline = Column(UTCDateTime, nullable=True)
+
     # Relationships
     guild = relationship("Guild", back_populates="rounds")
+    league = relationship("League", back_populates="rounds")
     submissions = relationship(
         "Submission", back_populates="round", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Round numbers are looked up, and paged through by /history, per league
+        Index("ix_rounds_league_number", "league_id", "round_number"),
+        # Reactions are matched to the ballot they were added to
+        Index("ix_rounds_voting_message", "voting_message_id"),
+        # The scheduler looks for rounds that are due a transition or reminder
+        Index("ix_rounds_next_deadline", "next_deadline"),
+    )
+
 
 class Submission(Base):
     """Model representing a music submission in a round."""
@@ -88,30 +213,396 @@ class Submission(Base):
     player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
     content = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    submitted_at = Column(DateTime, default=datetime.datetime.utcnow)
+    submitted_at = Column(UTCDateTime, default=utcnow)
     votes_received = Column(Integer, default=0)
+    # Points under the guild's scoring system, set when the round completes
+    score = Column(Integer, nullable=True)
+    # Place in the round's results, set when it completes; tied submissions share it
+    place = Column(Integer, nullable=True)
+
+    # Canonical key of the linked track (see links.parse_link), if recognised
+    provider = Column(String, nullable=True)
+    track_id = Column(String, nullable=True)
+
+    # Normalised track (see links.fingerprint) and its guild, for duplicate checks
+    guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=True)
+    fingerprint = Column(String, nullable=True)
 
     # Relationships
     round = relationship("Round", back_populates="submissions")
     player = relationship("Player", back_populates="submissions")
+    guild = relationship("Guild")
+    votes = relationship("Vote", back_populates="submission", cascade="all, delete-orphan")
+
+    # Earlier submission of the same song, set by DatabaseService.create_submission
+    duplicate_of = None
+
+    __table_args__ = (
+        Index("ix_submissions_track", "provider", "track_id"),
+        Index("ix_submissions_guild_fingerprint", "guild_id", "fingerprint"),
+        # A round's submissions in results order, for paging through /round
+        Index("ix_submissions_round_place", "round_id", "place", "id"),
+    )
+
+
+class Vote(Base):
+    """A member's vote for a submission, recorded from their ballot reaction."""
+
+    __tablename__ = "votes"
+
+    id = Column(Integer, primary_key=True)
+    round_id = Column(Integer, ForeignKey("rounds.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    voter_id = Column(String, nullable=False)  # Discord user ID
+    # Points given with /vote; None for a vote cast by reacting
+    points = Column(Integer, nullable=True)
+    created_at = Column(UTCDateTime, default=utcnow)
+
+    # Relationships
+    submission = relationship("Submission", back_populates="votes")
+
+    __table_args__ = (
+        Index("ix_votes_submission_voter", "submission_id", "voter_id", unique=True),
+        Index("ix_votes_round_voter", "round_id", "voter_id"),
+    )
+
+
+class GuildTemplate(Base):
+    """A guild's own text for one of the message templates in render.py."""
+
+    __tablename__ = "guild_templates"
+
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=False)
+    name = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    updated_at = Column(UTCDateTime, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_guild_templates_guild_name", "guild_id", "name", unique=True),
+    )
+
+
+class QueuedTheme(Base):
+    """A theme waiting to be played in a league, optionally not before a set time."""
+
+    __tablename__ = "queued_themes"
+
+    id = Column(Integer, primary_key=True)
+    league_id = Column(Integer, ForeignKey("leagues.id"), nullable=False)
+    theme = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)  # Order in the queue, lowest first
+    start_at = Column(UTCDateTime, nullable=True)  # Earliest start, or None for any time
+    added_by = Column(String, nullable=True)  # Discord user ID
+    created_at = Column(UTCDateTime, default=utcnow)
+
+    __table_args__ = (
+        # The head of a league's queue is read whenever one of its rounds ends
+        Index("ix_queued_themes_league_position", "league_id", "position"),
+    )
+
+
+class TrackMetadata(Base):
+    """Cached title, artist and duration of a linked track."""
+
+    __tablename__ = "track_metadata"
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String, nullable=False)
+    track_id = Column(String, nullable=False)
+    title = Column(String, nullable=True)
+    artist = Column(String, nullable=True)
+    duration_seconds = Column(Integer, nullable=True)
+    fetched_at = Column(UTCDateTime, default=utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_track_metadata_track", "provider", "track_id", unique=True),
+    )
+
+
+@event.listens_for(Round, "before_insert")
+@event.listens_for(Round, "before_update")
+def _set_next_deadline(mapper, connection, target):
+    """Keep a round's next_deadline in step with its deadlines and reminder."""
+    target.next_deadline = next_deadline(target)
+
+
+# Engines and session factories, one per database URL, shared by every session
+_engines = {}
+_session_factories = {}
+
+
+def _database_url(name, default=None):
+    """Read a database URL from the environment in its async driver form."""
+    database_url = os.getenv(name, default)
+    if database_url and database_url.startswith("sqlite:"):
+        database_url = database_url.replace("sqlite:", "sqlite+aiosqlite:")
+    return database_url
+
+
+def _is_sqlite_file(database_url):
+    """Whether the URL is a SQLite database on disk rather than in memory."""
+    return (
+        database_url.startswith("sqlite")
+        and not database_url.endswith("://")
+        and ":memory:" not in database_url
+    )
+
+
+def _create_engine(database_url, read_only=False):
+    # Reuse the engine so sessions share its connection pool
+    engine = _engines.get((database_url, read_only))
+    if engine is None:
+        # Logging every statement is slow; query counts and timings are in metrics
+        echo = os.getenv("DATABASE_ECHO", "").lower() in ("1", "true", "yes")
+        engine = create_async_engine(database_url, echo=echo)
+        metrics.instrument_engine(engine)
+
+        if _is_sqlite_file(database_url):
+            pragma = "PRAGMA query_only = ON" if read_only else "PRAGMA journal_mode = WAL"
+
+            # WAL lets readers keep reading while a vote or submission is written
+            @event.listens_for(engine.sync_engine, "connect")
+            def set_sqlite_pragma(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute(pragma)
+                cursor.close()
+
+        _engines[(database_url, read_only)] = engine
+
+    return engine
 
 
 # Create async engine factory function
 def get_engine():
     """Create and return a SQLAlchemy engine."""
-    database_url = os.getenv("DATABASE_URL", "sqlite:///musicleague.db")
-    if database_url.startswith("sqlite:"):
-        database_url = database_url.replace("sqlite:", "sqlite+aiosqlite:")
+    return _create_engine(_database_url("DATABASE_URL", "sqlite:///musicleague.db"))
+
+
+def get_read_engine():
+    """Return the engine for read-only queries.
 
-    return create_async_engine(database_url, echo=True)
+    This is ``DATABASE_READ_URL`` (e.g. a Postgres replica) when set. A SQLite
+    database file gets a separate pool of read-only connections to the same
+    file. Anything else reads through the main engine.
+    """
+    read_url = _database_url("DATABASE_READ_URL")
+    if read_url:
+        return _create_engine(read_url, read_only=True)
+
+    database_url = _database_url("DATABASE_URL", "sqlite:///musicleague.db")
+    if _is_sqlite_file(database_url):
+        return _create_engine(database_url, read_only=True)
+    return get_engine()
+
+
+def _new_session(engine):
+    async_session = _session_factories.get(engine)
+    if async_session is None:
+        async_session = sessionmaker(
+            engine, expire_on_commit=False, class_=AsyncSession
+        )
+        _session_factories[engine] = async_session
+    return async_session()
 
 
 # Create session factory
 async def get_session():
     """Create and return a SQLAlchemy session."""
-    engine = get_engine()
-    async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-    return async_session()
+    return _new_session(get_engine())
+
+
+async def get_read_session():
+    """Create and return a session for read-only queries.
+
+    Reads may lag behind writes made on other sessions (replicas apply them a
+    moment later), so use ``get_session`` when you need your own writes.
+    """
+    return _new_session(get_read_engine())
+
+
+async def dispose_engines():
+    """Close the connection pools of the current database URLs."""
+    engines = {get_engine(), get_read_engine()}
+    for engine in engines:
+        await engine.dispose()
+
+
+def _add_missing_columns(connection):
+    """Add columns and indexes introduced after a table was first created.
+
+    Returns the names of the added columns as ``(table, column)`` pairs.
+    """
+    inspector = inspect(connection)
+    added = set()
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                )
+                added.add((table.name, column.name))
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
+
+    return added
+
+
+def _backfill_submission_keys(connection):
+    """Fill in the track keys, guild and fingerprint of older submissions."""
+    from ..links import fingerprint, parse_link
+
+    submissions = Submission.__table__
+    rounds = Round.__table__
+    connection.execute(
+        submissions.update()
+        .where(submissions.c.guild_id.is_(None))
+        .values(
+            guild_id=select(rounds.c.guild_id)
+            .where(rounds.c.id == submissions.c.round_id)
+            .scalar_subquery()
+        )
+    )
+
+    rows = connection.execute(
+        select(submissions.c.id, submissions.c.content).where(
+            submissions.c.fingerprint.is_(None)
+        )
+    ).all()
+
+    updates = []
+    for submission_id, content in rows:
+        link = parse_link(content)
+        updates.append(
+            {
+                "row_id": submission_id,
+                "provider": link.provider if link else None,
+                "track_id": link.track_id if link else None,
+                "fingerprint": fingerprint(content),
+            }
+        )
+
+    if updates:
+        connection.execute(
+            submissions.update()
+            .where(submissions.c.id == bindparam("row_id"))
+            .values(
+                provider=bindparam("provider"),
+                track_id=bindparam("track_id"),
+                fingerprint=bindparam("fingerprint"),
+            ),
+            updates,
+        )
+
+
+def _missing_tables(connection):
+    """Names of the tables that haven't been created yet."""
+    inspector = inspect(connection)
+    return {
+        table.name
+        for table in Base.metadata.sorted_tables
+        if not inspector.has_table(table.name)
+    }
+
+
+def _backfill_leagues(connection):
+    """Move the settings of guilds from before leagues into a default league each.
+
+    The old settings columns are left on the guilds table, unused. Guilds that
+    set points to take off before penalties had modes keep their penalty.
+    """
+    leagues = League.__table__
+    guild_columns = {column["name"] for column in inspect(connection).get_columns("guilds")}
+    copied = [
+        column.name
+        for column in leagues.columns
+        if column.name in guild_columns and column.name not in ("id", "guild_id")
+    ]
+    rows = connection.execute(
+        text(f"SELECT {', '.join(['id'] + copied)} FROM guilds")
+    ).mappings().all()
+
+    values = []
+    for row in rows:
+        league = {"guild_id": row["id"], "name": DEFAULT_LEAGUE}
+        league.update({name: row[name] for name in copied})
+        if "vote_penalty" not in guild_columns:
+            penalty = league.get("non_voter_penalty") or 0
+            league["vote_penalty"] = "points" if penalty > 0 else "none"
+        values.append(league)
+    if values:
+        connection.execute(leagues.insert(), values)
+
+    for table in (Round.__table__, Player.__table__):
+        connection.execute(
+            table.update()
+            .where(table.c.league_id.is_(None))
+            .values(
+                league_id=select(leagues.c.id)
+                .where(leagues.c.guild_id == table.c.guild_id)
+                .where(leagues.c.name == DEFAULT_LEAGUE)
+                .scalar_subquery()
+            )
+        )
+
+
+def _backfill_places(connection):
+    """Place the submissions of rounds completed before places were stored.
+
+    They are ranked the way their results were posted: most votes first,
+    ties in ballot order.
+    """
+    submissions = Submission.__table__
+    rounds = Round.__table__
+    place = func.row_number().over(
+        partition_by=submissions.c.round_id,
+        order_by=(func.coalesce(submissions.c.votes_received, 0).desc(), submissions.c.id),
+    )
+    rows = connection.execute(
+        select(submissions.c.id, place)
+        .join(rounds, rounds.c.id == submissions.c.round_id)
+        .where(rounds.c.is_completed)
+    ).all()
+
+    if rows:
+        connection.execute(
+            submissions.update()
+            .where(submissions.c.id == bindparam("row_id"))
+            .values(place=bindparam("place")),
+            [{"row_id": submission_id, "place": place} for submission_id, place in rows],
+        )
+
+
+def _backfill_next_deadlines(connection):
+    """Set when the scheduler next has to act on rounds that were running before it was stored."""
+    rounds = Round.__table__
+    rows = connection.execute(
+        select(
+            rounds.c.id,
+            rounds.c.is_completed,
+            rounds.c.voting_message_id,
+            rounds.c.submission_end,
+            rounds.c.voting_end,
+            rounds.c.next_reminder,
+        ).where(rounds.c.is_completed == False)
+    ).all()
+
+    if rows:
+        connection.execute(
+            rounds.update()
+            .where(rounds.c.id == bindparam("row_id"))
+            .values(next_deadline=bindparam("deadline")),
+            [{"row_id": row.id, "deadline": next_deadline(row)} for row in rows],
+        )
 
 
 # Function to create all tables
@@ -119,4 +610,14 @@ async def init_db():
     """Initialize the database by creating all tables."""
     engine = get_engine()
     async with engine.begin() as conn:
+        created = await conn.run_sync(_missing_tables)
+        added = await conn.run_sync(_add_missing_columns)
         await conn.run_sync(Base.metadata.create_all)
+        if added & {("submissions", "provider"), ("submissions", "fingerprint")}:
+            await conn.run_sync(_backfill_submission_keys)
+        if "leagues" in created and "guilds" not in created:
+            await conn.run_sync(_backfill_leagues)
+        if ("submissions", "place") in added:
+            await conn.run_sync(_backfill_places)
+        if ("rounds", "next_deadline") in added:
+            await conn.run_sync(_backfill_next_deadlines)
@@ -1,158 +1,546 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import (
+    select,
+    insert,
+    update,
+    delete,
+    func,
+    and_,
+    or_,
+    tuple_,
+    except_,
+    case,
+    literal,
+    union,
+    union_all,
+)
 from sqlalchemy.future import select
 from datetime import datetime, timedelta
-from .models import Guild, Player, Round, Submission
+from typing import NamedTuple, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
+from .models import (
+    DEFAULT_LEAGUE,
+    Guild,
+    GuildTemplate,
+    League,
+    Player,
+    QueuedTheme,
+    Round,
+    Submission,
+    TrackMetadata,
+    Vote,
+)
+from ..links import fingerprint as track_fingerprint, parse_link
+from ..live import LIVE_TALLY_MODES
+from ..metrics import metrics
+from ..notify import (
+    REMINDER_DELIVERIES,
+    format_reminder_hours,
+    next_reminder_time,
+    parse_reminder_hours,
+)
+from ..schedule import (
+    MAX_QUEUED_THEMES,
+    MAX_THEME_LENGTH,
+    as_utc,
+    deadline_after,
+    next_start_time,
+    parse_deadline_time,
+    parse_start_time,
+    parse_timezone,
+    utcnow,
+)
+from ..scoring import (
+    SCORING_SYSTEMS,
+    TIE_BREAKERS,
+    VOTE_PENALTIES,
+    get_scoring_system,
+    non_voter_score,
+)
 
+DUPLICATE_POLICIES = ("warn", "reject", "allow")
 
+# Longest league name
+MAX_LEAGUE_NAME = 32
+
+
+def _sign(value):
+    """SQL expression for the sign of ``value``: 1, 0 or -1."""
+    return case((value > 0, 1), (value < 0, -1), else_=0)
+
+
+def league_name(league: str = None) -> str:
+    """The stored name of a league as typed in a command; the default league if empty."""
+    return (league or "").strip().lower() or DEFAULT_LEAGUE
+
+
+# Votes for a submission rather than against it: reactions, and /vote points
+_upvote = or_(Vote.points.is_(None), Vote.points > 0)
+
+
+def _in_league(guild_id: str, league: str = None):
+    """Condition selecting a guild's league by name, in a query joining League and Guild."""
+    return and_(Guild.guild_id == str(guild_id), League.name == league_name(league))
+
+
+class DuplicateMatch(NamedTuple):
+    """The earliest submission of a track in a guild."""
+
+    round_id: int
+    round_number: int
+    user_id: str
+
+
+class RoundSummary(NamedTuple):
+    """One line of a guild's round history."""
+
+    round_id: int
+    round_number: int
+    theme: str
+    voting_end: datetime
+    is_completed: bool
+    submission_count: int
+    winner_id: Optional[str]  # None until the round is completed
+    winner_score: Optional[int]
+    score_unit: Optional[str]  # "votes" for rounds completed before scores were stored
+
+
+class RoundSettings(NamedTuple):
+    """How a league scores its rounds and shows their ballots."""
+
+    scoring: str  # Name of the scoring system
+    vote_penalty: str  # What happens to submitters who didn't vote
+    non_voter_penalty: int  # Points they lose under the "points" penalty
+    live_tally: str  # What the ballot shows of the votes so far
+    reminder_hours: str  # Hours before each deadline to remind players
+    reminder_delivery: str  # How reminders reach players
+    league: str  # Name of the league
+    timezone: str  # Timezone its deadlines are aligned in
+    deadline_time: str  # Local time of day its deadlines fall on, or ""
+
+
+class RoundResult(NamedTuple):
+    """A submission's place in a completed round."""
+
+    player: Player
+    submission: Submission
+    ballot_index: int  # Position on the ballot
+    score: int  # Points after any penalty for not voting
+    voted: bool  # Whether the submitter voted in the round
+    place: int  # 1 for the winner; tied submissions share a place
+
+
+class UnknownLeague(ValueError):
+    """No league in the guild has the name given."""
+
+    def __init__(self, name: str):
+        super().__init__(f"There's no league called {name}")
+        self.name = name
+
+
+class DuplicateSubmission(Exception):
+    """The guild rejects songs that were already submitted."""
+
+    def __init__(self, match: DuplicateMatch, round_id: int):
+        super().__init__(f"Already submitted in round #{match.round_number}")
+        self.match = match
+        self.round_id = round_id  # The round the song was submitted to now
+
+
+@metrics.instrument_methods("db_operation_seconds", label="operation")
 class DatabaseService:
-    """Service class to handle all database operations."""
+    """Service class to handle all database operations.
 
-    def __init__(self, session: AsyncSession):
+    Writes, and reads that must see them, use ``session``. Reads that only
+    display data (leaderboards, templates, track metadata, counts) go to
+    ``read_session`` when one is given, unless called with ``fresh=True``.
+    """
+
+    def __init__(self, session: AsyncSession, read_session: AsyncSession = None):
         self.session = session
+        self.read_session = read_session
+
+    def _reader(self, fresh: bool = False) -> AsyncSession:
+        """The session for a read-only query; ``fresh`` reads your own writes."""
+        if fresh or self.read_session is None:
+            return self.session
+        return self.read_session
 
     # Guild operations
     async def get_or_create_guild(self, guild_id: str) -> Guild:
-        """Get a guild by Discord ID or create it if it doesn't exist."""
+        """Get a guild by Discord ID or create it, with its default league, if it doesn't exist."""
         query = select(Guild).where(Guild.guild_id == str(guild_id))
         result = await self.session.execute(query)
         guild = result.scalars().first()
 
         if not guild:
             guild = Guild(guild_id=str(guild_id))
-            self.session.add(guild)
+            self.session.add_all([guild, League(guild=guild, name=DEFAULT_LEAGUE)])
             await self.session.commit()
 
         return guild
 
+    # League operations
+    async def get_league(self, guild_id: str, league: str = None) -> League:
+        """Get a guild's league by name, with its guild loaded.
+
+        The default league is created along with the guild if need be; other
+        leagues have to be created first, and are None until then.
+        """
+        query = (
+            select(League)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league))
+            .options(contains_eager(League.guild))
+        )
+        result = await self.session.execute(query)
+        found = result.scalars().first()
+
+        if found is None and league_name(league) == DEFAULT_LEAGUE:
+            result = await self.session.execute(
+                select(Guild).where(Guild.guild_id == str(guild_id))
+            )
+            guild = result.scalars().first() or Guild(guild_id=str(guild_id))
+            found = League(guild=guild, name=DEFAULT_LEAGUE)
+            self.session.add(found)
+            await self.session.commit()
+
+        return found
+
+    async def has_league(self, guild_id: str, league: str = None, fresh: bool = False) -> bool:
+        """Whether a guild has a league by that name; the default league always counts.
+
+        For telling a typo from a league with nothing in it yet, after a query
+        for one came back empty.
+        """
+        if league_name(league) == DEFAULT_LEAGUE:
+            return True
+        query = (
+            select(League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league))
+        )
+        result = await self._reader(fresh).execute(query)
+        return result.first() is not None
+
+    async def _require_league(self, guild_id: str, league: str = None) -> League:
+        """Get a guild's league by name, raising UnknownLeague if there's none."""
+        found = await self.get_league(guild_id, league)
+        if found is None:
+            raise UnknownLeague(league_name(league))
+        return found
+
+    async def create_league(
+        self, guild_id: str, name: str, channel_id: str = None
+    ) -> League:
+        """Start another league in a guild, with the default settings.
+
+        Raises ValueError if the name is empty, too long or already taken.
+        """
+        name = league_name(name)
+        if len(name) > MAX_LEAGUE_NAME:
+            raise ValueError(f"League names can be at most {MAX_LEAGUE_NAME} characters")
+
+        guild = await self.get_or_create_guild(guild_id)
+        league = League(guild=guild, name=name, channel_id=channel_id)
+        self.session.add(league)
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise ValueError(f"There's already a league called {name}") from None
+        return league
+
+    async def get_leagues(self, guild_id: str, fresh: bool = False) -> list[League]:
+        """Get a guild's leagues, oldest first."""
+        query = (
+            select(League)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(Guild.guild_id == str(guild_id))
+            .order_by(League.id)
+        )
+        result = await self._reader(fresh).execute(query)
+        return result.scalars().all()
+
     async def update_guild_settings(
         self,
         guild_id: str,
         submission_days: int = None,
         voting_days: int = None,
         channel_id: str = None,
-    ) -> Guild:
-        """Update the settings for a guild."""
-        guild = await self.get_or_create_guild(guild_id)
+        duplicate_policy: str = None,
+        scoring: str = None,
+        vote_penalty: str = None,
+        non_voter_penalty: int = None,
+        tie_breaker: str = None,
+        live_tally: str = None,
+        reminder_hours: str = None,
+        reminder_delivery: str = None,
+        auto_start: bool = None,
+        timezone: str = None,
+        deadline_time: str = None,
+        league: str = None,
+    ) -> League:
+        """Update the settings for one of a guild's leagues.
+
+        The duplicate policy is shared by the guild's leagues; the rest are
+        the league's own. Changing the reminders reschedules the next one of
+        the league's active round, and changing ``auto_start`` the start of
+        its next queued theme. The timezone and deadline time apply to rounds
+        started afterwards.
+        """
+        settings = await self._require_league(guild_id, league)
 
         if submission_days is not None:
-            guild.submission_days = submission_days
+            settings.submission_days = submission_days
 
         if voting_days is not None:
-            guild.voting_days = voting_days
+            settings.voting_days = voting_days
 
         if channel_id is not None:
-            guild.channel_id = channel_id
+            settings.channel_id = channel_id
+
+        if duplicate_policy is not None:
+            if duplicate_policy not in DUPLICATE_POLICIES:
+                raise ValueError(f"Unknown duplicate policy: {duplicate_policy}")
+            settings.guild.duplicate_policy = duplicate_policy
+
+        if scoring is not None:
+            if scoring not in SCORING_SYSTEMS:
+                raise ValueError(f"Unknown scoring system: {scoring}")
+            settings.scoring = scoring
+
+        if vote_penalty is not None:
+            if vote_penalty not in VOTE_PENALTIES:
+                raise ValueError(f"Unknown vote penalty: {vote_penalty}")
+            settings.vote_penalty = vote_penalty
+
+        if non_voter_penalty is not None:
+            if non_voter_penalty < 0:
+                raise ValueError("The penalty for not voting can't be negative")
+            settings.non_voter_penalty = non_voter_penalty
+
+        if tie_breaker is not None:
+            if tie_breaker not in TIE_BREAKERS:
+                raise ValueError(f"Unknown tie-breaker: {tie_breaker}")
+            settings.tie_breaker = tie_breaker
+
+        if live_tally is not None:
+            if live_tally not in LIVE_TALLY_MODES:
+                raise ValueError(f"Unknown live tally mode: {live_tally}")
+            settings.live_tally = live_tally
+
+        if reminder_delivery is not None:
+            if reminder_delivery not in REMINDER_DELIVERIES:
+                raise ValueError(f"Unknown reminder delivery: {reminder_delivery}")
+            settings.reminder_delivery = reminder_delivery
+
+        if reminder_hours is not None:
+            settings.reminder_hours = format_reminder_hours(parse_reminder_hours(reminder_hours))
+            if settings.active_round:
+                round_obj = await self.get_round(settings.active_round)
+                if round_obj:
+                    round_obj.next_reminder = next_reminder_time(
+                        round_obj, settings.reminder_hours, utcnow()
+                    )
+
+        if timezone is not None:
+            settings.timezone = parse_timezone(timezone)
+
+        if deadline_time is not None:
+            settings.deadline_time = parse_deadline_time(deadline_time)
+
+        if auto_start is not None:
+            settings.auto_start = auto_start
+            await self._schedule_next_start(settings, utcnow())
 
         await self.session.commit()
-        return guild
+        return settings
 
-    async def set_active_round(self, guild_id: str, round_id: int = None) -> Guild:
-        """Set the active round for a guild."""
+    async def get_guild_templates(self, guild_id: str, fresh: bool = False) -> dict:
+        """Get a guild's custom message templates by name."""
+        query = (
+            select(GuildTemplate.name, GuildTemplate.body)
+            .join(Guild, GuildTemplate.guild_id == Guild.id)
+            .where(Guild.guild_id == str(guild_id))
+        )
+        result = await self._reader(fresh).execute(query)
+        return dict(result.all())
+
+    async def set_guild_template(self, guild_id: str, name: str, body: str = None):
+        """Store a guild's text for a template, or go back to the default if ``body`` is None."""
         guild = await self.get_or_create_guild(guild_id)
-        guild.active_round = round_id
+        query = select(GuildTemplate).where(
+            GuildTemplate.guild_id == guild.id, GuildTemplate.name == name
+        )
+        result = await self.session.execute(query)
+        template = result.scalars().first()
+
+        if body is None:
+            if template:
+                await self.session.delete(template)
+        elif template:
+            template.body = body
+            template.updated_at = utcnow()
+        else:
+            self.session.add(GuildTemplate(guild_id=guild.id, name=name, body=body))
+
         await self.session.commit()
-        return guild
 
-    # Player operations
-    async def get_or_create_player(self, guild_id: str, user_id: str) -> Player:
-        """Get a player by Discord user ID or create if not exists."""
-        guild = await self.get_or_create_guild(guild_id)
+    async def set_active_round(
+        self, guild_id: str, round_id: int = None, league: str = None
+    ) -> League:
+        """Set the active round for one of a guild's leagues."""
+        league_obj = await self._require_league(guild_id, league)
+        league_obj.active_round = round_id
+        await self.session.commit()
+        return league_obj
 
-        query = select(Player).where(
-            Player.guild_id == guild.id, Player.user_id == str(user_id)
+    # Player operations
+    async def get_or_create_player(
+        self, guild_id: str, user_id: str, league: str = None
+    ) -> Player:
+        """Get a player of a league by Discord user ID or create if not exists."""
+        query = (
+            select(Player)
+            .join(League, Player.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league), Player.user_id == str(user_id))
         )
         result = await self.session.execute(query)
         player = result.scalars().first()
 
         if not player:
-            player = Player(user_id=str(user_id), guild_id=guild.id)
+            league_obj = await self._require_league(guild_id, league)
+            player = Player(
+                user_id=str(user_id), guild_id=league_obj.guild_id, league_id=league_obj.id
+            )
             self.session.add(player)
             await self.session.commit()
 
         return player
 
+    async def set_player_reminders(
+        self, guild_id: str, user_id: str, enabled: bool, league: str = None
+    ) -> Player:
+        """Turn a player's deadline reminders in a league on or off."""
+        player = await self.get_or_create_player(guild_id, user_id, league)
+        player.reminders = enabled
+        await self.session.commit()
+        return player
+
     async def update_player_score(
-        self, guild_id: str, user_id: str, score_to_add: int
+        self, guild_id: str, user_id: str, score_to_add: int, league: str = None
     ) -> Player:
         """Update a player's score."""
-        player = await self.get_or_create_player(guild_id, user_id)
+        player = await self.get_or_create_player(guild_id, user_id, league)
         player.total_score += score_to_add
         await self.session.commit()
         return player
 
-    async def get_leaderboard(self, guild_id: str, limit: int = 5) -> list[Player]:
-        """Get the top players for a guild."""
-        guild = await self.get_or_create_guild(guild_id)
-
+    async def get_leaderboard(
+        self, guild_id: str, limit: int = 5, fresh: bool = False, league: str = None
+    ) -> list[Player]:
+        """Get the top players of one of a guild's leagues."""
         query = (
             select(Player)
-            .where(Player.guild_id == guild.id)
+            .join(League, Player.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league))
             .order_by(Player.total_score.desc())
             .limit(limit)
         )
-        result = await self.session.execute(query)
+        result = await self._reader(fresh).execute(query)
         return result.scalars().all()
 
     # Round operations
-    async def create_round(self, guild_id: str, theme: str) -> Round:
-        """Create a new round for the guild with the provided theme."""
-        guild = await self.get_or_create_guild(guild_id)
+    async def create_round(self, guild_id: str, theme: str, league: str = None) -> Round:
+        """Create a new round in one of the guild's leagues with the provided theme."""
+        league_obj = await self._require_league(guild_id, league)
+        new_round = await self._new_round(league_obj, theme, utcnow())
+        await self.session.commit()
+        return new_round
 
-        # Get the highest round number for the guild
-        query = select(func.max(Round.round_number)).where(Round.guild_id == guild.id)
+    async def _new_round(self, league_obj: League, theme: str, now: datetime) -> Round:
+        """Add a league's next round and make it the active one, without committing."""
+        # Rounds are numbered per league
+        query = select(func.max(Round.round_number)).where(Round.league_id == league_obj.id)
         result = await self.session.execute(query)
         highest_round = result.scalar() or 0
         new_round_number = highest_round + 1
 
-        # Calculate end times based on guild settings
-        submission_end = datetime.utcnow() + timedelta(days=guild.submission_days)
-        voting_end = submission_end + timedelta(days=guild.voting_days)
+        # Calculate end times based on league settings, at its deadline time if it has one
+        submission_end = deadline_after(
+            now, league_obj.submission_days, league_obj.timezone, league_obj.deadline_time
+        )
+        voting_end = deadline_after(
+            submission_end, league_obj.voting_days, league_obj.timezone, league_obj.deadline_time
+        )
 
         # Ensure theme is properly set
         theme = theme.strip() if theme else "General Music"
 
         new_round = Round(
-            guild_id=guild.id,
+            guild_id=league_obj.guild_id,
+            league_id=league_obj.id,
             round_number=new_round_number,
             theme=theme,
             submission_end=submission_end,
             voting_end=voting_end,
         )
+        new_round.next_reminder = next_reminder_time(
+            new_round, league_obj.reminder_hours, now
+        )
 
         self.session.add(new_round)
-        await self.session.commit()
+        await self.session.flush()
 
         # Set as active round
-        await self.set_active_round(guild_id, new_round.id)
-
+        league_obj.active_round = new_round.id
         return new_round
 
     async def get_round(self, round_id: int) -> Round:
         """Get a round by ID."""
-        query = select(Round).where(Round.id == round_id)
+        # Rounds already loaded in this session are returned without a query
+        return await self.session.get(Round, round_id)
+
+    async def get_active_round(self, guild_id: str, league: str = None) -> Round:
+        """Get the active round of one of a guild's leagues."""
+        query = (
+            select(Round)
+            .join(League, League.active_round == Round.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league))
+        )
         result = await self.session.execute(query)
         return result.scalars().first()
 
-    async def get_active_round(self, guild_id: str) -> Round:
-        """Get the active round for a guild."""
-        guild = await self.get_or_create_guild(guild_id)
-
-        if not guild.active_round:
-            return None
-
-        return await self.get_round(guild.active_round)
-
     async def complete_round(
         self, round_id: int, results_message_id: str = None
     ) -> Round:
-        """Mark a round as completed."""
+        """Mark a round as completed.
+
+        If its league's next queued theme is due, that round is started in the
+        same transaction and set as the completed round's ``next_round``.
+        """
+        now = utcnow()
         round_obj = await self.get_round(round_id)
         round_obj.is_completed = True
+        round_obj.next_reminder = None
+        round_obj.next_round = None
 
         if results_message_id:
             round_obj.results_message_id = results_message_id
 
+        league_obj = await self.session.get(League, round_obj.league_id)
+        if (
+            league_obj.active_round == round_obj.id
+            and league_obj.next_start is not None
+            and league_obj.next_start <= now
+        ):
+            round_obj.next_round = await self._start_next_round(league_obj, now)
+
         await self.session.commit()
         return round_obj
 
@@ -161,6 +549,8 @@ class DatabaseService:
         round_id: int,
         submission_message_id: str = None,
         voting_message_id: str = None,
+        voting_channel_id: str = None,
+        results_message_id: str = None,
     ) -> Round:
         """Update message IDs for a round."""
         round_obj = await self.get_round(round_id)
@@ -171,6 +561,12 @@ class DatabaseService:
         if voting_message_id:
             round_obj.voting_message_id = voting_message_id
 
+        if voting_channel_id:
+            round_obj.voting_channel_id = voting_channel_id
+
+        if results_message_id:
+            round_obj.results_message_id = results_message_id
+
         await self.session.commit()
         return round_obj
 
@@ -180,28 +576,140 @@ class DatabaseService:
         submission_end: datetime = None,
         voting_end: datetime = None,
     ) -> Round:
-        """Update the timing for a round's submission or voting period."""
+        """Update the timing for a round's submission or voting period.
+
+        Naive times are taken to be UTC.
+        """
         round_obj = await self.get_round(round_id)
 
         if submission_end:
-            round_obj.submission_end = submission_end
+            round_obj.submission_end = as_utc(submission_end)
 
         if voting_end:
-            round_obj.voting_end = voting_end
+            round_obj.voting_end = as_utc(voting_end)
 
         await self.session.commit()
         return round_obj
 
+    async def get_due_rounds(self, now: datetime) -> list[tuple]:
+        """Get leagues due a transition, reminder or queued start, in one query.
+
+        Rows are the league's active round, its Discord guild ID and the league's
+        ID. The round is None, or completed, when the league is only due to
+        start its next queued theme. Due rounds and starts are found by range
+        scans of their indexed times, however many leagues are idle.
+        """
+        due = union(
+            select(Round.league_id.label("league_id")).where(Round.next_deadline <= now),
+            select(League.id.label("league_id")).where(League.next_start <= now),
+        ).subquery()
+        query = (
+            select(Round, Guild.guild_id, League.id)
+            .select_from(due)
+            .join(League, League.id == due.c.league_id)
+            .join(Guild, League.guild_id == Guild.id)
+            .outerjoin(Round, League.active_round == Round.id)
+            .where(
+                or_(
+                    Round.next_deadline <= now,
+                    and_(
+                        League.next_start <= now,
+                        or_(Round.id.is_(None), Round.is_completed == True),
+                    ),
+                )
+            )
+        )
+        result = await self.session.execute(query)
+        return result.all()
+
+    async def claim_round(self, round_id: int, owner: str, ttl_seconds: int) -> bool:
+        """Take the transition lease on a round, returning False if another process holds it."""
+        now = utcnow()
+        query = (
+            update(Round)
+            .where(
+                Round.id == round_id,
+                or_(
+                    Round.lease_owner.is_(None),
+                    Round.lease_owner == owner,
+                    Round.lease_expires <= now,
+                ),
+            )
+            .values(
+                lease_owner=owner, lease_expires=now + timedelta(seconds=ttl_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def release_round(self, round_id: int, owner: str):
+        """Release a transition lease held by this process."""
+        query = (
+            update(Round)
+            .where(Round.id == round_id, Round.lease_owner == owner)
+            .values(lease_owner=None, lease_expires=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def schedule_reminder(self, round_obj: Round, reminder_hours: str, now: datetime):
+        """Set when to next remind the players of a round, after ``now``."""
+        round_obj.next_reminder = next_reminder_time(round_obj, reminder_hours, as_utc(now))
+        await self.session.commit()
+
+    async def get_reminder_targets(self, round_id: int, voting: bool) -> list[str]:
+        """Get the players to remind of a round's deadline, in one query.
+
+        Before voting these are the league's players who haven't submitted to
+        the round; during voting, its submitters who haven't voted. Players
+        who turned reminders off are left out.
+        """
+        if voting:
+            query = (
+                select(Player.user_id)
+                .join(Submission, Submission.player_id == Player.id)
+                .where(
+                    Submission.round_id == round_id,
+                    ~select(Vote.id)
+                    .where(Vote.round_id == round_id, Vote.voter_id == Player.user_id)
+                    .exists(),
+                )
+            )
+        else:
+            query = (
+                select(Player.user_id)
+                .join(Round, Round.league_id == Player.league_id)
+                .where(
+                    Round.id == round_id,
+                    ~select(Submission.id)
+                    .where(
+                        Submission.round_id == round_id,
+                        Submission.player_id == Player.id,
+                    )
+                    .exists(),
+                )
+            )
+        query = query.where(Player.reminders == True).distinct().order_by(Player.user_id)
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
     async def get_round_guild_info(self, round_id: int) -> tuple:
-        """Get the Discord guild ID and channel ID for a round without lazy loading."""
+        """Get the Discord guild ID, channel ID, voting days and league settings for a round."""
         from sqlalchemy import text
 
         # Use a direct SQL query to avoid lazy loading issues
         query = text(
             """
-            SELECT g.guild_id, g.channel_id, g.voting_days
-            FROM guilds g
-            JOIN rounds r ON r.guild_id = g.id
+            SELECT g.guild_id, l.channel_id, l.voting_days,
+                   l.scoring, l.vote_penalty, l.non_voter_penalty, l.live_tally,
+                   l.reminder_hours, l.reminder_delivery, l.name,
+                   l.timezone, l.deadline_time
+            FROM rounds r
+            JOIN leagues l ON r.league_id = l.id
+            JOIN guilds g ON l.guild_id = g.id
             WHERE r.id = :round_id
         """
         )
@@ -210,74 +718,849 @@ class DatabaseService:
         row = result.first()
 
         if not row:
-            return None, None, None
+            return None, None, None, None
+
+        # guild_discord_id, channel_id, voting_days, round settings
+        return row[0], row[1], row[2], RoundSettings(*row[3:])
+
+    # Theme queue operations
+    async def _queued_themes(self, league_id: int) -> list[QueuedTheme]:
+        """A league's queued themes, next first."""
+        query = (
+            select(QueuedTheme)
+            .where(QueuedTheme.league_id == league_id)
+            .order_by(QueuedTheme.position, QueuedTheme.id)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def _schedule_next_start(self, league_obj: League, now: datetime):
+        """Set when the head of a league's queue may start, without committing."""
+        query = (
+            select(QueuedTheme)
+            .where(QueuedTheme.league_id == league_obj.id)
+            .order_by(QueuedTheme.position, QueuedTheme.id)
+            .limit(1)
+        )
+        result = await self.session.execute(query)
+        league_obj.next_start = next_start_time(
+            result.scalars().first(), league_obj.auto_start, now
+        )
+
+    async def queue_theme(
+        self,
+        guild_id: str,
+        theme: str,
+        start: str = None,
+        added_by: str = None,
+        league: str = None,
+    ) -> QueuedTheme:
+        """Add a theme to the end of a league's queue, optionally not to start before ``start``.
+
+        ``start`` is a date and time in the league's timezone, such as
+        ``"2024-06-01 18:00"``. The queued theme's ``place`` is set to its
+        place in the queue. Raises ValueError if the theme is empty or too
+        long, the start time isn't in the future, or the queue is full.
+        """
+        theme = (theme or "").strip()
+        if not theme:
+            raise ValueError("You must provide a theme to queue")
+        if len(theme) > MAX_THEME_LENGTH:
+            raise ValueError(f"Themes can be at most {MAX_THEME_LENGTH} characters")
+
+        league_obj = await self._require_league(guild_id, league)
+        now = utcnow()
+        start_at = parse_start_time(start, now, league_obj.timezone)
+        query = select(func.count(QueuedTheme.id), func.max(QueuedTheme.position)).where(
+            QueuedTheme.league_id == league_obj.id
+        )
+        count, last_position = (await self.session.execute(query)).one()
+        if count >= MAX_QUEUED_THEMES:
+            raise ValueError(f"The queue already has {MAX_QUEUED_THEMES} themes")
+
+        queued = QueuedTheme(
+            league_id=league_obj.id,
+            theme=theme,
+            position=(last_position or 0) + 1,
+            start_at=start_at,
+            added_by=str(added_by) if added_by else None,
+        )
+        self.session.add(queued)
 
-        return row[0], row[1], row[2]  # guild_discord_id, channel_id, voting_days
+        # A theme queued first decides when the next round starts
+        if count == 0:
+            league_obj.next_start = next_start_time(queued, league_obj.auto_start, now)
+
+        await self.session.commit()
+        queued.place = count + 1
+        return queued
+
+    async def get_queue(
+        self, guild_id: str, league: str = None
+    ) -> tuple[League, list[QueuedTheme]]:
+        """Get one of a guild's leagues and its queued themes, next first."""
+        league_obj = await self._require_league(guild_id, league)
+        return league_obj, await self._queued_themes(league_obj.id)
+
+    async def remove_queued_theme(
+        self, guild_id: str, place: int, user_id: str = None, league: str = None
+    ) -> QueuedTheme:
+        """Take the theme at ``place`` (from 1) out of a league's queue.
+
+        With ``user_id``, only a theme that user queued may be removed. Raises
+        ValueError if there's no such theme or it was someone else's.
+        """
+        league_obj, themes = await self.get_queue(guild_id, league)
+        if not 1 <= place <= len(themes):
+            raise ValueError(f"There's no theme #{place} in the queue")
+
+        queued = themes[place - 1]
+        if user_id is not None and queued.added_by != str(user_id):
+            raise ValueError("You can only remove themes you queued")
+
+        await self.session.delete(queued)
+        if place == 1:
+            league_obj.next_start = next_start_time(
+                themes[1] if len(themes) > 1 else None,
+                league_obj.auto_start,
+                utcnow(),
+            )
+
+        await self.session.commit()
+        return queued
+
+    async def _start_next_round(self, league_obj: League, now: datetime) -> Round:
+        """Start a league's round for the head of its queue, without committing.
+
+        Returns None if the queue is empty or another process took its head.
+        """
+        themes = await self._queued_themes(league_obj.id)
+        if not themes:
+            league_obj.next_start = None
+            return None
+
+        # Deleting the head claims it, so only one process starts its round
+        claimed = await self.session.execute(
+            delete(QueuedTheme)
+            .where(QueuedTheme.id == themes[0].id)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            return None
+        self.session.expunge(themes[0])
+
+        new_round = await self._new_round(league_obj, themes[0].theme, now)
+        league_obj.next_start = next_start_time(
+            themes[1] if len(themes) > 1 else None, league_obj.auto_start, now
+        )
+        return new_round
+
+    async def start_queued_round(self, league_id: int, now: datetime) -> Round:
+        """Start a league's next queued theme if it's due and no round is running.
+
+        Returns the new round, or None if there was nothing to start.
+        """
+        now = as_utc(now)
+        league_obj = await self.session.get(League, league_id, populate_existing=True)
+        if league_obj is None or league_obj.next_start is None or league_obj.next_start > now:
+            return None
+
+        if league_obj.active_round:
+            running = await self.session.get(
+                Round, league_obj.active_round, populate_existing=True
+            )
+            if running is not None and not running.is_completed:
+                return None
+
+        new_round = await self._start_next_round(league_obj, now)
+        await self.session.commit()
+        return new_round
+
+    # Round history
+    async def get_round_history(
+        self,
+        guild_id: str,
+        before_number: int = None,
+        limit: int = 10,
+        fresh: bool = False,
+        league: str = None,
+    ) -> list[RoundSummary]:
+        """Get a page of the rounds of one of a guild's leagues, newest first.
+
+        Pass the last round number of the previous page as ``before_number``
+        for the next one. Pages are read from the (league_id, round_number)
+        index, so every page costs the same however many rounds there are.
+        Winners are shown with the score of the results post, or their votes
+        if the round was completed before scores were stored.
+        """
+        submission_count = (
+            select(func.count(Submission.id))
+            .where(Submission.round_id == Round.id)
+            .correlate(Round)
+            .scalar_subquery()
+        )
+        winning_submission = (
+            select(Submission.id)
+            .where(Submission.round_id == Round.id)
+            .order_by(Submission.place, Submission.id)
+            .limit(1)
+            .correlate(Round)
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                Round.id,
+                Round.round_number,
+                Round.theme,
+                Round.voting_end,
+                Round.is_completed,
+                submission_count,
+                Player.user_id,
+                Submission.score,
+                Submission.votes_received,
+                League.scoring,
+            )
+            .join(League, Round.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .outerjoin(
+                Submission,
+                and_(Round.is_completed, Submission.id == winning_submission),
+            )
+            .outerjoin(Player, Submission.player_id == Player.id)
+            .where(_in_league(guild_id, league))
+            .order_by(Round.round_number.desc())
+            .limit(limit)
+        )
+        if before_number is not None:
+            query = query.where(Round.round_number < before_number)
+
+        result = await self._reader(fresh).execute(query)
+        history = []
+        for *summary, winner_id, score, votes, scoring in result.all():
+            if winner_id is None:
+                winner_score = unit = None
+            elif score is None:
+                winner_score, unit = votes, "votes"
+            else:
+                winner_score, unit = score, get_scoring_system(scoring).unit
+            history.append(RoundSummary(*summary, winner_id, winner_score, unit))
+        return history
+
+    async def get_round_by_number(
+        self, guild_id: str, round_number: int, fresh: bool = False, league: str = None
+    ) -> Round:
+        """Get a round of one of a guild's leagues by its number, with its league loaded."""
+        query = (
+            select(Round)
+            .join(League, Round.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .where(_in_league(guild_id, league), Round.round_number == round_number)
+            .options(contains_eager(Round.league))
+        )
+        result = await self._reader(fresh).execute(query)
+        return result.scalars().first()
+
+    async def get_results_page(
+        self, round_id: int, after: tuple = None, limit: int = 10, fresh: bool = False
+    ) -> list[tuple]:
+        """Get a page of a round's submissions as ``(submission, user_id)``, in results order.
+
+        ``after`` is ``(place, id)`` of the last submission on the previous
+        page. Tied submissions are in ballot order, as in the results post.
+        """
+        query = (
+            select(Submission, Player.user_id)
+            .join(Player, Submission.player_id == Player.id)
+            .where(Submission.round_id == round_id)
+            .order_by(Submission.place, Submission.id)
+            .limit(limit)
+        )
+        if after is not None:
+            place, submission_id = after
+            query = query.where(
+                or_(
+                    Submission.place > place,
+                    and_(Submission.place == place, Submission.id > submission_id),
+                )
+            )
+
+        result = await self._reader(fresh).execute(query)
+        return result.all()
 
     # Submission operations
     async def create_submission(
-        self, guild_id: str, user_id: str, content: str, description: str = None
+        self,
+        guild_id: str,
+        user_id: str,
+        content: str,
+        description: str = None,
+        league: str = None,
     ) -> Submission:
-        """Create a new submission for the active round."""
-        player = await self.get_or_create_player(guild_id, user_id)
-        round_obj = await self.get_active_round(guild_id)
+        """Create a new submission for the active round of one of a guild's leagues.
+
+        If the song was submitted in the guild before, the earlier submission
+        is set on the result's ``duplicate_of``, or DuplicateSubmission is
+        raised when the guild rejects duplicates.
+        """
+        round_obj = await self.get_active_round(guild_id, league)
 
         if not round_obj:
             return None
 
-        # Check if player already submitted in this round
-        query = select(Submission).where(
-            Submission.round_id == round_obj.id, Submission.player_id == player.id
+        # Find the player and any earlier submission of theirs in one query
+        query = (
+            select(Player, Submission)
+            .outerjoin(
+                Submission,
+                and_(
+                    Submission.player_id == Player.id,
+                    Submission.round_id == round_obj.id,
+                ),
+            )
+            .where(Player.league_id == round_obj.league_id, Player.user_id == str(user_id))
         )
         result = await self.session.execute(query)
-        existing_submission = result.scalars().first()
+        row = result.first()
+        player, existing_submission = row if row else (None, None)
+        link = parse_link(content)
+        provider, track_id = link if link else (None, None)
+        fingerprint = track_fingerprint(content)
+
+        # Replacing your own entry with the same song isn't a duplicate
+        policy, duplicate = await self.find_duplicate_submission(
+            round_obj.guild_id,
+            fingerprint,
+            exclude_id=existing_submission.id if existing_submission else None,
+        )
+        if duplicate and policy == "reject":
+            raise DuplicateSubmission(duplicate, round_obj.id)
+        if policy == "allow":
+            duplicate = None
 
         if existing_submission:
             # Update existing submission
             existing_submission.content = content
             existing_submission.description = description
-            existing_submission.submitted_at = datetime.utcnow()
+            existing_submission.provider = provider
+            existing_submission.track_id = track_id
+            existing_submission.fingerprint = fingerprint
+            existing_submission.submitted_at = utcnow()
             await self.session.commit()
+            existing_submission.duplicate_of = duplicate
             return existing_submission
 
+        if not player:
+            player = Player(
+                user_id=str(user_id),
+                guild_id=round_obj.guild_id,
+                league_id=round_obj.league_id,
+            )
+            self.session.add(player)
+
         # Create new submission
         submission = Submission(
             round_id=round_obj.id,
-            player_id=player.id,
+            player=player,
             content=content,
             description=description,
+            provider=provider,
+            track_id=track_id,
+            guild_id=round_obj.guild_id,
+            fingerprint=fingerprint,
         )
 
         self.session.add(submission)
         await self.session.commit()
+        submission.duplicate_of = duplicate
         return submission
 
+    async def find_duplicate_submission(
+        self, guild_pk: int, fingerprint: str, exclude_id: int = None
+    ) -> tuple:
+        """Get a guild's duplicate policy and its earliest submission of a track.
+
+        ``guild_pk`` is the guild's database ID. Returns ``(policy, match)``
+        where ``match`` is a DuplicateMatch or None; both come from a single
+        lookup on the (guild_id, fingerprint) index.
+        """
+        conditions = [
+            Submission.guild_id == Guild.id,
+            Submission.fingerprint == fingerprint,
+        ]
+        if exclude_id is not None:
+            conditions.append(Submission.id != exclude_id)
+
+        query = (
+            select(Guild.duplicate_policy, Round.id, Round.round_number, Player.user_id)
+            .select_from(Guild)
+            .outerjoin(Submission, and_(*conditions))
+            .outerjoin(Round, Round.id == Submission.round_id)
+            .outerjoin(Player, Player.id == Submission.player_id)
+            .where(Guild.id == guild_pk)
+            .order_by(Submission.id)
+            .limit(1)
+        )
+        result = await self.session.execute(query)
+        policy, round_id, round_number, user_id = result.first()
+
+        if fingerprint is None or round_id is None:
+            return policy, None
+        return policy, DuplicateMatch(round_id, round_number, user_id)
+
     async def get_round_submissions(self, round_id: int) -> list[Submission]:
-        """Get all submissions for a round."""
-        query = select(Submission).where(Submission.round_id == round_id)
+        """Get all submissions for a round, with their players."""
+        query = (
+            select(Submission)
+            .join(Submission.player)
+            .options(contains_eager(Submission.player))
+            .where(Submission.round_id == round_id)
+            .order_by(Submission.id)
+        )
         result = await self.session.execute(query)
         return result.scalars().all()
 
-    async def calculate_round_results(self, round_id: int) -> list[tuple]:
-        """Calculate the results for a round and update player scores."""
-        # Get all submissions for the round
-        submissions = await self.get_round_submissions(round_id)
+    async def count_round_submissions(self, round_id: int, fresh: bool = False) -> int:
+        """Count the submissions in a round without loading them."""
+        query = select(func.count(Submission.id)).where(Submission.round_id == round_id)
+        result = await self._reader(fresh).execute(query)
+        return result.scalar()
+
+    def _head_to_head_wins(self, scores, scored):
+        """Subquery counting, per submission, the submissions with the same score it beat.
+
+        A submission beats another head-to-head when more voters gave it more
+        points than the other (not voting for one counts as 0 points) than
+        the other way round. That margin is each submission's ``preference``
+        (the signs of its votes added up) less the rival's, corrected for
+        voters who voted for both, so only pairs of votes by the same voter
+        are joined rather than every tied pair with every voter.
+        """
+        vote, other = scored.alias("vote"), scored.alias("other")
+        both = (
+            select(
+                vote.c.submission_id,
+                other.c.submission_id.label("rival_id"),
+                func.sum(
+                    _sign(vote.c.points - other.c.points)
+                    - _sign(vote.c.points)
+                    + _sign(other.c.points)
+                ).label("correction"),
+            )
+            .join(
+                other,
+                and_(
+                    other.c.voter_id == vote.c.voter_id,
+                    other.c.submission_id != vote.c.submission_id,
+                ),
+            )
+            .group_by(vote.c.submission_id, other.c.submission_id)
+            .subquery()
+        )
+
+        rival = scores.alias("rival")
+        margin = (
+            scores.c.preference - rival.c.preference + func.coalesce(both.c.correction, 0)
+        )
+        return (
+            select(scores.c.id.label("submission_id"), func.count().label("wins"))
+            .join(rival, and_(rival.c.score == scores.c.score, rival.c.id != scores.c.id))
+            .outerjoin(
+                both,
+                and_(both.c.submission_id == scores.c.id, both.c.rival_id == rival.c.id),
+            )
+            .where(margin > 0)
+            .group_by(scores.c.id)
+            .subquery()
+        )
+
+    async def calculate_round_results(self, round_id: int) -> list[RoundResult]:
+        """Score and rank a round under its league's settings and update player scores.
+
+        Returns the round's results, winner first. Every submission's points,
+        whether its submitter voted and its place are worked out by the
+        statement that loads the submissions: points are summed per
+        submission, submitters who didn't vote are penalised as the league's
+        ``vote_penalty`` says, and ``RANK()`` orders the scores with the
+        league's ``tie_breaker`` (see scoring.TIE_BREAKERS). Submissions still
+        tied share a place and are listed in ballot order.
+        """
+        query = (
+            select(
+                League.scoring,
+                League.vote_penalty,
+                League.non_voter_penalty,
+                League.tie_breaker,
+            )
+            .join(Round, Round.league_id == League.id)
+            .where(Round.id == round_id)
+        )
+        result = await self.session.execute(query)
+        scoring, penalty, penalty_points, tie_breaker = result.first()
+        system = get_scoring_system(scoring)
+
+        # Submitters who didn't vote: one set difference over the round
+        non_voters = except_(
+            select(Player.user_id)
+            .join(Submission, Submission.player_id == Player.id)
+            .where(Submission.round_id == round_id),
+            select(Vote.voter_id).where(Vote.round_id == round_id),
+        ).subquery()
+
+        votes = (
+            select(Vote.id, Vote.submission_id, Vote.voter_id, Vote.points)
+            .where(Vote.round_id == round_id)
+            .subquery()
+        )
+        vote_points = system.vote_points(votes)
+        scored = select(
+            votes.c.submission_id,
+            votes.c.voter_id,
+            (literal(1) if vote_points is None else vote_points).label("points"),
+        ).cte("scored")
+        totals = (
+            select(
+                scored.c.submission_id,
+                func.sum(scored.c.points).label("points"),
+                func.count(func.distinct(scored.c.voter_id)).label("voters"),
+                func.sum(_sign(scored.c.points)).label("preference"),
+            )
+            .group_by(scored.c.submission_id)
+            .subquery()
+        )
+        # Systems without vote points score the reaction counts stored when voting closed
+        points = func.coalesce(
+            Submission.votes_received if vote_points is None else totals.c.points, 0
+        )
+        voted = non_voters.c.user_id.is_(None)
+
+        scores = (
+            select(
+                Submission.id,
+                Submission.submitted_at,
+                case((voted, points), else_=non_voter_score(points, penalty, penalty_points))
+                .label("score"),
+                voted.label("voted"),
+                func.coalesce(totals.c.voters, 0).label("voters"),
+                func.coalesce(totals.c.preference, 0).label("preference"),
+                (func.row_number().over(order_by=Submission.id) - 1).label("ballot_index"),
+            )
+            .join(Player, Submission.player_id == Player.id)
+            .outerjoin(non_voters, non_voters.c.user_id == Player.user_id)
+            .outerjoin(totals, totals.c.submission_id == Submission.id)
+            .where(Submission.round_id == round_id)
+            .cte("scores")
+        )
+
+        ranking = [scores.c.score.desc()]
+        ranked = select(scores)
+        if tie_breaker == "earliest":
+            ranking += [scores.c.submitted_at, scores.c.id]
+        elif tie_breaker == "voters":
+            ranking.append(scores.c.voters.desc())
+        elif tie_breaker == "head_to_head":
+            wins = self._head_to_head_wins(scores, scored)
+            ranked = ranked.outerjoin(wins, wins.c.submission_id == scores.c.id)
+            ranking.append(func.coalesce(wins.c.wins, 0).desc())
+        ranked = ranked.add_columns(
+            func.rank().over(order_by=ranking).label("place"),
+            func.row_number().over(order_by=ranking + [scores.c.ballot_index]).label("position"),
+        ).subquery()
+
+        query = (
+            select(
+                Submission,
+                Player,
+                ranked.c.ballot_index,
+                ranked.c.score,
+                ranked.c.voted,
+                ranked.c.place,
+            )
+            .join(ranked, ranked.c.id == Submission.id)
+            .join(Player, Submission.player_id == Player.id)
+            .order_by(ranked.c.position)
+        )
+        result = await self.session.execute(query)
 
         results = []
-        for idx, submission in enumerate(submissions):
-            # Get the player
-            query = select(Player).where(Player.id == submission.player_id)
-            result = await self.session.execute(query)
-            player = result.scalars().first()
+        for submission, player, ballot_index, score, voted, place in result.all():
+            # Scoring a round again replaces its earlier scores
+            player.total_score += score - (submission.score or 0)
+            submission.score = score
+            submission.place = place
+            results.append(RoundResult(player, submission, ballot_index, score, voted, place))
+
+        await self.session.commit()
+        return results
 
-            # Update player score
-            player.total_score += submission.votes_received
+    # Vote operations
+    def _ballot_submission(self, round_id: int, ballot_index: int):
+        """Subquery for the ID of the submission at a position on a round's ballot."""
+        return (
+            select(Submission.id)
+            .where(Submission.round_id == round_id)
+            .order_by(Submission.id)
+            .offset(ballot_index)
+            .limit(1)
+            .scalar_subquery()
+        )
 
-            # Add to results
-            results.append((player, submission, idx, submission.votes_received))
+    async def record_vote(self, round_id: int, voter_id: str, ballot_index: int) -> bool:
+        """Record a vote for the submission at ``ballot_index`` on the ballot.
 
+        Returns False if the voter had already voted for it or there is no
+        submission at that position.
+        """
+        query = insert(Vote).values(
+            round_id=round_id,
+            submission_id=self._ballot_submission(round_id, ballot_index),
+            voter_id=str(voter_id),
+        )
+        try:
+            await self.session.execute(query)
+        except IntegrityError:
+            await self.session.rollback()
+            return False
         await self.session.commit()
+        return True
 
-        # Sort results by votes (highest first)
-        results.sort(key=lambda x: x[3], reverse=True)
-        return results
+    async def remove_vote(self, round_id: int, voter_id: str, ballot_index: int):
+        """Remove a vote for the submission at ``ballot_index`` on the ballot."""
+        query = delete(Vote).where(
+            Vote.voter_id == str(voter_id),
+            Vote.submission_id == self._ballot_submission(round_id, ballot_index),
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def get_voter_ballot(
+        self, round_id: int, voter_id: str, ballot_index: int = None
+    ) -> list:
+        """Get the points of a voter's votes this round, leaving out the one at ``ballot_index``.
+
+        Votes cast by reacting have points None.
+        """
+        query = select(Vote.points).where(
+            Vote.round_id == round_id, Vote.voter_id == str(voter_id)
+        )
+        if ballot_index is not None:
+            query = query.where(
+                Vote.submission_id != self._ballot_submission(round_id, ballot_index)
+            )
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def get_ballot_votes(self, round_id: int) -> tuple[list, list]:
+        """Get a round's submitters in ballot order, and its votes as ``(voter_id, ballot_index)``.
+
+        Downvotes are left out: they don't count towards the vote limit or
+        the live tally.
+        """
+        query = (
+            select(Submission.id, Player.user_id)
+            .join(Player, Submission.player_id == Player.id)
+            .where(Submission.round_id == round_id)
+            .order_by(Submission.id)
+        )
+        result = await self.session.execute(query)
+        submissions = result.all()
+        ballot_indexes = {
+            submission_id: idx for idx, (submission_id, _) in enumerate(submissions)
+        }
+
+        query = select(Vote.voter_id, Vote.submission_id).where(
+            Vote.round_id == round_id, _upvote
+        )
+        result = await self.session.execute(query)
+        votes = [
+            (voter_id, ballot_indexes[submission_id])
+            for voter_id, submission_id in result.all()
+        ]
+        return [user_id for _, user_id in submissions], votes
+
+    async def get_open_ballots(self) -> dict:
+        """Get the submitters and votes of every round being voted on, in two queries.
+
+        Returns ``{round_id: (guild_id, submitters, votes)}`` with the Discord
+        guild ID, the submitters in ballot order and the votes as
+        ``(voter_id, ballot_index)``, as get_ballot_votes does for one round.
+        """
+        voting = and_(Round.is_completed == False, Round.voting_message_id.isnot(None))
+        query = (
+            select(Submission.round_id, Submission.id, Player.user_id, Guild.guild_id)
+            .join(Round, Submission.round_id == Round.id)
+            .join(Player, Submission.player_id == Player.id)
+            .join(Guild, Round.guild_id == Guild.id)
+            .where(voting)
+            .order_by(Submission.round_id, Submission.id)
+        )
+        result = await self.session.execute(query)
+
+        ballots = {}
+        ballot_indexes = {}
+        for round_id, submission_id, user_id, guild_id in result.all():
+            _, submitters, _ = ballots.setdefault(round_id, (guild_id, [], []))
+            ballot_indexes[submission_id] = len(submitters)
+            submitters.append(user_id)
+
+        query = (
+            select(Vote.round_id, Vote.voter_id, Vote.submission_id)
+            .join(Round, Vote.round_id == Round.id)
+            .where(voting, _upvote)
+        )
+        result = await self.session.execute(query)
+        for round_id, voter_id, submission_id in result.all():
+            if round_id in ballots and submission_id in ballot_indexes:
+                ballots[round_id][2].append((voter_id, ballot_indexes[submission_id]))
+        return ballots
+
+    async def set_vote_points(
+        self, round_id: int, voter_id: str, ballot_index: int, points: int
+    ) -> bool:
+        """Give the submission at ``ballot_index`` on the ballot ``points``.
+
+        Replaces any vote the voter already gave it. Returns False if there
+        is no submission at that position.
+        """
+        query = (
+            update(Vote)
+            .where(
+                Vote.voter_id == str(voter_id),
+                Vote.submission_id == self._ballot_submission(round_id, ballot_index),
+            )
+            .values(points=points)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(query)
+        if result.rowcount == 0:
+            query = insert(Vote).values(
+                round_id=round_id,
+                submission_id=self._ballot_submission(round_id, ballot_index),
+                voter_id=str(voter_id),
+                points=points,
+            )
+            try:
+                await self.session.execute(query)
+            except IntegrityError:
+                await self.session.rollback()
+                return False
+        await self.session.commit()
+        return True
+
+    # Statistics
+    async def get_round_export(
+        self, guild_id: str, after_round: int = None, fresh: bool = False, league: str = None
+    ) -> list[tuple]:
+        """Get ``(round_number, user_id, votes_received, score, place)`` of every completed round's submissions.
+
+        ``score`` and ``place`` are as posted in the results; ``score`` is None
+        for rounds completed before scores were stored. Rounds nobody
+        submitted to appear once with ``user_id`` None. Pass ``after_round``
+        to only get rounds numbered after it.
+        """
+        query = (
+            select(
+                Round.round_number,
+                Player.user_id,
+                Submission.votes_received,
+                Submission.score,
+                Submission.place,
+            )
+            .join(League, Round.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .outerjoin(Submission, Submission.round_id == Round.id)
+            .outerjoin(Player, Submission.player_id == Player.id)
+            .where(_in_league(guild_id, league), Round.is_completed)
+            .order_by(Round.round_number)
+        )
+        if after_round is not None:
+            query = query.where(Round.round_number > after_round)
+        result = await self._reader(fresh).execute(query)
+        return result.all()
+
+    async def get_vote_export(
+        self, guild_id: str, after_round: int = None, fresh: bool = False, league: str = None
+    ) -> list[tuple]:
+        """Get ``(round_number, voter_id, submitter_id)`` of every vote in completed rounds.
+
+        Pass ``after_round`` to only get rounds numbered after it.
+        """
+        query = (
+            select(Round.round_number, Vote.voter_id, Player.user_id)
+            .join(League, Round.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .join(Vote, Vote.round_id == Round.id)
+            .join(Submission, Vote.submission_id == Submission.id)
+            .join(Player, Submission.player_id == Player.id)
+            .where(_in_league(guild_id, league), Round.is_completed)
+            .order_by(Round.round_number)
+        )
+        if after_round is not None:
+            query = query.where(Round.round_number > after_round)
+        result = await self._reader(fresh).execute(query)
+        return result.all()
+
+    async def get_vote_affinity(
+        self, guild_id: str, fresh: bool = False, league: str = None
+    ) -> list[tuple]:
+        """Get ``(voter_id, submitter_id, votes)`` totals over a league's completed rounds."""
+        query = (
+            select(Vote.voter_id, Player.user_id, func.count(Vote.id))
+            .join(Round, Vote.round_id == Round.id)
+            .join(League, Round.league_id == League.id)
+            .join(Guild, League.guild_id == Guild.id)
+            .join(Submission, Vote.submission_id == Submission.id)
+            .join(Player, Submission.player_id == Player.id)
+            .where(_in_league(guild_id, league), Round.is_completed)
+            .group_by(Vote.voter_id, Player.user_id)
+        )
+        result = await self._reader(fresh).execute(query)
+        return result.all()
+
+    # Track metadata cache
+    async def get_track_metadata(self, keys, fresh: bool = False) -> dict:
+        """Get cached metadata for ``(provider, track_id)`` keys, whatever its age."""
+        keys = {tuple(key) for key in keys if key and key[0]}
+        if not keys:
+            return {}
+
+        query = select(TrackMetadata).where(
+            tuple_(TrackMetadata.provider, TrackMetadata.track_id).in_(keys)
+        )
+        result = await self._reader(fresh).execute(query)
+        return {
+            (metadata.provider, metadata.track_id): metadata
+            for metadata in result.scalars().all()
+        }
+
+    async def store_track_metadata(
+        self,
+        provider: str,
+        track_id: str,
+        title: str = None,
+        artist: str = None,
+        duration_seconds: int = None,
+    ) -> TrackMetadata:
+        """Cache the metadata of a track, replacing any earlier copy.
+
+        Two players submitting the same new track at once both try to insert
+        it; the one that loses updates the other's row instead.
+        """
+        for attempt in range(2):
+            cached = await self.get_track_metadata([(provider, track_id)], fresh=True)
+            metadata = cached.get((provider, track_id))
+            if metadata is None:
+                metadata = TrackMetadata(provider=provider, track_id=track_id)
+                self.session.add(metadata)
+
+            metadata.title = title
+            metadata.artist = artist
+            metadata.duration_seconds = duration_seconds
+            metadata.fetched_at = utcnow()
+            try:
+                await self.session.commit()
+            except IntegrityError:
+                await self.session.rollback()
+                if attempt:
+                    raise
+                continue
+            return metadata
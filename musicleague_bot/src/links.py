@@ -0,0 +1,124 @@
+"""Recognise music links in submissions and reduce them to canonical keys.
+
+The same track can be linked in many ways (share links, mobile URLs, tracking
+parameters, URIs). ``parse_link`` turns any of them into a ``TrackLink`` whose
+``(provider, track_id)`` is the same for every variant, so submissions can be
+compared and joined on two indexed columns.
+"""
+
+import re
+import unicodedata
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+_URL = re.compile(r"https?://\S+", re.IGNORECASE)
+_SPOTIFY_URI = re.compile(r"\bspotify:track:([A-Za-z0-9]{22})\b")
+_SPOTIFY_ID = re.compile(r"^[A-Za-z0-9]{22}$")
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_NUMERIC_ID = re.compile(r"^\d+$")
+_SLUG = re.compile(r"^[A-Za-z0-9-]+$")
+
+
+class TrackLink(NamedTuple):
+    """A link to one track on a streaming service."""
+
+    provider: str
+    track_id: str
+
+    @property
+    def key(self):
+        return (self.provider, self.track_id)
+
+    @property
+    def url(self):
+        """The canonical URL of the track."""
+        if self.provider == "spotify":
+            return f"https://open.spotify.com/track/{self.track_id}"
+        if self.provider == "youtube":
+            return f"https://www.youtube.com/watch?v={self.track_id}"
+        if self.provider == "apple_music":
+            return f"https://music.apple.com/us/song/{self.track_id}"
+        artist, slug = self.track_id.split("/", 1)
+        return f"https://{artist}.bandcamp.com/track/{slug}"
+
+
+def parse_link(content: str) -> Optional[TrackLink]:
+    """Find the first recognised track link in a submission, if any."""
+    if not content:
+        return None
+
+    match = _SPOTIFY_URI.search(content)
+    if match:
+        return TrackLink("spotify", match.group(1))
+
+    for url in _URL.findall(content):
+        link = _parse_url(url.rstrip(".,;:!?)>]"))
+        if link:
+            return link
+    return None
+
+
+def fingerprint(content: str) -> Optional[str]:
+    """Normalise a submission into a key shared by every copy of the same track.
+
+    Recognised links become ``provider:track_id``. Anything else is reduced to
+    its lower-case words without accents or punctuation, so "Björk – Jóga"
+    and "bjork jóga" match.
+    """
+    link = parse_link(content)
+    if link:
+        return f"{link.provider}:{link.track_id}"
+
+    text = unicodedata.normalize("NFKD", content or "").casefold()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    words = re.findall(r"[^\W_]+", text)
+    return "text:" + " ".join(words) if words else None
+
+
+def _parse_url(url):
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = [segment for segment in parts.path.split("/") if segment]
+    query = parse_qs(parts.query)
+
+    if host == "open.spotify.com":
+        # /track/<id>, optionally after a locale segment such as /intl-de/
+        if path and path[0].startswith("intl-"):
+            path = path[1:]
+        if len(path) >= 2 and path[0] == "track" and _SPOTIFY_ID.match(path[1]):
+            return TrackLink("spotify", path[1])
+
+    elif host in ("youtube.com", "m.youtube.com", "music.youtube.com"):
+        video_id = None
+        if path[:1] == ["watch"]:
+            video_id = query.get("v", [None])[0]
+        elif len(path) >= 2 and path[0] in ("shorts", "embed", "live", "v"):
+            video_id = path[1]
+        if video_id and _YOUTUBE_ID.match(video_id):
+            return TrackLink("youtube", video_id)
+
+    elif host == "youtu.be":
+        if path and _YOUTUBE_ID.match(path[0]):
+            return TrackLink("youtube", path[0])
+
+    elif host in ("music.apple.com", "itunes.apple.com", "geo.music.apple.com"):
+        # Album links name the track in ?i=, song links end with its id
+        track_id = query.get("i", [None])[0]
+        if track_id is None and "song" in path and _NUMERIC_ID.match(path[-1]):
+            track_id = path[-1]
+        if track_id and _NUMERIC_ID.match(track_id):
+            return TrackLink("apple_music", track_id)
+
+    elif host.endswith(".bandcamp.com"):
+        artist = host[: -len(".bandcamp.com")]
+        if (
+            len(path) >= 2
+            and path[0] == "track"
+            and _SLUG.match(artist)
+            and _SLUG.match(path[1])
+        ):
+            return TrackLink("bandcamp", f"{artist}/{path[1].lower()}")
+
+    return None
@@ -0,0 +1,165 @@
+"""Live vote counts on the ballot of a round being voted on.
+
+Guilds can have the ballot's header message show how many players have
+voted so far, and optionally the votes for each submission. Votes are
+counted in the round's ``BallotState`` (see ballot.py), and ``LiveTallies``
+re-renders the header from it at most once every ``LIVE_TALLY_INTERVAL``
+seconds: votes arriving while an edit is waiting are coalesced into it, so a
+busy ballot costs one edit per interval rather than one per reaction.
+Closing a round's tally sends any edit still waiting before the results are
+posted.
+"""
+
+import asyncio
+import logging
+import time
+
+import discord
+
+from .render import MESSAGE_LIMIT, fit
+
+logger = logging.getLogger("musicleague-bot")
+
+# What the ballot header shows while voting is open
+LIVE_TALLY_MODES = {
+    "off": "Off",
+    "turnout": "How many players have voted",
+    "counts": "How many players have voted, and the votes for each submission",
+}
+
+# Fewest seconds between two edits of one ballot
+LIVE_TALLY_INTERVAL = 5.0
+
+
+class Tally:
+    """The ballot header of a round being voted on, showing the votes in its ``BallotState``."""
+
+    __slots__ = (
+        "mode",
+        "header",
+        "emojis",
+        "ballot",
+        "channel_id",
+        "message_id",
+        "version",
+        "shown",
+        "last_edit",
+        "task",
+        "lock",
+    )
+
+    def __init__(self, mode, header, emojis, ballot, channel_id=None, message_id=None):
+        self.mode = mode
+        self.header = header  # Ballot header without the tally
+        self.emojis = emojis  # Emoji of each ballot entry
+        self.ballot = ballot  # Votes so far, counted by the voting handlers
+        self.channel_id = channel_id
+        self.message_id = message_id
+        # Bumped by every change. Starts ahead of shown, so a tally is brought in
+        # line with its ballot unless it was posted with it
+        self.version = 1
+        self.shown = 0  # Version the ballot header last showed
+        self.last_edit = 0.0
+        self.task = None  # Edit waiting to be sent
+        self.lock = asyncio.Lock()  # Held while an edit is being sent
+
+    def render(self, renderer):
+        """The ballot header with the votes so far."""
+        ballot = self.ballot
+        counts = None
+        if self.mode == "counts":
+            counts = list(zip(self.emojis, ballot.votes))
+        tally = renderer.live_tally(ballot.turnout, ballot.players, ballot.cast, counts)
+        return fit(self.header + tally, MESSAGE_LIMIT)
+
+
+class LiveTallies:
+    """The tallies of the rounds being voted on, and the edits showing them."""
+
+    def __init__(self, bot, interval=LIVE_TALLY_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self._tallies = {}  # Round ID -> (tally, renderer)
+
+    def get(self, round_id):
+        entry = self._tallies.get(round_id)
+        return entry[0] if entry else None
+
+    def add(self, round_id, tally, renderer):
+        """Start showing a round's tally, replacing any it had.
+
+        A tally with votes the ballot doesn't show yet, such as one rebuilt
+        from the database after a restart, is shown with the next edit.
+        """
+        previous = self._tallies.get(round_id)
+        if previous and previous[0].task:
+            previous[0].task.cancel()
+        self._tallies[round_id] = (tally, renderer)
+        tally.task = None
+        if tally.version != tally.shown:
+            self._schedule(round_id, tally)
+
+    def changed(self, round_id):
+        """Note a vote counted on the round's ballot, scheduling an edit if one isn't waiting already."""
+        entry = self._tallies.get(round_id)
+        if entry:
+            entry[0].version += 1
+            self._schedule(round_id, entry[0])
+
+    def _schedule(self, round_id, tally):
+        if tally.task is None:
+            delay = max(0.0, tally.last_edit + self.interval - time.monotonic())
+            tally.task = asyncio.create_task(self._edit_later(round_id, delay))
+
+    async def _edit_later(self, round_id, delay):
+        await asyncio.sleep(delay)
+        entry = self._tallies.get(round_id)
+        if entry:
+            entry[0].task = None
+            await self._edit(*entry)
+
+    async def _edit(self, tally, renderer):
+        # One edit at a time, so an older count never lands after a newer one
+        async with tally.lock:
+            if tally.version == tally.shown or not tally.message_id:
+                return
+            channel = self.bot.get_channel(int(tally.channel_id)) if tally.channel_id else None
+            if channel is None:
+                return
+
+            version = tally.version
+            tally.last_edit = time.monotonic()
+            try:
+                await channel.get_partial_message(int(tally.message_id)).edit(
+                    content=tally.render(renderer)
+                )
+            except discord.HTTPException:
+                logger.warning(
+                    "Couldn't update the live tally on message %s",
+                    tally.message_id,
+                    exc_info=True,
+                )
+                return
+            tally.shown = version
+
+    async def close(self, round_id):
+        """Stop showing a round's tally, first sending any edit still waiting.
+
+        An edit already being sent is waited for, then followed by another if
+        votes came in meanwhile.
+        """
+        entry = self._tallies.pop(round_id, None)
+        if entry is None:
+            return
+        tally = entry[0]
+        if tally.task:
+            tally.task.cancel()
+            tally.task = None
+        await self._edit(*entry)
+
+    def cancel_all(self):
+        """Drop every tally without editing, when the bot shuts down."""
+        for tally, _ in self._tallies.values():
+            if tally.task:
+                tally.task.cancel()
+        self._tallies.clear()
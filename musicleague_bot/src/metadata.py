@@ -0,0 +1,139 @@
+"""Title, artist and duration lookups for submitted tracks.
+
+Lookups go through a pluggable resolver and are cached in the track_metadata
+table. They only happen when a track is submitted; ballots and results read
+the cache and never wait on a streaming service.
+
+Set METADATA_RESOLVER to choose the resolver ("oembed", the default, or
+"none"), and METADATA_TTL_HOURS for how long a cached lookup is trusted.
+"""
+
+import datetime
+import logging
+import os
+from typing import NamedTuple, Optional
+
+import aiohttp
+
+from .db import DatabaseService
+from .links import TrackLink
+from .schedule import utcnow
+
+logger = logging.getLogger("musicleague-bot")
+
+DEFAULT_TTL_HOURS = 7 * 24
+
+
+class TrackInfo(NamedTuple):
+    """What a resolver found out about a track."""
+
+    title: Optional[str] = None
+    artist: Optional[str] = None
+    duration_seconds: Optional[int] = None
+
+
+class MetadataResolver:
+    """Looks up track metadata. Subclasses implement ``resolve``."""
+
+    async def resolve(self, link: TrackLink) -> Optional[TrackInfo]:
+        """Return what is known about the track, or None if nothing is."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class NullResolver(MetadataResolver):
+    """Resolver that never looks anything up."""
+
+    async def resolve(self, link):
+        return None
+
+
+class OEmbedResolver(MetadataResolver):
+    """Resolver using the public oEmbed endpoints of Spotify and YouTube.
+
+    oEmbed needs no credentials but has no durations, and Spotify only
+    returns the track title.
+    """
+
+    ENDPOINTS = {
+        "spotify": "https://open.spotify.com/oembed",
+        "youtube": "https://www.youtube.com/oembed",
+    }
+
+    def __init__(self, timeout=5):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+
+    async def resolve(self, link):
+        endpoint = self.ENDPOINTS.get(link.provider)
+        if endpoint is None:
+            return None
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+
+        params = {"url": link.url, "format": "json"}
+        async with self._session.get(endpoint, params=params) as response:
+            if response.status != 200:
+                return None
+            data = await response.json(content_type=None)
+
+        artist = data.get("author_name")
+        if artist and artist.endswith(" - Topic"):
+            artist = artist[: -len(" - Topic")]  # YouTube Music auto-generated channels
+        return TrackInfo(title=data.get("title"), artist=artist)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def create_resolver():
+    """Build the resolver chosen by METADATA_RESOLVER."""
+    name = os.getenv("METADATA_RESOLVER", "oembed").strip().lower()
+    if name == "none":
+        return NullResolver()
+    if name != "oembed":
+        logger.warning(f"Unknown METADATA_RESOLVER {name!r}, using oembed")
+    return OEmbedResolver()
+
+
+def metadata_ttl():
+    return datetime.timedelta(
+        hours=float(os.getenv("METADATA_TTL_HOURS", DEFAULT_TTL_HOURS))
+    )
+
+
+async def refresh_track_metadata(bot, link: TrackLink):
+    """Resolve and cache a track's metadata unless a fresh copy is cached.
+
+    Returns the cached metadata, or None if the track couldn't be resolved.
+    """
+    async with bot.get_db_session() as session:
+        db = DatabaseService(session)
+        cached = (await db.get_track_metadata([link.key])).get(link.key)
+    if cached and utcnow() - cached.fetched_at < metadata_ttl():
+        return cached
+
+    # No session is held open while waiting on the streaming service
+    try:
+        info = await bot.metadata_resolver.resolve(link)
+    except Exception as e:
+        logger.warning(f"Couldn't resolve metadata for {link.url}: {e}")
+        info = None
+
+    if info is None:
+        return cached
+
+    async with bot.get_db_session() as session:
+        db = DatabaseService(session)
+        return await db.store_track_metadata(
+            link.provider,
+            link.track_id,
+            title=info.title,
+            artist=info.artist,
+            duration_seconds=info.duration_seconds,
+        )
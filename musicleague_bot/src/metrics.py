@@ -0,0 +1,284 @@
+"""In-process metrics for the bot: counters, gauges and latency histograms.
+
+Everything is recorded in the module-level ``metrics`` registry. It can be read
+through the admin ``/botstats`` command or, when METRICS_PORT is set, scraped
+from a local HTTP endpoint in the Prometheus text format.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import re
+import time
+from collections import defaultdict
+
+import aiohttp
+from sqlalchemy import event
+
+logger = logging.getLogger("musicleague-bot")
+
+# Bucket upper bounds, in seconds for latencies and statements for query counts
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Query counter for the interaction or task currently running, if any
+_current_query_count = contextvars.ContextVar("current_query_count", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every event."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class QueryCount:
+    """Number of SQL statements run while this counter was active."""
+
+    __slots__ = ("statements",)
+
+    def __init__(self):
+        self.statements = 0
+
+
+class MetricsRegistry:
+    """Collects every metric the bot records."""
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.histograms = {}
+        self._server = None
+
+    # Recording
+    def increment(self, name, value=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def set_gauge(self, name, value, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def timed(self, name, **labels):
+        """Decorate a coroutine function to record its latency in a histogram."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, **labels)
+
+            return wrapper
+
+        return decorator
+
+    def instrument_methods(self, name, label):
+        """Class decorator timing every public coroutine method, labelled by method name."""
+
+        def decorator(cls):
+            for attr, func in list(vars(cls).items()):
+                if not attr.startswith("_") and inspect.iscoroutinefunction(func):
+                    setattr(cls, attr, self.timed(name, **{label: attr})(func))
+            return cls
+
+        return decorator
+
+    # Database statements
+    def instrument_engine(self, engine):
+        """Count and time every statement run on a SQLAlchemy async engine."""
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_started"].pop()
+            self.observe("db_query_seconds", time.perf_counter() - started)
+            self.increment("db_queries_total")
+
+            query_count = _current_query_count.get()
+            if query_count is not None:
+                query_count.statements += 1
+
+    def start_query_count(self):
+        """Start counting statements for the current task and return the counter."""
+        query_count = QueryCount()
+        _current_query_count.set(query_count)
+        return query_count
+
+    @contextlib.contextmanager
+    def count_queries(self):
+        """Count the statements run inside a ``with`` block."""
+        query_count = QueryCount()
+        token = _current_query_count.set(query_count)
+        try:
+            yield query_count
+        finally:
+            _current_query_count.reset(token)
+
+    # Discord REST calls
+    def create_http_trace(self):
+        """Build an aiohttp trace config that records Discord REST calls per route."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            route = discord_route(params.method, params.url.path)
+            if route is None:
+                return  # Gateway connections and CDN requests
+
+            self.observe(
+                "discord_request_seconds",
+                time.perf_counter() - context.started,
+                route=route,
+            )
+            self.increment("discord_requests_total", route=route)
+            if params.response.status == 429:
+                self.increment("discord_rate_limited_total", route=route)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    # Reading
+    def cache_hit_ratio(self, cache):
+        hits = self.counters.get(("cache_hits_total", (("cache", cache),)), 0)
+        misses = self.counters.get(("cache_misses_total", (("cache", cache),)), 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(self.gauges.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                bucket_labels = labels + (("le", str(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            bucket_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+
+    # Local HTTP endpoint
+    async def start_http_server(self, host, port):
+        """Serve the Prometheus text format on http://host:port/metrics."""
+        self._server = await asyncio.start_server(self._handle_http, host, port)
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def stop_http_server(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Drain the headers; the request body is never used
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] in ("/metrics", "/"):
+                status, body = "200 OK", self.render_prometheus()
+            else:
+                status, body = "404 Not Found", "Not found\n"
+
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+_SNOWFLAKE = re.compile(r"^\d{15,21}$")
+
+
+def discord_route(method, path):
+    """Turn a Discord API URL path into a route template such as ``POST channels/{id}/messages``."""
+    parts = path.strip("/").split("/")
+    if len(parts) < 2 or parts[0] != "api":
+        return None
+
+    route = []
+    # Skip "api" and the version segment
+    for part in parts[2:]:
+        previous = route[-1] if route else None
+        if _SNOWFLAKE.match(part):
+            route.append("{id}")
+        elif previous == "reactions":
+            route.append("{emoji}")
+        elif previous == "{id}" and len(route) >= 2 and route[-2] in ("interactions", "webhooks"):
+            route.append("{token}")
+        else:
+            route.append(part)
+
+    return f"{method} {'/'.join(route)}"
+
+
+metrics = MetricsRegistry()
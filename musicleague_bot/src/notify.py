@@ -0,0 +1,219 @@
+"""Reminders before a round's deadlines, sent to many players at once.
+
+Guilds choose how many hours before each deadline to remind the players who
+haven't submitted or voted yet. The next reminder of a round is stored in
+``Round.next_reminder`` and picked up by the deadline scheduler along with
+the round transitions.
+
+``ReminderSender`` fans the reminders out in the background: direct messages
+go out from a few concurrent workers sharing one rate limit, and channel
+reminders mention as many players per message as fit. Players whose direct
+messages are closed are mentioned in the channel instead.
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+
+import discord
+
+from .render import chunk_messages
+
+logger = logging.getLogger("musicleague-bot")
+
+# How reminders reach the players
+REMINDER_DELIVERIES = {
+    "channel": "Mention them in the Music League channel",
+    "dm": "Send them a direct message",
+}
+
+# Most reminders before each deadline, and the earliest one
+MAX_REMINDERS = 4
+MAX_REMINDER_HOURS = 14 * 24
+
+# Messages sent per second, and how many may go out at once before that applies
+REMINDER_RATE = 5.0
+REMINDER_BURST = 10
+
+# Direct messages being sent at the same time
+REMINDER_CONCURRENCY = 10
+
+
+def parse_reminder_hours(value):
+    """Read reminder offsets such as ``"24, 1"`` or ``"24h 1h"`` as hours, latest first.
+
+    An empty value, "off" or "none" turns reminders off. Raises ValueError
+    for anything else that isn't a list of whole hours.
+    """
+    words = (value or "").replace(",", " ").lower().split()
+    if words in ([], ["off"], ["none"]):
+        return []
+
+    hours = set()
+    for word in words:
+        try:
+            hour = int(word.removesuffix("h"))
+        except ValueError:
+            raise ValueError(f"{word} isn't a number of hours") from None
+        if not 1 <= hour <= MAX_REMINDER_HOURS:
+            raise ValueError(
+                f"Reminders can be from 1 to {MAX_REMINDER_HOURS} hours before a deadline"
+            )
+        hours.add(hour)
+
+    if len(hours) > MAX_REMINDERS:
+        raise ValueError(f"There can be at most {MAX_REMINDERS} reminders per deadline")
+    return sorted(hours, reverse=True)
+
+
+def format_reminder_hours(hours):
+    """Store reminder offsets as text, e.g. ``"24,1"``."""
+    return ",".join(str(hour) for hour in hours)
+
+
+def describe_reminders(reminder_hours):
+    """Describe a guild's stored reminder offsets."""
+    hours = parse_reminder_hours(reminder_hours)
+    if not hours:
+        return "Off"
+    return ", ".join(f"{hour}h" for hour in hours) + " before each deadline"
+
+
+def next_reminder_time(round_obj, reminder_hours, after):
+    """When to next remind the players of a round, or None if there are no reminders left.
+
+    Reminders are for the deadline of the phase the round is in, so those
+    already past when a phase starts are skipped.
+    """
+    if round_obj.is_completed:
+        return None
+    deadline = round_obj.voting_end if round_obj.voting_message_id else round_obj.submission_end
+    times = (
+        deadline - datetime.timedelta(hours=hour)
+        for hour in parse_reminder_hours(reminder_hours)
+    )
+    return min((when for when in times if when > after), default=None)
+
+
+class RateLimiter:
+    """Spaces out requests to at most ``rate`` per second after a burst of ``burst``."""
+
+    def __init__(self, rate=REMINDER_RATE, burst=REMINDER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait for a turn to send."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # Take the token now, so requests waiting at the same time queue up
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class ReminderSender:
+    """Sends reminders to many players in the background, within one rate limit."""
+
+    def __init__(
+        self,
+        bot,
+        rate=REMINDER_RATE,
+        burst=REMINDER_BURST,
+        concurrency=REMINDER_CONCURRENCY,
+    ):
+        self.bot = bot
+        self.limiter = RateLimiter(rate, burst)
+        self.concurrency = concurrency
+        self._tasks = set()
+
+    def send(self, guild, channel, user_ids, content, delivery):
+        """Start reminding the players, returning the task doing it."""
+        task = asyncio.create_task(self.deliver(guild, channel, user_ids, content, delivery))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def deliver(self, guild, channel, user_ids, content, delivery):
+        """Remind the players, returning how many were reached by direct message."""
+        user_ids = [int(user_id) for user_id in user_ids]
+        sent = 0
+        if delivery == "dm":
+            failed = await self._send_direct_messages(guild, user_ids, content)
+            sent = len(user_ids) - len(failed)
+            user_ids = failed
+
+        if user_ids and channel is not None:
+            await self._mention(channel, user_ids, content)
+        return sent
+
+    async def _send_direct_messages(self, guild, user_ids, content):
+        """Send each player a direct message, returning the IDs that couldn't get one."""
+        members = await self._get_members(guild, user_ids)
+        failed = [user_id for user_id in user_ids if user_id not in members]
+        queue = iter(members.values())
+
+        async def worker():
+            for member in queue:
+                await self.limiter.acquire()
+                try:
+                    await member.send(content)
+                except discord.HTTPException:
+                    # Closed direct messages
+                    failed.append(member.id)
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(self.concurrency, len(members))))
+        )
+        return failed
+
+    async def _get_members(self, guild, user_ids):
+        """Look up the players still in the guild, asking the gateway for 100 at a time."""
+        members = {}
+        missing = []
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member:
+                members[user_id] = member
+            else:
+                missing.append(user_id)
+
+        if missing and self.bot.intents.members:
+            for start in range(0, len(missing), 100):
+                try:
+                    found = await guild.query_members(
+                        user_ids=missing[start : start + 100],
+                        cache=not self.bot.low_memory,
+                    )
+                except Exception:
+                    logger.exception("Error looking up members to remind in %s", guild.id)
+                    break
+                for member in found:
+                    members[member.id] = member
+        return members
+
+    async def _mention(self, channel, user_ids, content):
+        """Post the reminder in the channel, mentioning as many players per message as fit."""
+        entries = [content + "\n"] + [f"<@{user_id}> " for user_id in user_ids]
+        for chunk in chunk_messages(entries):
+            await self.limiter.acquire()
+            try:
+                await channel.send(
+                    chunk, allowed_mentions=discord.AllowedMentions(users=True)
+                )
+            except discord.HTTPException:
+                logger.warning(
+                    "Couldn't send reminders in channel %s", channel.id, exc_info=True
+                )
+                return
+
+    def cancel_all(self):
+        """Stop sending reminders, when the bot shuts down."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
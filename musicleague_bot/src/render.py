@@ -0,0 +1,458 @@
+"""Message templates for round announcements, ballots, results and leaderboards.
+
+Every message the bot posts about a round is rendered from a named template
+with ``{placeholder}`` fields. Templates are compiled once, and guilds can
+replace any of them with their own copy (see ``/template``). ``Chunker``
+splits rendered entries into messages that fit Discord's length limit.
+"""
+
+import functools
+import string
+import time
+from typing import NamedTuple
+
+# Discord rejects longer messages, embed titles and embed field values
+MESSAGE_LIMIT = 2000
+EMBED_TITLE_LIMIT = 256
+EMBED_FIELD_LIMIT = 1024
+
+# Rendered entries are packed into messages of at most this many characters
+CHUNK_LENGTH = 1900
+
+# Longest template a guild may store
+TEMPLATE_MAX_LENGTH = 1000
+
+# How long a guild's compiled templates are reused before checking for edits
+# made by another bot process
+RENDERER_TTL_SECONDS = 5 * 60
+
+
+class TemplateError(ValueError):
+    """A template uses an unknown or unsupported placeholder."""
+
+
+class TemplateSpec(NamedTuple):
+    """A template the bot renders, with its default text and placeholders."""
+
+    default: str
+    fields: tuple
+    description: str
+
+
+TEMPLATES = {
+    "announcement_title": TemplateSpec(
+        "🎵 New Music League Round #{round_number} 🎵",
+        ("round_number", "theme"),
+        "Title of the new round announcement",
+    ),
+    "announcement_description": TemplateSpec(
+        "A new round has started! Submit your music with `/submit`.",
+        ("round_number", "theme"),
+        "Text of the new round announcement",
+    ),
+    "status_title": TemplateSpec(
+        "Music League Round #{round_number} Status",
+        ("round_number", "theme"),
+        "Title of the /status reply",
+    ),
+    "voting_header": TemplateSpec(
+        "# 🎵 Voting for Round #{round_number} 🎵\n\n"
+        "React with emojis to vote for your favorite submissions! "
+        "You can vote for up to **{max_votes} submissions**.\n"
+        "Voting ends {voting_end}\n\n"
+        "**Theme**: {theme}\n\n",
+        ("round_number", "theme", "voting_end", "max_votes"),
+        "Ballot message that voters react to",
+    ),
+    "live_tally": TemplateSpec(
+        "\n🗳️ **{voters}/{players}** players have voted so far ({votes} votes)\n{counts}",
+        ("voters", "players", "votes", "counts"),
+        "Votes so far, under the ballot message",
+    ),
+    "voting_entry": TemplateSpec(
+        "{emoji} **Submission #{number}**\n{track}{content}\n{description}\n",
+        ("emoji", "number", "track", "content", "description"),
+        "One submission on the ballot",
+    ),
+    "results_header": TemplateSpec(
+        "# 🏆 Results for Round #{round_number} 🏆\n\n"
+        "**Theme**: {theme}\n\n"
+        "The round has ended! Here are the winners:\n\n",
+        ("round_number", "theme"),
+        "First results message",
+    ),
+    "result_entry": TemplateSpec(
+        "### {medal}{emoji}#{number}: {username} - {score} {unit}\n"
+        "{track}{content}\n{description}\n",
+        (
+            "position",
+            "medal",
+            "emoji",
+            "number",
+            "username",
+            "score",
+            "unit",
+            "track",
+            "content",
+            "description",
+        ),
+        "One submission in the results",
+    ),
+    "non_voters": TemplateSpec(
+        "\n⚠️ **Didn't vote** ({penalty}): {usernames}\n",
+        ("usernames", "penalty"),
+        "Submitters who didn't vote, after the results",
+    ),
+    "leaderboard_header": TemplateSpec(
+        "## 📊 Current Leaderboard\n\n", (), "Heading of the leaderboard"
+    ),
+    "leaderboard_entry": TemplateSpec(
+        "#{position}: {username} - {score} points\n",
+        ("position", "username", "score"),
+        "One player on the leaderboard",
+    ),
+    "leaderboard_empty": TemplateSpec(
+        "No players yet!\n", (), "Leaderboard text when nobody has played"
+    ),
+    "submission_reminder": TemplateSpec(
+        "⏰ Submissions for Round #{round_number} on {server} close {deadline}! "
+        "**Theme**: {theme}. Send yours with `/submit`.",
+        ("round_number", "theme", "deadline", "server"),
+        "Reminder to players who haven't submitted",
+    ),
+    "voting_reminder": TemplateSpec(
+        "⏰ Voting for Round #{round_number} on {server} ends {deadline}! "
+        "Don't forget to vote.",
+        ("round_number", "theme", "deadline", "server"),
+        "Reminder to submitters who haven't voted",
+    ),
+}
+
+MEDALS = ("🥇 ", "🥈 ", "🥉 ")
+
+# Stand-in values for previewing a template
+SAMPLE_VALUES = {
+    "round_number": 7,
+    "theme": "Songs about the sea",
+    "voting_end": "in 3 days",
+    "max_votes": 3,
+    "voters": 4,
+    "players": 6,
+    "votes": 11,
+    "counts": "🎵 3 · 🎶 5 · 🎤 3\n",
+    "emoji": "🎵",
+    "number": 1,
+    "position": 1,
+    "medal": "🥇 ",
+    "username": "Player",
+    "score": 5,
+    "unit": "votes",
+    "usernames": "Player, Another Player",
+    "penalty": "Forfeit their points",
+    "track": "**Sea Song** by Some Artist (3:35)\n",
+    "content": "https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC",
+    "description": "*A description*\n",
+    "deadline": "in 1 hour",
+    "server": "My Server",
+}
+
+
+class Template:
+    """A template split into literal text and placeholder slots.
+
+    Rendering fills a copy of a pre-sized list and joins it once, instead of
+    re-parsing the format string or concatenating piece by piece.
+    """
+
+    __slots__ = ("source", "_parts", "_slots")
+
+    def __init__(self, source, fields):
+        self.source = source
+        self._parts = []
+        self._slots = []
+
+        try:
+            parsed = list(string.Formatter().parse(source))
+        except ValueError as e:
+            raise TemplateError(f"Invalid template: {e}") from None
+
+        for literal, field, format_spec, conversion in parsed:
+            if literal:
+                self._parts.append(literal)
+            if field is None:
+                continue
+            if field not in fields or format_spec or conversion:
+                raise TemplateError(
+                    f"Unknown placeholder {{{field}}}; use one of "
+                    + ", ".join(f"{{{name}}}" for name in fields)
+                )
+            self._slots.append((len(self._parts), field))
+            self._parts.append(None)
+
+    def render(self, values):
+        parts = self._parts.copy()
+        for slot, field in self._slots:
+            parts[slot] = str(values[field])
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(name, source):
+    """Compile a template, reusing the result for the same name and text."""
+    spec = TEMPLATES.get(name)
+    if spec is None:
+        raise TemplateError(f"Unknown template: {name}")
+    if len(source) > TEMPLATE_MAX_LENGTH:
+        raise TemplateError(
+            f"Templates can be at most {TEMPLATE_MAX_LENGTH} characters long"
+        )
+    return Template(source, spec.fields)
+
+
+def fit(text, limit):
+    """Shorten text to at most ``limit`` characters, marking the cut."""
+    if len(text) <= limit:
+        return text
+    return text[: limit - 1] + "…"
+
+
+class Chunker:
+    """Packs rendered entries into as few messages as fit in ``limit``.
+
+    Entries are never split unless one is longer than a whole message.
+    """
+
+    __slots__ = ("limit", "_entries", "_length")
+
+    def __init__(self, limit=CHUNK_LENGTH):
+        self.limit = limit
+        self._entries = []
+        self._length = 0
+
+    def add(self, entry):
+        """Add an entry, returning the messages it completed (often none)."""
+        ready = []
+        if self._entries and self._length + len(entry) > self.limit:
+            ready.append(self.flush())
+
+        while len(entry) > self.limit:
+            # Too long for any message; cut at the last line break that fits
+            cut = entry.rfind("\n", 0, self.limit) + 1 or self.limit
+            ready.append(entry[:cut])
+            entry = entry[cut:]
+
+        if entry:
+            self._entries.append(entry)
+            self._length += len(entry)
+        return ready
+
+    def flush(self):
+        """Return the pending message, or None if there isn't one."""
+        if not self._entries:
+            return None
+        message = "".join(self._entries)
+        self._entries.clear()
+        self._length = 0
+        return message
+
+
+def chunk_messages(entries, limit=CHUNK_LENGTH):
+    """Group rendered entries into messages of at most ``limit`` characters."""
+    chunker = Chunker(limit)
+    for entry in entries:
+        yield from chunker.add(entry)
+    message = chunker.flush()
+    if message:
+        yield message
+
+
+def format_track(metadata):
+    """Format the cached title, artist and duration of a track, if known."""
+    if not metadata or not metadata.title:
+        return ""
+
+    parts = ["**", metadata.title, "**"]
+    if metadata.artist:
+        parts += [" by ", metadata.artist]
+    if metadata.duration_seconds:
+        minutes, seconds = divmod(metadata.duration_seconds, 60)
+        parts.append(f" ({minutes}:{seconds:02d})")
+    parts.append("\n")
+    return "".join(parts)
+
+
+def format_timestamp(value, style="R"):
+    """Discord markup showing a UTC datetime in each reader's timezone."""
+    return f"<t:{int(value.timestamp())}:{style}>"
+
+
+class Renderer:
+    """Renders a guild's messages from its templates, or the defaults."""
+
+    def __init__(self, overrides=None):
+        self.overrides = dict(overrides or {})
+        self.templates = {}
+        for name, spec in TEMPLATES.items():
+            try:
+                template = compile_template(name, self.overrides.get(name, spec.default))
+            except TemplateError:
+                # Stored before its placeholders changed; use the default
+                template = compile_template(name, spec.default)
+            self.templates[name] = template
+
+    def render(self, name, **values):
+        return self.templates[name].render(values)
+
+    # Announcements
+    def announcement_title(self, round_obj):
+        return fit(
+            self.render(
+                "announcement_title",
+                round_number=round_obj.round_number,
+                theme=round_obj.theme,
+            ),
+            EMBED_TITLE_LIMIT,
+        )
+
+    def announcement_description(self, round_obj):
+        return fit(
+            self.render(
+                "announcement_description",
+                round_number=round_obj.round_number,
+                theme=round_obj.theme,
+            ),
+            MESSAGE_LIMIT,
+        )
+
+    def status_title(self, round_obj):
+        return fit(
+            self.render(
+                "status_title", round_number=round_obj.round_number, theme=round_obj.theme
+            ),
+            EMBED_TITLE_LIMIT,
+        )
+
+    # Ballots
+    def voting_header(self, round_obj, max_votes):
+        return fit(
+            self.render(
+                "voting_header",
+                round_number=round_obj.round_number,
+                theme=round_obj.theme,
+                voting_end=format_timestamp(round_obj.voting_end),
+                max_votes=max_votes,
+            ),
+            MESSAGE_LIMIT,
+        )
+
+    def live_tally(self, voters, players, votes, counts=None):
+        return self.render(
+            "live_tally",
+            voters=voters,
+            players=players,
+            votes=votes,
+            counts=" · ".join(f"{emoji} {count}" for emoji, count in counts) + "\n"
+            if counts
+            else "",
+        )
+
+    def voting_entry(self, emoji, submission_index, submission, metadata=None):
+        return self.render(
+            "voting_entry",
+            emoji=emoji,
+            number=submission_index + 1,
+            track=format_track(metadata),
+            content=submission.content,
+            description=f"*{submission.description}*\n" if submission.description else "",
+        )
+
+    # Results
+    def results_header(self, round_obj):
+        return fit(
+            self.render(
+                "results_header", round_number=round_obj.round_number, theme=round_obj.theme
+            ),
+            MESSAGE_LIMIT,
+        )
+
+    def result_entry(
+        self,
+        position,
+        emoji,
+        submission_index,
+        submission,
+        score,
+        username,
+        metadata=None,
+        unit="votes",
+    ):
+        return self.render(
+            "result_entry",
+            position=position + 1,
+            medal=MEDALS[position] if position < len(MEDALS) else "",
+            emoji=f"{emoji} " if emoji else "",
+            number=submission_index + 1,
+            username=username,
+            score=score,
+            unit=unit,
+            track=format_track(metadata),
+            content=submission.content,
+            description=f"*{submission.description}*\n" if submission.description else "",
+        )
+
+    def non_voters(self, usernames, penalty):
+        return self.render("non_voters", usernames=", ".join(usernames), penalty=penalty)
+
+    def leaderboard(self, leaderboard, usernames):
+        parts = [None] * (len(leaderboard) + 1)
+        parts[0] = self.render("leaderboard_header")
+        if not leaderboard:
+            return parts[0] + self.render("leaderboard_empty")
+
+        for idx, player in enumerate(leaderboard, 1):
+            parts[idx] = self.render(
+                "leaderboard_entry",
+                position=idx,
+                username=usernames[player.user_id],
+                score=player.total_score,
+            )
+        return fit("".join(parts), MESSAGE_LIMIT)
+
+    # Reminders
+    def reminder(self, round_obj, voting, server):
+        name = "voting_reminder" if voting else "submission_reminder"
+        deadline = round_obj.voting_end if voting else round_obj.submission_end
+        return fit(
+            self.render(
+                name,
+                round_number=round_obj.round_number,
+                theme=round_obj.theme,
+                deadline=format_timestamp(deadline),
+                server=server,
+            ),
+            MESSAGE_LIMIT,
+        )
+
+
+DEFAULT_RENDERER = Renderer()
+
+# Compiled renderers of guilds with custom templates: guild ID -> (renderer, loaded at)
+_renderers = {}
+
+
+async def get_renderer(db, guild_id):
+    """Get a guild's renderer, loading its custom templates if not cached."""
+    guild_id = str(guild_id)
+    cached = _renderers.get(guild_id)
+    if cached and time.monotonic() - cached[1] < RENDERER_TTL_SECONDS:
+        return cached[0]
+
+    overrides = await db.get_guild_templates(guild_id)
+    renderer = Renderer(overrides) if overrides else DEFAULT_RENDERER
+    _renderers[guild_id] = (renderer, time.monotonic())
+    return renderer
+
+
+def invalidate_renderer(guild_id):
+    """Forget a guild's compiled templates after they change."""
+    _renderers.pop(str(guild_id), None)
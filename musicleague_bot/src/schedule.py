@@ -0,0 +1,156 @@
+"""When rounds start and end.
+
+Deadlines are stored in UTC and compared with ``utcnow()``. A league may set a
+timezone and a local time of day its deadlines fall on (``deadline_time``), so
+``deadline_after`` moves each deadline to the next such time after the
+configured number of days; the league's rounds then change phase at the same
+local time, and the scheduler knows when transitions will come in bursts.
+``Round.next_deadline`` holds the next time the scheduler has to act on a
+round (see ``next_deadline``), so due rounds are found with one index scan.
+
+Players queue themes with ``/queue_theme``, each optionally not before a set
+time. ``League.next_start`` holds when the head of the queue may start: its
+start time, now if the league starts queued themes automatically, or None if
+it waits for ``/start``. The deadline scheduler starts it once that time has
+passed and no round is running, and a round completing starts it in the same
+transaction, so one league's rounds follow each other without polling.
+"""
+
+import datetime
+import re
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Longest queued theme, as the /start announcement shows it in a field
+MAX_THEME_LENGTH = 200
+
+# Most themes waiting in one league, so the queue fits in one embed's fields
+MAX_QUEUED_THEMES = 25
+
+# Accepted formats for start times, in the league's timezone
+START_TIME_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+
+DEFAULT_TIMEZONE = "UTC"
+
+_DEADLINE_TIME = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)$")
+
+
+def utcnow():
+    """The current time in UTC, timezone-aware like the stored deadlines."""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def as_utc(value):
+    """A datetime in UTC, reading a naive one as already being UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def get_timezone(name):
+    """The tzinfo for a timezone name, falling back to UTC for unknown names."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return datetime.timezone.utc
+
+
+def parse_timezone(value):
+    """Check a timezone name such as ``"Europe/Berlin"``, returning it.
+
+    Raises ValueError if it isn't a known IANA timezone.
+    """
+    value = (value or "").strip()
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(
+            f"{value} isn't a timezone like Europe/Berlin or America/New_York"
+        ) from None
+    return value
+
+
+def parse_deadline_time(value):
+    """Read a local time of day such as ``"20:00"``, or ``"off"``, as stored.
+
+    Returns ``"HH:MM"``, or ``""`` for deadlines at whatever time the phase
+    started. Raises ValueError for anything else.
+    """
+    value = (value or "").strip().lower()
+    if value in ("", "off", "none"):
+        return ""
+
+    match = _DEADLINE_TIME.match(value)
+    if not match:
+        raise ValueError(f"{value} isn't a time of day like 20:00")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def deadline_after(start, days, timezone=DEFAULT_TIMEZONE, deadline_time=""):
+    """The deadline ``days`` days after ``start``, in UTC.
+
+    With a ``deadline_time``, it's moved on to the next time the clock shows
+    that time in ``timezone``. Days are counted on the local calendar, so
+    deadlines stay at the same local time across daylight saving changes.
+    """
+    local = start.astimezone(get_timezone(timezone))
+    deadline = local + datetime.timedelta(days=days)
+
+    if deadline_time:
+        hour, minute = (int(part) for part in deadline_time.split(":"))
+        aligned = deadline.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if aligned < deadline:
+            aligned += datetime.timedelta(days=1)
+        deadline = aligned
+
+    return deadline.astimezone(datetime.timezone.utc)
+
+
+def next_deadline(round_obj):
+    """When the scheduler next has to act on a round, or None once it's completed.
+
+    That's the earliest of its reminder and the deadline of its phase.
+    """
+    if round_obj.is_completed:
+        return None
+
+    times = [round_obj.voting_end, round_obj.next_reminder]
+    if not round_obj.voting_message_id:
+        times.append(round_obj.submission_end)
+    times = [as_utc(value) for value in times if value is not None]
+    return min(times) if times else None
+
+
+def parse_start_time(value, now, timezone=DEFAULT_TIMEZONE):
+    """Read a start time such as ``"2024-06-01 18:00"`` in ``timezone``, or None for an empty value.
+
+    Returns it in UTC. Raises ValueError if it isn't a date and time in the future.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    for time_format in START_TIME_FORMATS:
+        try:
+            start_at = datetime.datetime.strptime(value, time_format)
+        except ValueError:
+            continue
+        start_at = start_at.replace(tzinfo=get_timezone(timezone)).astimezone(
+            datetime.timezone.utc
+        )
+        if start_at <= now:
+            raise ValueError("That time has already passed")
+        return start_at
+
+    raise ValueError(f"{value} isn't a date and time like 2024-06-01 18:00")
+
+
+def next_start_time(head, auto_start, now):
+    """When the head of a league's queue may start, or None if it waits for /start.
+
+    ``head`` is the first QueuedTheme, or None when the queue is empty.
+    """
+    if head is None:
+        return None
+    if head.start_at is not None:
+        return head.start_at
+    return now if auto_start else None
@@ -0,0 +1,188 @@
+"""Scoring systems a guild can choose for its rounds.
+
+Each system says what every vote in a round is worth as a SQL expression over
+that round's votes. ``DatabaseService.calculate_round_results`` sums it per
+submission, applies any penalty for not voting and ranks the submissions with
+window functions, all in the statement that loads the results. That makes
+scoring one aggregate over the vote set, whichever system is used and however
+large the round is.
+"""
+
+from sqlalchemy import case, func
+
+# Points each voter can hand out on a points ballot
+BALLOT_POINTS = 10
+
+# Downvotes each voter can give per round
+MAX_DOWNVOTES = 1
+
+# What happens to the points of submitters who didn't vote in the round
+VOTE_PENALTIES = {
+    "none": "No penalty",
+    "points": "Lose a set number of points",
+    "half": "Lose half their points",
+    "forfeit": "Forfeit their points",
+}
+
+# How submissions with the same score are ordered in the results
+TIE_BREAKERS = {
+    "earliest": "Earliest submission wins",
+    "voters": "Most voters wins",
+    "head_to_head": "Head-to-head: picked by more voters than the other",
+    "none": "Ties share a place",
+}
+
+
+class ScoringSystem:
+    """How a round's votes turn into points.
+
+    ``allocation`` is the range of points ``/vote`` can give one submission
+    (giving 0 takes a vote back), or None when votes are only cast by
+    reacting to the ballot.
+    """
+
+    name = None
+    description = None
+    unit = "points"  # What scores are called in the results
+    allocation = None
+
+    def vote_points(self, votes):
+        """SQL expression for the points each row of ``votes`` is worth.
+
+        ``votes`` is a subquery of one round's votes with ``id``,
+        ``submission_id``, ``voter_id`` and ``points`` columns (``points`` is
+        None for votes cast by reacting). Returning None scores submissions
+        by their reaction counts instead.
+        """
+        raise NotImplementedError
+
+    def ballot_note(self):
+        """Text added to the ballot explaining how votes are counted."""
+        return ""
+
+    def check_vote(self, points, ballot):
+        """Return why a voter can't give a submission ``points``, or None if they can.
+
+        ``ballot`` is the points of the voter's other votes this round, None
+        for votes cast by reacting. Reactions are checked as one point.
+        """
+        return None
+
+
+class Approval(ScoringSystem):
+    """One point per vote. The classic Music League ballot."""
+
+    name = "approval"
+    description = "One point per vote"
+    unit = "votes"
+
+    def vote_points(self, votes):
+        # The reaction counts stored when voting closes also include reactions
+        # added while the bot was offline
+        return None
+
+
+class PointAllocation(ScoringSystem):
+    """Voters hand out a budget of points, a reaction being worth one."""
+
+    name = "points"
+    description = f"Voters share out {BALLOT_POINTS} points"
+    allocation = (1, BALLOT_POINTS)
+
+    def vote_points(self, votes):
+        return func.coalesce(votes.c.points, 1)
+
+    def ballot_note(self):
+        return (
+            f"\nYou have **{BALLOT_POINTS} points** to give out. Each reaction gives "
+            f"1 point; use `/vote` to give a submission more.\n"
+        )
+
+    def check_vote(self, points, ballot):
+        spent = sum(1 if other is None else other for other in ballot)
+        if spent + points > BALLOT_POINTS:
+            return (
+                f"You only have {BALLOT_POINTS - spent} of your {BALLOT_POINTS} "
+                f"points left to give."
+            )
+        return None
+
+
+class Borda(ScoringSystem):
+    """Ranked ballots: the order a voter reacts in ranks their picks."""
+
+    name = "borda"
+    description = "Ranked: earlier picks score more"
+
+    def __init__(self, points=(3, 2, 1)):
+        self.points = points  # Points for a voter's first, second, ... pick
+
+    def vote_points(self, votes):
+        rank = func.row_number().over(partition_by=votes.c.voter_id, order_by=votes.c.id)
+        return case(
+            {rank_number: points for rank_number, points in enumerate(self.points, 1)},
+            value=rank,
+            else_=0,
+        )
+
+    def ballot_note(self):
+        ranks = ", ".join(str(points) for points in self.points)
+        return (
+            f"\nVotes are ranked in the order you react: your picks score {ranks} "
+            f"points.\n"
+        )
+
+
+class Downvotes(ScoringSystem):
+    """One point per vote, and voters can take a point off a submission."""
+
+    name = "downvotes"
+    description = f"Votes plus {MAX_DOWNVOTES} downvote"
+    allocation = (-1, -1)
+
+    def vote_points(self, votes):
+        return func.coalesce(votes.c.points, 1)
+
+    def ballot_note(self):
+        return (
+            f"\nYou can also give {MAX_DOWNVOTES} downvote with "
+            f"`/vote number:<submission> points:-1`.\n"
+        )
+
+    def check_vote(self, points, ballot):
+        downvotes = sum(1 for other in ballot if other is not None and other < 0)
+        if points < 0 and downvotes >= MAX_DOWNVOTES:
+            return f"You can only give {MAX_DOWNVOTES} downvote per round."
+        return None
+
+
+SCORING_SYSTEMS = {
+    system.name: system for system in (Approval(), PointAllocation(), Borda(), Downvotes())
+}
+
+
+def non_voter_score(score, penalty, penalty_points=0):
+    """SQL expression for what a submitter who didn't vote keeps of ``score``.
+
+    Halving and forfeiting only take away points, so a negative score (from
+    downvotes) is left as it is.
+    """
+    if penalty == "points":
+        return score - penalty_points
+    if penalty == "half":
+        return case((score > 0, score // 2), else_=score)
+    if penalty == "forfeit":
+        return case((score > 0, 0), else_=score)
+    return score
+
+
+def describe_vote_penalty(penalty, penalty_points=0):
+    """How a penalty reads in /settings and the results."""
+    if penalty == "points":
+        return f"Lose {penalty_points} points"
+    return VOTE_PENALTIES.get(penalty, VOTE_PENALTIES["none"])
+
+
+def get_scoring_system(name):
+    """The scoring system called ``name``, falling back to approval voting."""
+    return SCORING_SYSTEMS.get(name) or SCORING_SYSTEMS["approval"]
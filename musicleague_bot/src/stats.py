@@ -0,0 +1,163 @@
+"""Per-player statistics over a league's completed rounds.
+
+A league's history is read in two set-based queries: every submission of every
+completed round as a columnar export (round, player, votes, score, place),
+and the vote totals between each pair of voter and submitter. Wins and podiums
+go by the places posted in each round's results. The statistics of every
+player are then worked out in a few passes over those columns and cached until
+the league completes another round, so ``/stats`` costs the same however long
+the history is.
+"""
+
+import time
+from typing import NamedTuple
+
+from .db import league_name
+
+# How many favourite submitters and biggest fans to keep per player
+AFFINITY_SIZE = 3
+
+# How long a guild's statistics are reused before checking for rounds
+# completed by another bot process
+STATS_TTL_SECONDS = 10 * 60
+
+
+class PlayerStats(NamedTuple):
+    """A player's record over a guild's completed rounds."""
+
+    user_id: str
+    rounds_played: int
+    total_votes: int
+    wins: int
+    podiums: int
+    current_streak: int
+    longest_streak: int
+    votes_given: tuple  # ((submitter_id, votes), ...), most votes first
+    votes_from: tuple  # ((voter_id, votes), ...), most votes first
+
+    @property
+    def average_votes(self):
+        return self.total_votes / self.rounds_played if self.rounds_played else 0.0
+
+    @property
+    def win_rate(self):
+        return self.wins / self.rounds_played if self.rounds_played else 0.0
+
+
+class GuildStats(NamedTuple):
+    """Statistics of every player in a guild."""
+
+    round_count: int
+    players: dict  # user ID -> PlayerStats
+
+
+def compute_guild_stats(export, affinity):
+    """Work out every player's statistics.
+
+    ``export`` is ``(round_number, user_id, votes_received, score, place)``
+    rows ordered by round, as returned by ``DatabaseService.get_round_export``;
+    ``affinity`` is ``(voter_id, submitter_id, votes)`` rows from
+    ``get_vote_affinity``.
+    """
+    # Columns: the round (as a position among the completed rounds), player,
+    # votes, score and place of each submission
+    round_column, player_column, votes_column, score_column, rank_column = (
+        [], [], [], [], []
+    )
+    round_count = 0
+    last_round = None
+    for round_number, user_id, votes, score, place in export:
+        if round_number != last_round:
+            round_count += 1
+            last_round = round_number
+        if user_id is not None:
+            round_column.append(round_count - 1)
+            player_column.append(user_id)
+            votes_column.append(votes or 0)
+            score_column.append((votes or 0) if score is None else score)
+            rank_column.append(place)
+
+    # Submissions without a stored place are ranked by their score within the
+    # round: one more than the number scoring higher, so ties share a place
+    unplaced = [row for row, rank in enumerate(rank_column) if rank is None]
+    unplaced.sort(key=lambda row: (round_column[row], -score_column[row]))
+    previous_round = previous_score = None
+    for position, row in enumerate(unplaced):
+        if round_column[row] != previous_round:
+            previous_round, round_start, previous_score = round_column[row], position, None
+        if score_column[row] != previous_score:
+            rank, previous_score = position - round_start + 1, score_column[row]
+        rank_column[row] = rank
+
+    # Totals per player
+    totals = {}
+    for row, user_id in enumerate(player_column):
+        record = totals.get(user_id)
+        if record is None:
+            record = totals[user_id] = [0, 0, 0, set()]
+        record[0] += votes_column[row]
+        # Points from /vote aren't in votes_received, so placing needs a score
+        if score_column[row] > 0 and rank_column[row] == 1:
+            record[1] += 1
+        if score_column[row] > 0 and rank_column[row] <= 3:
+            record[2] += 1
+        record[3].add(round_column[row])
+
+    given, received = {}, {}
+    for voter_id, submitter_id, votes in affinity:
+        given.setdefault(voter_id, []).append((submitter_id, votes))
+        received.setdefault(submitter_id, []).append((voter_id, votes))
+
+    players = {}
+    for user_id in totals.keys() | given.keys():
+        total_votes, wins, podiums, rounds = totals.get(user_id, (0, 0, 0, set()))
+        current_streak, longest_streak = _streaks(rounds, round_count)
+        players[user_id] = PlayerStats(
+            user_id=user_id,
+            rounds_played=len(rounds),
+            total_votes=total_votes,
+            wins=wins,
+            podiums=podiums,
+            current_streak=current_streak,
+            longest_streak=longest_streak,
+            votes_given=_top(given.get(user_id, ())),
+            votes_from=_top(received.get(user_id, ())),
+        )
+
+    return GuildStats(round_count, players)
+
+
+def _streaks(rounds, round_count):
+    """The current and longest runs of consecutive rounds played."""
+    longest = run = 0
+    for position in range(round_count):
+        run = run + 1 if position in rounds else 0
+        longest = max(longest, run)
+    return run, longest
+
+
+def _top(pairs):
+    return tuple(sorted(pairs, key=lambda pair: (-pair[1], pair[0]))[:AFFINITY_SIZE])
+
+
+# Statistics of leagues recently asked for: (guild ID, league) -> (stats, computed at)
+_guild_stats = {}
+
+
+async def get_guild_stats(db, guild_id, league=None):
+    """Get the statistics of one of a guild's leagues, computing them if not cached."""
+    guild_id, league = str(guild_id), league_name(league)
+    cached = _guild_stats.get((guild_id, league))
+    if cached and time.monotonic() - cached[1] < STATS_TTL_SECONDS:
+        return cached[0]
+
+    export = await db.get_round_export(guild_id, league=league)
+    affinity = await db.get_vote_affinity(guild_id, league=league)
+    stats = compute_guild_stats(export, affinity)
+    _guild_stats[(guild_id, league)] = (stats, time.monotonic())
+    return stats
+
+
+def invalidate_stats(guild_id, league=None):
+    """Forget a league's statistics after one of its rounds completes."""
+    _guild_stats.pop((str(guild_id), league_name(league)), None)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the vote matrix and the voting ring analysis built on it
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import seed_history
+from musicleague_bot.src.analysis import VoteMatrix, mark_rounds_completed
+from musicleague_bot.src.cogs.admin import AdminCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Round
+from musicleague_bot.src.metrics import metrics
+
+
+def test_matrix():
+    """Test affinities and pairs scored from a small matrix."""
+    print("Testing the vote matrix...")
+
+    players = "abcdef"
+    submissions = [(number, user_id, 0) for number in range(1, 11) for user_id in players]
+    votes = []
+    for number in range(1, 11):
+        # a and b always vote for each other; the rest spread their votes around
+        votes += [(number, "a", "b"), (number, "b", "a")]
+        for offset, voter in enumerate("cdef"):
+            votes.append((number, voter, players[(number + offset) % 6]))
+    votes = [vote for vote in votes if vote[1] != vote[2]]
+
+    matrix = VoteMatrix()
+    matrix.add_rounds(submissions, votes)
+    assert matrix.round_count == 10 and matrix.last_round == 10
+    pairs = matrix.suspicious_pairs()
+    assert [(pair.first_id, pair.second_id, pair.votes) for pair in pairs] == [("a", "b", 20)]
+    top = matrix.top_affinities(2)
+    assert {(affinity.voter_id, affinity.submitter_id) for affinity in top} == {
+        ("a", "b"),
+        ("b", "a"),
+    }
+    assert all(abs(affinity.expected - 2.0) < 1e-9 for affinity in top)  # 10 of 5 a round
+    assert matrix.top_affinities(user_id="z") == []
+    print("✓ Players who always vote for each other stand out")
+
+    # Adding rounds one at a time ends up with the same matrix
+    incremental = VoteMatrix()
+    for number in range(1, 11):
+        incremental.add_rounds(
+            [row for row in submissions if row[0] == number],
+            [vote for vote in votes if vote[0] == number],
+        )
+    assert incremental._score_pairs() == matrix._score_pairs()
+    assert list(incremental.slots) == list(matrix.slots)
+    print("✓ Rounds added incrementally match a full build")
+
+
+async def _run_command_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=40)
+        await seed_history(client, guild, rounds=60, rings=2)
+        members = list(guild.members.values())
+        cog = AdminCog(client)
+
+        # The last round completes after the matrix is first built
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update().where(Round.round_number == 60).values(is_completed=False)
+            )
+            await session.commit()
+
+        async def analyse(user=None):
+            interaction = FakeInteraction(client, guild, members[0])
+            with metrics.count_queries() as query_count:
+                await cog.vote_analysis.callback(cog, interaction, user)
+            assert interaction.response.deferred
+            embed = interaction.followup.messages[0]
+            return embed, query_count.statements
+
+        embed, statements = await analyse()
+        assert statements == 2
+        assert "59 completed round(s)" in embed.description
+        trading = embed.fields[0].value
+        for first, second in [(members[0], members[1]), (members[2], members[3])]:
+            assert (
+                f"{first.display_name} ↔ {second.display_name}" in trading
+                or f"{second.display_name} ↔ {first.display_name}" in trading
+            )
+        assert trading.count("↔") == 2
+        print("✓ /vote_analysis finds both planted voting rings")
+
+        embed, statements = await analyse(members[5])
+        assert statements == 0
+        assert embed.fields[0].value == "Nothing unusual"
+        assert all(
+            members[5].display_name in line for line in embed.fields[1].value.splitlines()
+        )
+        print("✓ Later calls served from the cached matrix")
+
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update().where(Round.round_number == 60).values(is_completed=True)
+            )
+            await session.commit()
+        mark_rounds_completed(guild.id)
+        embed, statements = await analyse()
+        assert statements == 2
+        assert "60 completed round(s)" in embed.description
+
+        async with client.get_read_session() as session:
+            db = DatabaseService(session)
+            assert await db.get_vote_export(str(guild.id), after_round=60) == []
+            assert len(await db.get_vote_export(str(guild.id), after_round=59)) == 120
+        print("✓ Only rounds completed since are read into the matrix")
+
+
+def test_vote_analysis_command():
+    """Test /vote_analysis and its cached matrix."""
+    print("\nTesting /vote_analysis...")
+    asyncio.run(_run_command_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_matrix()
+        test_vote_analysis_command()
+        print("\n🎉 All vote analysis tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory ballot states behind vote limits, self-votes and tallies
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from benchmarks.budgets import query_budget
+from benchmarks.fakes import FakeClient, FakeInteraction, reaction_payload
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.ballot import BallotState, Ballots
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Vote
+from musicleague_bot.src.metrics import metrics
+
+
+def test_ballot_state():
+    """Test counting votes as bits of each voter's picks."""
+    print("Testing ballot states...")
+    ballot = BallotState(["10", "20", "30"])
+    assert ballot.players == 3 and list(ballot.voters.values()) == [0, 1, 2]
+
+    assert ballot.owns("10", 0) and ballot.owns(20, 1) and not ballot.owns("10", 1)
+    assert not ballot.owns("10", 7)
+    print("✓ Submitters own their entry")
+
+    assert ballot.add("10", 1) and ballot.add(10, 2) and ballot.add("99", 1)
+    assert not ballot.add("10", 1)  # Already counted
+    assert not ballot.add("10", 3)  # No such entry
+    assert ballot.count("10") == 2 and ballot.count("99") == 1 and ballot.count("5") == 0
+    assert ballot.has_voted("10", 2) and not ballot.has_voted("10", 0)
+    assert list(ballot.votes) == [0, 2, 1]
+    # Only submitters count towards the turnout
+    assert (ballot.cast, ballot.turnout) == (3, 1)
+    print("✓ Votes counted once each, with per-entry counts and turnout")
+
+    assert ballot.remove("10", 1) and not ballot.remove("10", 1)
+    assert not ballot.remove("5", 0)  # Never voted
+    assert ballot.remove("10", 2)
+    assert (ballot.cast, ballot.turnout, list(ballot.votes)) == (1, 0, [0, 1, 0])
+    # Voting again reuses the voter's picks
+    assert ballot.add("10", 2) and len(ballot.picks) == 4
+    print("✓ Votes taken back, keeping each voter's index")
+
+    rebuilt = BallotState.load(["10", "20"], [("10", 1), ("20", 0), ("30", 1), ("30", 5)])
+    assert (rebuilt.cast, rebuilt.turnout, list(rebuilt.votes)) == (3, 2, [1, 2])
+
+    ballots = Ballots()
+    assert ballots.add(1, rebuilt) is rebuilt
+    assert ballots.add(1, BallotState([])) is rebuilt  # The one kept wins
+    ballots.discard(1)
+    assert len(ballots) == 0
+    print("✓ Ballots rebuilt from stored votes")
+
+
+async def _vote_count(client):
+    async with client.get_db_session() as session:
+        return (await session.execute(select(func.count(Vote.id)))).scalar()
+
+
+async def _run_reaction_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        await seed_guilds(client, [guild], submissions=5, phase="voting")
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        message = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+        emojis = [reaction.emoji for reaction in message.reactions]
+        members = list(guild.members.values())
+        round_id = next(iter(cog.ballots._ballots))
+
+        async def react(member, emoji):
+            message.react(emoji, member.id)
+            payload = reaction_payload(guild, message, member, emoji)
+            with query_budget("voting_reaction"):
+                await cog.on_raw_reaction_add(payload)
+
+        client.recorder.reset()
+        for emoji in emojis[1:4]:
+            await react(members[0], emoji)
+        # Counted without asking Discord who reacted
+        assert client.recorder.calls["get_reaction_users"] == 0
+        assert client.recorder.summary()["rest_calls"] == 0
+        print("✓ Votes counted without fetching reaction users")
+
+        # A fourth vote and a vote for your own submission are taken off the ballot
+        await react(members[0], emojis[4])
+        await react(members[1], emojis[1])
+        assert members[0].id not in message._reaction(emojis[4]).user_ids
+        assert members[1].id not in message._reaction(emojis[1]).user_ids
+        assert await _vote_count(client) == 3
+        ballot = cog.ballots.get(round_id)
+        assert ballot.count(members[0].id) == 3 and ballot.count(members[1].id) == 0
+        print("✓ Vote limit and own submissions enforced")
+
+        # Removing a reaction that was never counted doesn't touch the database
+        payload = reaction_payload(guild, message, members[0], emojis[4])
+        with metrics.count_queries() as query_count:
+            await cog.on_raw_reaction_remove(payload)
+        assert query_count.statements == 1  # Finding the ballot
+        message.unreact(emojis[1], members[0].id)
+        await cog.on_raw_reaction_remove(
+            reaction_payload(guild, message, members[0], emojis[1])
+        )
+        assert await _vote_count(client) == 2 and ballot.count(members[0].id) == 2
+
+        # Completing the round forgets its ballot
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await cog.complete_round(db, await db.get_round(round_id))
+        assert cog.ballots.get(round_id) is None
+        print("✓ Ballot dropped when the round completes")
+
+
+def test_reaction_votes():
+    """Test ballot reactions checked against the ballot state."""
+    print("\nTesting reaction votes...")
+    asyncio.run(_run_reaction_checks())
+
+
+async def _run_startup_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guilds = [client.add_guild(member_count=4) for _ in range(4)]
+        await seed_guilds(client, guilds, submissions=3, phase="voting")
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballots
+        for guild in guilds:
+            message = next(
+                message for message in guild.channel.messages.values() if message.reactions
+            )
+            member = list(guild.members.values())[3]
+            for emoji in [reaction.emoji for reaction in message.reactions][:2]:
+                message.react(emoji, member.id)
+                await cog.on_raw_reaction_add(reaction_payload(guild, message, member, emoji))
+
+        # Only the guilds on this process's shards are loaded
+        other = str(guilds[0].id)
+        client.owns_guild = lambda guild_id: str(guild_id) != other
+        restarted = make_rounds_cog(client)
+        with query_budget("get_open_ballots"):
+            await restarted.load_ballots()
+        del client.owns_guild
+        assert len(restarted.ballots) == len(guilds) - 1
+        for round_id, ballot in restarted.ballots._ballots.items():
+            assert (ballot.cast, ballot.turnout, ballot.players) == (2, 0, 3)
+            assert list(ballot.votes) == list(cog.ballots.get(round_id).votes)
+        print("✓ Ballots rebuilt from the votes table at startup, for this process's guilds")
+
+        # A ballot this process doesn't have is rebuilt when it's needed
+        (missing,) = set(cog.ballots._ballots) - set(restarted.ballots._ballots)
+        async with client.get_db_session() as session:
+            with query_budget("get_ballot_votes"):
+                ballot = await restarted._get_ballot(DatabaseService(session), missing)
+        assert ballot.cast == 2 and restarted.ballots.get(missing) is ballot
+        print("✓ Missing ballot rebuilt on demand")
+
+        # A failed load keeps no ballots, so each is rebuilt from the database
+        def broken_session():
+            raise RuntimeError("database unavailable")
+
+        key = ("ballot_load_failures_total", ())
+        failures = metrics.counters.get(key, 0)
+        client.get_db_session = broken_session
+        failed = make_rounds_cog(client)
+        await failed.load_ballots()
+        del client.get_db_session
+        assert len(failed.ballots) == 0
+        assert metrics.counters[key] == failures + 1
+        async with client.get_db_session() as session:
+            ballot = await failed._get_ballot(DatabaseService(session), missing)
+        assert ballot.cast == 2
+        print("✓ Failed ballot load recorded, ballots rebuilt from the database instead")
+
+
+def test_startup_rebuild():
+    """Test rebuilding the ballots being voted on when the bot starts."""
+    print("\nTesting ballot rebuilds...")
+    asyncio.run(_run_startup_checks())
+
+
+async def _run_vote_command_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=4)
+        await seed_guilds(client, [guild], submissions=3, phase="voting")
+        async with client.get_db_session() as session:
+            await DatabaseService(session).update_guild_settings(
+                str(guild.id), scoring="points"
+            )
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        members = list(guild.members.values())
+        round_id = next(iter(cog.ballots._ballots))
+
+        interaction = FakeInteraction(client, guild, members[0])
+        await cog.vote.callback(cog, interaction, 1, 3)
+        assert interaction.response.messages == ["You can't vote for your own submission."]
+
+        interaction = FakeInteraction(client, guild, members[0])
+        await cog.vote.callback(cog, interaction, 2, 3)
+        assert cog.ballots.get(round_id).count(members[0].id) == 1
+        await cog.vote.callback(cog, FakeInteraction(client, guild, members[0]), 2, 5)
+        assert cog.ballots.get(round_id).cast == 1  # New points, same vote
+        assert await _vote_count(client) == 1
+        print("✓ /vote keeps the ballot and refuses votes for your own submission")
+
+
+def test_vote_command():
+    """Test /vote against the ballot state."""
+    print("\nTesting /vote...")
+    asyncio.run(_run_vote_command_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_ballot_state()
+        test_reaction_votes()
+        test_startup_rebuild()
+        test_vote_command()
+        print("\n🎉 All ballot tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
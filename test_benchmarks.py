@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Smoke test running every benchmark scenario at a small scale
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.scenarios import SCENARIOS
+
+
+def test_benchmark_scenarios():
+    """Test that each scenario runs offline and reports its numbers."""
+    print("Testing benchmark scenarios...")
+
+    for name, scenario in SCENARIOS.items():
+        summary = asyncio.run(scenario(scale=0.01)).summary()
+        assert summary["operations"] > 0, f"{name} ran no operations"
+        assert summary["p99_ms"] >= summary["p50_ms"]
+        assert "rest_calls" in summary
+        print(f"✓ {name}: {summary['operations']} operations, p50 {summary['p50_ms']}ms")
+
+
+if __name__ == "__main__":
+    try:
+        test_benchmark_scenarios()
+        print("\n🎉 All benchmark scenarios PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
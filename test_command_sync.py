@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test for skipping application command syncs when nothing changed
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import discord
+from discord import app_commands
+
+from musicleague_bot.src.bot import MusicLeagueBot
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.cogs.rounds import RoundsCog
+
+
+async def _run_sync_checks():
+    bot = MusicLeagueBot()
+    await bot.add_cog(SettingsCog(bot))
+    rounds_cog = RoundsCog(bot)
+    rounds_cog.check_rounds.cancel()
+    await bot.add_cog(rounds_cog)
+
+    uploads = []
+
+    async def fake_sync(*, guild=None):
+        uploads.append(guild)
+        return []
+
+    bot.tree.sync = fake_sync
+
+    assert await bot.sync_commands()
+    assert len(uploads) == 1
+    print("✓ First start uploads the command tree")
+
+    assert not await bot.sync_commands()
+    assert len(uploads) == 1
+    print("✓ Unchanged command tree is not uploaded again")
+
+    @app_commands.command(name="ping", description="Check the bot is alive")
+    async def ping(interaction: discord.Interaction):
+        pass
+
+    bot.tree.add_command(ping)
+    assert await bot.sync_commands()
+    assert len(uploads) == 2
+    print("✓ Changed command tree is uploaded")
+
+    os.environ["DEV_GUILD_ID"] = "42"
+    try:
+        assert await bot.sync_commands()
+        assert uploads[-1].id == 42
+        assert not await bot.sync_commands()
+    finally:
+        os.environ.pop("DEV_GUILD_ID")
+    print("✓ Development guild syncs are tracked separately")
+
+
+def test_command_sync():
+    """Test the hash-based command sync."""
+    print("Testing command sync...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["COMMAND_SYNC_CACHE"] = os.path.join(tmp, "sync.json")
+        try:
+            asyncio.run(_run_sync_checks())
+        finally:
+            os.environ.pop("COMMAND_SYNC_CACHE")
+
+
+if __name__ == "__main__":
+    try:
+        test_command_sync()
+        print("\n🎉 All command sync tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
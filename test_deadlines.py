@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test timezone-aware deadlines, aligned to a league's local deadline time
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.schedule import (
+    deadline_after,
+    next_deadline,
+    parse_deadline_time,
+    parse_timezone,
+)
+
+UTC = datetime.timezone.utc
+
+
+def test_deadline_alignment():
+    """Test moving deadlines to a local time of day."""
+    print("Testing deadline alignment...")
+    assert parse_deadline_time("8:05") == "08:05"
+    assert parse_deadline_time("off") == parse_deadline_time("") == ""
+    assert parse_timezone(" Europe/Berlin ") == "Europe/Berlin"
+    for parse, bad in ((parse_deadline_time, "25:00"), (parse_timezone, "Mars/Olympus")):
+        try:
+            parse(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+    print("✓ Deadline times and timezones checked")
+
+    start = datetime.datetime(2024, 3, 1, 10, 17, tzinfo=UTC)
+    assert deadline_after(start, 3) == start + datetime.timedelta(days=3)
+    # 20:00 in Berlin is 19:00 UTC in winter
+    assert deadline_after(start, 3, "Europe/Berlin", "20:00") == datetime.datetime(
+        2024, 3, 4, 19, tzinfo=UTC
+    )
+    # Already past 20:00 local on the last day, so it's the next evening
+    late = datetime.datetime(2024, 3, 1, 20, 30, tzinfo=UTC)
+    assert deadline_after(late, 1, "Europe/Berlin", "20:00") == datetime.datetime(
+        2024, 3, 3, 19, tzinfo=UTC
+    )
+    # Across the change to summer time, still 20:00 local
+    spring = datetime.datetime(2024, 3, 29, 10, tzinfo=UTC)
+    deadline = deadline_after(spring, 3, "Europe/Berlin", "20:00")
+    assert deadline == datetime.datetime(2024, 4, 1, 18, tzinfo=UTC)
+    assert deadline.astimezone(ZoneInfo("Europe/Berlin")).hour == 20
+    print("✓ Deadlines moved to the next local deadline time, across daylight saving")
+
+    round_obj = SimpleNamespace(
+        is_completed=False,
+        voting_message_id=None,
+        submission_end=start + datetime.timedelta(days=1),
+        voting_end=start + datetime.timedelta(days=2),
+        next_reminder=start + datetime.timedelta(hours=2),
+    )
+    assert next_deadline(round_obj) == round_obj.next_reminder
+    round_obj.next_reminder = None
+    assert next_deadline(round_obj) == round_obj.submission_end
+    round_obj.voting_message_id = "1"
+    assert next_deadline(round_obj) == round_obj.voting_end
+    round_obj.is_completed = True
+    assert next_deadline(round_obj) is None
+    print("✓ Next deadline is the round's reminder or the end of its phase")
+
+
+async def _run_aligned_round_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=3)
+        user = next(iter(guild.members.values()))
+        rounds_cog = make_rounds_cog(client)
+        settings_cog = SettingsCog(client)
+        new_york = ZoneInfo("America/New_York")
+
+        def interaction():
+            return FakeInteraction(client, guild, user)
+
+        reply = interaction()
+        await settings_cog.settings.callback(settings_cog, reply, timezone="Moon/Base")
+        assert "isn't a timezone" in reply.response.messages[0]
+
+        reply = interaction()
+        await settings_cog.settings.callback(
+            settings_cog, reply, timezone="America/New_York", deadline_time="18:00"
+        )
+        fields = {field.name: field.value for field in reply.response.messages[0].fields}
+        assert fields["Deadlines"] == "18:00 America/New_York"
+        await settings_cog.create_league.callback(settings_cog, interaction(), "side")
+        await settings_cog.settings.callback(
+            settings_cog,
+            interaction(),
+            timezone="America/New_York",
+            deadline_time="18:00",
+            league="side",
+        )
+        print("✓ Timezone and deadline time set in /settings")
+
+        await rounds_cog.start_round.callback(rounds_cog, interaction(), "Aligned")
+        await asyncio.sleep(0.01)
+        await rounds_cog.start_round.callback(rounds_cog, interaction(), "Side", "side")
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            side_round = await db.get_active_round(str(guild.id), "side")
+
+        assert round_obj.submission_end.tzinfo is not None
+        for deadline in (round_obj.submission_end, round_obj.voting_end):
+            local = deadline.astimezone(new_york)
+            assert (local.hour, local.minute, local.second) == (18, 0, 0)
+        assert round_obj.next_deadline == round_obj.submission_end
+        # Rounds started at different times change phase together
+        assert side_round.submission_end == round_obj.submission_end
+        print("✓ Rounds' deadlines fall on the league's local deadline time, stored aware")
+
+        async with client.get_db_session() as session:
+            await DatabaseService(session).create_submission(str(guild.id), str(user.id), "A song")
+        await rounds_cog.end_submission.callback(rounds_cog, interaction())
+        async with client.get_db_session() as session:
+            round_obj = await DatabaseService(session).get_active_round(str(guild.id))
+        assert round_obj.voting_end.astimezone(new_york).hour == 18
+        assert round_obj.next_deadline == round_obj.submission_end
+        assert round_obj.next_deadline <= datetime.datetime.now(UTC)
+
+        # The scheduler finds it by its next deadline and opens voting
+        await rounds_cog.check_rounds()
+        async with client.get_db_session() as session:
+            round_obj = await DatabaseService(session).get_active_round(str(guild.id))
+        assert round_obj.voting_message_id
+        assert round_obj.next_deadline == round_obj.voting_end
+        print("✓ /end_submission keeps the voting deadline aligned, and the next deadline follows")
+
+
+def test_aligned_rounds():
+    """Test rounds started in a league with a deadline time."""
+    print("\nTesting aligned rounds...")
+    asyncio.run(_run_aligned_round_checks())
+
+
+async def _run_backfill(path):
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import dispose_engines, get_engine
+
+    previous_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        await init_db()
+        async with get_engine().connect() as conn:
+            rounds = await conn.execute(
+                text("SELECT id, next_deadline FROM rounds ORDER BY id")
+            )
+            leagues = await conn.execute(text("SELECT timezone, deadline_time FROM leagues"))
+            return rounds.all(), leagues.all()
+    finally:
+        await dispose_engines()
+        if previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_next_deadline_backfill():
+    """Test that running rounds from before next deadlines were stored get one."""
+    print("\nTesting next deadline backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE guilds (
+                id INTEGER PRIMARY KEY, guild_id VARCHAR NOT NULL UNIQUE,
+                submission_days INTEGER, voting_days INTEGER, active_round INTEGER,
+                channel_id VARCHAR
+            );
+            CREATE TABLE rounds (
+                id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL REFERENCES guilds (id),
+                round_number INTEGER NOT NULL, theme VARCHAR, created_at DATETIME,
+                submission_end DATETIME NOT NULL, voting_end DATETIME NOT NULL,
+                is_completed BOOLEAN, voting_message_id VARCHAR
+            );
+            INSERT INTO guilds (guild_id, active_round) VALUES ('1', 3);
+            INSERT INTO rounds (guild_id, round_number, submission_end, voting_end,
+                                is_completed, voting_message_id)
+            VALUES (1, 1, '2024-01-01 00:00:00.000000', '2024-01-02 00:00:00.000000', 1, '5'),
+                   (1, 2, '2024-01-03 00:00:00.000000', '2024-01-04 00:00:00.000000', 0, '6'),
+                   (1, 3, '2024-01-05 00:00:00.000000', '2024-01-06 00:00:00.000000', 0, NULL);
+            """
+        )
+        conn.close()
+
+        rounds, leagues = asyncio.run(_run_backfill(path))
+        assert [row.next_deadline for row in rounds] == [
+            None,
+            "2024-01-04 00:00:00.000000",
+            "2024-01-05 00:00:00.000000",
+        ]
+        assert [tuple(row) for row in leagues] == [("UTC", "")]
+        print("✓ Running rounds given their next deadline, completed ones none")
+
+
+if __name__ == "__main__":
+    try:
+        test_deadline_alignment()
+        test_aligned_rounds()
+        test_next_deadline_backfill()
+        print("\n🎉 All deadline tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
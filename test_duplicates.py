@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test duplicate song detection and the per-guild duplicate policy
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from musicleague_bot.src.cogs.rounds import SubmissionModal
+from musicleague_bot.src.db import DatabaseService, DuplicateSubmission
+from musicleague_bot.src.db.models import Guild, Player, Round, Submission
+from musicleague_bot.src.metrics import metrics
+
+GUILD_ID = "123456789"
+PAST = datetime.datetime(2024, 1, 1)
+
+
+async def _start_round(db, theme):
+    round_obj = await db.create_round(GUILD_ID, theme)
+    if round_obj.round_number > 1:
+        # Mark the previous round completed, as the bot would
+        await db.session.execute(
+            Round.__table__.update()
+            .where(Round.id != round_obj.id)
+            .values(is_completed=True)
+        )
+    return round_obj
+
+
+async def _run_policy_checks():
+    async with temporary_database():
+        client = FakeClient()
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await _start_round(db, "First")
+
+            first = await db.create_submission(GUILD_ID, "1", "https://youtu.be/dQw4w9WgXcQ")
+            assert first.duplicate_of is None
+
+            # Same track, different link, same round
+            second = await db.create_submission(
+                GUILD_ID, "2", "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10"
+            )
+            assert second.duplicate_of.user_id == "1"
+            assert second.duplicate_of.round_number == 1
+            print("✓ Same track in one round is flagged (warn is the default)")
+
+            # Replacing your own entry with the same song is not a duplicate
+            again = await db.create_submission(GUILD_ID, "1", "https://youtu.be/dQw4w9WgXcQ")
+            assert again.id == first.id
+            assert again.duplicate_of.user_id == "2"  # Still matches the other player
+            await db.create_submission(GUILD_ID, "3", "Björk – Jóga")
+            own = await db.create_submission(GUILD_ID, "3", "bjork joga")
+            assert own.duplicate_of is None
+            print("✓ Resubmitting your own song is not flagged")
+
+            # Across rounds, with the reject policy
+            await _start_round(db, "Second")
+            await db.update_guild_settings(GUILD_ID, duplicate_policy="reject")
+            try:
+                await db.create_submission(GUILD_ID, "4", "BJÖRK - Jóga!")
+            except DuplicateSubmission as e:
+                assert e.match.round_number == 1
+                assert e.match.user_id == "3"
+            else:
+                assert False, "Duplicate was not rejected"
+            round_obj = await db.get_active_round(GUILD_ID)
+            assert await db.get_round_submissions(round_obj.id) == []
+            print("✓ Songs from earlier rounds rejected")
+
+            await db.update_guild_settings(GUILD_ID, duplicate_policy="allow")
+            allowed = await db.create_submission(GUILD_ID, "4", "BJÖRK - Jóga!")
+            assert allowed.duplicate_of is None
+            print("✓ Duplicates allowed when configured")
+
+            try:
+                await db.update_guild_settings(GUILD_ID, duplicate_policy="sometimes")
+            except ValueError:
+                print("✓ Unknown policies refused")
+            else:
+                assert False, "Unknown policy was accepted"
+
+
+def test_duplicate_policies():
+    """Test warn, reject and allow policies."""
+    print("Testing duplicate policies...")
+    asyncio.run(_run_policy_checks())
+
+
+async def _run_modal_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=2)
+        first_user, second_user = guild.members.values()
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.create_round(str(guild.id), "Modal")
+
+        async def submit(user, content):
+            modal = SubmissionModal(client, str(guild.id))
+            modal.submission._value = content
+            interaction = FakeInteraction(client, guild, user)
+            await modal.on_submit(interaction)
+            return interaction.followup.messages[0]
+
+        await submit(first_user, "https://youtu.be/dQw4w9WgXcQ")
+        message = await submit(second_user, "https://youtu.be/dQw4w9WgXcQ")
+        assert "recorded" in message and "already submitted in this round" in message
+
+        async with client.get_db_session() as session:
+            await DatabaseService(session).update_guild_settings(
+                str(guild.id), duplicate_policy="reject"
+            )
+        message = await submit(second_user, "https://youtu.be/dQw4w9WgXcQ?si=x")
+        assert "recorded" not in message and "pick another one" in message
+        print("✓ Submitters warned or turned away")
+
+
+def test_duplicate_modal_messages():
+    """Test what submitters are told about duplicates."""
+    print("\nTesting duplicate messages...")
+    asyncio.run(_run_modal_checks())
+
+
+async def _run_history_lookup():
+    async with temporary_database():
+        client = FakeClient()
+        async with client.get_db_session() as session:
+            guild = Guild(guild_id=GUILD_ID)
+            players = [Player(user_id=str(idx), guild=guild) for idx in range(50)]
+            for number in range(1, 101):
+                round_obj = Round(
+                    guild=guild,
+                    round_number=number,
+                    theme=f"Round {number}",
+                    submission_end=PAST,
+                    voting_end=PAST,
+                    is_completed=True,
+                )
+                for player in players:
+                    Submission(
+                        round=round_obj,
+                        player=player,
+                        guild=guild,
+                        content=f"song {number} {player.user_id}",
+                        fingerprint=f"text:song {number} {player.user_id}",
+                    )
+            session.add(guild)
+            await session.commit()
+
+            db = DatabaseService(session)
+            with metrics.count_queries() as query_count:
+                policy, match = await db.find_duplicate_submission(guild.id, "text:song 42 7")
+            assert policy == "warn"
+            assert match.round_number == 42 and match.user_id == "7"
+            assert query_count.statements == 1
+            print("✓ 5,000 historical submissions checked in one statement")
+
+            # The lookup is served by the (guild_id, fingerprint) index
+            plan = await session.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM submissions "
+                    "WHERE guild_id = :guild AND fingerprint = :fingerprint"
+                ),
+                {"guild": guild.id, "fingerprint": "text:song 42 7"},
+            )
+            assert "ix_submissions_guild_fingerprint" in str(plan.all())
+            print("✓ Lookup uses the guild/fingerprint index")
+
+
+def test_history_lookup():
+    """Test that duplicate checks stay one indexed lookup on long histories."""
+    print("\nTesting lookups over a long history...")
+    asyncio.run(_run_history_lookup())
+
+
+if __name__ == "__main__":
+    try:
+        test_duplicate_policies()
+        test_duplicate_modal_messages()
+        test_history_lookup()
+        print("\n🎉 All duplicate detection tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
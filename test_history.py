@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test the round history browser and its keyset-paginated queries
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from musicleague_bot.src.cogs.history import HISTORY_PAGE_SIZE, HistoryCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Guild, League, Player, Round, Submission
+from musicleague_bot.src.metrics import metrics
+
+ROUND_COUNT = 250
+PLAYER_COUNT = 12
+PAST = datetime.datetime(2024, 1, 1)
+
+
+async def _seed_history(client, guild):
+    """Store ROUND_COUNT rounds, all completed but the last."""
+    async with client.get_db_session() as session:
+        guild_row = Guild(guild_id=str(guild.id))
+        league_row = League(guild=guild_row, scoring="points")
+        members = list(guild.members.values())
+        players = [
+            Player(user_id=str(member.id), guild=guild_row, league=league_row)
+            for member in members
+        ]
+        for number in range(1, ROUND_COUNT + 1):
+            round_row = Round(
+                guild=guild_row,
+                league=league_row,
+                round_number=number,
+                theme=f"Theme {number}",
+                submission_end=PAST,
+                voting_end=PAST,
+                is_completed=number < ROUND_COUNT,
+            )
+            votes = [(number + idx) % 4 for idx in range(len(players))]  # Plenty of ties
+            # Places as completing the round stores them, ties going to the earliest
+            order = sorted(range(len(players)), key=lambda idx: (-votes[idx], idx))
+            # Even rounds were completed before scores were stored
+            scored = round_row.is_completed and number % 2
+            for idx, player in enumerate(players):
+                Submission(
+                    round=round_row,
+                    player=player,
+                    guild=guild_row,
+                    content=f"song {number} {idx}",
+                    votes_received=votes[idx],
+                    score=votes[idx] * 10 if scored else None,
+                    place=order.index(idx) + 1 if round_row.is_completed else None,
+                )
+        session.add(guild_row)
+        await session.commit()
+
+
+async def _run_query_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=PLAYER_COUNT)
+        await _seed_history(client, guild)
+
+        async with client.get_read_session() as session:
+            db = DatabaseService(session)
+
+            # Walk every page of rounds, one statement each
+            numbers, cursor, statements = [], None, set()
+            while True:
+                with metrics.count_queries() as query_count:
+                    page = await db.get_round_history(str(guild.id), cursor, HISTORY_PAGE_SIZE)
+                statements.add(query_count.statements)
+                if not page:
+                    break
+                numbers += [summary.round_number for summary in page]
+                cursor = page[-1].round_number
+            assert numbers == list(range(ROUND_COUNT, 0, -1))
+            assert statements == {1}
+            print(f"✓ {ROUND_COUNT} rounds paged newest first, one statement per page")
+
+            newest, completed, unscored = await db.get_round_history(str(guild.id), None, 3)
+            assert newest.winner_id is None and newest.submission_count == PLAYER_COUNT
+            assert (completed.winner_score, completed.score_unit) == (30, "points")
+            assert (unscored.winner_score, unscored.score_unit) == (3, "votes")
+            # Ties go to the earliest submission, as in the results post
+            winner_idx = next(idx for idx in range(PLAYER_COUNT) if (249 + idx) % 4 == 3)
+            assert completed.winner_id == str(list(guild.members)[winner_idx])
+            print("✓ Winners shown with their score for completed rounds only")
+
+            round_obj = await db.get_round_by_number(str(guild.id), 100)
+            assert round_obj.theme == "Theme 100"
+            rows, after = [], None
+            while True:
+                page = await db.get_results_page(round_obj.id, after, 5)
+                if not page:
+                    break
+                rows += page
+                after = (page[-1][0].place, page[-1][0].id)
+            ordered = sorted(
+                (submission for submission, _ in rows),
+                key=lambda submission: (-submission.votes_received, submission.id),
+            )
+            assert [submission for submission, _ in rows] == ordered
+            assert [submission.place for submission, _ in rows] == list(
+                range(1, PLAYER_COUNT + 1)
+            )
+            print("✓ Results paged by place with ties kept in submission order")
+
+            # Both queries are served by indexes rather than scanning the tables
+            plan = await session.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM rounds "
+                    "WHERE league_id = 1 AND round_number < 100 ORDER BY round_number DESC LIMIT 10"
+                )
+            )
+            assert "ix_rounds_league_number" in str(plan.all())
+            plan = await session.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT id FROM submissions WHERE round_id = 1 "
+                    "ORDER BY place, id LIMIT 10"
+                )
+            )
+            plan = str(plan.all())
+            assert "ix_submissions_round_place" in plan and "TEMP B-TREE" not in plan
+            print("✓ Pages read from the round number and results indexes")
+
+
+def test_history_queries():
+    """Test the paginated history queries."""
+    print("Testing history queries...")
+    asyncio.run(_run_query_checks())
+
+
+async def _run_command_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=PLAYER_COUNT)
+        await _seed_history(client, guild)
+        user, other_user = list(guild.members.values())[:2]
+        cog = HistoryCog(client)
+
+        interaction = FakeInteraction(client, guild, user)
+        await cog.history.callback(cog, interaction)
+        embed, view = interaction.response.messages[0], interaction.response.view
+        assert len(embed.fields) == HISTORY_PAGE_SIZE
+        assert embed.fields[0].name == f"Round #{ROUND_COUNT}: Theme {ROUND_COUNT}"
+        assert embed.fields[0].value.startswith("In progress")
+        assert "- 30 points\n" in embed.fields[1].value
+        assert "- 3 votes\n" in embed.fields[2].value
+        assert view.previous_button.disabled and not view.next_button.disabled
+
+        interaction = FakeInteraction(client, guild, user)
+        await view.next_button.callback(interaction)
+        assert interaction.response.messages[0].fields[0].name.startswith("Round #240:")
+        assert interaction.response.messages[0].footer.text == "Page 2"
+        interaction = FakeInteraction(client, guild, user)
+        await view.previous_button.callback(interaction)
+        assert interaction.response.messages[0].fields[0].name.startswith("Round #250:")
+
+        interaction = FakeInteraction(client, guild, other_user)
+        assert not await view.interaction_check(interaction)
+        print("✓ /history pages back and forth for the member who ran it")
+
+        interaction = FakeInteraction(client, guild, user)
+        await cog.round_results.callback(cog, interaction, 3)
+        embed, view = interaction.response.messages[0], interaction.response.view
+        assert embed.title == "🏆 Round #3: Theme 3"
+        assert embed.fields[0].name.startswith("🥇 #1:")
+        assert embed.fields[0].name.endswith("- 30 points")
+        assert len(embed.fields) == HISTORY_PAGE_SIZE
+        interaction = FakeInteraction(client, guild, user)
+        await view.next_button.callback(interaction)
+        fields = interaction.response.messages[0].fields
+        assert len(fields) == PLAYER_COUNT - HISTORY_PAGE_SIZE
+        assert fields[0].name.startswith(f"#{HISTORY_PAGE_SIZE + 1}:")
+        assert view.next_button.disabled
+        interaction = FakeInteraction(client, guild, user)
+        await cog.round_results.callback(cog, interaction, 2)
+        assert interaction.response.messages[0].fields[0].name.endswith("- 3 votes")
+        print("✓ /round shows a completed round's results across pages")
+
+        for number, expected in [(ROUND_COUNT, "still in progress"), (999, "no Round #999")]:
+            interaction = FakeInteraction(client, guild, user)
+            await cog.round_results.callback(cog, interaction, number)
+            assert expected in interaction.response.messages[0]
+        print("✓ Unfinished and unknown rounds explained")
+
+
+def test_history_commands():
+    """Test /history and /round with their page buttons."""
+    print("\nTesting history commands...")
+    asyncio.run(_run_command_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_history_queries()
+        test_history_commands()
+        print("\n🎉 All history tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
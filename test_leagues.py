@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test running several leagues side by side in one guild
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+import sqlite3
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from benchmarks.fakes import FakeClient, FakeInteraction, reaction_payload
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.history import HistoryCog
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Round
+from musicleague_bot.src.stats import get_guild_stats
+
+
+async def _rounds(client):
+    async with client.get_db_session() as session:
+        result = await session.execute(Round.__table__.select().order_by(Round.id))
+        return result.all()
+
+
+async def _end_phase(client, column):
+    past = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    async with client.get_db_session() as session:
+        await session.execute(
+            Round.__table__.update().values(
+                {column: past, "next_deadline": past}
+            )
+        )
+        await session.commit()
+
+
+async def _run_league_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        members = list(guild.members.values())
+        await seed_guilds(client, [guild], submissions=3, phase="submission")
+        rounds_cog = make_rounds_cog(client)
+        settings_cog = SettingsCog(client)
+
+        def interaction(member=members[0]):
+            return FakeInteraction(client, guild, member)
+
+        # A second league, with its own scoring
+        await settings_cog.create_league.callback(settings_cog, interaction(), " Side ")
+        reply = interaction()
+        await settings_cog.create_league.callback(settings_cog, reply, "side")
+        assert "already a league called side" in reply.response.messages[0]
+        await settings_cog.settings.callback(
+            settings_cog, interaction(), scoring="borda", league="side"
+        )
+        reply = interaction()
+        await settings_cog.list_leagues.callback(settings_cog, reply)
+        assert [field.name for field in reply.response.messages[0].fields] == ["main", "side"]
+        print("✓ League created, configured and listed")
+
+        # Its rounds are numbered on their own, and run alongside the main league's
+        reply = interaction()
+        await rounds_cog.start_round.callback(rounds_cog, reply, "Side theme", "side")
+        assert reply.response.messages == ["Creating new round..."]
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            main_round = await db.get_active_round(str(guild.id))
+            side_round = await db.get_active_round(str(guild.id), "side")
+            assert main_round.id != side_round.id
+            assert main_round.round_number == side_round.round_number == 1
+            for member in members[3:]:
+                await db.create_submission(
+                    str(guild.id), str(member.id), f"side song {member.id}", league="side"
+                )
+        print("✓ Side round started next to the main league's")
+
+        reply = interaction()
+        await rounds_cog.start_round.callback(rounds_cog, reply, "Theme", "nope")
+        assert "no league called **nope**" in reply.response.messages[0]
+
+        # Browsing commands tell a typo from a league with nothing in it yet
+        history_cog = HistoryCog(client)
+        commands = [
+            (history_cog.history, ()),
+            (history_cog.round_results, (1,)),
+            (history_cog.stats, (None,)),
+            (settings_cog.leaderboard, (5,)),
+        ]
+        for command, args in commands:
+            reply = interaction()
+            await command.callback(command.binding, reply, *args, league="nope")
+            sent = reply.response.messages + reply.followup.messages
+            assert "no league called **nope**" in sent[0], command.name
+            reply = interaction()
+            await command.callback(command.binding, reply, *args, league="side")
+            sent = reply.response.messages + reply.followup.messages
+            assert "no league called" not in str(sent[0]), command.name
+        print("✓ Unknown leagues reported")
+
+        # One scheduler pass opens voting in both leagues
+        await _end_phase(client, "submission_end")
+        await rounds_cog.check_rounds()
+        ballots = {
+            message.id: message
+            for message in guild.channel.messages.values()
+            if message.reactions
+        }
+        rows = await _rounds(client)
+        assert len(ballots) == 2 and all(row.voting_message_id for row in rows)
+        side_ballot = ballots[int(rows[1].voting_message_id)]
+        assert "ranked in the order you react" in side_ballot.content
+        print("✓ Both leagues' rounds moved to voting in one pass")
+
+        # Reactions are counted in the league of the ballot they were added to
+        for member in members[:3]:
+            emoji = side_ballot.reactions[0].emoji
+            side_ballot.react(emoji, member.id)
+            await rounds_cog.on_raw_reaction_add(
+                reaction_payload(guild, side_ballot, member, emoji)
+            )
+        async with client.get_db_session() as session:
+            votes = await session.execute(
+                text("SELECT round_id, COUNT(*) FROM votes GROUP BY round_id")
+            )
+            assert votes.all() == [(rows[1].id, 3)]
+        print("✓ Votes routed to the side league's round")
+
+        await _end_phase(client, "voting_end")
+        await rounds_cog.check_rounds()
+        assert all(row.is_completed for row in await _rounds(client))
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            main_board = await db.get_leaderboard(str(guild.id), 10)
+            side_board = await db.get_leaderboard(str(guild.id), 10, league="side")
+            assert {player.user_id for player in main_board} == {
+                str(member.id) for member in members[:3]
+            }
+            assert [player.user_id for player in side_board][0] == str(members[3].id)
+            assert side_board[0].total_score == 9  # Three first places under Borda
+
+            main_stats = await get_guild_stats(db, guild.id)
+            side_stats = await get_guild_stats(db, guild.id, "side")
+            assert main_stats is not side_stats
+            assert set(side_stats.players) == {str(member.id) for member in members[3:]} | {
+                str(member.id) for member in members[:3]
+            }
+            assert side_stats.players[str(members[3].id)].wins == 1
+            assert str(members[3].id) not in main_stats.players
+        print("✓ Leaderboards and statistics kept per league")
+
+
+def test_leagues():
+    """Test two leagues' rounds, settings and scores staying apart."""
+    print("Testing leagues...")
+    asyncio.run(_run_league_checks())
+
+
+async def _run_backfill(path):
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import dispose_engines, get_engine
+
+    previous_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        await init_db()
+        async with get_engine().connect() as conn:
+            leagues = await conn.execute(
+                text(
+                    "SELECT guild_id, name, channel_id, active_round, scoring, voting_days "
+                    "FROM leagues ORDER BY guild_id"
+                )
+            )
+            rounds = await conn.execute(text("SELECT id, league_id FROM rounds ORDER BY id"))
+            players = await conn.execute(text("SELECT id, league_id FROM players ORDER BY id"))
+            return leagues.all(), rounds.all(), players.all()
+    finally:
+        await dispose_engines()
+        if previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_league_backfill():
+    """Test that guilds from before leagues get a main league with their settings."""
+    print("\nTesting league backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE guilds (
+                id INTEGER PRIMARY KEY, guild_id VARCHAR NOT NULL UNIQUE,
+                submission_days INTEGER, voting_days INTEGER, active_round INTEGER,
+                channel_id VARCHAR, duplicate_policy VARCHAR DEFAULT 'warn' NOT NULL,
+                scoring VARCHAR DEFAULT 'approval' NOT NULL
+            );
+            CREATE TABLE players (
+                id INTEGER PRIMARY KEY, user_id VARCHAR NOT NULL,
+                guild_id INTEGER NOT NULL REFERENCES guilds (id), total_score INTEGER
+            );
+            CREATE TABLE rounds (
+                id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL REFERENCES guilds (id),
+                round_number INTEGER NOT NULL, theme VARCHAR, created_at DATETIME,
+                submission_end DATETIME NOT NULL, voting_end DATETIME NOT NULL,
+                is_completed BOOLEAN
+            );
+            INSERT INTO guilds (guild_id, voting_days, active_round, channel_id, scoring)
+            VALUES ('1', 5, 2, '10', 'borda'), ('2', 3, NULL, NULL, 'approval');
+            INSERT INTO players (user_id, guild_id, total_score) VALUES ('7', 1, 4), ('7', 2, 0);
+            INSERT INTO rounds (guild_id, round_number, submission_end, voting_end)
+            VALUES (1, 1, '2024-01-01', '2024-01-02'), (1, 2, '2024-01-03', '2024-01-04'),
+                   (2, 1, '2024-01-01', '2024-01-02');
+            """
+        )
+        conn.close()
+
+        leagues, rounds, players = asyncio.run(_run_backfill(path))
+        assert [tuple(row) for row in leagues] == [
+            (1, "main", "10", 2, "borda", 5),
+            (2, "main", None, None, "approval", 3),
+        ]
+        assert [league_id for _, league_id in rounds] == [1, 1, 2]
+        assert [league_id for _, league_id in players] == [1, 2]
+        print("✓ Settings, active round, rounds and players moved to each guild's main league")
+
+
+if __name__ == "__main__":
+    try:
+        test_leagues()
+        test_league_backfill()
+        print("\n🎉 All league tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
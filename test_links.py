@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Test link canonicalization and the track metadata cache
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+import sqlite3
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs import rounds as rounds_module
+from musicleague_bot.src.cogs.rounds import SubmissionModal
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.links import TrackLink, parse_link
+from musicleague_bot.src.metadata import MetadataResolver, TrackInfo, refresh_track_metadata
+
+SPOTIFY_ID = "4uLU6hMCjMI75M1A2tKUQC"
+
+
+class StubResolver(MetadataResolver):
+    """Resolver returning canned metadata and counting lookups."""
+
+    def __init__(self):
+        self.lookups = []
+
+    async def resolve(self, link):
+        self.lookups.append(link)
+        return TrackInfo(title=f"Song {link.track_id}", artist="Stub Artist", duration_seconds=215)
+
+
+def test_parse_link():
+    """Test that every form of a track link maps to one key."""
+    print("Testing link parsing...")
+
+    spotify = [
+        f"https://open.spotify.com/track/{SPOTIFY_ID}",
+        f"https://open.spotify.com/track/{SPOTIFY_ID}?si=abc123",
+        f"https://open.spotify.com/intl-de/track/{SPOTIFY_ID}",
+        f"spotify:track:{SPOTIFY_ID}",
+        f"Listen to this! https://open.spotify.com/track/{SPOTIFY_ID}.",
+    ]
+    for link in spotify:
+        assert parse_link(link) == TrackLink("spotify", SPOTIFY_ID), link
+    print("✓ Spotify links")
+
+    youtube = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+        "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=42",
+        "https://music.youtube.com/watch?v=dQw4w9WgXcQ&list=RDAMVM",
+        "https://youtu.be/dQw4w9WgXcQ?si=xyz",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    ]
+    for link in youtube:
+        assert parse_link(link) == TrackLink("youtube", "dQw4w9WgXcQ"), link
+    print("✓ YouTube links")
+
+    apple = [
+        "https://music.apple.com/us/album/some-album/1440857781?i=1440857786",
+        "https://music.apple.com/gb/song/some-song/1440857786",
+    ]
+    for link in apple:
+        assert parse_link(link) == TrackLink("apple_music", "1440857786"), link
+    print("✓ Apple Music links")
+
+    assert parse_link("https://artist.bandcamp.com/track/Some-Song?from=home") == TrackLink(
+        "bandcamp", "artist/some-song"
+    )
+    print("✓ Bandcamp links")
+
+    for content in [
+        "Never Gonna Give You Up - Rick Astley",
+        "https://open.spotify.com/album/" + SPOTIFY_ID,
+        "https://example.com/watch?v=dQw4w9WgXcQ",
+        "",
+    ]:
+        assert parse_link(content) is None, content
+    print("✓ Unrecognised content has no key")
+
+    for link in [
+        TrackLink("spotify", SPOTIFY_ID),
+        TrackLink("youtube", "dQw4w9WgXcQ"),
+        TrackLink("apple_music", "1440857786"),
+        TrackLink("bandcamp", "artist/some-song"),
+    ]:
+        assert parse_link(link.url) == link
+    print("✓ Canonical URLs parse back to the same key")
+
+
+async def _run_metadata_checks():
+    async with temporary_database():
+        client = FakeClient()
+        client.metadata_resolver = StubResolver()
+        guild = client.add_guild(member_count=3)
+        await seed_guilds(client, [guild], phase="submission")
+        members = list(guild.members.values())
+
+        # Submitting stores the key and caches the metadata once
+        for member, content in zip(
+            members,
+            [
+                f"https://open.spotify.com/track/{SPOTIFY_ID}?si=one",
+                f"spotify:track:{SPOTIFY_ID}",
+                "Some song I like",
+            ],
+        ):
+            modal = SubmissionModal(client, str(guild.id))
+            modal.submission._value = content
+            await modal.on_submit(FakeInteraction(client, guild, member))
+
+        assert client.metadata_resolver.lookups == [TrackLink("spotify", SPOTIFY_ID)]
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            active_round = await db.get_active_round(str(guild.id))
+            submissions = await db.get_round_submissions(active_round.id)
+            keys = [(s.provider, s.track_id) for s in submissions]
+            assert keys == [("spotify", SPOTIFY_ID), ("spotify", SPOTIFY_ID), (None, None)]
+            cached = await db.get_track_metadata(keys)
+            assert cached[("spotify", SPOTIFY_ID)].artist == "Stub Artist"
+        print("✓ Keys stored and metadata resolved once per track")
+
+        # Expired entries are looked up again
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            metadata = await db.store_track_metadata("spotify", SPOTIFY_ID, title="Old")
+            metadata.fetched_at = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+            await session.commit()
+        refreshed = await refresh_track_metadata(client, TrackLink("spotify", SPOTIFY_ID))
+        assert refreshed.title == f"Song {SPOTIFY_ID}"
+        assert len(client.metadata_resolver.lookups) == 2
+        print("✓ Stale metadata refreshed")
+
+        # Losing a race to cache the same new track updates the winner's row
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            lookups = []
+
+            async def missed_first(keys, fresh=False):
+                lookups.append(keys)
+                if len(lookups) == 1:
+                    return {}  # Another submission inserted it meanwhile
+                return await DatabaseService.get_track_metadata(db, keys, fresh)
+
+            db.get_track_metadata = missed_first
+            metadata = await db.store_track_metadata(
+                "spotify",
+                SPOTIFY_ID,
+                title=f"Song {SPOTIFY_ID}",
+                artist="Stub Artist",
+                duration_seconds=215,
+            )
+            assert metadata.artist == "Stub Artist" and len(lookups) == 2
+
+        # A failing cache fill doesn't turn a saved submission into an error
+        async def failing_refresh(bot, link):
+            raise RuntimeError("database is locked")
+
+        original = rounds_module.refresh_track_metadata
+        rounds_module.refresh_track_metadata = failing_refresh
+        try:
+            modal = SubmissionModal(client, str(guild.id))
+            modal.submission._value = f"spotify:track:{SPOTIFY_ID}"
+            interaction = FakeInteraction(client, guild, members[0])
+            await modal.on_submit(interaction)
+        finally:
+            rounds_module.refresh_track_metadata = original
+        assert len(interaction.followup.messages) == 1
+        assert "has been recorded" in interaction.followup.messages[0]
+        print("✓ Metadata caching races and failures kept away from players")
+
+        # The ballot reads the cache and never calls the resolver
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_round_timing(
+                active_round.id,
+                submission_end=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+            )
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()
+        ballot = "\n".join(
+            message.content for message in guild.channel.messages.values()
+        )
+        assert f"**Song {SPOTIFY_ID}** by Stub Artist (3:35)" in ballot
+        assert len(client.metadata_resolver.lookups) == 2
+        print("✓ Ballot shows cached metadata without lookups")
+
+
+def test_metadata_cache():
+    """Test metadata caching around submissions and ballots."""
+    print("\nTesting metadata cache...")
+    asyncio.run(_run_metadata_checks())
+
+
+async def _run_backfill(path):
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import get_engine
+
+    previous_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        await init_db()
+        async with get_engine().connect() as conn:
+            from sqlalchemy import text
+
+            rows = await conn.execute(
+                text("SELECT provider, track_id FROM submissions ORDER BY id")
+            )
+            return rows.all()
+    finally:
+        await get_engine().dispose()
+        if previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_backfill_existing_submissions():
+    """Test that submissions stored before track keys existed are keyed on upgrade."""
+    print("\nTesting track key backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE submissions (
+                id INTEGER PRIMARY KEY, round_id INTEGER NOT NULL,
+                player_id INTEGER NOT NULL, content VARCHAR NOT NULL,
+                description VARCHAR, submitted_at DATETIME, votes_received INTEGER
+            );
+            INSERT INTO submissions (round_id, player_id, content)
+            VALUES (1, 1, 'https://youtu.be/dQw4w9WgXcQ'), (1, 2, 'just a title');
+            """
+        )
+        conn.close()
+
+        rows = asyncio.run(_run_backfill(path))
+        assert [tuple(row) for row in rows] == [("youtube", "dQw4w9WgXcQ"), (None, None)]
+        print("✓ Existing submissions backfilled")
+
+
+if __name__ == "__main__":
+    try:
+        test_parse_link()
+        test_metadata_cache()
+        test_backfill_existing_submissions()
+        print("\n🎉 All link and metadata tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
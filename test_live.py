@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test the live vote tally shown on ballots and its debounced edits
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.budgets import query_budget
+from benchmarks.fakes import FakeClient, FakeInteraction, reaction_payload
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Round
+from musicleague_bot.src.ballot import BallotState
+from musicleague_bot.src.live import Tally
+from musicleague_bot.src.render import DEFAULT_RENDERER
+
+INTERVAL = 0.2
+
+
+def test_tally():
+    """Test rendering the votes counted on a ballot under its header."""
+    print("Testing the tally...")
+    ballot = BallotState(["1", "2", "3"])
+    tally = Tally("counts", "Ballot\n", ["🎵", "🎶", "🎤"], ballot)
+    assert (tally.version, tally.shown) == (1, 0)  # Not shown yet
+    assert ballot.add("1", 1) and ballot.add("1", 2) and ballot.add("9", 0)
+
+    text = tally.render(DEFAULT_RENDERER)
+    assert text.startswith("Ballot\n")
+    # Only players in the round count as having voted; every vote is counted
+    assert "**1/3** players have voted so far (3 votes)" in text
+    assert "🎵 1 · 🎶 1 · 🎤 1" in text
+
+    assert ballot.remove("1", 1) and ballot.remove("1", 2)
+    assert "**0/3** players have voted so far (1 votes)" in tally.render(DEFAULT_RENDERER)
+    tally.mode = "turnout"
+    assert "🎵" not in tally.render(DEFAULT_RENDERER)
+
+    print("✓ Turnout and per-submission counts shown from the ballot")
+
+
+async def _post_ballot(client, guild, cog):
+    await seed_guilds(client, [guild], submissions=4, phase="voting")
+    async with client.get_db_session() as session:
+        await DatabaseService(session).update_guild_settings(
+            str(guild.id), live_tally="counts", scoring="points"
+        )
+    await cog.check_rounds()
+    ballot = next(
+        message for message in guild.channel.messages.values() if message.reactions
+    )
+    return ballot, [reaction.emoji for reaction in ballot.reactions]
+
+
+async def _react(cog, guild, ballot, member, emoji):
+    ballot.react(emoji, member.id)
+    await cog.on_raw_reaction_add(reaction_payload(guild, ballot, member, emoji))
+
+
+async def _run_edit_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=8)
+        cog = make_rounds_cog(client)
+        cog.live.interval = INTERVAL
+        ballot, emojis = await _post_ballot(client, guild, cog)
+        members = list(guild.members.values())
+        assert "**0/4** players have voted so far (0 votes)" in ballot.content
+        # Posted already up to date, so no edit waits
+        assert all(tally.task is None for tally, _ in cog.live._tallies.values())
+        print("✓ Ballot posted with the tally")
+
+        client.recorder.reset()
+        for member in members[1:7]:
+            await _react(cog, guild, ballot, member, emojis[0])
+        await asyncio.sleep(INTERVAL / 4)
+        # The first vote is shown straight away, the rest wait for the interval
+        assert client.recorder.calls["edit_message"] == 1
+        assert "(1 votes)" in ballot.content
+        await asyncio.sleep(INTERVAL * 1.5)
+        assert client.recorder.calls["edit_message"] == 2
+        assert "**3/4** players have voted so far (6 votes)" in ballot.content
+        assert "🎵 6 · 🎶 0" in ballot.content
+        print("✓ A burst of votes coalesced into one edit")
+
+        # /vote counts too; taking a vote back with 0 points
+        interaction = FakeInteraction(client, guild, members[1])
+        await cog.vote.callback(cog, interaction, 1, 0)
+        await asyncio.sleep(INTERVAL * 1.5)
+        assert "(5 votes)" in ballot.content
+        print("✓ Votes taken back with /vote shown")
+
+        # Votes just before voting closes are shown before the results
+        await _react(cog, guild, ballot, members[6], emojis[1])
+        await _react(cog, guild, ballot, members[7], emojis[1])
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update().values(
+                    voting_end=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                    next_deadline=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                )
+            )
+            await session.commit()
+        await cog.check_rounds()
+        assert "(7 votes)" in ballot.content and "🎶 2" in ballot.content
+        assert not cog.live._tallies
+        results = [
+            message for message in guild.channel.messages.values() if "Results" in message.content
+        ]
+        assert results
+        print("✓ Final count flushed when the round completes")
+
+
+def test_debounced_edits():
+    """Test that the ballot is edited at most once per interval."""
+    print("\nTesting debounced ballot edits...")
+    asyncio.run(_run_edit_checks())
+
+
+async def _run_rebuild_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=4)
+        cog = make_rounds_cog(client)
+        ballot, emojis = await _post_ballot(client, guild, cog)
+        members = list(guild.members.values())
+        for member in members[:3]:
+            await _react(cog, guild, ballot, member, emojis[3])
+        round_id = next(iter(cog.live._tallies))
+        cog.live.cancel_all()
+
+        # A restarted bot rebuilds the ballot and its tally from the votes stored so far
+        restarted = make_rounds_cog(client)
+        restarted.live.interval = INTERVAL
+        with query_budget("get_open_ballots"):
+            await restarted.load_ballots()
+        rebuilt = restarted.ballots.get(round_id)
+        assert (rebuilt.cast, rebuilt.turnout) == (3, 3)
+
+        client.recorder.reset()
+        with query_budget("live_tally_rebuild"):
+            async with client.get_db_session() as session:
+                assert restarted.live.get(round_id) is None
+                await restarted._show_live_vote(
+                    DatabaseService(session), guild.id, round_id, "points", "counts", rebuilt
+                )
+        await asyncio.sleep(INTERVAL / 4)
+        assert "**3/4** players have voted so far (3 votes)" in ballot.content
+        await _react(restarted, guild, ballot, members[3], emojis[0])
+        await asyncio.sleep(INTERVAL * 1.5)
+        assert "**4/4** players have voted so far (4 votes)" in ballot.content
+        restarted.live.cancel_all()
+        print("✓ Tally rebuilt from stored votes after a restart")
+
+
+def test_rebuild():
+    """Test rebuilding a tally the bot lost when it restarted."""
+    print("\nTesting tally rebuild...")
+    asyncio.run(_run_rebuild_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_tally()
+        test_debounced_edits()
+        test_rebuild()
+        print("\n🎉 All live tally tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
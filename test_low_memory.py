@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test for the low-memory profile and on-demand name lookups
+"""
+
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from musicleague_bot.src.bot import MusicLeagueBot
+
+
+def _make_bot(profile):
+    previous = os.environ.get("MEMORY_PROFILE")
+    os.environ["MEMORY_PROFILE"] = profile
+    try:
+        return MusicLeagueBot()
+    finally:
+        if previous is None:
+            os.environ.pop("MEMORY_PROFILE", None)
+        else:
+            os.environ["MEMORY_PROFILE"] = previous
+
+
+class FakeGuild:
+    """Guild that only knows members through query_members."""
+
+    def __init__(self, members):
+        self.id = 1
+        self.members = members
+        self.queries = []
+
+    def get_member(self, user_id):
+        return None
+
+    async def query_members(self, user_ids, cache):
+        self.queries.append((list(user_ids), cache))
+        return [
+            SimpleNamespace(id=user_id, display_name=self.members[user_id])
+            for user_id in user_ids
+            if user_id in self.members
+        ]
+
+
+def test_memory_profiles():
+    """Test that the low-memory profile trims caches and intents."""
+    print("Testing memory profiles...")
+
+    bot = _make_bot("default")
+    assert bot.intents.members
+    assert bot._connection._chunk_guilds
+    print("✓ Default profile keeps member chunking")
+
+    bot = _make_bot("low")
+    assert bot.low_memory
+    assert not bot._connection._chunk_guilds
+    assert bot._connection.member_cache_flags.value == 0
+    assert bot._connection.max_messages == 200
+    assert not bot.intents.message_content
+    # Still needed to look up individual members by ID
+    assert bot.intents.members
+    print("✓ Low-memory profile disables chunking and member caching")
+
+
+def test_resolve_display_names():
+    """Test that names are requested in one batch and fall back to the API."""
+    print("\nTesting display name lookups...")
+
+    bot = _make_bot("low")
+    bot.get_user = lambda user_id: None
+
+    fetched = []
+
+    async def fetch_user(user_id):
+        fetched.append(user_id)
+        raise Exception("Unknown user")
+
+    bot.fetch_user = fetch_user
+    guild = FakeGuild({11: "Alice", 22: "Bob"})
+
+    names = asyncio.run(bot.resolve_display_names(guild, ["11", "22", "11", "33"]))
+
+    assert names == {"11": "Alice", "22": "Bob", "33": "User 33"}
+    assert guild.queries == [([11, 22, 33], False)]
+    assert fetched == [33]
+    print("✓ Members requested once, without caching them")
+
+
+if __name__ == "__main__":
+    try:
+        test_memory_profiles()
+        test_resolve_display_names()
+        print("\n🎉 All low-memory tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test for the metrics registry, query counting and the metrics endpoint
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from musicleague_bot.src.metrics import MetricsRegistry, Histogram, discord_route, metrics
+
+
+def test_histogram_and_rendering():
+    """Test histogram quantiles and the Prometheus text output."""
+    print("Testing histograms...")
+
+    histogram = Histogram((0.01, 0.1, 1))
+    for value in [0.005] * 90 + [0.5] * 10:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.99) == 1
+    print("✓ Quantiles estimated from buckets")
+
+    registry = MetricsRegistry()
+    registry.observe("handler_seconds", 0.02, handler="check_rounds")
+    registry.increment("discord_requests_total", route="POST channels/{id}/messages")
+    registry.set_gauge("due_rounds", 3)
+    text = registry.render_prometheus()
+    assert 'discord_requests_total{route="POST channels/{id}/messages"} 1' in text
+    assert 'handler_seconds_bucket{handler="check_rounds",le="0.025"} 1' in text
+    assert 'handler_seconds_count{handler="check_rounds"} 1' in text
+    assert "due_rounds 3" in text
+    print("✓ Prometheus text rendered")
+
+
+def test_discord_routes():
+    """Test that REST paths are grouped by route."""
+    print("\nTesting Discord route templates...")
+
+    assert (
+        discord_route("POST", "/api/v10/channels/1157111607663538206/messages")
+        == "POST channels/{id}/messages"
+    )
+    assert (
+        discord_route(
+            "PUT",
+            "/api/v10/channels/1157111607663538206/messages/1157111607663538207"
+            "/reactions/%F0%9F%8E%B5/@me",
+        )
+        == "PUT channels/{id}/messages/{id}/reactions/{emoji}/@me"
+    )
+    assert (
+        discord_route("POST", "/api/v10/interactions/1157111607663538206/aW50ZXJhY3Rpb24/callback")
+        == "POST interactions/{id}/{token}/callback"
+    )
+    assert discord_route("GET", "/") is None
+    print("✓ IDs, emojis and tokens replaced")
+
+
+async def _run_query_count_checks():
+    from musicleague_bot.src.db import init_db, get_session, DatabaseService
+    from musicleague_bot.src.db.models import get_engine
+
+    await init_db()
+    session = await get_session()
+    try:
+        query_count = metrics.start_query_count()
+        await DatabaseService(session).get_or_create_guild("123")
+        # SELECT, then INSERTs for the new guild and its main league
+        assert query_count.statements == 3, query_count.statements
+        print("✓ Statements counted per task")
+
+        key = ("db_operation_seconds", (("operation", "get_or_create_guild"),))
+        assert metrics.histograms[key].count >= 1
+        print("✓ Service operations timed")
+    finally:
+        await session.close()
+        await get_engine().dispose()
+
+    registry = MetricsRegistry()
+    registry.increment("db_queries_total", 5)
+    await registry.start_http_server("127.0.0.1", 0)
+    port = registry._server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        await registry.stop_http_server()
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert "db_queries_total 5" in response
+    print("✓ Metrics served over HTTP")
+
+
+def test_query_counting_and_endpoint():
+    """Test statement counting and the local HTTP endpoint."""
+    print("\nTesting query counting...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_url = os.environ.get("DATABASE_URL")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+        try:
+            asyncio.run(_run_query_count_checks())
+        finally:
+            if previous_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = previous_url
+
+
+if __name__ == "__main__":
+    try:
+        test_histogram_and_rendering()
+        test_discord_routes()
+        test_query_counting_and_endpoint()
+        print("\n🎉 All metrics tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
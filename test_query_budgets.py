@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test that database operations and commands stay within their SQL statement budgets
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.budgets import QueryBudgetExceeded, query_budget
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog
+from musicleague_bot.src.cogs.history import HistoryCog
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+
+
+async def _run_service_budgets():
+    async with temporary_database():
+        client = FakeClient()
+        guild_id = str(client.add_guild().id)
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+
+            # Worst cases first: each guild and player is created on first use
+            with query_budget("get_or_create_guild"):
+                await db.get_or_create_guild(guild_id)
+            with query_budget("get_league"):
+                await db.get_league(str(client.add_guild().id))
+            with query_budget("create_league"):
+                await db.create_league(guild_id, "Side")
+            with query_budget("get_leagues"):
+                assert len(await db.get_leagues(guild_id)) == 2
+            with query_budget("update_guild_settings"):
+                await db.update_guild_settings(guild_id, submission_days=2)
+            with query_budget("get_or_create_player"):
+                await db.get_or_create_player(guild_id, "1")
+            with query_budget("create_round"):
+                round_obj = await db.create_round(guild_id, "Budgets")
+            with query_budget("get_active_round"):
+                await db.get_active_round(guild_id)
+            with query_budget("get_round"):
+                await db.get_round(round_obj.id)
+            with query_budget("create_submission"):
+                await db.create_submission(guild_id, "2", "New player")
+            with query_budget("create_submission"):
+                await db.create_submission(guild_id, "1", "Existing player")
+            with query_budget("create_submission"):
+                await db.create_submission(guild_id, "1", "Resubmission")
+            for user_id in range(3, 30):
+                await db.create_submission(guild_id, str(user_id), "Filler")
+            with query_budget("find_duplicate_submission"):
+                await db.find_duplicate_submission(round_obj.guild_id, "text:filler")
+            with query_budget("set_guild_template"):
+                await db.set_guild_template(guild_id, "status_title", "Round {round_number}")
+            with query_budget("get_guild_templates"):
+                await db.get_guild_templates(guild_id)
+            with query_budget("get_round_submissions"):
+                submissions = await db.get_round_submissions(round_obj.id)
+            with query_budget("count_round_submissions"):
+                assert await db.count_round_submissions(round_obj.id) == len(submissions)
+            with query_budget("get_round_history"):
+                await db.get_round_history(guild_id, None, 10)
+            with query_budget("get_round_by_number"):
+                await db.get_round_by_number(guild_id, round_obj.round_number)
+            with query_budget("get_results_page"):
+                await db.get_results_page(round_obj.id, (0, 1), 10)
+            with query_budget("update_round_message_ids"):
+                await db.update_round_message_ids(round_obj.id, voting_message_id="1")
+            with query_budget("update_round_timing"):
+                await db.update_round_timing(
+                    round_obj.id, voting_end=datetime.datetime.utcnow()
+                )
+            with query_budget("get_due_rounds"):
+                await db.get_due_rounds(datetime.datetime.utcnow())
+            with query_budget("claim_round"):
+                await db.claim_round(round_obj.id, "test", 60)
+            with query_budget("release_round"):
+                await db.release_round(round_obj.id, "test")
+            with query_budget("get_round_guild_info"):
+                await db.get_round_guild_info(round_obj.id)
+            with query_budget("update_guild_settings"):
+                await db.update_guild_settings(guild_id, reminder_hours="24,1")
+            with query_budget("schedule_reminder"):
+                await db.schedule_reminder(round_obj, "24,1", datetime.datetime.utcnow())
+            with query_budget("set_player_reminders"):
+                await db.set_player_reminders(guild_id, "40", False)
+            with query_budget("get_reminder_targets"):
+                await db.get_reminder_targets(round_obj.id, False)
+            with query_budget("get_reminder_targets"):
+                await db.get_reminder_targets(round_obj.id, True)
+            with query_budget("record_vote"):
+                await db.record_vote(round_obj.id, "1", 0)
+            with query_budget("get_voter_ballot"):
+                await db.get_voter_ballot(round_obj.id, "1", 1)
+            with query_budget("set_vote_points"):
+                await db.set_vote_points(round_obj.id, "1", 1, 3)
+            with query_budget("set_vote_points"):
+                await db.set_vote_points(round_obj.id, "1", 1, 4)
+            with query_budget("remove_vote"):
+                await db.remove_vote(round_obj.id, "1", 1)
+            with query_budget("get_ballot_votes"):
+                await db.get_ballot_votes(round_obj.id)
+
+            # Scoring must not query once per submission
+            for idx, submission in enumerate(submissions):
+                submission.votes_received = idx % 4
+            await session.commit()
+            with query_budget("calculate_round_results"):
+                await db.calculate_round_results(round_obj.id)
+
+            with query_budget("get_leaderboard"):
+                await db.get_leaderboard(guild_id, 25)
+            with query_budget("complete_round"):
+                await db.complete_round(round_obj.id)
+
+
+def test_service_query_budgets():
+    """Test every DatabaseService operation against its budget."""
+    print("Testing DatabaseService query budgets...")
+    asyncio.run(_run_service_budgets())
+    print("✓ All operations within budget")
+
+
+async def _run_command_budgets():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=3)
+        user = next(iter(guild.members.values()))
+        rounds_cog = make_rounds_cog(client)
+        settings_cog = SettingsCog(client)
+        history_cog = HistoryCog(client)
+
+        def interaction():
+            return FakeInteraction(client, guild, user)
+
+        with query_budget("/settings"):
+            await settings_cog.settings.callback(settings_cog, interaction(), 3, 3, None)
+        with query_budget("/league create"):
+            await settings_cog.create_league.callback(settings_cog, interaction(), "side")
+        with query_budget("/league list"):
+            await settings_cog.list_leagues.callback(settings_cog, interaction())
+        with query_budget("/start"):
+            await rounds_cog.start_round.callback(rounds_cog, interaction(), "Budgets")
+        with query_budget("/settings"):
+            await settings_cog.settings.callback(
+                settings_cog, interaction(), reminders="24, 1", reminder_delivery="dm"
+            )
+        with query_budget("/reminders"):
+            await settings_cog.reminders.callback(settings_cog, interaction(), False)
+        with query_budget("/submit"):
+            await rounds_cog.submit.callback(rounds_cog, interaction())
+        with query_budget("/status"):
+            await rounds_cog.status.callback(rounds_cog, interaction())
+        with query_budget("/leaderboard"):
+            await settings_cog.leaderboard.callback(settings_cog, interaction(), 10)
+        with query_budget("/end_submission"):
+            await rounds_cog.end_submission.callback(rounds_cog, interaction())
+        with query_budget("/end_voting"):
+            await rounds_cog.end_voting.callback(rounds_cog, interaction())
+        await settings_cog.settings.callback(
+            settings_cog, interaction(), None, None, None, None, "points"
+        )
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            await db.update_round_message_ids(round_obj.id, voting_message_id="1")
+        with query_budget("/vote"):
+            await rounds_cog.vote.callback(rounds_cog, interaction(), 1, 3)
+        with query_budget("/history"):
+            await history_cog.history.callback(history_cog, interaction())
+        with query_budget("/round"):
+            await history_cog.round_results.callback(history_cog, interaction(), 1)
+
+
+def test_command_query_budgets():
+    """Test slash commands against their budgets."""
+    print("\nTesting command query budgets...")
+    asyncio.run(_run_command_budgets())
+    print("✓ All commands within budget")
+
+
+def test_budget_violation_fails():
+    """Test that going over a budget raises."""
+    print("\nTesting budget violations...")
+
+    async def run_extra_queries():
+        async with temporary_database():
+            client = FakeClient()
+            async with client.get_db_session() as session:
+                db = DatabaseService(session)
+                with query_budget("get_leaderboard", {"get_leaderboard": 1}):
+                    await db.get_leaderboard("1")
+                    await db.get_leaderboard("1")
+
+    try:
+        asyncio.run(run_extra_queries())
+    except QueryBudgetExceeded as e:
+        assert "2 SQL statements" in str(e)
+        print("✓ Extra statements detected")
+    else:
+        assert False, "Budget violation was not detected"
+
+
+if __name__ == "__main__":
+    try:
+        test_service_query_budgets()
+        test_command_query_budgets()
+        test_budget_violation_fails()
+        print("\n🎉 All query budget tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Test the theme queue: queueing themes and starting them automatically
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, text
+
+from benchmarks.budgets import query_budget
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import League, Round, get_engine
+from musicleague_bot.src.schedule import next_start_time, parse_start_time
+
+
+def test_start_times():
+    """Test reading start times and when the head of a queue may start."""
+    print("Testing start times...")
+    utc = datetime.timezone.utc
+    now = datetime.datetime(2024, 1, 1, 12, tzinfo=utc)
+    assert parse_start_time("2024-06-01 18:00", now) == datetime.datetime(
+        2024, 6, 1, 18, tzinfo=utc
+    )
+    assert parse_start_time("2024-06-01", now) == datetime.datetime(2024, 6, 1, tzinfo=utc)
+    # Read in the league's timezone, and stored in UTC
+    assert parse_start_time("2024-06-01 18:00", now, "Europe/Berlin") == datetime.datetime(
+        2024, 6, 1, 16, tzinfo=utc
+    )
+    assert parse_start_time("", now) is parse_start_time(None, now) is None
+    for bad in ("next friday", "2023-12-31 18:00"):
+        try:
+            parse_start_time(bad, now)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+    print("✓ Start times parsed, and past or unreadable ones rejected")
+
+    later = now + datetime.timedelta(days=1)
+    assert next_start_time(None, True, now) is None
+    assert next_start_time(SimpleNamespace(start_at=None), True, now) == now
+    assert next_start_time(SimpleNamespace(start_at=None), False, now) is None
+    assert next_start_time(SimpleNamespace(start_at=later), False, now) == later
+    print("✓ Next start follows the head's start time, or the league's auto-start")
+
+
+async def _league(client):
+    async with client.get_db_session() as session:
+        return (await session.execute(League.__table__.select())).first()
+
+
+async def _rounds(client):
+    async with client.get_db_session() as session:
+        result = await session.execute(Round.__table__.select().order_by(Round.id))
+        return result.all()
+
+
+async def _run_queue_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=4)
+        members = list(guild.members.values())
+        await seed_guilds(client, [guild], submissions=3, phase="submission")
+        guild_id = str(guild.id)
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            with query_budget("queue_theme"):
+                first = await db.queue_theme(guild_id, " Covers ", added_by=members[0].id)
+            second = await db.queue_theme(guild_id, "B-sides", added_by=members[1].id)
+            assert (first.place, second.place) == (1, 2)
+            assert (await _league(client)).next_start is None  # Waits for /start
+            with query_budget("get_queue"):
+                _, themes = await db.get_queue(guild_id)
+            assert [queued.theme for queued in themes] == ["Covers", "B-sides"]
+        print("✓ Themes queued in order")
+
+        # Turning auto-start on lets the head start as soon as no round is running
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            with query_budget("update_guild_settings"):
+                await db.update_guild_settings(guild_id, auto_start=True)
+        assert (await _league(client)).next_start is not None
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            try:
+                await db.remove_queued_theme(guild_id, 1, user_id=str(members[1].id))
+            except ValueError as e:
+                assert "only remove themes you queued" in str(e)
+            else:
+                raise AssertionError("Removed someone else's theme")
+            with query_budget("remove_queued_theme"):
+                await db.remove_queued_theme(guild_id, 2, user_id=str(members[1].id))
+            await db.queue_theme(guild_id, "Duets")
+        print("✓ Players may only take their own themes out of the queue")
+
+        # Completing the round starts the next one in the same transaction
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(guild_id)
+            commits = []
+            listener = lambda conn: commits.append(conn)
+            event.listen(get_engine().sync_engine, "commit", listener)
+            try:
+                with query_budget("complete_round_handover"):
+                    completed = await db.complete_round(round_obj.id)
+            finally:
+                event.remove(get_engine().sync_engine, "commit", listener)
+            assert len(commits) == 1
+            assert completed.next_round.theme == "Covers"
+            assert completed.next_round.round_number == 2
+
+        rows = await _rounds(client)
+        assert [row.is_completed for row in rows] == [True, False]
+        league = await _league(client)
+        assert league.active_round == rows[1].id
+        assert league.next_start is not None  # "Duets" follows the next completion
+        print("✓ Next round started along with the completion, in one transaction")
+
+
+def test_queue():
+    """Test queueing themes and handing over to the next round."""
+    print("\nTesting the theme queue...")
+    asyncio.run(_run_queue_checks())
+
+
+async def _run_scheduled_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=4)
+        members = list(guild.members.values())
+        await seed_guilds(client, [guild], submissions=0, phase="complete")
+        rounds_cog = make_rounds_cog(client)
+
+        def interaction(member=members[0]):
+            return FakeInteraction(client, guild, member)
+
+        # Nothing submitted, so the round ends at once; nothing queued yet
+        await rounds_cog.check_rounds()
+        assert len(await _rounds(client)) == 1
+
+        start = (datetime.datetime.utcnow() + datetime.timedelta(days=1)).strftime(
+            "%Y-%m-%d %H:%M"
+        )
+        reply = interaction()
+        with query_budget("/queue_theme"):
+            await rounds_cog.queue_theme.callback(rounds_cog, reply, "Live albums", start)
+        assert "as #1 for **main**" in reply.response.messages[0]
+        assert "won't start before" in reply.response.messages[0]
+
+        reply = interaction()
+        await rounds_cog.queue_theme.callback(rounds_cog, reply, "Later", "yesterday")
+        assert "like 2024-06-01 18:00" in reply.response.messages[0]
+
+        reply = interaction()
+        with query_budget("/queued_themes"):
+            await rounds_cog.queued_themes.callback(rounds_cog, reply)
+        (listing,) = reply.response.messages
+        assert [field.name for field in listing.fields] == ["#1"]
+        assert "Live albums" in listing.fields[0].value
+        print("✓ Theme queued for a set time, and listed")
+
+        # Not due until its start time
+        client.recorder.reset()
+        with query_budget("check_rounds_idle"):
+            await rounds_cog.check_rounds()
+        assert len(await _rounds(client)) == 1
+
+        async with client.get_db_session() as session:
+            await session.execute(
+                text("UPDATE leagues SET next_start = :now"),
+                {"now": datetime.datetime.utcnow() - datetime.timedelta(minutes=1)},
+            )
+            await session.commit()
+        guild.channel.messages.clear()
+        with query_budget("queued_start"):
+            await rounds_cog.check_rounds()
+
+        rows = await _rounds(client)
+        assert len(rows) == 2 and rows[1].theme == "Live albums"
+        assert rows[1].submission_message_id
+        (announcement,) = guild.channel.messages.values()
+        assert announcement.embed.fields[0].value == "Live albums"
+        assert (await _league(client)).next_start is None
+
+        await rounds_cog.check_rounds()
+        assert len(await _rounds(client)) == 2
+        print("✓ Queued round started and announced by the scheduler once its time came")
+
+        # Only managers remove other players' themes
+        await rounds_cog.queue_theme.callback(rounds_cog, interaction(), "Encores")
+        other = members[1]
+        other.guild_permissions.manage_guild = False
+        reply = interaction(other)
+        await rounds_cog.queued_themes.callback(rounds_cog, reply, remove=1)
+        assert "only remove themes you queued" in reply.response.messages[0]
+        reply = interaction()
+        await rounds_cog.queued_themes.callback(rounds_cog, reply, remove=1)
+        assert "Removed **Encores**" in reply.response.messages[0]
+        print("✓ Themes removed by whoever queued them")
+
+        settings_cog = SettingsCog(client)
+        reply = interaction()
+        await settings_cog.settings.callback(settings_cog, reply, auto_start=True)
+        fields = {field.name: field.value for field in reply.response.messages[0].fields}
+        assert fields["Queued Themes"] == "Start when a round ends"
+        print("✓ Auto-start shown in the settings")
+
+
+def test_scheduled_start():
+    """Test the scheduler starting a queued theme at its start time."""
+    print("\nTesting scheduled starts...")
+    asyncio.run(_run_scheduled_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_start_times()
+        test_queue()
+        test_scheduled_start()
+        print("\n🎉 All theme queue tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test how a round's submissions are ranked, and how ties are broken
+"""
+
+import sys
+import os
+import asyncio
+import random
+import sqlite3
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select, text
+
+from benchmarks.fakes import FakeClient
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import seed_guilds
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Player, Round, Submission
+from musicleague_bot.src.metrics import metrics
+
+
+async def _run_tie_breaker_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=9)
+        await seed_guilds(client, [guild], submissions=4, phase="voting", voters=9)
+        members = [str(member.id) for member in guild.members.values()]
+        a, b, c, d, e = members[4:]
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(str(guild.id), scoring="points")
+            round_obj = await db.get_active_round(str(guild.id))
+            # Ballot positions 0-2 all score 4 points:
+            #   0 from one voter, 1 from three voters, 2 from two voters who
+            #   both rate it above 1
+            for voter, idx, points in [
+                (d, 0, 4),
+                (a, 1, 1),
+                (b, 1, 1),
+                (c, 1, 2),
+                (a, 2, 2),
+                (b, 2, 2),
+            ]:
+                assert await db.set_vote_points(round_obj.id, voter, idx, points)
+            assert await db.record_vote(round_obj.id, e, 3)
+
+        async def rank(tie_breaker, **settings):
+            async with client.get_db_session() as session:
+                db = DatabaseService(session)
+                await db.update_guild_settings(
+                    str(guild.id), tie_breaker=tie_breaker, **settings
+                )
+                with metrics.count_queries() as query_count:
+                    results = await db.calculate_round_results(round_obj.id)
+            # Scoring again corrects the totals of players whose score changed
+            assert query_count.statements <= 5
+            return [(result.ballot_index, result.place) for result in results]
+
+        assert await rank("earliest") == [(0, 1), (1, 2), (2, 3), (3, 4)]
+        print("✓ Earliest submission breaks ties")
+        assert await rank("voters") == [(1, 1), (2, 2), (0, 3), (3, 4)]
+        print("✓ Most voters breaks ties")
+        assert await rank("head_to_head") == [(2, 1), (1, 2), (0, 3), (3, 4)]
+        print("✓ Head-to-head preferences break ties")
+        assert await rank("none") == [(0, 1), (1, 1), (2, 1), (3, 4)]
+        print("✓ Unbroken ties share a place, listed in ballot order")
+
+        # Penalties are applied before ranking: nobody who submitted voted
+        assert await rank("none", vote_penalty="forfeit") == [(0, 1), (1, 1), (2, 1), (3, 1)]
+        async with client.get_db_session() as session:
+            result = await session.execute(select(func.sum(Player.total_score)))
+            assert result.scalar() == 0  # Each scoring replaced the one before
+        print("✓ Submissions ranked on their penalised scores")
+
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update().where(Round.id == round_obj.id).values(is_completed=True)
+            )
+            await session.commit()
+
+        async with client.get_read_session() as session:
+            db = DatabaseService(session)
+            page = await db.get_results_page(round_obj.id, None, 10)
+            assert [submission.place for submission, _ in page] == [1, 1, 1, 1]
+            summary = (await db.get_round_history(str(guild.id)))[0]
+            assert summary.winner_id == members[0]
+        print("✓ /round and /history follow the stored places")
+
+
+def test_tie_breakers():
+    """Test each tie-breaker on a round with a three-way tie."""
+    print("Testing tie-breakers...")
+    asyncio.run(_run_tie_breaker_checks())
+
+
+async def _run_large_round_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=200)
+        await seed_guilds(client, [guild], submissions=200, phase="voting", voters=200)
+        members = [str(member.id) for member in guild.members.values()]
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(
+                str(guild.id), scoring="borda", tie_breaker="head_to_head"
+            )
+            round_obj = await db.get_active_round(str(guild.id))
+            # Ranked ballots: points[voter][ballot index]
+            rng = random.Random(3)
+            points = []
+            for voter in members:
+                picks = rng.sample(range(200), rng.randrange(1, 5))
+                points.append(dict(zip(picks, (3, 2, 1, 0))))
+                for idx in picks:
+                    await db.record_vote(round_obj.id, voter, idx)
+            with metrics.count_queries() as query_count:
+                results = await db.calculate_round_results(round_obj.id)
+
+        assert query_count.statements == 4
+        assert len(results) == 200
+
+        # The same ranking worked out pair by pair in plain Python
+        scores = [sum(ballot.get(idx, 0) for ballot in points) for idx in range(200)]
+
+        def beats(first, second):
+            margin = sum(
+                (ballot.get(first, 0) > ballot.get(second, 0))
+                - (ballot.get(second, 0) > ballot.get(first, 0))
+                for ballot in points
+            )
+            return margin > 0
+
+        wins = [
+            sum(
+                beats(idx, rival)
+                for rival in range(200)
+                if rival != idx and scores[rival] == scores[idx]
+            )
+            for idx in range(200)
+        ]
+        keys = [(-scores[idx], -wins[idx]) for idx in range(200)]
+        expected = [
+            (idx, 1 + sum(key < keys[idx] for key in keys))
+            for idx in sorted(range(200), key=lambda idx: (keys[idx], idx))
+        ]
+        assert [(result.ballot_index, result.place) for result in results] == expected
+        assert len(set(scores)) < 20 and len(set(keys)) > len(set(scores))  # Ties broken
+        print(f"✓ {len(results)} submissions ranked head-to-head in 4 statements")
+
+
+def test_large_round():
+    """Test ranking a large round with many ties."""
+    print("\nTesting a large round...")
+    asyncio.run(_run_large_round_checks())
+
+
+async def _run_place_backfill(path):
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import dispose_engines, get_engine
+
+    previous_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        await init_db()
+        async with get_engine().connect() as conn:
+            rows = await conn.execute(text("SELECT place FROM submissions ORDER BY id"))
+            return rows.scalars().all()
+    finally:
+        await dispose_engines()
+        if previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_place_backfill():
+    """Test that rounds completed before places were stored get them on upgrade."""
+    print("\nTesting place backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE rounds (
+                id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL,
+                round_number INTEGER NOT NULL, theme VARCHAR,
+                submission_end DATETIME NOT NULL, voting_end DATETIME NOT NULL,
+                is_completed BOOLEAN
+            );
+            CREATE TABLE submissions (
+                id INTEGER PRIMARY KEY, round_id INTEGER NOT NULL,
+                player_id INTEGER NOT NULL, content VARCHAR NOT NULL,
+                votes_received INTEGER
+            );
+            INSERT INTO rounds VALUES
+                (1, 1, 1, 'Done', '2024-01-01', '2024-01-02', 1),
+                (2, 1, 2, 'Running', '2024-01-03', '2024-01-04', 0);
+            INSERT INTO submissions VALUES
+                (1, 1, 1, 'a', 2), (2, 1, 2, 'b', 5), (3, 1, 3, 'c', 2),
+                (4, 2, 1, 'd', 1);
+            """
+        )
+        conn.close()
+
+        places = asyncio.run(_run_place_backfill(path))
+        assert places == [2, 1, 3, None]
+        print("✓ Completed rounds placed as their results were posted")
+
+
+if __name__ == "__main__":
+    try:
+        test_tie_breakers()
+        test_large_round()
+        test_place_backfill()
+        print("\n🎉 All ranking tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
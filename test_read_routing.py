@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test that read-only queries are routed to the read engine
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Player, get_engine, get_read_engine
+
+
+def test_engine_selection():
+    """Test which engine read-only sessions use."""
+    print("Testing read engine selection...")
+    previous = {name: os.environ.get(name) for name in ("DATABASE_URL", "DATABASE_READ_URL")}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ.pop("DATABASE_READ_URL", None)
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bot.db')}"
+            assert get_read_engine() is not get_engine()
+            assert get_read_engine().url == get_engine().url
+            print("✓ SQLite files get a separate reader pool on the same file")
+
+            os.environ["DATABASE_READ_URL"] = f"sqlite:///{os.path.join(tmp, 'replica.db')}"
+            assert get_read_engine().url.database.endswith("replica.db")
+            print("✓ DATABASE_READ_URL used when set")
+
+        os.environ.pop("DATABASE_READ_URL", None)
+        os.environ["DATABASE_URL"] = "sqlite://"
+        assert get_read_engine() is get_engine()
+        print("✓ In-memory databases read through the main engine")
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def _run_routing_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=3)
+        await seed_guilds(client, [guild], submissions=3, phase="voting")
+        guild_id = str(guild.id)
+
+        async with client.get_db_session() as session, client.get_read_session() as read_session:
+            mode = await session.execute(text("PRAGMA journal_mode"))
+            assert mode.scalar() == "wal"
+
+            try:
+                await read_session.execute(text("DELETE FROM players"))
+            except OperationalError:
+                await read_session.rollback()
+            else:
+                assert False, "Read session accepted a write"
+            print("✓ Writer in WAL mode, reader refuses writes")
+
+            db = DatabaseService(session, read_session)
+
+            # A score is written after the read session loaded the leaderboard
+            before = await db.get_leaderboard(guild_id, 5)
+            assert all(player.total_score == 0 for player in before)
+            player = await session.get(Player, before[0].id)
+            player.total_score = 7
+            await asyncio.wait_for(session.commit(), timeout=1)
+            print("✓ Write committed while a read transaction was open")
+
+            # Until its transaction ends the read session keeps what it loaded;
+            # fresh reads go to the primary and see the write
+            stale = await db.get_leaderboard(guild_id, 1)
+            fresh = await db.get_leaderboard(guild_id, 1, fresh=True)
+            assert stale[0].total_score == 0
+            assert fresh[0].total_score == 7
+            await read_session.rollback()
+            assert (await db.get_leaderboard(guild_id, 1))[0].total_score == 7
+            print("✓ fresh=True reads your own writes")
+
+        # Read-only commands still answer while a vote write is in progress
+        async with client.get_db_session() as session:
+            await session.execute(text("UPDATE players SET total_score = total_score + 1"))
+
+            user = next(iter(guild.members.values()))
+            settings_cog = SettingsCog(client)
+            interaction = FakeInteraction(client, guild, user)
+            await asyncio.wait_for(
+                settings_cog.leaderboard.callback(settings_cog, interaction, 5), timeout=1
+            )
+            embed = interaction.response.messages[0]
+            assert embed.fields[0].value == "7 points"
+
+            cog = make_rounds_cog(client)
+            interaction = FakeInteraction(client, guild, user)
+            await asyncio.wait_for(cog.status.callback(cog, interaction), timeout=1)
+            embed = interaction.response.messages[0]
+            assert "3 submission(s)" in embed.fields[-1].value
+            await session.rollback()
+        print("✓ /leaderboard and /status served during an open write")
+
+
+def test_read_routing():
+    """Test read sessions, snapshots and read-your-writes."""
+    print("\nTesting read routing...")
+    asyncio.run(_run_routing_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_engine_selection()
+        test_read_routing()
+        print("\n🎉 All read routing tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test deadline reminders: when they are due, who gets them and how they are sent
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.budgets import query_budget
+from benchmarks.fakes import FakeClient
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Round
+from musicleague_bot.src.notify import RateLimiter, next_reminder_time, parse_reminder_hours
+
+
+def test_reminder_hours():
+    """Test reading and scheduling reminder offsets."""
+    print("Testing reminder offsets...")
+    assert parse_reminder_hours("24, 1") == [24, 1]
+    assert parse_reminder_hours("1h 24h,24") == [24, 1]
+    assert parse_reminder_hours("off") == parse_reminder_hours("") == []
+    for bad in ("0", "tomorrow", "1,2,3,4,5", "1000"):
+        try:
+            parse_reminder_hours(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+    print("✓ Offsets parsed, and bad ones rejected")
+
+    now = datetime.datetime(2024, 1, 1, 12)
+    round_obj = SimpleNamespace(
+        is_completed=False,
+        voting_message_id=None,
+        submission_end=now + datetime.timedelta(hours=30),
+        voting_end=now + datetime.timedelta(hours=60),
+    )
+    assert next_reminder_time(round_obj, "24,1", now) == now + datetime.timedelta(hours=6)
+    assert next_reminder_time(
+        round_obj, "24,1", now + datetime.timedelta(hours=6)
+    ) == now + datetime.timedelta(hours=29)
+    assert next_reminder_time(round_obj, "24,1", now + datetime.timedelta(hours=29)) is None
+    assert next_reminder_time(round_obj, "", now) is None
+
+    # Once voting starts, reminders count down to the voting deadline
+    round_obj.voting_message_id = "1"
+    assert next_reminder_time(round_obj, "24,1", now) == now + datetime.timedelta(hours=36)
+    round_obj.is_completed = True
+    assert next_reminder_time(round_obj, "24,1", now) is None
+    print("✓ Next reminder follows the deadline of the round's phase")
+
+
+async def _make_reminder_due(client):
+    async with client.get_db_session() as session:
+        await session.execute(
+            Round.__table__.update().values(
+                next_reminder=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                next_deadline=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+            )
+        )
+        await session.commit()
+
+
+async def _get_round(client):
+    async with client.get_db_session() as session:
+        return (await session.execute(Round.__table__.select())).first()
+
+
+async def _run_reminder_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=10)
+        members = list(guild.members.values())
+        # Eight players, four of whom submitted to the round
+        await seed_guilds(client, [guild], submissions=4, phase="submission", voters=8)
+
+        cog = make_rounds_cog(client)
+        cog.reminders.limiter = RateLimiter(rate=1000, burst=1000)
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(str(guild.id), reminder_hours="48, 1")
+            await db.set_player_reminders(str(guild.id), str(members[7].id), False)
+
+        # The 48 hour reminder was already past when the reminders were set
+        round_row = await _get_round(client)
+        assert round_row.next_reminder == round_row.submission_end - datetime.timedelta(hours=1)
+        print("✓ Active round rescheduled when the reminders change")
+
+        client.recorder.reset()
+        await cog.check_rounds()
+        assert not guild.channel.messages  # Not due yet
+
+        await _make_reminder_due(client)
+        with query_budget("round_reminder"):
+            await cog.check_rounds()
+        await asyncio.gather(*cog.reminders._tasks)
+        (reminder,) = guild.channel.messages.values()
+        assert "Submissions for Round #1" in reminder.content
+        mentioned = [member.id for member in members if f"<@{member.id}>" in reminder.content]
+        assert mentioned == [member.id for member in members[4:7]]
+        print("✓ Players who haven't submitted mentioned in one message, except those opted out")
+
+        round_row = await _get_round(client)
+        assert round_row.next_reminder == round_row.submission_end - datetime.timedelta(hours=1)
+        await cog.check_rounds()
+        assert len(guild.channel.messages) == 1
+        print("✓ Each reminder sent once")
+
+        # Voting starts; reminders now go to submitters who haven't voted
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(str(guild.id), reminder_delivery="dm")
+            await session.execute(
+                Round.__table__.update().values(
+                    submission_end=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                    next_deadline=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                )
+            )
+            await session.commit()
+        await cog.check_rounds()
+        round_row = await _get_round(client)
+        assert round_row.voting_message_id
+        assert round_row.next_reminder == round_row.voting_end - datetime.timedelta(hours=1)
+
+        async with client.get_db_session() as session:
+            await DatabaseService(session).record_vote(round_row.id, str(members[0].id), 1)
+        members[2].dms_closed = True
+        guild.channel.messages.clear()
+        client.recorder.reset()
+
+        await _make_reminder_due(client)
+        with query_budget("round_reminder"):
+            await cog.check_rounds()
+        await asyncio.gather(*cog.reminders._tasks)
+
+        assert [len(member.dms) for member in members[:4]] == [0, 1, 0, 1]
+        assert "Voting for Round #1" in members[1].dms[0]
+        assert client.recorder.calls["send_dm"] == 3
+        assert client.recorder.calls["query_members"] == 1
+        (fallback,) = guild.channel.messages.values()
+        assert f"<@{members[2].id}>" in fallback.content
+        print("✓ Submitters who haven't voted sent a DM, or mentioned if their DMs are closed")
+
+        # Completing the round drops its reminders
+        async with client.get_db_session() as session:
+            await session.execute(
+                Round.__table__.update().values(
+                    voting_end=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                    next_deadline=datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+                )
+            )
+            await session.commit()
+        await cog.check_rounds()
+        round_row = await _get_round(client)
+        assert round_row.is_completed and round_row.next_reminder is None
+        print("✓ No reminders after the round completes")
+
+
+def test_reminders():
+    """Test reminders through the deadline scheduler."""
+    print("\nTesting reminders...")
+    asyncio.run(_run_reminder_checks())
+
+
+async def _run_rate_limit_checks():
+    limiter = RateLimiter(rate=100, burst=5)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(*(limiter.acquire() for _ in range(25)))
+    elapsed = loop.time() - started
+    # The first five go straight away, the other 20 at 100 per second
+    assert 0.18 <= elapsed < 0.5, elapsed
+
+
+def test_rate_limiter():
+    """Test that reminders sent together are spaced out to the rate."""
+    print("\nTesting the reminder rate limit...")
+    asyncio.run(_run_rate_limit_checks())
+    print("✓ Bursts spaced out to the rate")
+
+
+if __name__ == "__main__":
+    try:
+        test_reminder_hours()
+        test_reminders()
+        test_rate_limiter()
+        print("\n🎉 All reminder tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
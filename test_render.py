@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test message templates, per-guild overrides and message chunking
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.metrics import metrics
+from musicleague_bot.src.render import (
+    CHUNK_LENGTH,
+    DEFAULT_RENDERER,
+    SAMPLE_VALUES,
+    TEMPLATES,
+    Chunker,
+    Renderer,
+    TemplateError,
+    chunk_messages,
+    compile_template,
+    get_renderer,
+)
+
+
+def test_templates():
+    """Test compiling and rendering templates."""
+    print("Testing templates...")
+
+    for name, spec in TEMPLATES.items():
+        compile_template(name, spec.default).render(SAMPLE_VALUES)
+    print("✓ Every default template renders")
+
+    round_obj = SimpleNamespace(
+        round_number=4, theme="Covers", voting_end=datetime.datetime(2030, 1, 1)
+    )
+    header = DEFAULT_RENDERER.voting_header(round_obj, 3)
+    assert header.startswith("# 🎵 Voting for Round #4 🎵")
+    assert "**3 submissions**" in header and "**Theme**: Covers" in header
+    submission = SimpleNamespace(content="https://example.com/song", description="Why not")
+    metadata = SimpleNamespace(title="Song", artist="Band", duration_seconds=125)
+    assert DEFAULT_RENDERER.voting_entry("🎵", 0, submission, metadata) == (
+        "🎵 **Submission #1**\n**Song** by Band (2:05)\nhttps://example.com/song\n*Why not*\n\n"
+    )
+    assert DEFAULT_RENDERER.result_entry(0, "🎶", 1, submission, 5, "Alice") == (
+        "### 🥇 🎶 #2: Alice - 5 votes\nhttps://example.com/song\n*Why not*\n\n"
+    )
+    print("✓ Defaults match the bot's original messages")
+
+    for bad in ["{player}", "{theme.__class__}", "{score!r}", "{score:>5}", "{unclosed"]:
+        try:
+            compile_template("result_entry", bad)
+        except TemplateError:
+            pass
+        else:
+            assert False, f"{bad} was accepted"
+    try:
+        compile_template("result_entry", "x" * 1001)
+    except TemplateError:
+        pass
+    else:
+        assert False, "Overlong template was accepted"
+    print("✓ Unknown placeholders, attribute access and overlong templates refused")
+
+    # A stored template that no longer compiles falls back to the default
+    renderer = Renderer({"leaderboard_entry": "{rank}. {username}", "leaderboard_header": "Top\n"})
+    leaders = [SimpleNamespace(user_id="1", total_score=9)]
+    assert renderer.leaderboard(leaders, {"1": "Alice"}) == "Top\n#1: Alice - 9 points\n"
+    print("✓ Broken overrides fall back to the default")
+
+
+def test_chunking():
+    """Test splitting rendered entries into messages."""
+    print("\nTesting chunking...")
+
+    entries = [f"Entry {idx}\n" + "x" * 300 + "\n" for idx in range(30)]
+    messages = list(chunk_messages(entries))
+    assert all(len(message) <= CHUNK_LENGTH for message in messages)
+    assert "".join(messages) == "".join(entries)
+    assert len(messages) == 5  # Six ~310-character entries per message
+    print(f"✓ {len(entries)} entries packed into {len(messages)} messages")
+
+    long_entry = "line of text\n" * 400
+    chunker = Chunker(limit=1000)
+    ready = chunker.add("short\n") + chunker.add(long_entry)
+    ready.append(chunker.flush())
+    assert all(len(message) <= 1000 for message in ready)
+    assert all(message.endswith("\n") for message in ready)
+    assert "".join(ready) == "short\n" + long_entry
+    print("✓ Entries longer than a message split at line breaks")
+
+
+async def _run_guild_templates():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=5)
+        await seed_guilds(client, [guild], submissions=5, phase="voting")
+        admin = next(iter(guild.members.values()))
+        settings_cog = SettingsCog(client)
+
+        # Edit through the modal
+        interaction = FakeInteraction(client, guild, admin)
+        await settings_cog.edit_template.callback(settings_cog, interaction, "voting_entry")
+        modal = interaction.response.modal
+        assert modal.body.default == TEMPLATES["voting_entry"].default
+
+        modal.body._value = "{emoji} {content}\n"
+        interaction = FakeInteraction(client, guild, admin)
+        await modal.on_submit(interaction)
+        assert interaction.response.messages[0].startswith("Template saved!")
+
+        modal.body._value = "{emoji} {votes}\n"
+        interaction = FakeInteraction(client, guild, admin)
+        await modal.on_submit(interaction)
+        assert "can't be used" in interaction.response.messages[0]
+        print("✓ Templates edited, invalid ones refused")
+
+        # The ballot uses the guild's copy
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()
+        posted = [message.content for message in guild.channel.messages.values()]
+        assert posted[0].startswith("# 🎵 Voting for Round #1")
+        assert posted[1].startswith("🎵 https://open.spotify.com/track/")
+        assert len(posted) == 2  # Every entry fits in one follow-up message
+        print("✓ Ballot rendered with the custom template")
+
+        # Compiled renderers are cached until the templates change
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            first = await get_renderer(db, guild.id)
+            with metrics.count_queries() as query_count:
+                assert await get_renderer(db, guild.id) is first
+            assert query_count.statements == 0
+
+            interaction = FakeInteraction(client, guild, admin)
+            await settings_cog.reset_template.callback(
+                settings_cog, interaction, "voting_entry"
+            )
+            assert await get_renderer(db, guild.id) is DEFAULT_RENDERER
+        print("✓ Renderers cached and reset")
+
+
+def test_guild_templates():
+    """Test per-guild templates end to end."""
+    print("\nTesting guild templates...")
+    asyncio.run(_run_guild_templates())
+
+
+if __name__ == "__main__":
+    try:
+        test_templates()
+        test_chunking()
+        test_guild_templates()
+        print("\n🎉 All rendering tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test that round results are streamed out while names are still resolving
+"""
+
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+from benchmarks.fakes import FakeClient
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.rounds import RESULTS_FIRST_BATCH
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Player
+from musicleague_bot.src.render import CHUNK_LENGTH, DEFAULT_RENDERER
+
+
+class SlowNamesClient(FakeClient):
+    """Client whose name lookups take a while, recording when each finishes."""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    async def resolve_display_names(self, guild, user_ids):
+        await asyncio.sleep(0.05 if len(user_ids) > RESULTS_FIRST_BATCH else 0.01)
+        self.events.append(("names", len(user_ids)))
+        return await FakeClient.resolve_display_names(self, guild, user_ids)
+
+
+async def _run_stream_checks():
+    async with temporary_database():
+        client = SlowNamesClient()
+        guild = client.add_guild(member_count=40)
+        await seed_guilds(client, [guild], submissions=40, phase="complete")
+        cog = make_rounds_cog(client)
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            results = await db.calculate_round_results(round_obj.id)
+
+        chunks = []
+        async for chunk in cog._stream_results(guild, results, {}, DEFAULT_RENDERER):
+            client.events.append(("chunk", len(chunks)))
+            chunks.append(chunk)
+
+        assert all(len(chunk) <= CHUNK_LENGTH for chunk in chunks)
+        assert sum(chunk.count("### ") for chunk in chunks) == len(results)
+        assert len(chunks) > 1
+        print(f"✓ {len(results)} results split into {len(chunks)} messages")
+
+        # The first message is ready before the slower lookup for the rest finishes
+        assert client.events.index(("chunk", 0)) < client.events.index(
+            ("names", len(results) - RESULTS_FIRST_BATCH)
+        )
+        print("✓ First message yielded while later names were still resolving")
+
+
+def test_stream_results():
+    """Test the results generator."""
+    print("Testing streamed results...")
+    asyncio.run(_run_stream_checks())
+
+
+async def _run_completion_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=30)
+        await seed_guilds(client, [guild], submissions=30, phase="complete")
+        cog = make_rounds_cog(client)
+
+        await cog.check_rounds()  # Post the ballot
+        ballot_messages = len(guild.channel.messages)
+        await cog.check_rounds()
+
+        posted = list(guild.channel.messages.values())[ballot_messages:]
+        messages = [message.content for message in posted]
+        assert messages[0].startswith("# 🏆 Results for Round #1")
+        assert messages[-1].startswith("## 📊 Current Leaderboard")
+        assert all("#" in message for message in messages[1:-1])
+        print("✓ Header first, detailed results, then the leaderboard")
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_round(1)
+            assert round_obj.is_completed
+            assert round_obj.results_message_id == str(posted[0].id)
+        print("✓ Round completed with the header as its results message")
+
+
+def test_complete_round_messages():
+    """Test the messages posted when a round completes."""
+    print("\nTesting round completion messages...")
+    asyncio.run(_run_completion_checks())
+
+
+async def _total_scores(client):
+    async with client.get_db_session() as session:
+        result = await session.execute(select(Player.user_id, Player.total_score))
+        return dict(result.all())
+
+
+async def _run_unposted_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        await seed_guilds(client, [guild], submissions=4, phase="complete")
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        members = [str(member.id) for member in guild.members.values()]
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(str(guild.id), scoring="points")
+            for voter, idx, points in [(members[4], 0, 3), (members[5], 1, 2)]:
+                assert await db.set_vote_points(1, voter, idx, points)
+
+        # Nowhere the bot may post
+        guild.channel.permissions_for = lambda member: SimpleNamespace(send_messages=False)
+        for _ in range(2):
+            async with client.get_db_session() as session:
+                db = DatabaseService(session)
+                await cog.complete_round(db, await db.get_round(1))
+            totals = await _total_scores(client)
+            assert sorted(totals.values(), reverse=True)[:2] == [3, 2]
+        async with client.get_db_session() as session:
+            assert (await DatabaseService(session).get_round(1)).is_completed
+        print("✓ Round with nowhere to post completed, scored once")
+
+
+async def _run_failed_post_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        await seed_guilds(client, [guild], submissions=4, phase="complete")
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+
+        async def broken_send(*args, **kwargs):
+            raise RuntimeError("Discord unavailable")
+
+        guild.channel.send = broken_send
+        try:
+            await cog.check_rounds()
+        except RuntimeError:
+            pass
+        async with client.get_db_session() as session:
+            round_obj = await DatabaseService(session).get_round(1)
+            assert round_obj.is_completed and round_obj.results_message_id is None
+        print("✓ Round completed even though its results couldn't be posted")
+
+
+def test_unposted_results():
+    """Test completing rounds whose results can't be posted."""
+    print("\nTesting unposted results...")
+    asyncio.run(_run_unposted_checks())
+    asyncio.run(_run_failed_post_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_stream_results()
+        test_complete_round_messages()
+        test_unposted_results()
+        print("\n🎉 All results streaming tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
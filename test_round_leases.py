@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test for shard ownership and round transition leases
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from musicleague_bot.src.bot import MusicLeagueBot, parse_shard_ids
+
+
+def test_shard_ownership():
+    """Test that guilds are split between processes by shard."""
+    print("Testing shard ownership...")
+
+    assert parse_shard_ids("0,2,4-6") == [0, 2, 4, 5, 6]
+    assert parse_shard_ids(" 3 , 1 ") == [1, 3]
+    print("✓ Shard lists parsed")
+
+    # Shard of a guild is (guild_id >> 22) % shard_count
+    guild_on_shard_1 = str((1 << 22) * 5)  # 5 % 4 == 1
+    single_process = SimpleNamespace(shard_ids=None, shard_count=4)
+    first_half = SimpleNamespace(shard_ids=[0, 1], shard_count=4)
+    second_half = SimpleNamespace(shard_ids=[2, 3], shard_count=4)
+
+    assert MusicLeagueBot.owns_guild(single_process, guild_on_shard_1)
+    assert MusicLeagueBot.owns_guild(first_half, guild_on_shard_1)
+    assert not MusicLeagueBot.owns_guild(second_half, guild_on_shard_1)
+    print("✓ Each guild is owned by exactly one process")
+
+
+async def _run_lease_checks():
+    from musicleague_bot.src.db import init_db, get_session, DatabaseService
+    from musicleague_bot.src.db.models import get_engine
+
+    await init_db()
+    session = await get_session()
+    db = DatabaseService(session)
+
+    try:
+        round_obj = await db.create_round("123456789", "Leases")
+        now = datetime.utcnow()
+
+        # Nothing is due until the submission deadline passes
+        assert await db.get_due_rounds(now) == []
+        await db.update_round_timing(
+            round_obj.id, submission_end=now - timedelta(minutes=1)
+        )
+        due = await db.get_due_rounds(now)
+        assert [(r.id, guild_id) for r, guild_id, _ in due] == [(round_obj.id, "123456789")]
+        print("✓ Due rounds found with their guild")
+
+        assert await db.claim_round(round_obj.id, "process-a", 60)
+        assert not await db.claim_round(round_obj.id, "process-b", 60)
+        print("✓ Only one process can claim a round")
+
+        await db.release_round(round_obj.id, "process-a")
+        assert await db.claim_round(round_obj.id, "process-b", 60)
+        print("✓ Released rounds can be claimed again")
+
+        # Leases left behind by a crashed process expire
+        assert await db.claim_round(round_obj.id, "process-b", -1)
+        assert await db.claim_round(round_obj.id, "process-a", 60)
+        print("✓ Expired leases can be taken over")
+    finally:
+        await session.close()
+        await get_engine().dispose()
+
+
+def test_round_leases():
+    """Test claiming and releasing round transition leases."""
+    print("\nTesting round leases...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_url = os.environ.get("DATABASE_URL")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+        try:
+            asyncio.run(_run_lease_checks())
+        finally:
+            if previous_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = previous_url
+
+
+if __name__ == "__main__":
+    try:
+        test_shard_ownership()
+        test_round_leases()
+        print("\n🎉 All round lease tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Test the scoring systems guilds can choose between, and /vote
+"""
+
+import sys
+import os
+import asyncio
+import random
+import sqlite3
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, literal, select, text
+
+from benchmarks.fakes import FakeClient, FakeInteraction, reaction_payload
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.settings import SettingsCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Submission, Vote
+from musicleague_bot.src.metrics import metrics
+from musicleague_bot.src.scoring import BALLOT_POINTS, SCORING_SYSTEMS, non_voter_score
+
+
+def reference_scores(system, ballots, reactions):
+    """Score a round in plain Python: ``ballots`` is voter -> [(submission, points)] in voting order."""
+    if system == "approval":
+        return dict(reactions)
+    scores = {}
+    for votes in ballots.values():
+        for rank, (submission, points) in enumerate(votes):
+            if system == "borda":
+                worth = (3, 2, 1)[rank] if rank < 3 else 0
+            else:
+                worth = 1 if points is None else points
+            scores[submission] = scores.get(submission, 0) + worth
+    return scores
+
+
+async def _score(client, guild, **settings):
+    async with client.get_db_session() as session:
+        db = DatabaseService(session)
+        await db.update_guild_settings(str(guild.id), **settings)
+        round_obj = await db.get_active_round(str(guild.id))
+        results = await db.calculate_round_results(round_obj.id)
+    return {result.player.user_id: result.score for result in results}
+
+
+async def _run_system_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=5)
+        await seed_guilds(client, [guild], submissions=4, phase="voting", voters=5)
+        m0, m1, m2, m3, m4 = (str(member.id) for member in guild.members.values())
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            # Reactions, in the order they were added (ballot positions 0-3 are m0-m3's songs)
+            for voter, picks in [(m0, [1, 2, 3]), (m1, [0, 2]), (m2, [0]), (m4, [2, 0])]:
+                for idx in picks:
+                    assert await db.record_vote(round_obj.id, voter, idx)
+            submissions = await db.get_round_submissions(round_obj.id)
+            for submission, votes in zip(submissions, [3, 1, 3, 1]):
+                submission.votes_received = votes
+            await session.commit()
+
+        assert await _score(client, guild) == {m0: 3, m1: 1, m2: 3, m3: 1}
+        print("✓ Approval voting counts reactions")
+        assert await _score(client, guild, scoring="borda") == {m0: 8, m1: 3, m2: 7, m3: 1}
+        print("✓ Borda ranks picks in the order they were made")
+        assert await _score(
+            client, guild, scoring="approval", vote_penalty="points", non_voter_penalty=2
+        ) == {
+            m0: 3,
+            m1: 1,
+            m2: 3,
+            m3: -1,
+        }
+        print("✓ Submitters who didn't vote lose points")
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            assert await db.set_vote_points(round_obj.id, m4, 3, 5)  # A new vote
+            assert await db.set_vote_points(round_obj.id, m2, 0, 4)  # Replaces a reaction
+            assert not await db.set_vote_points(round_obj.id, m2, 9, 4)  # No such submission
+            assert sorted(await db.get_voter_ballot(round_obj.id, m4, 3), key=str) == [None, None]
+        assert await _score(client, guild, scoring="points", non_voter_penalty=0) == {
+            m0: 6,
+            m1: 1,
+            m2: 3,
+            m3: 6,
+        }
+        print("✓ Point ballots add up the points given")
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            assert await db.set_vote_points(round_obj.id, m3, 0, -1)
+        assert await _score(client, guild, scoring="downvotes", non_voter_penalty=2) == {
+            m0: 5,
+            m1: 1,
+            m2: 3,
+            m3: 6,  # Voted (a downvote), so no penalty
+        }
+        print("✓ Downvotes take points off")
+
+        async with client.get_db_session() as session:
+            stored = (
+                await session.execute(select(Submission.score).order_by(Submission.id))
+            ).scalars().all()
+        assert stored == [5, 1, 3, 6]
+        print("✓ Scores stored with the submissions")
+
+
+def test_scoring_systems():
+    """Test each scoring system on a small round."""
+    print("Testing scoring systems...")
+    asyncio.run(_run_system_checks())
+
+
+async def _run_random_checks():
+    async with temporary_database():
+        client = FakeClient()
+        rng = random.Random(7)
+        guild = client.add_guild(member_count=30)
+        await seed_guilds(client, [guild], submissions=30, phase="voting", voters=30)
+
+        ballots, reactions = {}, {}
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            submissions = await db.get_round_submissions(round_obj.id)
+            owners = {idx: submission.player_id for idx, submission in enumerate(submissions)}
+            for member in guild.members.values():
+                votes = ballots[member.id] = []
+                for idx in rng.sample(range(30), rng.randrange(0, 6)):
+                    points = rng.choice([None, None, -1, 4])
+                    if points is None:
+                        await db.record_vote(round_obj.id, member.id, idx)
+                        reactions[owners[idx]] = reactions.get(owners[idx], 0) + 1
+                    else:
+                        await db.set_vote_points(round_obj.id, member.id, idx, points)
+                    votes.append((owners[idx], points))
+            for idx, submission in enumerate(submissions):
+                submission.votes_received = reactions.get(owners[idx], 0)
+            await session.commit()
+
+        for name in SCORING_SYSTEMS:
+            async with client.get_db_session() as session:
+                db = DatabaseService(session)
+                await db.update_guild_settings(str(guild.id), scoring=name)
+                # Each system scores the round as if for the first time
+                await session.execute(
+                    Submission.__table__.update().values(score=None, place=None)
+                )
+                await session.commit()
+                with metrics.count_queries() as query_count:
+                    results = await db.calculate_round_results(round_obj.id)
+            scores = {result.submission.player_id: result.score for result in results}
+            expected = reference_scores(name, ballots, reactions)
+            assert scores == {owner: expected.get(owner, 0) for owner in owners.values()}, name
+            assert [result.score for result in results] == sorted(scores.values(), reverse=True)
+            assert query_count.statements <= 4
+        print(f"✓ {len(SCORING_SYSTEMS)} systems match a plain Python count, in 4 statements each")
+
+
+def test_random_rounds():
+    """Test the SQL scoring against a reference implementation."""
+    print("\nTesting scoring against a reference...")
+    asyncio.run(_run_random_checks())
+
+
+async def _run_command_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        await seed_guilds(client, [guild], submissions=6, phase="voting", voters=6)
+        members = list(guild.members.values())
+        cog = make_rounds_cog(client)
+        settings_cog = SettingsCog(client)
+
+        async def vote(member, number, points):
+            interaction = FakeInteraction(client, guild, member)
+            await cog.vote.callback(cog, interaction, number, points)
+            return interaction.response.messages[0]
+
+        async def settings(**values):
+            interaction = FakeInteraction(client, guild, members[0])
+            await settings_cog.settings.callback(
+                settings_cog,
+                interaction,
+                values.get("submission_days"),
+                values.get("voting_days"),
+                None,
+                None,
+                values.get("scoring"),
+                values.get("vote_penalty"),
+                values.get("non_voter_penalty"),
+            )
+            return interaction.response.messages[0]
+
+        assert "reacting to the ballot" in await vote(members[0], 1, 3)
+        embed = await settings(scoring="points", non_voter_penalty=1)
+        fields = {field.name: field.value for field in embed.fields}
+        assert fields["Scoring"] == SCORING_SYSTEMS["points"].description
+        assert fields["Penalty for Not Voting"] == "Lose 1 points"
+        assert "can't be negative" in await settings(non_voter_penalty=-1)
+        print("✓ Scoring system and penalty chosen in /settings")
+
+        assert "no round being voted on" in await vote(members[0], 1, 3)
+        await cog.check_rounds()  # Post the ballot
+        ballot = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+        assert f"**{BALLOT_POINTS} points**" in ballot.content
+        print("✓ The ballot explains how votes are counted")
+
+        assert "1 to 10 points" in await vote(members[0], 2, BALLOT_POINTS + 1)
+        assert "no Submission #99" in await vote(members[0], 99, 2)
+        assert "Gave Submission #2 8 point(s)" in await vote(members[0], 2, 8)
+        assert "only have 2 of your 10 points left" in await vote(members[0], 3, 3)
+        assert "Gave Submission #2 9 point(s)" in await vote(members[0], 2, 9)
+
+        # A reaction is one more point, so it only fits while points are left
+        emojis = [reaction.emoji for reaction in ballot.reactions]
+        for emoji in emojis[2:4]:
+            ballot.react(emoji, members[0].id)
+            await cog.on_raw_reaction_add(reaction_payload(guild, ballot, members[0], emoji))
+        assert members[0].id in ballot._reaction(emojis[2]).user_ids
+        assert members[0].id not in ballot._reaction(emojis[3]).user_ids
+        assert "Took back your vote" in await vote(members[0], 2, 0)
+        async with client.get_db_session() as session:
+            points = (
+                await session.execute(select(Vote.points).where(Vote.voter_id == str(members[0].id)))
+            ).scalars().all()
+        assert points == [None]
+        print("✓ /vote hands out points within the ballot's budget")
+
+        await settings(scoring="downvotes")
+        round_id, ballot_state = next(iter(cog.ballots._ballots.items()))
+        cast = ballot_state.cast
+        assert "-1 points" in await vote(members[1], 1, 2)
+        assert "Gave Submission #1 -1 point(s)" in await vote(members[1], 1, -1)
+        assert "only give 1 downvote" in await vote(members[1], 3, -1)
+        print("✓ Downvotes limited per voter")
+
+        # Downvotes are kept off the ballot's vote counts and vote limit
+        assert ballot_state.cast == cast and ballot_state.count(members[1].id) == 0
+        assert "already voted for Submission #3" in await vote(members[0], 3, -1)
+        assert "Took back your vote" in await vote(members[1], 1, 0)
+        assert "Gave Submission #3 -1 point(s)" in await vote(members[1], 3, -1)
+        async with client.get_db_session() as session:
+            _, votes = await DatabaseService(session).get_ballot_votes(round_id)
+        assert (str(members[1].id), 2) not in votes and len(votes) == cast
+        print("✓ Downvotes don't count as votes, nor replace one")
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.get_active_round(str(guild.id))
+            await db.update_round_timing(round_obj.id, voting_end=round_obj.submission_end)
+        posted = len(guild.channel.messages)
+        await cog.check_rounds()
+        results = "".join(
+            message.content for message in list(guild.channel.messages.values())[posted:]
+        )
+        assert " points\n" in results and " votes\n" not in results
+        print("✓ Results shown in points")
+
+
+def test_vote_command():
+    """Test /vote and the scoring settings."""
+    print("\nTesting /vote...")
+    asyncio.run(_run_command_checks())
+
+
+def test_penalties():
+    """Test what submitters who didn't vote keep."""
+    print("\nTesting penalties for not voting...")
+    with create_engine("sqlite://").connect() as connection:
+
+        def penalised(score, penalty, penalty_points=0):
+            expression = non_voter_score(literal(score), penalty, penalty_points)
+            return connection.execute(select(expression)).scalar()
+
+        assert penalised(5, "none") == 5
+        assert penalised(5, "points", 2) == 3
+        assert penalised(5, "half") == 2
+        assert penalised(5, "forfeit") == 0
+        assert penalised(-1, "half") == penalised(-1, "forfeit") == -1
+    print("✓ Points, half and forfeit penalties")
+
+
+async def _run_non_voter_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=40)
+        await seed_guilds(client, [guild], submissions=40, phase="voting", voters=40)
+        members = list(guild.members.values())
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        ballot = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+        emojis = [reaction.emoji for reaction in ballot.reactions]
+
+        # Everyone but the last three votes for the submission before their own
+        for idx, member in enumerate(members[:-3]):
+            emoji = emojis[idx - 1]
+            ballot.react(emoji, member.id)
+            await cog.on_raw_reaction_add(reaction_payload(guild, ballot, member, emoji))
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_guild_settings(str(guild.id), vote_penalty="forfeit")
+            round_obj = await db.get_active_round(str(guild.id))
+            for submission in await db.get_round_submissions(round_obj.id):
+                submission.votes_received = 2
+            await session.commit()
+            with metrics.count_queries() as query_count:
+                results = await db.calculate_round_results(round_obj.id)
+
+        assert query_count.statements == 4
+        non_voters = {result.player.user_id for result in results if not result.voted}
+        assert non_voters == {str(member.id) for member in members[-3:]}
+        assert all(result.score == (2 if result.voted else 0) for result in results)
+        print("✓ Non-voters found by one set difference and their points forfeited")
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            await db.update_round_timing(round_obj.id, voting_end=round_obj.submission_end)
+        posted = len(guild.channel.messages)
+        await cog.check_rounds()
+        messages = [message.content for message in list(guild.channel.messages.values())[posted:]]
+        listing = next(message for message in messages if "Didn't vote" in message)
+        assert "### " in listing  # Sent along with the last results, not on its own
+        line = listing[listing.index("Didn't vote") :].splitlines()[0]
+        assert "(Forfeit their points)" in line
+        assert all(member.display_name in line for member in members[-3:])
+        assert members[0].display_name not in line
+        print("✓ Non-voters listed with the results")
+
+
+def test_non_voters():
+    """Test non-voters found and penalised when a round completes."""
+    print("\nTesting non-voters...")
+    asyncio.run(_run_non_voter_checks())
+
+
+async def _run_penalty_backfill(path):
+    from musicleague_bot.src.db import init_db
+    from musicleague_bot.src.db.models import dispose_engines, get_engine
+
+    previous_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        await init_db()
+        async with get_engine().connect() as conn:
+            rows = await conn.execute(
+                text(
+                    "SELECT name, vote_penalty, non_voter_penalty FROM leagues ORDER BY guild_id"
+                )
+            )
+            return rows.all()
+    finally:
+        await dispose_engines()
+        if previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous_url
+
+
+def test_penalty_backfill():
+    """Test that guilds taking points off non-voters keep doing so on upgrade."""
+    print("\nTesting penalty backfill...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE guilds (
+                id INTEGER PRIMARY KEY, guild_id VARCHAR NOT NULL UNIQUE,
+                submission_days INTEGER, voting_days INTEGER, active_round INTEGER,
+                channel_id VARCHAR, duplicate_policy VARCHAR DEFAULT 'warn' NOT NULL,
+                scoring VARCHAR DEFAULT 'approval' NOT NULL,
+                non_voter_penalty INTEGER DEFAULT '0' NOT NULL
+            );
+            INSERT INTO guilds (guild_id, non_voter_penalty) VALUES ('1', 2), ('2', 0);
+            """
+        )
+        conn.close()
+
+        rows = asyncio.run(_run_penalty_backfill(path))
+        assert [tuple(row) for row in rows] == [("main", "points", 2), ("main", "none", 0)]
+        print("✓ Existing point penalties kept in each guild's default league")
+
+
+if __name__ == "__main__":
+    try:
+        test_scoring_systems()
+        test_random_rounds()
+        test_vote_command()
+        test_penalties()
+        test_non_voters()
+        test_penalty_backfill()
+        print("\n🎉 All scoring tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test for the startup pipeline running database setup in the background
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from musicleague_bot.src.bot import MusicLeagueBot
+
+
+async def _run_startup_checks():
+    from sqlalchemy import text
+    from musicleague_bot.src.db.models import get_engine
+
+    bot = MusicLeagueBot()
+    bot.load_extension_calls = []
+
+    async def load_extension(name):
+        # The database must not be ready yet while cogs are loading
+        assert not bot.db_ready_task.done()
+        bot.load_extension_calls.append(name)
+
+    bot.load_extension = load_extension
+
+    await bot.setup_hook()
+    assert bot.load_extension_calls == [
+        "musicleague_bot.src.cogs.settings",
+        "musicleague_bot.src.cogs.rounds",
+        "musicleague_bot.src.cogs.history",
+        "musicleague_bot.src.cogs.admin",
+    ]
+    assert "cogs" in bot.startup_timings
+    print("✓ Cogs load without waiting for the database")
+
+    # Sessions wait until the tables exist
+    async with bot.get_db_session() as session:
+        result = await session.execute(text("SELECT COUNT(*) FROM guilds"))
+        assert result.scalar() == 0
+    assert bot.db_ready_task.done()
+    assert "database" in bot.startup_timings
+    print("✓ Database sessions wait for setup to finish")
+
+    await get_engine().dispose()
+
+
+def test_startup_pipeline():
+    """Test that database setup runs concurrently with the rest of startup."""
+    print("Testing startup pipeline...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_url = os.environ.get("DATABASE_URL")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'test.db')}"
+        try:
+            asyncio.run(_run_startup_checks())
+        finally:
+            if previous_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = previous_url
+
+
+if __name__ == "__main__":
+    try:
+        test_startup_pipeline()
+        print("\n🎉 All startup tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
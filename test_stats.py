@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test recorded votes and the player statistics built from them
+"""
+
+import sys
+import os
+import asyncio
+import datetime
+import time
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from benchmarks.fakes import FakeClient, FakeInteraction, reaction_payload
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds, seed_history
+from musicleague_bot.src.cogs.history import HistoryCog
+from musicleague_bot.src.db import DatabaseService
+from musicleague_bot.src.db.models import Vote
+from musicleague_bot.src.metrics import metrics
+from musicleague_bot.src.stats import compute_guild_stats, get_guild_stats
+
+PAST = datetime.datetime(2024, 1, 1)
+
+
+def test_compute_stats():
+    """Test the statistics worked out from an export."""
+    print("Testing statistics...")
+
+    export = [
+        # Places as posted, ties going to the earliest submission
+        (1, "a", 5, 10, 1), (1, "b", 5, 10, 2), (1, "c", 1, 2, 3), (1, "d", 0, 0, 4),
+        (2, None, None, None, None),  # Nobody submitted
+        (3, "a", 0, None, None), (3, "b", 2, None, None),  # Completed before places were stored
+        (4, "a", 3, 12, 1), (4, "c", 4, 8, 2),  # More points from fewer votes
+    ]
+    affinity = [("b", "a", 4), ("c", "a", 2), ("a", "b", 3), ("e", "a", 1)]
+    stats = compute_guild_stats(export, affinity)
+
+    assert stats.round_count == 4
+    a, b, c, d = (stats.players[user_id] for user_id in "abcd")
+    assert (a.rounds_played, a.total_votes, a.wins, a.podiums) == (3, 8, 2, 2)
+    assert (b.wins, b.podiums) == (1, 2)  # Second on the tie-break in round 1
+    assert (c.wins, c.podiums) == (0, 2)
+    assert (d.wins, d.podiums) == (0, 0)  # No votes, no podium
+    assert abs(a.average_votes - 8 / 3) < 1e-9 and abs(b.win_rate - 0.5) < 1e-9
+
+    # Points given with /vote score rounds without any reaction votes
+    points = compute_guild_stats([(1, "a", 0, 7, 1), (1, "b", 0, 3, 2), (1, "c", 0, 0, 3)], [])
+    assert (points.players["a"].wins, points.players["a"].podiums) == (1, 1)
+    assert (points.players["b"].wins, points.players["b"].podiums) == (0, 1)
+    assert points.players["c"].podiums == 0  # No points, no podium
+
+    tied = compute_guild_stats([(1, "a", 2, None, None), (1, "b", 2, None, None)], [])
+    assert tied.players["a"].wins == tied.players["b"].wins == 1
+    print("✓ Wins and podiums counted from the posted places and scores")
+
+    assert (a.current_streak, a.longest_streak) == (2, 2)
+    assert (b.current_streak, b.longest_streak) == (0, 1)
+    assert (c.current_streak, c.longest_streak) == (1, 1)
+    print("✓ Streaks broken by rounds a player missed")
+
+    assert a.votes_from == (("b", 4), ("c", 2), ("e", 1))
+    assert a.votes_given == (("b", 3),)
+    assert stats.players["e"].rounds_played == 0  # Voted without submitting
+    print("✓ Who votes for whom")
+
+
+async def _run_vote_recording():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=6)
+        await seed_guilds(client, [guild], submissions=6, phase="complete")
+        cog = make_rounds_cog(client)
+        await cog.check_rounds()  # Post the ballot
+        ballot = next(
+            message for message in guild.channel.messages.values() if message.reactions
+        )
+        emojis = [reaction.emoji for reaction in ballot.reactions]
+        members = list(guild.members.values())
+
+        async def react(member, emoji, add=True):
+            payload = reaction_payload(guild, ballot, member, emoji)
+            if add:
+                ballot.react(emoji, member.id)
+                await cog.on_raw_reaction_add(payload)
+            else:
+                ballot.unreact(emoji, member.id)
+                await cog.on_raw_reaction_remove(payload)
+
+        # Everyone votes for the first submission; the first voter changes their mind
+        for member in members[1:]:
+            await react(member, emojis[0])
+        await react(members[1], emojis[2])
+        await react(members[1], emojis[0], add=False)
+        # A fourth vote is taken back off the ballot and not recorded
+        for emoji in emojis[3:6]:
+            await react(members[2], emoji)
+
+        async with client.get_db_session() as session:
+            votes = (await session.execute(select(func.count(Vote.id)))).scalar()
+        assert votes == 5 + 1 - 1 + 2
+        assert members[2].id not in ballot._reaction(emojis[5]).user_ids
+        print("✓ Votes recorded from reactions and removed with them")
+
+        await cog.check_rounds()  # Complete the round
+        stats_cog = HistoryCog(client)
+        interaction = FakeInteraction(client, guild, members[0])
+        with metrics.count_queries() as query_count:
+            await stats_cog.stats.callback(stats_cog, interaction, None)
+        assert interaction.response.deferred
+        embed = interaction.followup.messages[0]
+        fields = {field.name: field.value for field in embed.fields}
+        assert fields["Wins"] == "1 (100%)"
+        assert fields["Rounds Played"] == "1 of 1"
+        assert fields["Most Votes From"].count("- 1 votes") == 3
+        assert query_count.statements == 2
+        print("✓ /stats shows a round's winner and their voters")
+
+        interaction = FakeInteraction(client, guild, members[0])
+        with metrics.count_queries() as query_count:
+            await stats_cog.stats.callback(stats_cog, interaction, members[1])
+        assert query_count.statements == 0
+        print("✓ Later /stats calls served from the cache")
+
+        # Completing another round refreshes the cached statistics
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            round_obj = await db.create_round(str(guild.id), "Second")
+            await db.create_submission(str(guild.id), str(members[3].id), "Song")
+            round_obj.submission_end = round_obj.voting_end = PAST
+            await session.commit()
+        await cog.check_rounds()
+        await cog.check_rounds()
+        interaction = FakeInteraction(client, guild, members[3])
+        await stats_cog.stats.callback(stats_cog, interaction, None)
+        fields = {field.name: field.value for field in interaction.followup.messages[0].fields}
+        assert fields["Rounds Played"] == "2 of 2"
+        print("✓ Statistics refreshed when a round completes")
+
+
+def test_vote_recording():
+    """Test votes recorded from ballot reactions and /stats."""
+    print("\nTesting recorded votes...")
+    asyncio.run(_run_vote_recording())
+
+
+async def _run_long_history():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=30)
+        assert await seed_history(client, guild, rounds=200) == 18000
+
+        async with client.get_read_session() as session:
+            db = DatabaseService(session)
+            started = time.perf_counter()
+            with metrics.count_queries() as query_count:
+                stats = await get_guild_stats(db, guild.id)
+            elapsed = time.perf_counter() - started
+            assert query_count.statements == 2
+            assert sum(player.rounds_played for player in stats.players.values()) == 6000
+            assert sum(player.total_votes for player in stats.players.values()) == 18000
+            print(f"✓ 18,000 votes over 200 rounds summarised in 2 statements ({elapsed * 1000:.0f}ms)")
+
+
+def test_long_history():
+    """Test statistics over a long history."""
+    print("\nTesting a long history...")
+    asyncio.run(_run_long_history())
+
+
+if __name__ == "__main__":
+    try:
+        test_compute_stats()
+        test_vote_recording()
+        test_long_history()
+        print("\n🎉 All statistics tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)
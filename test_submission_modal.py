@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test that the submission modal acknowledges first and saves in its own session
+"""
+
+import sys
+import os
+import asyncio
+import logging
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.budgets import query_budget
+from benchmarks.fakes import FakeClient, FakeInteraction
+from benchmarks.harness import temporary_database
+from benchmarks.scenarios import make_rounds_cog, seed_guilds
+from musicleague_bot.src.cogs.rounds import SubmissionModal
+from musicleague_bot.src.db import DatabaseService
+
+
+def fill_modal(modal, content, description=None):
+    """Set the values Discord would send back with a submitted modal."""
+    modal.submission._value = content
+    modal.description._value = description
+
+
+async def _run_modal_checks():
+    async with temporary_database():
+        client = FakeClient()
+        guild = client.add_guild(member_count=50)
+        await seed_guilds(client, [guild], phase="submission")
+        cog = make_rounds_cog(client)
+        members = list(guild.members.values())
+
+        # /submit only shows the modal; the session it used is closed by now
+        interaction = FakeInteraction(client, guild, members[0])
+        await cog.submit.callback(cog, interaction)
+        modal = interaction.response.modal
+        assert isinstance(modal, SubmissionModal)
+        assert modal.bot is client
+        print("✓ Modal shown without holding a database session")
+
+        fill_modal(modal, "https://example.com/first", "Opener")
+        interaction = FakeInteraction(client, guild, members[0])
+        with query_budget("submission_modal"):
+            await modal.on_submit(interaction)
+        assert interaction.response.deferred
+        assert interaction.response.messages == []
+        assert "recorded" in interaction.followup.messages[0]
+        print("✓ Interaction deferred, then confirmed with a followup")
+
+        # A burst of submissions at the deadline, each in its own session
+        modals = []
+        for member in members[1:]:
+            modal = SubmissionModal(client, str(guild.id))
+            fill_modal(modal, f"https://example.com/{member.id}")
+            modals.append((modal, FakeInteraction(client, guild, member)))
+        await asyncio.gather(*(modal.on_submit(i) for modal, i in modals))
+        assert all("recorded" in i.followup.messages[0] for _, i in modals)
+
+        async with client.get_db_session() as session:
+            db = DatabaseService(session)
+            active_round = await db.get_active_round(str(guild.id))
+            submissions = await db.get_round_submissions(active_round.id)
+        assert len(submissions) == len(members)
+        assert submissions[0].description == "Opener"
+        print(f"✓ {len(members)} concurrent submissions saved")
+
+        # No active round: the user is still told, via the followup
+        modal = SubmissionModal(client, "1")
+        fill_modal(modal, "https://example.com/nowhere")
+        interaction = FakeInteraction(client, guild, members[0])
+        await modal.on_submit(interaction)
+        assert "no active round" in interaction.followup.messages[0]
+        print("✓ Missing round reported after deferring")
+
+        # Unexpected errors are logged with their traceback
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger("musicleague-bot")
+        logger.addHandler(handler)
+        try:
+            try:
+                raise RuntimeError("database unavailable")
+            except RuntimeError as e:
+                await modal.on_error(interaction, e)
+        finally:
+            logger.removeHandler(handler)
+        assert records[0].exc_info[1].args == ("database unavailable",)
+        assert "went wrong" in interaction.followup.messages[-1]
+        print("✓ Errors logged with their traceback and reported to the player")
+
+
+def test_submission_modal():
+    """Test the submission modal's deferred writes."""
+    print("Testing submission modal...")
+    asyncio.run(_run_modal_checks())
+
+
+if __name__ == "__main__":
+    try:
+        test_submission_modal()
+        print("\n🎉 All submission modal tests PASSED!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test FAILED: {e}")
+        sys.exit(1)